@@ -0,0 +1,141 @@
+"""
+Concorrência Adaptativa por Endpoint (AIMD)
+Ajusta quantas requisições cada endpoint/chave recebe ao mesmo tempo, do mesmo
+jeito que o TCP ajusta a janela: sobe devagar enquanto dá certo e corta pela
+metade ao primeiro sinal de sobrecarga (ver ANALISE_PROBLEMAS_RATE_LIMITING.md)
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from synthesis_cache import escrever_atomico
+
+
+ARQUIVO_ESTADO_PADRAO = "concorrencia_endpoints.json"
+
+
+class ControladorAimd:
+    """
+    Limite de requisições em voo de cada endpoint (aumento aditivo, corte multiplicativo)
+
+    - Sucesso: o limite sobe 1/limite, ou seja, +1 a cada "janela" cheia de sucessos
+    - 429, 503 ou timeout: o limite é multiplicado por `fator_corte`
+
+    Respostas de uma mesma rajada (requisições enviadas antes do último corte)
+    não cortam de novo, senão dez 429 simultâneos levariam o limite direto ao
+    mínimo. O Retry-After continua sendo respeitado pelo cooldown do agendador.
+
+    Os limites aprendidos são gravados em disco, e o próximo job começa deles.
+    """
+
+    def __init__(self, arquivo_estado: Optional[str] = ARQUIVO_ESTADO_PADRAO,
+                 limite_inicial: float = 2.0, limite_minimo: float = 1.0,
+                 limite_maximo: float = 16.0, fator_corte: float = 0.5):
+        """
+        Args:
+            arquivo_estado: JSON com os limites aprendidos (None = não persistir)
+            limite_inicial: Limite de um endpoint nunca visto
+            limite_minimo: Piso do limite
+            limite_maximo: Teto do limite
+            fator_corte: Multiplicador aplicado em sobrecarga
+        """
+        self.arquivo_estado = arquivo_estado
+        self.limite_inicial = limite_inicial
+        self.limite_minimo = limite_minimo
+        self.limite_maximo = limite_maximo
+        self.fator_corte = fator_corte
+
+        self._cond = threading.Condition()
+        self._limites: Dict[str, float] = {}
+        self._em_voo: Dict[str, int] = {}
+        self._ultimo_corte: Dict[str, float] = {}
+
+        self._carregar()
+
+    # ----- Vagas -----
+
+    def tem_vaga(self, nome: str) -> bool:
+        """True se o endpoint está abaixo do seu limite"""
+        with self._cond:
+            return self._em_voo.get(nome, 0) < int(self._limite(nome))
+
+    def tentar_adquirir(self, nome: str) -> Optional[float]:
+        """
+        Reserva uma vaga no endpoint, se houver
+
+        Returns:
+            Marca de tempo da reserva (passar para liberar), ou None se está cheio
+        """
+        with self._cond:
+            if self._em_voo.get(nome, 0) >= int(self._limite(nome)):
+                return None
+            self._em_voo[nome] = self._em_voo.get(nome, 0) + 1
+            return time.monotonic()
+
+    def liberar(self, nome: str, reserva: float, sobrecarga: bool = False, sucesso: bool = False):
+        """
+        Devolve a vaga e ajusta o limite
+
+        Args:
+            nome: Endpoint
+            reserva: Valor devolvido por tentar_adquirir
+            sobrecarga: A resposta foi 429, 503 ou timeout
+            sucesso: A resposta foi boa (erros comuns não mexem no limite)
+        """
+        with self._cond:
+            self._em_voo[nome] -= 1
+            limite = self._limite(nome)
+
+            if sobrecarga:
+                if reserva >= self._ultimo_corte.get(nome, 0.0):
+                    novo = max(limite * self.fator_corte, self.limite_minimo)
+                    self._limites[nome] = novo
+                    self._ultimo_corte[nome] = time.monotonic()
+                    print(f"[AIMD] {nome}: sobrecarga, limite {limite:.1f} → {novo:.1f}")
+            elif sucesso:
+                self._limites[nome] = min(limite + 1.0 / limite, self.limite_maximo)
+
+            self._cond.notify_all()
+
+    def aguardar_vaga(self, timeout: float):
+        """Bloqueia até alguma vaga ser liberada (ou até o timeout)"""
+        with self._cond:
+            self._cond.wait(timeout)
+
+    def limites(self) -> Dict[str, float]:
+        """Limite atual de cada endpoint"""
+        with self._cond:
+            return dict(self._limites)
+
+    def _limite(self, nome: str) -> float:
+        """Limite do endpoint (chamar com o lock)"""
+        if nome not in self._limites:
+            self._limites[nome] = self.limite_inicial
+        return self._limites[nome]
+
+    # ----- Persistência -----
+
+    def salvar(self):
+        """Grava os limites aprendidos"""
+        if not self.arquivo_estado:
+            return
+        with self._cond:
+            dados = {"limites": dict(self._limites), "salvo_em": time.time()}
+        escrever_atomico(self.arquivo_estado, json.dumps(dados, indent=1).encode("utf-8"))
+
+    def _carregar(self):
+        if not self.arquivo_estado or not os.path.exists(self.arquivo_estado):
+            return
+        try:
+            with open(self.arquivo_estado, "r", encoding="utf-8") as f:
+                limites = json.load(f).get("limites", {})
+        except (OSError, ValueError) as e:
+            print(f"[AIMD] Estado ilegível, usando limites iniciais: {e}")
+            return
+
+        for nome, limite in limites.items():
+            self._limites[nome] = min(max(float(limite), self.limite_minimo), self.limite_maximo)
+        print(f"[AIMD] Limites carregados de {self.arquivo_estado}: {len(self._limites)} endpoint(s)")
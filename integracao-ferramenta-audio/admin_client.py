@@ -0,0 +1,389 @@
+"""
+Cliente de Administração em Lote
+Varreduras de usuários e acessos pelas edge functions get-users e
+check-expired-access, em páginas (keyset), com requisições simultâneas
+limitadas e um cache local incremental: auditorias de rotina só baixam os
+perfis que mudaram desde a última vez
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from auth_manager import AuthManager
+from synthesis_cache import escrever_atomico
+from tts_client import STATUS_RECUPERAVEIS
+
+
+PASTA_CACHE = "cache_admin"
+ARQUIVO_CACHE = "usuarios.json"
+VERSAO_CACHE = 1
+
+TAMANHO_PAGINA = 500
+MAX_SIMULTANEAS = 4
+# Faixas de id varridas em paralelo (ids são UUID v4: as faixas ficam do mesmo tamanho)
+FAIXAS_PADRAO = 4
+MAX_TENTATIVAS = 4
+TIMEOUT = 30
+
+# Recomeça cada faixa um pouco antes do cursor salvo: uma transação que gravou
+# updated_at antes do cursor mas só confirmou depois ainda é vista
+FOLGA_CURSOR = timedelta(minutes=2)
+
+
+class ErroAdmin(Exception):
+    """
+    Erro numa chamada de administração
+
+    Attributes:
+        status: Status HTTP (None para erros de rede/formato)
+    """
+
+    def __init__(self, mensagem: str, status: Optional[int] = None):
+        super().__init__(mensagem)
+        self.status = status
+
+    @property
+    def recuperavel(self) -> bool:
+        return self.status is None or self.status in STATUS_RECUPERAVEIS
+
+
+def faixas_uuid(quantidade: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Divide o espaço de UUIDs em faixas [mínimo, máximo) do mesmo tamanho
+
+    Returns:
+        [(id_min, id_max)], com None nas pontas abertas
+    """
+    passo = (1 << 128) // quantidade
+    limites = [None] + [str(uuid.UUID(int=passo * i)) for i in range(1, quantidade)] + [None]
+    return list(zip(limites[:-1], limites[1:]))
+
+
+def _data(valor: Optional[str]) -> Optional[datetime]:
+    if not valor:
+        return None
+    return datetime.fromisoformat(valor.replace("Z", "+00:00"))
+
+
+def dias_restantes(usuario: Dict, agora: Optional[datetime] = None) -> Optional[int]:
+    """Dias até o acesso expirar (None: permanente; 0: expirado), como no get-users"""
+    expira = _data(usuario.get("access_expires_at"))
+    if expira is None:
+        return None
+    segundos = (expira - (agora or datetime.now(timezone.utc))).total_seconds()
+    return max(-(-int(segundos) // 86400), 0)
+
+
+class ClienteAdmin:
+    """
+    Cliente das funções de administração, autenticado pela sessão do AuthManager
+
+    A conta logada precisa ser administradora: get-users exige a conta master e
+    check-expired-access o papel admin (as funções devolvem 401/403 se não for).
+
+    Cache: <pasta_cache>/usuarios.json guarda cada perfil pelo id e, para
+    cada faixa de ids, o último (updated_at, id) recebido. `sincronizar` pede
+    a cada faixa só o que vem depois do cursor dela, as faixas em paralelo, e
+    grava o cache a cada página: uma sincronização interrompida continua de
+    onde parou. Perfis apagados só somem com `sincronizar(completo=True)`.
+    """
+
+    def __init__(self, auth: AuthManager, pasta_cache: str = PASTA_CACHE,
+                 tamanho_pagina: int = TAMANHO_PAGINA, max_simultaneas: int = MAX_SIMULTANEAS,
+                 faixas: int = FAIXAS_PADRAO, sessao: Optional[requests.Session] = None):
+        """
+        Args:
+            auth: AuthManager com o login do administrador
+            pasta_cache: Onde guardar o cache local
+            tamanho_pagina: Perfis por página (máximo 1000)
+            max_simultaneas: Requisições simultâneas
+            faixas: Faixas de id varridas em paralelo (fixado no cache na primeira sincronização)
+            sessao: Sessão HTTP (padrão: uma nova)
+        """
+        self.auth = auth
+        self.pasta_cache = pasta_cache
+        self.tamanho_pagina = tamanho_pagina
+        self.max_simultaneas = max_simultaneas
+        self.faixas = faixas
+        self.sessao = sessao or requests.Session()
+        self.requisicoes = 0
+
+        self._lock = threading.Lock()
+        self._cache = self._carregar()
+
+    # ----- Transporte -----
+
+    def _chamar(self, funcao: str, corpo: Dict) -> Dict:
+        """POST numa edge function, com retry e backoff nos erros temporários"""
+        url = self.auth.url_funcao(funcao)
+        ultimo_erro: Optional[ErroAdmin] = None
+        for tentativa in range(1, MAX_TENTATIVAS + 1):
+            with self._lock:
+                self.requisicoes += 1
+            try:
+                response = self.sessao.post(url, json=corpo, headers=self.auth.cabecalhos(),
+                                            timeout=TIMEOUT)
+                if response.status_code == 200:
+                    return response.json()
+                try:
+                    mensagem = response.json().get("error", "")
+                except ValueError:
+                    mensagem = response.text[:200]
+                ultimo_erro = ErroAdmin(f"{funcao} HTTP {response.status_code}: {mensagem}",
+                                        response.status_code)
+            except (requests.RequestException, ValueError) as e:
+                ultimo_erro = ErroAdmin(f"{funcao}: {e}")
+
+            if not ultimo_erro.recuperavel or tentativa == MAX_TENTATIVAS:
+                raise ultimo_erro
+            print(f"[ADMIN] {ultimo_erro} (tentativa {tentativa}/{MAX_TENTATIVAS})")
+            # Backoff exponencial: 1s, 2s, 4s
+            time.sleep(min(2 ** (tentativa - 1), 5))
+        raise ultimo_erro
+
+    # ----- Usuários -----
+
+    def paginas_usuarios(self, apos: Optional[Dict] = None, id_min: Optional[str] = None,
+                         id_max: Optional[str] = None) -> Iterator[Tuple[List[Dict], Optional[Dict]]]:
+        """
+        Perfis em ordem de (updated_at, id), uma página por vez
+
+        Args:
+            apos: Cursor {"updated_at", "id"}: só os perfis depois dele
+            id_min: Início da faixa de ids (inclusivo)
+            id_max: Fim da faixa de ids (exclusivo)
+
+        Yields:
+            (perfis da página, cursor do último perfil)
+        """
+        while True:
+            corpo = {"limit": self.tamanho_pagina, "after": apos, "id_min": id_min, "id_max": id_max}
+            resposta = self._chamar("get-users", corpo)
+            usuarios = resposta.get("users") or []
+            if usuarios:
+                ultimo = usuarios[-1]
+                apos = {"updated_at": ultimo["updated_at"], "id": ultimo["id"]}
+            yield usuarios, apos
+            if not resposta.get("next_cursor"):
+                return
+
+    def sincronizar(self, completo: bool = False) -> Dict[str, int]:
+        """
+        Atualiza o cache local com os perfis que mudaram
+
+        Args:
+            completo: Descarta o cache e baixa tudo (remove também os perfis apagados)
+
+        Returns:
+            Dict com recebidos, novos, alterados, total e requisicoes
+        """
+        if completo or self._cache["faixas"] is None:
+            self._cache = {"versao": VERSAO_CACHE, "faixas": self.faixas,
+                           "cursores": [None] * self.faixas, "usuarios": {},
+                           "sincronizado_em": None}
+        faixas = faixas_uuid(self._cache["faixas"])
+        contagem = {"recebidos": 0, "novos": 0, "alterados": 0}
+        requisicoes_antes = self.requisicoes
+        inicio = time.monotonic()
+
+        def varrer(indice: int):
+            id_min, id_max = faixas[indice]
+            apos = self._recuar(self._cache["cursores"][indice])
+            for usuarios, cursor in self.paginas_usuarios(apos, id_min, id_max):
+                with self._lock:
+                    for usuario in usuarios:
+                        anterior = self._cache["usuarios"].get(usuario["id"])
+                        if anterior is None:
+                            contagem["novos"] += 1
+                        elif anterior.get("updated_at") != usuario.get("updated_at"):
+                            contagem["alterados"] += 1
+                        self._cache["usuarios"][usuario["id"]] = usuario
+                    contagem["recebidos"] += len(usuarios)
+                    # A folga faz a primeira página repetir perfis; o cursor só avança
+                    if cursor and self._depois(cursor, self._cache["cursores"][indice]):
+                        self._cache["cursores"][indice] = cursor
+                    self._salvar()
+
+        with ThreadPoolExecutor(max_workers=min(self.max_simultaneas, len(faixas)),
+                                thread_name_prefix="admin") as executor:
+            for futuro in [executor.submit(varrer, i) for i in range(len(faixas))]:
+                futuro.result()
+
+        with self._lock:
+            self._cache["sincronizado_em"] = datetime.now(timezone.utc).isoformat()
+            self._salvar()
+        contagem["total"] = len(self._cache["usuarios"])
+        contagem["requisicoes"] = self.requisicoes - requisicoes_antes
+        print(f"[ADMIN] Sincronizado em {time.monotonic() - inicio:.1f}s: {contagem['recebidos']} "
+              f"perfil(is) recebido(s) ({contagem['novos']} novo(s), {contagem['alterados']} "
+              f"alterado(s)), {contagem['total']} no cache, {contagem['requisicoes']} requisição(ões)")
+        return contagem
+
+    def usuarios(self) -> List[Dict]:
+        """Perfis do cache (chame `sincronizar` antes para atualizar)"""
+        return list(self._cache["usuarios"].values())
+
+    # ----- Acessos -----
+
+    def revogar_expirados(self, tamanho_pagina: Optional[int] = None) -> List[Dict]:
+        """
+        Revoga todos os acessos expirados, em páginas, com chamadas simultâneas
+
+        Cada chamada revoga até `tamanho_pagina` perfis; as linhas são travadas
+        com SKIP LOCKED no banco, então chamadas simultâneas nunca pegam o mesmo
+        perfil. Cada worker para quando recebe uma página incompleta.
+
+        Returns:
+            Perfis revogados ({id, name, access_expires_at})
+        """
+        limite = tamanho_pagina or self.tamanho_pagina
+        revogados: List[Dict] = []
+
+        def worker():
+            while True:
+                resposta = self._chamar("check-expired-access", {"limit": limite})
+                with self._lock:
+                    revogados.extend(resposta.get("users") or [])
+                if not resposta.get("has_more"):
+                    return
+
+        with ThreadPoolExecutor(max_workers=self.max_simultaneas, thread_name_prefix="admin") as executor:
+            for futuro in [executor.submit(worker) for _ in range(self.max_simultaneas)]:
+                futuro.result()
+
+        print(f"[ADMIN] {len(revogados)} acesso(s) expirado(s) revogado(s)")
+        return revogados
+
+    def auditar(self, dias_alerta: int = 7) -> Dict[str, List[Dict]]:
+        """
+        Situação dos acessos pelo cache
+
+        Returns:
+            {"expirados_aprovados": [...], "expirando": [...] (até dias_alerta),
+             "permanentes": [...], "pendentes": [...] (não aprovados)}
+        """
+        agora = datetime.now(timezone.utc)
+        grupos: Dict[str, List[Dict]] = {"expirados_aprovados": [], "expirando": [],
+                                         "permanentes": [], "pendentes": []}
+        for usuario in self.usuarios():
+            dias = dias_restantes(usuario, agora)
+            if not usuario.get("is_approved"):
+                grupos["pendentes"].append(usuario)
+            elif dias is None:
+                grupos["permanentes"].append(usuario)
+            elif dias == 0:
+                grupos["expirados_aprovados"].append(usuario)
+            elif dias <= dias_alerta:
+                grupos["expirando"].append(usuario)
+        grupos["expirando"].sort(key=lambda u: u["access_expires_at"])
+        return grupos
+
+    # ----- Cache -----
+
+    @staticmethod
+    def _depois(cursor: Dict, outro: Optional[Dict]) -> bool:
+        if outro is None:
+            return True
+        return (_data(cursor["updated_at"]), cursor["id"]) > (_data(outro["updated_at"]), outro["id"])
+
+    @staticmethod
+    def _recuar(cursor: Optional[Dict]) -> Optional[Dict]:
+        if cursor is None:
+            return None
+        recuado = _data(cursor["updated_at"]) - FOLGA_CURSOR
+        return {"updated_at": recuado.isoformat(), "id": "00000000-0000-0000-0000-000000000000"}
+
+    def _caminho(self) -> str:
+        return os.path.join(self.pasta_cache, ARQUIVO_CACHE)
+
+    def _carregar(self) -> Dict:
+        try:
+            with open(self._caminho(), "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            if dados.get("versao") == VERSAO_CACHE:
+                return dados
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            print(f"[ADMIN] Cache ilegível, será refeito: {e}")
+        return {"versao": VERSAO_CACHE, "faixas": None, "cursores": [], "usuarios": {},
+                "sincronizado_em": None}
+
+    def _salvar(self):
+        os.makedirs(self.pasta_cache, exist_ok=True)
+        escrever_atomico(self._caminho(), json.dumps(self._cache, ensure_ascii=False).encode("utf-8"))
+
+
+# ===== LINHA DE COMANDO =====
+
+def _gravar_csv(caminho: str, usuarios: List[Dict]):
+    campos = ["id", "name", "email", "is_approved", "access_expires_at", "dias_restantes",
+              "created_at", "updated_at"]
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=campos, extrasaction="ignore")
+        escritor.writeheader()
+        for usuario in usuarios:
+            escritor.writerow(dict(usuario, dias_restantes=dias_restantes(usuario)))
+    print(f"[ADMIN] {len(usuarios)} usuário(s) gravado(s) em {caminho}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varreduras de usuários e acessos (administrador)")
+    parser.add_argument("comando", choices=["sincronizar", "auditar", "revogar-expirados"])
+    parser.add_argument("--completo", action="store_true", help="Baixar tudo de novo, ignorando o cache")
+    parser.add_argument("--csv", help="Gravar os usuários (sincronizar) ou a auditoria num CSV")
+    parser.add_argument("--dias-alerta", type=int, default=7)
+    parser.add_argument("--paralelo", type=int, default=MAX_SIMULTANEAS, help="Requisições simultâneas")
+    parser.add_argument("--pagina", type=int, default=TAMANHO_PAGINA)
+    parser.add_argument("--cache", default=PASTA_CACHE)
+    args = parser.parse_args()
+
+    auth = AuthManager()
+    if not auth.verificar_acesso_ativo():
+        print("[ADMIN] Faça login no programa com a conta de administrador")
+        sys.exit(1)
+
+    cliente = ClienteAdmin(auth, pasta_cache=args.cache, tamanho_pagina=args.pagina,
+                           max_simultaneas=args.paralelo)
+    try:
+        if args.comando == "revogar-expirados":
+            revogados = cliente.revogar_expirados()
+            if args.csv:
+                _gravar_csv(args.csv, revogados)
+            return
+
+        cliente.sincronizar(completo=args.completo)
+        if args.comando == "sincronizar":
+            if args.csv:
+                _gravar_csv(args.csv, cliente.usuarios())
+            return
+
+        grupos = cliente.auditar(args.dias_alerta)
+        print(f"[ADMIN] {len(cliente.usuarios())} usuário(s): {len(grupos['permanentes'])} permanente(s), "
+              f"{len(grupos['pendentes'])} não aprovado(s), {len(grupos['expirando'])} expirando em "
+              f"até {args.dias_alerta} dia(s), {len(grupos['expirados_aprovados'])} expirado(s) "
+              f"ainda aprovado(s)")
+        for usuario in grupos["expirando"][:20]:
+            print(f"[ADMIN]   {dias_restantes(usuario):3d} dia(s)  {usuario.get('email')}  {usuario.get('name')}")
+        if grupos["expirados_aprovados"]:
+            print("[ADMIN] Para revogar os expirados: python admin_client.py revogar-expirados")
+        if args.csv:
+            _gravar_csv(args.csv, grupos["expirando"] + grupos["expirados_aprovados"])
+    except ErroAdmin as e:
+        print(f"[ADMIN] ❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
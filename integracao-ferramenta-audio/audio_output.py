@@ -0,0 +1,154 @@
+"""
+Escrita do Áudio Final
+Grava o PCM dos chunks em um arquivo WAV, em ordem, sem manter tudo em memória
+"""
+
+import math
+import wave
+from array import array
+from typing import Iterable, Optional
+
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+
+# Crossfade curto nas emendas entre chunks sintetizados separadamente
+AMOSTRAS_CROSSFADE = int(TAXA_AMOSTRAGEM * 0.02)
+
+
+class EscritorWav:
+    """
+    Escritor incremental de WAV (PCM 16-bit mono)
+
+    O cabeçalho é corrigido automaticamente ao fechar, então os chunks
+    podem ser escritos um a um, à medida que ficam prontos.
+    """
+
+    def __init__(self, caminho: str, taxa_amostragem: int = TAXA_AMOSTRAGEM):
+        """
+        Args:
+            caminho: Arquivo .wav de saída
+            taxa_amostragem: Taxa em Hz (padrão: 24000, a do Gemini)
+        """
+        self.caminho = caminho
+        self.taxa_amostragem = taxa_amostragem
+        self.frames_escritos = 0
+
+        self._wav = wave.open(caminho, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(BYTES_POR_AMOSTRA)
+        self._wav.setframerate(taxa_amostragem)
+
+    def escrever(self, pcm: bytes):
+        """Acrescenta um trecho PCM ao final do arquivo"""
+        self._wav.writeframesraw(pcm)
+        self.frames_escritos += len(pcm) // BYTES_POR_AMOSTRA
+
+    @property
+    def duracao(self) -> float:
+        """Duração escrita até agora, em segundos"""
+        return self.frames_escritos / self.taxa_amostragem
+
+    def fechar(self):
+        """Fecha o arquivo (corrige o cabeçalho com o tamanho final)"""
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+class EmendaCrossfade:
+    """
+    Une chunks consecutivos com crossfade de potência constante nas emendas marcadas
+
+    Recebe os chunks em ordem e devolve o PCM que já pode ser escrito. Só o
+    fim de um chunk seguido de emenda fica retido até o próximo chegar; sem
+    emendas, o PCM passa inalterado. Cada emenda encurta o áudio em até
+    `amostras` amostras.
+    """
+
+    def __init__(self, emendas: Iterable[int] = (), amostras: int = AMOSTRAS_CROSSFADE):
+        """
+        Args:
+            emendas: Índices de chunk cujo início se sobrepõe ao fim do anterior
+            amostras: Duração do crossfade em amostras (padrão: 20 ms)
+        """
+        self.emendas = set(emendas)
+        self.amostras = amostras
+        self._cauda: Optional[bytes] = None
+        self._tamanho_cauda: Optional[int] = None
+
+    def processar(self, indice: int, pcm: bytes) -> bytes:
+        """Entrega o próximo chunk (em ordem) e devolve o PCM liberado"""
+        saida = bytearray()
+        if self._cauda is not None:
+            if indice in self.emendas and pcm:
+                sobreposicao = min(len(self._cauda), len(pcm)) // BYTES_POR_AMOSTRA
+                saida += self._cauda[:len(self._cauda) - sobreposicao * BYTES_POR_AMOSTRA]
+                saida += cruzar(self._cauda[len(self._cauda) - sobreposicao * BYTES_POR_AMOSTRA:],
+                                pcm[:sobreposicao * BYTES_POR_AMOSTRA])
+                pcm = pcm[sobreposicao * BYTES_POR_AMOSTRA:]
+            else:
+                saida += self._cauda
+
+        if indice + 1 not in self.emendas:
+            self._cauda = None
+            return bytes(saida + pcm) if saida else pcm
+
+        reter = min(self.amostras * BYTES_POR_AMOSTRA, len(pcm))
+        saida += pcm[:len(pcm) - reter]
+        self._cauda = pcm[len(pcm) - reter:]
+        return bytes(saida)
+
+    def tamanho_liberado(self, indice: int, tamanho: int) -> int:
+        """
+        Como processar, só com tamanhos: quantos bytes o chunk libera
+
+        Para quem precisa dos tempos do áudio final sem o PCM (ex: legendas).
+        Não misturar com processar na mesma instância.
+        """
+        liberado = self._tamanho_cauda or 0
+        if self._tamanho_cauda is not None and indice in self.emendas and tamanho:
+            tamanho -= min(self._tamanho_cauda, tamanho) // BYTES_POR_AMOSTRA * BYTES_POR_AMOSTRA
+
+        if indice + 1 not in self.emendas:
+            self._tamanho_cauda = None
+            return liberado + tamanho
+
+        self._tamanho_cauda = min(self.amostras * BYTES_POR_AMOSTRA, tamanho)
+        return liberado + tamanho - self._tamanho_cauda
+
+
+def cruzar(fim: bytes, inicio: bytes) -> bytes:
+    """Crossfade de potência constante entre dois trechos PCM do mesmo tamanho"""
+    a = array("h", fim)
+    b = array("h", inicio)
+    total = len(a)
+    saida = array("h", bytes(len(fim)))
+    for k in range(total):
+        t = (k + 0.5) / total * math.pi / 2
+        valor = a[k] * math.cos(t) + b[k] * math.sin(t)
+        saida[k] = max(-32768, min(32767, int(round(valor))))
+    return saida.tobytes()
+
+
+def salvar_wav(caminho: str, pcms: Iterable[bytes], taxa_amostragem: int = TAXA_AMOSTRAGEM) -> float:
+    """
+    Salva uma sequência de trechos PCM como um único WAV
+
+    Args:
+        caminho: Arquivo .wav de saída
+        pcms: Trechos PCM na ordem final
+        taxa_amostragem: Taxa em Hz
+
+    Returns:
+        Duração total em segundos
+    """
+    with EscritorWav(caminho, taxa_amostragem) as escritor:
+        for pcm in pcms:
+            escritor.escrever(pcm)
+        return escritor.duracao
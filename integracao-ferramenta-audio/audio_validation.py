@@ -0,0 +1,190 @@
+"""
+Validação do Áudio de Cada Chunk
+Detecta, assim que o chunk chega, os defeitos descritos em DEBUG_SILENCIO_AUDIO.md
+e CORRECAO_BUG_AUDIO.md: silêncios longos, áudio truncado, offset DC e clipping
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from text_chunker import contar_palavras
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+
+class ConfigValidacao:
+    """
+    Limites da validação
+
+    Os padrões aceitam as pausas normais de narração do Gemini e reprovam os
+    casos reportados (minutos de silêncio, chunks cortados, barulho saturado).
+    """
+
+    def __init__(self, limiar_silencio_dbfs: float = -50.0, janela_ms: int = 20,
+                 max_silencio_interno: float = 3.0, margem_bordas: float = 0.25,
+                 palavras_por_minuto: float = 150.0, min_fracao_duracao: float = 0.4,
+                 max_offset_dc: float = 0.02, max_fracao_clipping: float = 0.001):
+        """
+        Args:
+            limiar_silencio_dbfs: Janelas com RMS abaixo disto contam como silêncio
+            janela_ms: Tamanho da janela de análise
+            max_silencio_interno: Maior pausa aceita no meio da fala (segundos)
+            margem_bordas: Silêncio mantido no início e no fim ao aparar (segundos)
+            palavras_por_minuto: Ritmo esperado (mesmo padrão de getLanguageWPM)
+            min_fracao_duracao: Fala mais curta que esta fração do esperado = truncado
+            max_offset_dc: Média do sinal tolerada (fração do fundo de escala)
+            max_fracao_clipping: Fração máxima de amostras no fundo de escala
+        """
+        self.limiar_silencio_dbfs = limiar_silencio_dbfs
+        self.janela_ms = janela_ms
+        self.max_silencio_interno = max_silencio_interno
+        self.margem_bordas = margem_bordas
+        self.palavras_por_minuto = palavras_por_minuto
+        self.min_fracao_duracao = min_fracao_duracao
+        self.max_offset_dc = max_offset_dc
+        self.max_fracao_clipping = max_fracao_clipping
+
+
+class ResultadoValidacao:
+    """
+    Resultado da validação de um chunk
+
+    Attributes:
+        problemas: Defeitos encontrados (vazio = chunk aprovado)
+        duracao: Duração total em segundos
+        duracao_esperada: Duração esperada pela contagem de palavras
+        silencio_inicio: Silêncio no início (segundos)
+        silencio_fim: Silêncio no fim (segundos)
+        maior_silencio: Maior pausa no meio da fala (segundos)
+        offset_dc: Média do sinal (fração do fundo de escala)
+        fracao_clipping: Fração de amostras no fundo de escala
+    """
+
+    def __init__(self):
+        self.problemas: List[str] = []
+        self.duracao = 0.0
+        self.duracao_esperada = 0.0
+        self.silencio_inicio = 0.0
+        self.silencio_fim = 0.0
+        self.maior_silencio = 0.0
+        self.offset_dc = 0.0
+        self.fracao_clipping = 0.0
+
+        # Trecho útil (em amostras) após aparar as bordas
+        self._inicio = 0
+        self._fim = 0
+
+    @property
+    def valido(self) -> bool:
+        return not self.problemas
+
+    def aparar(self, pcm: bytes) -> bytes:
+        """Remove o silêncio excedente do início e do fim do PCM"""
+        return pcm[self._inicio * BYTES_POR_AMOSTRA:self._fim * BYTES_POR_AMOSTRA]
+
+    def __str__(self) -> str:
+        if self.valido:
+            return f"OK ({self.duracao:.1f}s)"
+        return "; ".join(self.problemas)
+
+
+def _maior_sequencia(mascara: np.ndarray) -> int:
+    """Comprimento da maior sequência de True em um vetor booleano"""
+    if not mascara.any():
+        return 0
+    bordas = np.diff(np.concatenate(([0], mascara.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordas == 1)
+    fins = np.flatnonzero(bordas == -1)
+    return int((fins - inicios).max())
+
+
+def validar_chunk(pcm: bytes, texto: str, config: Optional[ConfigValidacao] = None,
+                  taxa_amostragem: int = TAXA_AMOSTRAGEM) -> ResultadoValidacao:
+    """
+    Valida o PCM (16-bit mono) de um chunk
+
+    Toda a análise é feita em vetores NumPy por janelas, sem laços em Python:
+    um chunk de 3 minutos leva poucos milissegundos.
+
+    Args:
+        pcm: Áudio do chunk
+        texto: Texto do chunk (para estimar a duração esperada)
+        config: Limites (padrão: ConfigValidacao())
+        taxa_amostragem: Taxa do PCM em Hz
+
+    Returns:
+        ResultadoValidacao com os problemas encontrados e o trecho a manter
+    """
+    config = config or ConfigValidacao()
+    resultado = ResultadoValidacao()
+
+    amostras = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // BYTES_POR_AMOSTRA)
+    total = len(amostras)
+    resultado.duracao = total / taxa_amostragem
+    resultado.duracao_esperada = contar_palavras(texto) * 60.0 / config.palavras_por_minuto
+    resultado._fim = total
+
+    janela = max(int(taxa_amostragem * config.janela_ms / 1000), 1)
+    n_janelas = total // janela
+    if n_janelas == 0:
+        resultado.problemas.append("áudio vazio")
+        return resultado
+
+    # RMS por janela, em fração do fundo de escala
+    blocos = amostras[:n_janelas * janela].reshape(n_janelas, janela).astype(np.float32)
+    rms = np.sqrt(np.einsum("ij,ij->i", blocos, blocos) / janela) / 32768.0
+    limiar = 10 ** (config.limiar_silencio_dbfs / 20)
+    silencio = rms < limiar
+
+    com_som = np.flatnonzero(~silencio)
+    if len(com_som) == 0:
+        resultado.problemas.append(f"chunk inteiro em silêncio ({resultado.duracao:.1f}s)")
+        return resultado
+
+    segundos_janela = janela / taxa_amostragem
+    primeira, ultima = int(com_som[0]), int(com_som[-1])
+    resultado.silencio_inicio = primeira * segundos_janela
+    resultado.silencio_fim = (n_janelas - 1 - ultima) * segundos_janela
+    resultado.maior_silencio = _maior_sequencia(silencio[primeira:ultima + 1]) * segundos_janela
+
+    margem = int(config.margem_bordas * taxa_amostragem)
+    resultado._inicio = max(primeira * janela - margem, 0)
+    resultado._fim = min((ultima + 1) * janela + margem, total)
+
+    if resultado.maior_silencio > config.max_silencio_interno:
+        resultado.problemas.append(f"silêncio de {resultado.maior_silencio:.1f}s no meio da fala")
+
+    duracao_fala = (ultima + 1 - primeira) * segundos_janela
+    if duracao_fala < resultado.duracao_esperada * config.min_fracao_duracao:
+        resultado.problemas.append(
+            f"provavelmente truncado: {duracao_fala:.1f}s de fala para "
+            f"~{resultado.duracao_esperada:.0f}s esperados"
+        )
+
+    resultado.offset_dc = float(np.mean(amostras, dtype=np.float64)) / 32768.0
+    if abs(resultado.offset_dc) > config.max_offset_dc:
+        resultado.problemas.append(f"offset DC de {resultado.offset_dc:+.3f}")
+
+    saturadas = np.count_nonzero((amostras == 32767) | (amostras == -32768))
+    resultado.fracao_clipping = saturadas / total
+    if resultado.fracao_clipping > config.max_fracao_clipping:
+        resultado.problemas.append(f"clipping em {resultado.fracao_clipping:.2%} das amostras")
+
+    return resultado
+
+
+class ValidadorAudio:
+    """
+    Validador usado pelo AgendadorSintese
+
+    Chunks reprovados voltam para a fila de tentativas (outro endpoint) antes
+    de chegar ao escritor; os aprovados são devolvidos com as bordas aparadas.
+    """
+
+    def __init__(self, config: Optional[ConfigValidacao] = None,
+                 taxa_amostragem: int = TAXA_AMOSTRAGEM):
+        self.config = config or ConfigValidacao()
+        self.taxa_amostragem = taxa_amostragem
+
+    def validar(self, pcm: bytes, texto: str) -> ResultadoValidacao:
+        return validar_chunk(pcm, texto, self.config, self.taxa_amostragem)
@@ -4,8 +4,10 @@ Integra com sistema Kiwify/Supabase
 """
 
 import requests
+import base64
 import json
 import os
+import time
 from typing import Optional, Dict, Tuple
 
 
@@ -119,6 +121,61 @@ class AuthManager:
         """
         return self.token is not None
 
+    def url_funcao(self, nome: str) -> str:
+        """
+        URL de outra edge function do mesmo projeto (ex: "deepseek-proxy")
+
+        Args:
+            nome: Nome da função
+
+        Returns:
+            URL completa, derivada de API_URL
+        """
+        return f"{self.API_URL.rsplit('/', 1)[0]}/{nome}"
+
+    def sessao_expirada(self, margem: float = 60) -> bool:
+        """
+        Verifica se o token salvo já expirou (ou expira em menos de `margem` segundos)
+
+        O token é o access_token do Supabase (JWT, válido por ~1 hora) e o
+        auth-login não devolve refresh token: depois disso, só um novo login.
+        A assinatura não é conferida aqui, só o campo `exp`.
+
+        Returns:
+            True se não há token ou ele expirou; False se ainda vale
+            (ou se o token não tem `exp` legível)
+        """
+        if not self.token:
+            return True
+        try:
+            carga = self.token.split(".")[1]
+            carga += "=" * (-len(carga) % 4)
+            expira = json.loads(base64.urlsafe_b64decode(carga)).get("exp")
+        except (IndexError, ValueError):
+            return False
+        return expira is not None and expira - margem <= time.time()
+
+    def cabecalhos(self, usar_sessao: bool = True) -> Dict[str, str]:
+        """
+        Cabeçalhos para chamar as edge functions
+
+        Args:
+            usar_sessao: False para funções que não dependem do usuário (ex: deepseek-proxy,
+                         chamado pelo sistema web só com a ANON_KEY)
+
+        Returns:
+            Content-Type, apikey e Authorization (token da sessão; ANON_KEY se não houver
+            login, se a sessão já expirou ou com usar_sessao=False)
+        """
+        token = self.ANON_KEY
+        if usar_sessao and self.token and not self.sessao_expirada():
+            token = self.token
+        return {
+            "Content-Type": "application/json",
+            "apikey": self.ANON_KEY,
+            "Authorization": f"Bearer {token}",
+        }
+
     def obter_nome_usuario(self) -> str:
         """
         Retorna nome do usuário logado
@@ -0,0 +1,472 @@
+"""
+Fila de Lotes de Roteiros
+Processa pastas inteiras de roteiros (.txt), vários jobs ao mesmo tempo, sobre
+um único conjunto de endpoints, chaves e cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from adaptive_concurrency import ControladorAimd
+from audio_validation import ValidadorAudio
+from chunk_sizing import PlanoChunks, dividir_planejado, relatar
+from compression_stage import EstagioCompressao
+from job_journal import DiarioJob, executar_job
+from job_trace import RastreadorJob, caminho_trace
+from language_detect import RoteadorIdiomas
+from memory_budget import OrcamentoMemoria
+from memory_report import SessaoMemoria
+from phrase_reuse import ArmazemFrases, dividir_com_frases
+from synthesis_cache import CacheSintese, escrever_atomico
+from synthesis_scheduler import (AgendadorSintese, ConfigDuplicacao, EstatisticasJob, FalhaJob,
+                                 ReguladorJusto)
+from tts_client import Endpoint
+
+
+PRIORIDADE_PADRAO = 5
+
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+
+class FilaLotes:
+    """
+    Fila persistente de jobs de síntese
+
+    O estado fica em <pasta_estado>/fila.json e sobrevive a reinícios: jobs
+    que estavam executando voltam para pendente e são retomados pelo diário,
+    sem refazer os chunks já prontos.
+
+    Jobs de prioridade maior começam primeiro e recebem uma fatia maior das
+    requisições simultâneas (a prioridade é o peso no ReguladorJusto).
+    """
+
+    def __init__(self, agendador: AgendadorSintese, pasta_estado: str = "fila_lotes",
+                 pasta_saida: str = "saida_lotes", jobs_simultaneos: int = 3,
+                 limite_global: Optional[int] = None, comprimir: bool = False,
+                 legendas: bool = True, rastrear: bool = False,
+                 perfil_memoria: Optional[SessaoMemoria] = None,
+                 idiomas: Optional[RoteadorIdiomas] = None):
+        """
+        Args:
+            agendador: Agendador compartilhado por todos os jobs
+            pasta_estado: Onde guardar o estado da fila
+            pasta_saida: Onde gravar os áudios prontos
+            jobs_simultaneos: Quantos jobs rodam ao mesmo tempo
+            limite_global: Requisições simultâneas somando todos os jobs
+                           (padrão: max_paralelo do agendador)
+            comprimir: Gerar também o arquivo comprimido de cada job
+            legendas: Gerar o .srt de cada job
+            rastrear: Gravar a linha do tempo de cada job (.trace.json, ver job_trace.py)
+            perfil_memoria: Sessão do relatório de memória por estágio (memory_report.py)
+            idiomas: Voz/instrução por chunk conforme o idioma detectado (language_detect.py)
+        """
+        self.agendador = agendador
+        self.pasta_estado = pasta_estado
+        self.pasta_saida = pasta_saida
+        self.jobs_simultaneos = jobs_simultaneos
+        self.comprimir = comprimir
+        self.legendas = legendas
+        self.rastrear = rastrear
+        self.perfil_memoria = perfil_memoria
+        self.idiomas = idiomas
+
+        if agendador.regulador is None:
+            agendador.regulador = ReguladorJusto(limite_global or agendador.max_paralelo)
+
+        self._lock = threading.Lock()
+        self._evento = threading.Event()
+        self._parar = threading.Event()
+        self._vigias: List[threading.Thread] = []
+        self._executando: Dict[str, threading.Thread] = {}
+        self._planos: Dict[str, PlanoChunks] = {}
+
+        os.makedirs(pasta_estado, exist_ok=True)
+        os.makedirs(pasta_saida, exist_ok=True)
+        self.jobs: List[Dict] = self._carregar()
+
+    # ----- Entrada de roteiros -----
+
+    def adicionar(self, arquivo: str, prioridade: int = PRIORIDADE_PADRAO,
+                  lote: Optional[str] = None, voz: str = "Kore", prompt: str = "") -> Optional[Dict]:
+        """
+        Adiciona um roteiro à fila
+
+        Roteiros com o mesmo conteúdo, voz e prompt de um job já na fila são
+        ignorados, inclusive se o job falhou: senão vigiar_pasta colocaria de
+        novo um roteiro com problema a cada verificação. Para tentar de novo
+        um job que falhou, use repetir_erros.
+
+        Returns:
+            A entrada criada, ou None se era duplicada
+        """
+        with open(arquivo, "rb") as f:
+            assinatura = hashlib.sha256(f.read()).hexdigest()
+
+        with self._lock:
+            for job in self.jobs:
+                if job["assinatura"] == assinatura and job["voz"] == voz and job["prompt"] == prompt:
+                    return None
+
+            nome = os.path.splitext(os.path.basename(arquivo))[0]
+            id_entrada = uuid.uuid4().hex
+            entrada = {
+                "id": id_entrada,
+                "arquivo": os.path.abspath(arquivo),
+                "assinatura": assinatura,
+                "lote": lote or time.strftime("%Y-%m-%d"),
+                "prioridade": prioridade,
+                "voz": voz,
+                "prompt": prompt,
+                # Sufixo do id: roteiros de mesmo nome (outra pasta, versão editada) não se sobrescrevem
+                "saida": os.path.abspath(os.path.join(self.pasta_saida, f"{nome}_{id_entrada[:8]}.wav")),
+                "status": STATUS_PENDENTE,
+                "diario": None,
+                "criado_em": time.time(),
+                "iniciado_em": None,
+                "concluido_em": None,
+                "duracao_audio": 0.0,
+                "requisicoes": 0,
+                "erro": None,
+            }
+            self.jobs.append(entrada)
+            self._salvar()
+
+        self._evento.set()
+        return entrada
+
+    def ingerir_pasta(self, pasta: str, prioridade: int = PRIORIDADE_PADRAO,
+                      lote: Optional[str] = None, voz: str = "Kore", prompt: str = "",
+                      extensoes=(".txt",)) -> int:
+        """
+        Adiciona à fila todos os roteiros novos de uma pasta
+
+        Returns:
+            Quantidade de roteiros adicionados
+        """
+        adicionados = 0
+        for nome in sorted(os.listdir(pasta)):
+            caminho = os.path.join(pasta, nome)
+            if os.path.isfile(caminho) and nome.lower().endswith(extensoes):
+                if self.adicionar(caminho, prioridade, lote, voz, prompt):
+                    adicionados += 1
+
+        if adicionados:
+            print(f"[LOTES] {adicionados} roteiro(s) adicionados de {pasta}")
+        return adicionados
+
+    def vigiar_pasta(self, pasta: str, intervalo: float = 10.0, **opcoes):
+        """
+        Verifica a pasta periodicamente e adiciona roteiros novos
+
+        Args:
+            pasta: Pasta a vigiar
+            intervalo: Segundos entre verificações
+            **opcoes: Repassadas para ingerir_pasta (prioridade, lote, voz, prompt)
+        """
+        def vigiar():
+            while not self._parar.is_set():
+                try:
+                    self.ingerir_pasta(pasta, **opcoes)
+                except OSError as e:
+                    print(f"[LOTES] Erro ao ler {pasta}: {e}")
+                self._parar.wait(intervalo)
+
+        thread = threading.Thread(target=vigiar, daemon=True)
+        thread.start()
+        self._vigias.append(thread)
+
+    def repetir_erros(self, ids: Optional[List[str]] = None) -> int:
+        """
+        Devolve jobs que falharam para a fila (retomados pelo diário, sem refazer chunks prontos)
+
+        Args:
+            ids: Só estes jobs (padrão: todos os que falharam)
+
+        Returns:
+            Quantidade de jobs devolvidos à fila
+        """
+        with self._lock:
+            repetidos = 0
+            for job in self.jobs:
+                if job["status"] == STATUS_ERRO and (ids is None or job["id"] in ids):
+                    job["status"] = STATUS_PENDENTE
+                    job["erro"] = None
+                    job["concluido_em"] = None
+                    repetidos += 1
+            if repetidos:
+                self._salvar()
+
+        if repetidos:
+            print(f"[LOTES] {repetidos} job(s) com erro de volta à fila")
+            self._evento.set()
+        return repetidos
+
+    # ----- Execução -----
+
+    def executar(self):
+        """
+        Processa a fila até esvaziar (ou até parar(), se houver pasta vigiada)
+        """
+        print(f"[LOTES] Iniciando: até {self.jobs_simultaneos} job(s) simultâneos")
+
+        while not self._parar.is_set():
+            self._evento.clear()
+            with self._lock:
+                self._iniciar_pendentes()
+                ocioso = not self._executando and not self._pendentes()
+
+            if ocioso and not self._vigias:
+                break
+            self._evento.wait(1.0)
+
+        for thread in list(self._executando.values()):
+            thread.join()
+
+        self.imprimir_relatorio()
+
+    def parar(self):
+        """Para de iniciar jobs novos (os que estão rodando terminam)"""
+        self._parar.set()
+        self._evento.set()
+
+    def _pendentes(self) -> List[Dict]:
+        """Jobs pendentes, por prioridade (maior primeiro) e ordem de chegada"""
+        pendentes = [j for j in self.jobs if j["status"] == STATUS_PENDENTE]
+        return sorted(pendentes, key=lambda j: (-j["prioridade"], j["criado_em"]))
+
+    def _iniciar_pendentes(self):
+        """Inicia jobs até o limite de simultâneos (chamar com o lock)"""
+        for entrada in self._pendentes():
+            if len(self._executando) >= self.jobs_simultaneos:
+                break
+            entrada["status"] = STATUS_EXECUTANDO
+            entrada["iniciado_em"] = entrada["iniciado_em"] or time.time()
+            thread = threading.Thread(target=self._executar_entrada, args=(entrada,))
+            self._executando[entrada["id"]] = thread
+            thread.start()
+        self._salvar()
+
+    def _executar_entrada(self, entrada: Dict):
+        """Executa um job da fila (roda em thread própria)"""
+        nome = os.path.basename(entrada["arquivo"])
+        rastreio = RastreadorJob(nome) if self.rastrear else None
+        compressao = None
+        diario = None
+        try:
+            diario = self._obter_diario(entrada)
+            perfil = self.perfil_memoria.novo_job(nome) if self.perfil_memoria else None
+            estatisticas = EstatisticasJob(entrada["id"], peso=max(entrada["prioridade"], 1),
+                                           rastreio=rastreio, perfil_memoria=perfil)
+            if self.comprimir:
+                compressao = EstagioCompressao(entrada["saida"], orcamento=self.agendador.memoria,
+                                               emendas=diario.emendas)
+            caminho_srt = os.path.splitext(entrada["saida"])[0] + ".srt" if self.legendas else None
+
+            print(f"[LOTES] ▶ {nome} (prioridade {entrada['prioridade']}, "
+                  f"{len(diario.chunks)} chunks)")
+            inicio = time.monotonic()
+            duracao = executar_job(self.agendador, diario, compressao, caminho_srt, estatisticas)
+            tempo_real = time.monotonic() - inicio
+
+            with self._lock:
+                entrada["status"] = STATUS_CONCLUIDO
+                entrada["duracao_audio"] = duracao
+                entrada["tempo_real"] = tempo_real
+                entrada["requisicoes"] += estatisticas.requisicoes
+                plano = self._planos.pop(entrada["id"], None)
+            print(f"[LOTES] ✅ {nome}: {duracao / 60:.1f} min de áudio")
+            if plano is not None:
+                relatar(plano, tempo_real)
+
+        except Exception as e:
+            # Qualquer erro (inclusive do ffmpeg) encerra só este job, sem deixá-lo "executando"
+            if compressao is not None:
+                compressao.cancelar()
+            mensagem = str(e) if isinstance(e, (FalhaJob, OSError, ValueError)) else f"{type(e).__name__}: {e}"
+            with self._lock:
+                entrada["status"] = STATUS_ERRO
+                entrada["erro"] = mensagem
+            print(f"[LOTES] ❌ {nome}: {mensagem}")
+
+        finally:
+            if diario is not None:
+                # Solta o descritor e o mmap dos textos (TextosChunks)
+                diario.fechar()
+            if rastreio is not None:
+                # Também nos jobs que falharam: são os que mais interessam
+                rastreio.salvar(caminho_trace(entrada["saida"]))
+            with self._lock:
+                entrada["concluido_em"] = time.time()
+                self._executando.pop(entrada["id"], None)
+                self._salvar()
+            self._evento.set()
+
+    def _obter_diario(self, entrada: Dict) -> DiarioJob:
+        """Reabre o diário de uma execução anterior ou cria um novo"""
+        if entrada["diario"] and os.path.isdir(entrada["diario"]):
+            return DiarioJob.abrir(entrada["diario"])
+
+        with open(entrada["arquivo"], "r", encoding="utf-8") as f:
+            texto = f.read()
+        chunks, plano = dividir_planejado(texto, self.agendador)
+        emendas: List[int] = []
+        if self.agendador.frases is not None:
+            # Frases recorrentes em chunks próprios; o resto mantém o tamanho planejado
+            chunks, emendas = dividir_com_frases(texto, self.agendador.frases, entrada["voz"],
+                                                 entrada["prompt"], plano.palavras_por_chunk)
+            plano.total_chunks = len(chunks)
+            plano.tempo_previsto = plano.prever(len(chunks), plano.palavras_por_chunk)
+        rotas = None
+        if self.idiomas is not None:
+            rotas = self.idiomas.rotear(chunks, entrada["voz"], entrada["prompt"])
+        diario = DiarioJob.criar(chunks, entrada["voz"], entrada["prompt"], entrada["saida"],
+                                 emendas=emendas, rotas=rotas)
+        with self._lock:
+            self._planos[entrada["id"]] = plano
+            entrada["diario"] = diario.pasta
+            entrada["tempo_previsto"] = plano.tempo_previsto
+            self._salvar()
+        return diario
+
+    # ----- Relatório -----
+
+    def relatorio(self) -> Dict[str, Dict]:
+        """
+        Resumo de cada lote
+
+        A vazão é medida em minutos de áudio prontos por hora de relógio, do
+        início do primeiro job do lote até o fim do último (ou agora).
+        """
+        with self._lock:
+            lotes: Dict[str, List[Dict]] = {}
+            for job in self.jobs:
+                lotes.setdefault(job["lote"], []).append(job)
+
+            resumo = {}
+            agora = time.time()
+            for lote, jobs in lotes.items():
+                concluidos = [j for j in jobs if j["status"] == STATUS_CONCLUIDO]
+                inicios = [j["iniciado_em"] for j in jobs if j["iniciado_em"]]
+                fins = [j["concluido_em"] or agora for j in jobs if j["iniciado_em"]]
+                horas = (max(fins) - min(inicios)) / 3600 if inicios else 0.0
+                minutos_audio = sum(j["duracao_audio"] for j in concluidos) / 60
+
+                resumo[lote] = {
+                    "jobs": len(jobs),
+                    "concluidos": len(concluidos),
+                    "erros": sum(1 for j in jobs if j["status"] == STATUS_ERRO),
+                    "pendentes": sum(1 for j in jobs if j["status"] in (STATUS_PENDENTE, STATUS_EXECUTANDO)),
+                    "minutos_audio": minutos_audio,
+                    "horas_relogio": horas,
+                    "minutos_audio_por_hora": minutos_audio / horas if horas else 0.0,
+                    "requisicoes": sum(j["requisicoes"] for j in jobs),
+                }
+            return resumo
+
+    def imprimir_relatorio(self):
+        """Mostra o relatório de todos os lotes no console"""
+        for lote, r in sorted(self.relatorio().items()):
+            print(f"[LOTES] Lote {lote}: {r['concluidos']}/{r['jobs']} prontos, "
+                  f"{r['erros']} erro(s), {r['pendentes']} pendente(s) | "
+                  f"{r['minutos_audio']:.1f} min de áudio em {r['horas_relogio'] * 60:.1f} min "
+                  f"→ {r['minutos_audio_por_hora']:.1f} min de áudio/hora")
+
+    # ----- Persistência -----
+
+    def _carregar(self) -> List[Dict]:
+        caminho = os.path.join(self.pasta_estado, "fila.json")
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                jobs = json.load(f).get("jobs", [])
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"[LOTES] Estado da fila ilegível, começando vazia: {e}")
+            return []
+
+        for job in jobs:
+            if job["status"] == STATUS_EXECUTANDO:
+                # Interrompido no meio: será retomado pelo diário
+                job["status"] = STATUS_PENDENTE
+        return jobs
+
+    def _salvar(self):
+        """Grava o estado da fila (chamar com o lock)"""
+        escrever_atomico(
+            os.path.join(self.pasta_estado, "fila.json"),
+            json.dumps({"jobs": self.jobs}, ensure_ascii=False, indent=1).encode("utf-8"),
+        )
+
+
+# ===== LINHA DE COMANDO =====
+
+def main():
+    from auth_manager import AuthManager
+
+    parser = argparse.ArgumentParser(description="Processa uma pasta de roteiros em lote")
+    parser.add_argument("pasta", help="Pasta com os roteiros (.txt)")
+    parser.add_argument("--prioridade", type=int, default=PRIORIDADE_PADRAO)
+    parser.add_argument("--lote", help="Nome do lote (padrão: data de hoje)")
+    parser.add_argument("--voz", default="Kore")
+    parser.add_argument("--prompt", default="")
+    parser.add_argument("--simultaneos", type=int, default=3, help="Jobs ao mesmo tempo")
+    parser.add_argument("--paralelo", type=int, default=6, help="Requisições simultâneas no total")
+    parser.add_argument("--comprimir", action="store_true", help="Gerar também MP3")
+    parser.add_argument("--frases", action="store_true",
+                        help="Reaproveitar frases que se repetem entre roteiros (vinhetas, chamadas)")
+    parser.add_argument("--idiomas", action="store_true",
+                        help="Detectar o idioma de cada chunk e trocar voz/instrução nos trechos em outro idioma")
+    parser.add_argument("--voz-idioma", action="append", default=[], metavar="IDIOMA=VOZ",
+                        help="Voz para um idioma detectado (ex: en=Puck); repetir para vários")
+    parser.add_argument("--trace", action="store_true",
+                        help="Gravar a linha do tempo de cada job (abrir em ui.perfetto.dev)")
+    parser.add_argument("--perfil-memoria", action="store_true",
+                        help="Relatório de memória por estágio de cada job (tracemalloc, mais lento)")
+    parser.add_argument("--memoria-mb", type=float, default=512,
+                        help="PCM máximo em RAM entre síntese e saída (o excedente vai para disco)")
+    parser.add_argument("--vigiar", action="store_true", help="Continuar vigiando a pasta (Ctrl+C para parar)")
+    parser.add_argument("--repetir-erros", action="store_true",
+                        help="Tentar de novo os jobs que falharam em execuções anteriores")
+    args = parser.parse_args()
+
+    agendador = AgendadorSintese(
+        Endpoint.workers_supabase(AuthManager.ANON_KEY),
+        cache=CacheSintese(),
+        max_paralelo=args.paralelo,
+        validador=ValidadorAudio(),
+        duplicacao=ConfigDuplicacao(),
+        concorrencia=ControladorAimd(),
+        memoria=OrcamentoMemoria(args.memoria_mb),
+        frases=ArmazemFrases() if args.frases else None,
+    )
+    fila = FilaLotes(agendador, jobs_simultaneos=args.simultaneos, comprimir=args.comprimir,
+                     rastrear=args.trace,
+                     perfil_memoria=SessaoMemoria() if args.perfil_memoria else None,
+                     idiomas=RoteadorIdiomas(dict(v.split("=", 1) for v in args.voz_idioma))
+                     if args.idiomas or args.voz_idioma else None)
+
+    if args.repetir_erros:
+        fila.repetir_erros()
+    opcoes = dict(prioridade=args.prioridade, lote=args.lote, voz=args.voz, prompt=args.prompt)
+    fila.ingerir_pasta(args.pasta, **opcoes)
+    if args.vigiar:
+        fila.vigiar_pasta(args.pasta, **opcoes)
+
+    try:
+        fila.executar()
+    except KeyboardInterrupt:
+        print("[LOTES] Parando... (jobs em andamento serão retomados na próxima execução)")
+        fila.parar()
+
+
+if __name__ == "__main__":
+    main()
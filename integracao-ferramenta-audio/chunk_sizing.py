@@ -0,0 +1,185 @@
+"""
+Tamanho de Chunk Adaptativo
+Escolhe quantas palavras por chunk usar em cada job a partir do que o agendador
+já mediu: latência por palavra, folga de RPM/RPD e endpoints saudáveis
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from synthesis_scheduler import AgendadorSintese
+from text_chunker import GEMINI_TTS_WORD_LIMIT, contar_palavras, dividir_texto_para_tts
+from tts_client import Endpoint
+
+
+# Sem medições ainda: ~2 s fixos por requisição + ~25 ms por palavra
+SEGUNDOS_FIXOS_PADRAO = 2.0
+SEGUNDOS_POR_PALAVRA_PADRAO = 0.025
+
+# Chunks com tempos previstos até 5% piores que o ótimo são aceitos se
+# usarem menos requisições (cota é o recurso mais escasso)
+TOLERANCIA_TEMPO = 1.05
+
+
+class LimitesProvedor:
+    """
+    O que cada tipo de endpoint permite
+
+    Attributes:
+        max_palavras: Maior chunk aceito (GEMINI_TTS_WORD_LIMIT no Gemini)
+        min_palavras: Menor chunk que vale a pena (abaixo disto o custo fixo domina)
+        rpm: Requisições por minuto por endpoint (None = sem limite conhecido)
+        rpd: Requisições por dia por endpoint (None = sem limite conhecido)
+    """
+
+    def __init__(self, max_palavras: int = GEMINI_TTS_WORD_LIMIT, min_palavras: int = 80,
+                 rpm: Optional[int] = None, rpd: Optional[int] = None):
+        self.max_palavras = max_palavras
+        self.min_palavras = min_palavras
+        self.rpm = rpm
+        self.rpd = rpd
+
+
+# Chave direta: plano gratuito do gemini-2.5-flash-preview-tts.
+# Workers: a cota fica atrás do proxy, só o limite de palavras vale.
+LIMITES_PADRAO = {
+    Endpoint.TIPO_GEMINI: LimitesProvedor(rpm=3, rpd=15),
+    Endpoint.TIPO_WORKER: LimitesProvedor(),
+}
+
+
+class PlanoChunks:
+    """
+    Tamanho de chunk escolhido para um job e a previsão de tempo
+
+    Attributes:
+        palavras_por_chunk: Limite passado ao divisor de texto
+        total_chunks: Quantidade prevista (ou real, após dividir)
+        paralelismo: Requisições simultâneas consideradas
+        segundos_fixos / segundos_por_palavra: Modelo de latência usado
+        tempo_previsto: Duração prevista do job (segundos de relógio)
+        motivo: Por que este tamanho foi escolhido
+    """
+
+    def __init__(self, palavras_por_chunk: int, total_chunks: int, paralelismo: int,
+                 segundos_fixos: float, segundos_por_palavra: float,
+                 rpm_total: Optional[int], motivo: str):
+        self.palavras_por_chunk = palavras_por_chunk
+        self.total_chunks = total_chunks
+        self.paralelismo = paralelismo
+        self.segundos_fixos = segundos_fixos
+        self.segundos_por_palavra = segundos_por_palavra
+        self.rpm_total = rpm_total
+        self.motivo = motivo
+        self.tempo_previsto = self.prever(total_chunks, palavras_por_chunk)
+
+    def prever(self, chunks: int, palavras_por_chunk: int) -> float:
+        """Tempo de relógio previsto para `chunks` chunks de `palavras_por_chunk` palavras"""
+        rodadas = math.ceil(chunks / max(self.paralelismo, 1))
+        tempo = rodadas * (self.segundos_fixos + self.segundos_por_palavra * palavras_por_chunk)
+        if self.rpm_total:
+            tempo = max(tempo, chunks / self.rpm_total * 60)
+        return tempo
+
+    def __str__(self) -> str:
+        return (f"{self.total_chunks} chunks de até {self.palavras_por_chunk} palavras, "
+                f"{self.paralelismo} em paralelo, ~{self.tempo_previsto:.1f}s previstos ({self.motivo})")
+
+
+def planejar_chunks(total_palavras: int, agendador: AgendadorSintese,
+                    limites: Optional[dict] = None) -> PlanoChunks:
+    """
+    Escolhe o tamanho de chunk que minimiza o tempo previsto do job
+
+    - Latência: modelo fixo + por palavra ajustado sobre as requisições já feitas
+      pelos endpoints saudáveis (padrões conservadores enquanto não há medições)
+    - Paralelismo: endpoints saudáveis × limite adaptativo de cada um, até max_paralelo
+    - RPM: teto de requisições por minuto somado dos endpoints
+    - RPD: o número de chunks não pode passar da cota que resta hoje
+
+    Args:
+        total_palavras: Palavras do roteiro
+        agendador: Agendador que vai sintetizar o job (fonte das medições)
+        limites: Limites por tipo de endpoint (padrão: LIMITES_PADRAO)
+    """
+    limites = limites or LIMITES_PADRAO
+    saudaveis = [ep for ep in agendador.endpoints if agendador.saude.saudavel(ep.nome)] \
+        or list(agendador.endpoints)
+    por_endpoint = [limites.get(ep.tipo, LimitesProvedor()) for ep in saudaveis]
+
+    max_palavras = min(lim.max_palavras for lim in por_endpoint)
+    min_palavras = min(max(lim.min_palavras for lim in por_endpoint), max_palavras)
+
+    modelo = agendador.latencias.modelo_por_palavra([ep.nome for ep in saudaveis])
+    fixo, por_palavra = modelo or (SEGUNDOS_FIXOS_PADRAO, SEGUNDOS_POR_PALAVRA_PADRAO)
+
+    if agendador.concorrencia is not None:
+        limites_aimd = agendador.concorrencia.limites()
+        vagas = sum(int(limites_aimd.get(ep.nome, agendador.concorrencia.limite_inicial))
+                    for ep in saudaveis)
+    else:
+        vagas = agendador.max_paralelo
+    paralelismo = max(min(agendador.max_paralelo, vagas), 1)
+
+    rpm_total = None
+    if all(lim.rpm for lim in por_endpoint):
+        rpm_total = sum(lim.rpm for lim in por_endpoint)
+
+    folga_rpd = None
+    if all(lim.rpd for lim in por_endpoint):
+        folga_rpd = sum(max(lim.rpd - agendador.cota.hoje(ep.nome), 0)
+                        for ep, lim in zip(saudaveis, por_endpoint))
+
+    plano_base = PlanoChunks(max_palavras, 0, paralelismo, fixo, por_palavra, rpm_total, "")
+
+    def chunks_para(palavras: int) -> int:
+        return max(math.ceil(total_palavras / palavras), 1)
+
+    tamanhos = sorted(set(range(min_palavras, max_palavras, 10)) | {max_palavras})
+    candidatos: List[Tuple[float, int]] = [
+        (plano_base.prever(chunks_para(palavras), palavras), palavras)
+        for palavras in tamanhos
+        if folga_rpd is None or chunks_para(palavras) <= folga_rpd
+    ]
+
+    if not candidatos:
+        escolhido = max_palavras
+        motivo = f"cota diária insuficiente: restam {folga_rpd} requisições"
+    else:
+        melhor_tempo = min(t for t, _ in candidatos)
+        escolhido = max(p for t, p in candidatos if t <= melhor_tempo * TOLERANCIA_TEMPO)
+        origem = "medido" if modelo else "estimado"
+        motivo = (f"{len(saudaveis)} endpoint(s) saudáveis, "
+                  f"{fixo:.1f}s + {por_palavra * 1000:.0f}ms/palavra ({origem})")
+        if folga_rpd is not None:
+            motivo += f", {folga_rpd} requisições restantes hoje"
+
+    return PlanoChunks(escolhido, chunks_para(escolhido), paralelismo, fixo, por_palavra,
+                       rpm_total, motivo)
+
+
+def dividir_planejado(texto: str, agendador: AgendadorSintese,
+                      limites: Optional[dict] = None) -> Tuple[List[str], PlanoChunks]:
+    """
+    Divide o texto com o tamanho de chunk planejado
+
+    Returns:
+        (chunks, plano) - o plano já reflete a quantidade real de chunks
+    """
+    plano = planejar_chunks(contar_palavras(texto), agendador, limites)
+    chunks = dividir_texto_para_tts(texto, plano.palavras_por_chunk)
+
+    # Quebras em fim de frase podem gerar alguns chunks a mais que a conta exata
+    plano.total_chunks = len(chunks)
+    plano.tempo_previsto = plano.prever(len(chunks), plano.palavras_por_chunk)
+    print(f"[PLANO] {plano}")
+    return chunks, plano
+
+
+def relatar(plano: PlanoChunks, segundos_reais: float) -> str:
+    """Compara o tempo previsto com o real (imprime e devolve a linha)"""
+    desvio = (segundos_reais - plano.tempo_previsto) / plano.tempo_previsto if plano.tempo_previsto else 0.0
+    linha = (f"[PLANO] Previsto {plano.tempo_previsto:.1f}s, real {segundos_reais:.1f}s "
+             f"({desvio:+.0%}) com {plano.total_chunks} chunks de até {plano.palavras_por_chunk} palavras")
+    print(linha)
+    return linha
@@ -0,0 +1,379 @@
+"""
+Tabela Compacta de Chunks
+Estado de cada chunk de um job (situação, tentativas, duração, onde está o
+texto e onde está o PCM) em colunas NumPy em vez de um dict por chunk, e os
+textos num arquivo lido por offset em vez de uma string por chunk: lotes de
+centenas de milhares de chunks cabem em poucos MB e as varreduras de situação
+são operações vetorizadas
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import random
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+from progress_bus import FALHOU, PENDENTE, PRONTO, REPETINDO, SINTETIZANDO
+
+
+# Códigos da coluna de situação (mesmos nomes do barramento de progresso)
+ESTADOS = (PENDENTE, SINTETIZANDO, REPETINDO, PRONTO, FALHOU)
+CODIGOS = {estado: codigo for codigo, estado in enumerate(ESTADOS)}
+
+_COLUNAS = ("estado", "tentativas", "duracao", "offset_texto", "tamanho_texto",
+            "offset_pcm", "tamanho_pcm", "sha256")
+
+
+class TabelaChunks:
+    """
+    Estado dos chunks de um job, uma coluna por campo
+
+    Colunas (uma posição por chunk):
+        estado         uint8    código em ESTADOS
+        tentativas     uint8    requisições à rede feitas pelo agendador
+        duracao        float32  segundos entre o início e o fim da síntese
+        offset_texto   uint64   início do texto no arquivo de textos (TextosChunks)
+        tamanho_texto  uint32   bytes UTF-8 do texto
+        offset_pcm     uint64   início do PCM no audio.pcm do diário
+        tamanho_pcm    uint32   bytes de PCM
+        sha256         32 bytes checksum do PCM
+
+    São 62 bytes por chunk. Escritas em posições diferentes podem vir de
+    threads diferentes sem lock (cada uma é uma atribuição num elemento).
+    """
+
+    __slots__ = _COLUNAS + ("total",)
+
+    def __init__(self, total: int):
+        """
+        Args:
+            total: Número de chunks (todos começam pendentes)
+        """
+        self.total = total
+        self.estado = np.zeros(total, np.uint8)
+        self.tentativas = np.zeros(total, np.uint8)
+        self.duracao = np.zeros(total, np.float32)
+        self.offset_texto = np.zeros(total, np.uint64)
+        self.tamanho_texto = np.zeros(total, np.uint32)
+        self.offset_pcm = np.zeros(total, np.uint64)
+        self.tamanho_pcm = np.zeros(total, np.uint32)
+        self.sha256 = np.zeros((total, 32), np.uint8)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __getitem__(self, indice: int) -> "RegistroChunk":
+        if not -self.total <= indice < self.total:
+            raise IndexError(f"Chunk {indice} fora da tabela ({self.total} chunks)")
+        return RegistroChunk(self, indice % self.total)
+
+    # ----- Escrita -----
+
+    def marcar(self, indice: int, estado: str):
+        """Muda a situação de um chunk"""
+        self.estado[indice] = CODIGOS[estado]
+
+    def reiniciar(self, indices: Iterable[int]):
+        """Volta chunks para pendente, sem tentativas nem duração (nova rodada de síntese)"""
+        posicoes = np.fromiter(indices, np.int64)
+        self.estado[posicoes] = CODIGOS[PENDENTE]
+        self.tentativas[posicoes] = 0
+        self.duracao[posicoes] = 0
+
+    def registrar_tentativa(self, indice: int, tentativa: int):
+        """Anota a tentativa de rede em andamento (a partir da segunda, o chunk fica repetindo)"""
+        self.tentativas[indice] = min(tentativa, 255)
+        if tentativa > 1:
+            self.estado[indice] = CODIGOS[REPETINDO]
+
+    def registrar_pcm(self, indice: int, offset: int, tamanho: int, sha256: bytes):
+        """Anota onde o PCM do chunk foi gravado e marca o chunk como pronto"""
+        self.offset_pcm[indice] = offset
+        self.tamanho_pcm[indice] = tamanho
+        self.sha256[indice] = np.frombuffer(sha256, np.uint8)
+        self.estado[indice] = CODIGOS[PRONTO]
+
+    # ----- Varreduras -----
+
+    def indices(self, *estados: str) -> np.ndarray:
+        """Índices dos chunks em alguma das situações, em ordem"""
+        return np.flatnonzero(self._mascara(estados))
+
+    def indices_exceto(self, *estados: str) -> np.ndarray:
+        """Índices dos chunks fora das situações, em ordem"""
+        return np.flatnonzero(~self._mascara(estados))
+
+    def contar(self) -> Dict[str, int]:
+        """Quantidade de chunks em cada situação"""
+        contagem = np.bincount(self.estado, minlength=len(ESTADOS))
+        return {estado: int(contagem[codigo]) for codigo, estado in enumerate(ESTADOS)}
+
+    def esta_em(self, indice: int, *estados: str) -> bool:
+        return ESTADOS[self.estado[indice]] in estados
+
+    def _mascara(self, estados) -> np.ndarray:
+        if len(estados) == 1:
+            return self.estado == CODIGOS[estados[0]]
+        return np.isin(self.estado, [CODIGOS[estado] for estado in estados])
+
+
+class RegistroChunk:
+    """
+    Visão de uma linha da tabela (não copia nada: lê e grava nas colunas)
+    """
+
+    __slots__ = ("_tabela", "indice")
+
+    def __init__(self, tabela: TabelaChunks, indice: int):
+        self._tabela = tabela
+        self.indice = indice
+
+    @property
+    def estado(self) -> str:
+        return ESTADOS[self._tabela.estado[self.indice]]
+
+    @estado.setter
+    def estado(self, estado: str):
+        self._tabela.marcar(self.indice, estado)
+
+    @property
+    def tentativas(self) -> int:
+        return int(self._tabela.tentativas[self.indice])
+
+    @property
+    def duracao(self) -> float:
+        return float(self._tabela.duracao[self.indice])
+
+    @property
+    def offset_texto(self) -> int:
+        return int(self._tabela.offset_texto[self.indice])
+
+    @property
+    def tamanho_texto(self) -> int:
+        return int(self._tabela.tamanho_texto[self.indice])
+
+    @property
+    def offset_pcm(self) -> int:
+        return int(self._tabela.offset_pcm[self.indice])
+
+    @property
+    def tamanho_pcm(self) -> int:
+        return int(self._tabela.tamanho_pcm[self.indice])
+
+    @property
+    def sha256(self) -> bytes:
+        return self._tabela.sha256[self.indice].tobytes()
+
+    def __repr__(self) -> str:
+        return (f"RegistroChunk({self.indice + 1}, {self.estado}, tentativas={self.tentativas}, "
+                f"duracao={self.duracao:.2f}s, pcm={self.tamanho_pcm} bytes)")
+
+
+class TextosChunks(Sequence):
+    """
+    Textos dos chunks lidos sob demanda de um arquivo UTF-8
+
+    O arquivo guarda os textos um atrás do outro; offset e tamanho de cada
+    um ficam nas colunas da tabela. `textos[i]` decodifica só aquele trecho
+    (o arquivo é mapeado em memória, e o sistema operacional descarta as
+    páginas que não estão em uso).
+    """
+
+    __slots__ = ("caminho", "_tabela", "_arquivo", "_mapa")
+
+    def __init__(self, caminho: str, tabela: TabelaChunks):
+        """
+        Args:
+            caminho: Arquivo de textos (gravado por TextosChunks.gravar)
+            tabela: Tabela com offset_texto/tamanho_texto preenchidos
+        """
+        self.caminho = caminho
+        self._tabela = tabela
+        self._arquivo = open(caminho, "rb")
+        # Arquivo vazio não pode ser mapeado
+        if os.fstat(self._arquivo.fileno()).st_size:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mapa = b""
+
+    @staticmethod
+    def gravar(caminho: str, textos: Iterable[str], tabela: TabelaChunks):
+        """
+        Grava os textos no arquivo e preenche offset_texto/tamanho_texto da tabela
+
+        Args:
+            caminho: Arquivo de destino (sincronizado em disco ao final)
+            textos: Um texto por chunk, na ordem (tantos quanto linhas da tabela)
+            tabela: Tabela a preencher
+        """
+        offset = 0
+        with open(caminho, "wb") as f:
+            for indice, texto in enumerate(textos):
+                dados = texto.encode("utf-8")
+                f.write(dados)
+                tabela.offset_texto[indice] = offset
+                tabela.tamanho_texto[indice] = len(dados)
+                offset += len(dados)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def preencher_offsets(tabela: TabelaChunks, tamanhos: List[int]):
+        """Reconstrói os offsets a partir dos tamanhos (ao reabrir um diário)"""
+        tabela.tamanho_texto[:] = tamanhos
+        if tabela.total:
+            tabela.offset_texto[0] = 0
+            np.cumsum(tabela.tamanho_texto[:-1], dtype=np.uint64, out=tabela.offset_texto[1:])
+
+    def __len__(self) -> int:
+        return self._tabela.total
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        inicio = int(self._tabela.offset_texto[indice])
+        return self._mapa[inicio:inicio + int(self._tabela.tamanho_texto[indice])].decode("utf-8")
+
+    def fechar(self):
+        """Libera o arquivo (no Windows, necessário antes de apagá-lo)"""
+        if isinstance(self._mapa, mmap.mmap):
+            self._mapa.close()
+        self._arquivo.close()
+
+
+# ===== BENCHMARK =====
+
+_PALAVRAS = ("a história começou numa cidade pequena do interior onde todos se conheciam e "
+             "ninguém imaginava que aquela noite mudaria tudo para sempre").split()
+
+
+def _texto_sintetico(indice: int, palavras: int) -> str:
+    aleatorio = random.Random(indice)
+    return " ".join(aleatorio.choice(_PALAVRAS) for _ in range(palavras)).capitalize() + "."
+
+
+def _situacao_sintetica(indice: int) -> str:
+    # 70% prontos, 15% pendentes, 10% sintetizando, 5% falhos
+    resto = indice % 20
+    return PRONTO if resto < 14 else PENDENTE if resto < 17 else SINTETIZANDO if resto < 19 else FALHOU
+
+
+def _montar_dicts(total: int, palavras: int) -> Dict[int, Dict]:
+    tabela = {}
+    for indice in range(total):
+        estado = _situacao_sintetica(indice)
+        pronto = estado == PRONTO
+        tabela[indice] = {
+            "texto": _texto_sintetico(indice, palavras),
+            "estado": estado,
+            "tentativas": 1 + indice % 3,
+            "duracao": 12.5 + indice % 7,
+            "offset": indice * 4_320_000 if pronto else None,
+            "tamanho": 4_320_000 if pronto else None,
+            "sha256": hashlib.sha256(indice.to_bytes(8, "little")).hexdigest() if pronto else None,
+        }
+    return tabela
+
+
+def _montar_tabela(total: int, palavras: int, caminho_textos: str):
+    tabela = TabelaChunks(total)
+    TextosChunks.gravar(caminho_textos, (_texto_sintetico(i, palavras) for i in range(total)), tabela)
+    for indice in range(total):
+        estado = _situacao_sintetica(indice)
+        if estado == PRONTO:
+            tabela.registrar_pcm(indice, indice * 4_320_000, 4_320_000,
+                                 hashlib.sha256(indice.to_bytes(8, "little")).digest())
+        else:
+            tabela.marcar(indice, estado)
+        tabela.tentativas[indice] = 1 + indice % 3
+        tabela.duracao[indice] = 12.5 + indice % 7
+    return tabela, TextosChunks(caminho_textos, tabela)
+
+
+def _medir_memoria(construir: Callable[[], object]):
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        resultado = construir()
+        return resultado, tracemalloc.get_traced_memory()[0] - antes
+    finally:
+        tracemalloc.stop()
+
+
+def _melhor_tempo(funcao: Callable[[], object], repeticoes: int = 5) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def comparar(total: int, palavras: int, pasta: str) -> Dict[str, Dict[str, float]]:
+    """
+    Mede memória por chunk e tempo das varreduras: dict por chunk x tabela em colunas
+
+    Args:
+        total: Chunks no lote
+        palavras: Palavras por chunk
+        pasta: Onde gravar o arquivo de textos temporário
+
+    Returns:
+        {"dicts": {...}, "tabela": {...}} com bytes_por_chunk, contar_ms,
+        faltando_ms e texto_us (leitura de um texto por índice)
+    """
+    caminho_textos = os.path.join(pasta, f"textos_benchmark_{os.getpid()}.txt")
+    amostra = random.Random(0).sample(range(total), min(total, 1000))
+
+    dicts, memoria_dicts = _medir_memoria(lambda: _montar_dicts(total, palavras))
+    resultados = {"dicts": {
+        "bytes_por_chunk": memoria_dicts / total,
+        "contar_ms": _melhor_tempo(lambda: Counter(d["estado"] for d in dicts.values())) * 1000,
+        "faltando_ms": _melhor_tempo(
+            lambda: [i for i, d in dicts.items() if d["estado"] != PRONTO]) * 1000,
+        "texto_us": _melhor_tempo(lambda: [dicts[i]["texto"] for i in amostra]) / len(amostra) * 1e6,
+    }}
+    del dicts
+
+    (tabela, textos), memoria_tabela = _medir_memoria(lambda: _montar_tabela(total, palavras, caminho_textos))
+    try:
+        resultados["tabela"] = {
+            "bytes_por_chunk": memoria_tabela / total,
+            "contar_ms": _melhor_tempo(tabela.contar) * 1000,
+            "faltando_ms": _melhor_tempo(lambda: tabela.indices_exceto(PRONTO).tolist()) * 1000,
+            "texto_us": _melhor_tempo(lambda: [textos[i] for i in amostra]) / len(amostra) * 1e6,
+        }
+    finally:
+        textos.fechar()
+        os.remove(caminho_textos)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a tabela de chunks em colunas com um dict por chunk")
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--palavras", type=int, default=60, help="Palavras por chunk")
+    parser.add_argument("--pasta", default=".", help="Onde gravar o arquivo de textos temporário")
+    args = parser.parse_args()
+
+    print(f"[TABELA] {args.chunks} chunks de {args.palavras} palavras")
+    resultados = comparar(args.chunks, args.palavras, args.pasta)
+    print(f"[TABELA] {'':8s} {'bytes/chunk':>12s} {'contar':>10s} {'faltando':>10s} {'texto':>9s}")
+    for nome, r in resultados.items():
+        print(f"[TABELA] {nome:8s} {r['bytes_por_chunk']:12.0f} {r['contar_ms']:8.2f}ms "
+              f"{r['faltando_ms']:8.2f}ms {r['texto_us']:7.2f}µs")
+    dicts, tabela = resultados["dicts"], resultados["tabela"]
+    print(f"[TABELA] Memória {dicts['bytes_por_chunk'] / tabela['bytes_por_chunk']:.0f}x menor, "
+          f"contagem {dicts['contar_ms'] / tabela['contar_ms']:.0f}x mais rápida, "
+          f"lista de faltando {dicts['faltando_ms'] / tabela['faltando_ms']:.0f}x mais rápida")
+
+
+if __name__ == "__main__":
+    main()
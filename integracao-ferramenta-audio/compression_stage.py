@@ -0,0 +1,421 @@
+"""
+Estágio de Compressão em Pipeline
+Comprime o áudio em segmentos num pool de processos enquanto a síntese ainda
+está rodando, e junta os segmentos sem lacunas no final
+"""
+
+import itertools
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from audio_output import EmendaCrossfade
+from job_trace import PID_COMPRESSAO, ativo, trecho
+from memory_budget import BufferReordenacao, OrcamentoMemoria
+from synthesis_cache import escrever_atomico_partes
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+
+# Fronteiras de segmento são múltiplas deste valor (1152 = quadro MPEG-1, 2 × 576 do MPEG-2)
+ALINHAMENTO_AMOSTRAS = 1152
+
+# Tamanho padrão de cada segmento: ~60 segundos de áudio
+AMOSTRAS_POR_SEGMENTO = ALINHAMENTO_AMOSTRAS * 1250
+
+
+class Codificador(ABC):
+    """
+    Interface de um codificador plugável
+
+    As instâncias são enviadas para outros processos, então precisam ser
+    serializáveis (pickle) - guarde só configuração simples nos atributos.
+    """
+
+    nome = "base"
+    extensao = ""
+
+    # Amostras de contexto antes/depois de cada segmento que o codificador
+    # precisa para que a junção não tenha emendas audíveis
+    contexto_amostras = 0
+
+    @abstractmethod
+    def codificar(self, pcm: bytes, amostras_antes: int, amostras_segmento: int, ultimo: bool) -> bytes:
+        """
+        Codifica um segmento (roda no processo do pool)
+
+        Args:
+            pcm: PCM do segmento com o contexto antes e depois
+            amostras_antes: Quantas amostras iniciais são só contexto
+            amostras_segmento: Quantas amostras pertencem de fato ao segmento
+            ultimo: True no último segmento (deve incluir o final do fluxo)
+
+        Returns:
+            Bytes codificados que representam exatamente o segmento
+        """
+
+    @abstractmethod
+    def juntar(self, segmentos: Iterable[bytes], destino: str, total_amostras: int):
+        """Grava o arquivo final a partir dos segmentos codificados, na ordem (lidos um a um)"""
+
+
+# ===== MP3 via ffmpeg =====
+
+_BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+_TAXAS = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def dividir_quadros_mp3(dados: bytes) -> Tuple[List[bytes], int]:
+    """
+    Divide um fluxo MP3 (Layer III, sem tags) em quadros
+
+    Returns:
+        (quadros, amostras_por_quadro)
+
+    Raises:
+        ValueError: Se encontrar bytes que não são um quadro válido: sincronismo
+                    errado, versão/bitrate/taxa reservados, bitrate livre
+                    (free format, sem tamanho no cabeçalho) ou quadro cortado
+    """
+    quadros = []
+    amostras_por_quadro = 0
+    posicao = 0
+    visao = memoryview(dados)
+
+    while posicao + 4 <= len(dados):
+        cabecalho = struct.unpack(">I", dados[posicao:posicao + 4])[0]
+        if (cabecalho >> 21) & 0x7FF != 0x7FF or (cabecalho >> 17) & 0x3 != 0x1:
+            raise ValueError(f"Quadro MP3 inválido na posição {posicao}")
+
+        versao = (cabecalho >> 19) & 0x3
+        indice_bitrate = (cabecalho >> 12) & 0xF
+        indice_taxa = (cabecalho >> 10) & 0x3
+        if versao == 1:
+            raise ValueError(f"Versão MPEG reservada na posição {posicao}")
+        if indice_bitrate in (0, 15):
+            # 0 = free format (tamanho do quadro não está no cabeçalho); 15 = reservado
+            raise ValueError(f"Bitrate {'livre' if indice_bitrate == 0 else 'reservado'} "
+                             f"na posição {posicao}")
+        if indice_taxa == 3:
+            raise ValueError(f"Taxa de amostragem reservada na posição {posicao}")
+        taxa = _TAXAS[versao][indice_taxa]
+        preenchimento = (cabecalho >> 9) & 0x1
+
+        if versao == 3:
+            bitrate = _BITRATES_MPEG1[indice_bitrate] * 1000
+            tamanho = 144 * bitrate // taxa + preenchimento
+            amostras_por_quadro = 1152
+        else:
+            bitrate = _BITRATES_MPEG2[indice_bitrate] * 1000
+            tamanho = 72 * bitrate // taxa + preenchimento
+            amostras_por_quadro = 576
+
+        if posicao + tamanho > len(dados):
+            raise ValueError(f"Quadro MP3 cortado na posição {posicao}")
+        quadros.append(bytes(visao[posicao:posicao + tamanho]))
+        posicao += tamanho
+
+    return quadros, amostras_por_quadro
+
+
+class CodificadorMp3Ffmpeg(Codificador):
+    """
+    MP3 via subprocesso ffmpeg (libmp3lame)
+
+    Junção sem lacunas: cada segmento é codificado com contexto antes e depois,
+    sem bit reservoir (cada quadro é autocontido) e começando numa fronteira de
+    quadro. Assim o quadro k de um segmento que começa na amostra t corresponde
+    ao quadro t/amostras_por_quadro + k de uma codificação contínua; os quadros
+    de contexto são descartados e os demais são simplesmente concatenados.
+    """
+
+    nome = "ffmpeg-mp3"
+    extensao = ".mp3"
+    contexto_amostras = ALINHAMENTO_AMOSTRAS * 4
+
+    def __init__(self, bitrate_kbps: int = 128, ffmpeg: Optional[str] = None):
+        """
+        Args:
+            bitrate_kbps: Bitrate (128 kbps, como no sistema web)
+            ffmpeg: Caminho do executável (padrão: procurar no PATH)
+        """
+        self.bitrate_kbps = bitrate_kbps
+        self.ffmpeg = ffmpeg or shutil.which("ffmpeg")
+
+    def codificar(self, pcm: bytes, amostras_antes: int, amostras_segmento: int, ultimo: bool) -> bytes:
+        processo = subprocess.run(
+            [self.ffmpeg, "-v", "error",
+             "-f", "s16le", "-ar", str(TAXA_AMOSTRAGEM), "-ac", "1", "-i", "pipe:0",
+             "-c:a", "libmp3lame", "-b:a", f"{self.bitrate_kbps}k", "-reservoir", "0",
+             "-write_xing", "0", "-id3v2_version", "0", "-write_id3v1", "0",
+             "-f", "mp3", "pipe:1"],
+            input=pcm,
+            capture_output=True,
+        )
+        if processo.returncode != 0:
+            raise RuntimeError(f"ffmpeg falhou: {processo.stderr.decode(errors='replace')[:300]}")
+
+        quadros, amostras_por_quadro = dividir_quadros_mp3(processo.stdout)
+        inicio = amostras_antes // amostras_por_quadro
+        if ultimo:
+            return b"".join(quadros[inicio:])
+        fim = inicio + amostras_segmento // amostras_por_quadro
+        return b"".join(quadros[inicio:fim])
+
+    def juntar(self, segmentos: Iterable[bytes], destino: str, total_amostras: int):
+        escrever_atomico_partes(destino, segmentos)
+
+
+# ===== Fallback só com a biblioteca padrão: WAV µ-law (G.711) =====
+
+def _tabela_mulaw() -> bytes:
+    """Tabela de 65536 entradas: amostra 16-bit (como unsigned) → byte µ-law"""
+    tabela = bytearray(65536)
+    for valor in range(65536):
+        amostra = valor - 65536 if valor >= 32768 else valor
+        sinal = 0x80 if amostra < 0 else 0
+        magnitude = min(abs(amostra), 32635) + 0x84
+        expoente = max(magnitude.bit_length() - 8, 0)
+        mantissa = (magnitude >> (expoente + 3)) & 0x0F
+        tabela[valor] = ~(sinal | (expoente << 4) | mantissa) & 0xFF
+    return bytes(tabela)
+
+
+_TABELA_MULAW: Optional[bytes] = None
+
+
+def pcm16_para_mulaw(pcm: bytes) -> bytes:
+    """Converte PCM 16-bit little-endian em µ-law (1 byte por amostra)"""
+    global _TABELA_MULAW
+    if _TABELA_MULAW is None:
+        _TABELA_MULAW = _tabela_mulaw()
+    amostras = memoryview(pcm).cast("H")
+    return bytes(map(_TABELA_MULAW.__getitem__, amostras))
+
+
+class CodificadorMulawWav(Codificador):
+    """
+    WAV µ-law 8-bit: metade do tamanho do PCM, sem dependências externas
+
+    Cada amostra é codificada independentemente, então a junção é trivialmente
+    sem lacunas e nenhum contexto é necessário.
+    """
+
+    nome = "wav-mulaw"
+    # Sufixo próprio para não sobrescrever o WAV PCM do mesmo job
+    extensao = "_ulaw.wav"
+    contexto_amostras = 0
+
+    def codificar(self, pcm: bytes, amostras_antes: int, amostras_segmento: int, ultimo: bool) -> bytes:
+        return pcm16_para_mulaw(pcm)
+
+    def juntar(self, segmentos: Iterable[bytes], destino: str, total_amostras: int):
+        # Um byte por amostra: o tamanho é conhecido sem ler os segmentos
+        tamanho_dados = total_amostras
+        formato = struct.pack("<HHIIHHH", 7, 1, TAXA_AMOSTRAGEM, TAXA_AMOSTRAGEM, 1, 8, 0)
+        cabecalho = b"".join([
+            b"RIFF", struct.pack("<I", 4 + 8 + len(formato) + 12 + 8 + tamanho_dados + tamanho_dados % 2),
+            b"WAVE",
+            b"fmt ", struct.pack("<I", len(formato)), formato,
+            b"fact", struct.pack("<II", 4, total_amostras),
+            b"data", struct.pack("<I", tamanho_dados),
+        ])
+        escrever_atomico_partes(destino, itertools.chain(
+            [cabecalho], segmentos, [b"\0" * (tamanho_dados % 2)]))
+
+
+def codificador_padrao() -> Codificador:
+    """MP3 via ffmpeg se estiver instalado; senão WAV µ-law"""
+    if shutil.which("ffmpeg"):
+        return CodificadorMp3Ffmpeg()
+    print("[COMPRESSAO] ffmpeg não encontrado, usando WAV µ-law")
+    return CodificadorMulawWav()
+
+
+def _codificar_segmento(codificador: Codificador, pcm: bytes, amostras_antes: int,
+                        amostras_segmento: int, ultimo: bool) -> Tuple[bytes, float, float, int]:
+    """Ponto de entrada no processo do pool (devolve também início, fim e pid, para a linha do tempo)"""
+    inicio = time.time()
+    dados = codificador.codificar(pcm, amostras_antes, amostras_segmento, ultimo)
+    return dados, inicio, time.time(), os.getpid()
+
+
+# ===== Estágio do pipeline =====
+
+class EstagioCompressao:
+    """
+    Estágio de compressão que roda em paralelo com a síntese
+
+    Recebe os chunks na ordem em que terminam; assim que um trecho contínuo
+    desde o início cobre um segmento inteiro (mais o contexto do codificador),
+    esse segmento é enviado para um processo do pool. A codificação não disputa
+    o GIL com as threads de rede. Ao final só resta codificar o último segmento
+    e concatenar.
+
+    Se a codificação não acompanhar a síntese, adicionar_chunk espera o pool
+    (no máximo 2 segmentos por processo na fila), e essa espera segura o
+    agendador. Com um orçamento de memória, chunks fora de ordem e segmentos
+    já codificados que passarem dele aguardam em arquivos temporários.
+    """
+
+    def __init__(self, destino: str, codificador: Optional[Codificador] = None,
+                 max_processos: Optional[int] = None,
+                 amostras_por_segmento: int = AMOSTRAS_POR_SEGMENTO,
+                 orcamento: Optional[OrcamentoMemoria] = None,
+                 emendas: Iterable[int] = ()):
+        """
+        Args:
+            destino: Caminho do arquivo comprimido (a extensão é a do codificador)
+            codificador: Codificador a usar (padrão: codificador_padrao())
+            max_processos: Tamanho do pool (padrão: número de CPUs)
+            amostras_por_segmento: Tamanho dos segmentos (arredondado para o alinhamento)
+            orcamento: Orçamento de memória compartilhado com o agendador
+            emendas: Chunks unidos ao anterior com crossfade (as mesmas do diário)
+        """
+        self.codificador = codificador or codificador_padrao()
+        self.destino = os.path.splitext(destino)[0] + self.codificador.extensao
+        self.amostras_por_segmento = max(
+            amostras_por_segmento // ALINHAMENTO_AMOSTRAS, 1) * ALINHAMENTO_AMOSTRAS
+
+        self._executor = ProcessPoolExecutor(max_workers=max_processos)
+        self._max_na_fila = 2 * (max_processos or os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._cancelado = False
+
+        # Chunks que chegaram fora de ordem
+        self._pendentes = BufferReordenacao(orcamento, nome="compressao")
+        self._proximo_chunk = 0
+        self._emenda = EmendaCrossfade(emendas)
+
+        # PCM contínuo ainda necessário; _base é a amostra global do byte 0 do buffer
+        self._buffer = bytearray()
+        self._base = 0
+        self._total_amostras = 0
+        self._inicio_segmento = 0
+
+        # Segmentos no pool (número → futuro) e os já codificados, à espera do final
+        self._segmentos: Dict[Future, int] = {}
+        self._codificados = BufferReordenacao(orcamento, nome="segmentos")
+        self._total_segmentos = 0
+
+    def adicionar_chunk(self, indice: int, pcm: bytes):
+        """
+        Entrega um chunk pronto ao estágio (qualquer ordem, qualquer thread)
+        """
+        with self._lock:
+            if self._cancelado:
+                # Chunks de threads de síntese que terminaram depois da falha do job
+                return
+            if indice != self._proximo_chunk:
+                self._pendentes.guardar(indice, pcm)
+                return
+            self._anexar(pcm)
+            while self._proximo_chunk in self._pendentes:
+                self._anexar(self._pendentes.retirar(self._proximo_chunk))
+
+    def finalizar(self, total_chunks: int) -> str:
+        """
+        Codifica o que falta, espera o pool e grava o arquivo final
+
+        Args:
+            total_chunks: Número total de chunks do job (para conferir que nada faltou)
+
+        Returns:
+            Caminho do arquivo comprimido
+        """
+        with self._lock:
+            if self._proximo_chunk != total_chunks:
+                raise ValueError(f"Compressão incompleta: recebidos {self._proximo_chunk}/{total_chunks} chunks")
+            self._enviar_segmento(self._total_amostras, ultimo=True)
+
+        try:
+            with trecho("aguardando compressão", "espera"):
+                wait(list(self._segmentos))
+            self._recolher()
+        finally:
+            self._executor.shutdown()
+
+        total = self._total_segmentos
+        try:
+            with trecho("juntar segmentos", "escrita", segmentos=total):
+                self.codificador.juntar((self._codificados.retirar(n) for n in range(total)),
+                                        self.destino, self._total_amostras)
+        finally:
+            self._pendentes.fechar()
+            self._codificados.fechar()
+        print(f"[COMPRESSAO] {self.destino}: {total} segmento(s), "
+              f"{os.path.getsize(self.destino) / 1024 ** 2:.1f} MB ({self.codificador.nome})")
+        return self.destino
+
+    def cancelar(self):
+        """Descarta o trabalho pendente (job falhou)"""
+        # Sob o lock: adicionar_chunk de outra thread não pode enviar ao pool já desligado
+        with self._lock:
+            self._cancelado = True
+            for futuro in self._segmentos:
+                futuro.cancel()
+            self._executor.shutdown(wait=False)
+            self._pendentes.fechar()
+            self._codificados.fechar()
+
+    # ----- Internos (chamar com o lock) -----
+
+    def _anexar(self, pcm: bytes):
+        """Acrescenta o próximo chunk em ordem e envia os segmentos que fecharam"""
+        pcm = self._emenda.processar(self._proximo_chunk, pcm)
+        self._buffer += pcm
+        self._total_amostras += len(pcm) // BYTES_POR_AMOSTRA
+        self._proximo_chunk += 1
+        self._enviar_segmentos_prontos()
+
+    def _recolher(self):
+        """Tira do pool os segmentos já codificados (erros sobem no result())"""
+        rastreio = ativo()
+        for futuro in [f for f in self._segmentos if f.done()]:
+            numero = self._segmentos.pop(futuro)
+            dados, inicio, fim, pid = futuro.result()
+            self._codificados.guardar(numero, dados)
+            if rastreio is not None:
+                rastreio.trecho_completo(f"codificar segmento {numero + 1}", "compressao", inicio, fim,
+                                         pid=PID_COMPRESSAO, tid=pid, codificador=self.codificador.nome)
+
+    def _enviar_segmentos_prontos(self):
+        contexto = self.codificador.contexto_amostras
+        while self._inicio_segmento + self.amostras_por_segmento + contexto <= self._total_amostras:
+            self._enviar_segmento(self._inicio_segmento + self.amostras_por_segmento, ultimo=False)
+
+    def _enviar_segmento(self, fim: int, ultimo: bool):
+        """Envia ao pool o segmento [_inicio_segmento, fim) com seu contexto"""
+        contexto = self.codificador.contexto_amostras
+        inicio = self._inicio_segmento
+        inicio_contexto = max(inicio - contexto, 0)
+        fim_contexto = self._total_amostras if ultimo else min(fim + contexto, self._total_amostras)
+
+        # Pool ocupado: esperar aqui segura quem está entregando chunks
+        self._recolher()
+        while len(self._segmentos) >= self._max_na_fila:
+            with trecho("aguardando compressão", "espera"):
+                wait(list(self._segmentos), return_when=FIRST_COMPLETED)
+            self._recolher()
+
+        pcm = bytes(self._buffer[(inicio_contexto - self._base) * BYTES_POR_AMOSTRA:
+                                 (fim_contexto - self._base) * BYTES_POR_AMOSTRA])
+        futuro = self._executor.submit(
+            _codificar_segmento, self.codificador, pcm,
+            inicio - inicio_contexto, fim - inicio, ultimo,
+        )
+        self._segmentos[futuro] = self._total_segmentos
+        self._total_segmentos += 1
+
+        # Liberar o que não será mais usado como contexto do próximo segmento
+        self._inicio_segmento = fim
+        descartar = max(fim - contexto, 0) - self._base
+        if descartar > 0:
+            del self._buffer[:descartar * BYTES_POR_AMOSTRA]
+            self._base += descartar
@@ -0,0 +1,366 @@
+"""
+Estatísticas dos Endpoints
+Latência e saúde observadas de cada endpoint, usadas pelo agendador para
+escolher endpoints e decidir quando duplicar um chunk atrasado
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from tts_client import Endpoint
+
+
+class HistoricoLatencias:
+    """
+    Janela deslizante das últimas latências (sucessos) de cada endpoint
+
+    Os quantis são calculados sob demanda sobre a janela, então se adaptam
+    quando um worker fica mais lento ou mais rápido.
+    """
+
+    def __init__(self, janela: int = 200, min_amostras: int = 20):
+        """
+        Args:
+            janela: Quantas latências guardar por endpoint
+            min_amostras: Abaixo disto o endpoint usa o histórico de todos os endpoints
+        """
+        self.janela = janela
+        self.min_amostras = min_amostras
+        self._lock = threading.Lock()
+        self._por_endpoint: Dict[str, Deque[float]] = {}
+        self._geral: Deque[float] = deque(maxlen=janela)
+        self._com_palavras: Dict[str, Deque[Tuple[int, float]]] = {}
+
+    def registrar(self, endpoint: str, segundos: float, palavras: Optional[int] = None):
+        """Registra a latência de uma requisição bem-sucedida (e o tamanho do chunk, se souber)"""
+        with self._lock:
+            if endpoint not in self._por_endpoint:
+                self._por_endpoint[endpoint] = deque(maxlen=self.janela)
+                self._com_palavras[endpoint] = deque(maxlen=self.janela)
+            self._por_endpoint[endpoint].append(segundos)
+            self._geral.append(segundos)
+            if palavras:
+                self._com_palavras[endpoint].append((palavras, segundos))
+
+    def modelo_por_palavra(self, endpoints: Optional[List[str]] = None,
+                           min_amostras: int = 5) -> Optional[Tuple[float, float]]:
+        """
+        Ajusta latência = fixo + por_palavra × palavras (mínimos quadrados)
+
+        Args:
+            endpoints: Considerar só estes endpoints (padrão: todos)
+            min_amostras: Mínimo de requisições observadas
+
+        Returns:
+            (segundos_fixos, segundos_por_palavra), ou None sem amostras suficientes
+        """
+        with self._lock:
+            nomes = endpoints if endpoints is not None else list(self._com_palavras)
+            pares = [par for nome in nomes for par in self._com_palavras.get(nome, ())]
+        if len(pares) < min_amostras:
+            return None
+
+        n = len(pares)
+        media_p = sum(p for p, _ in pares) / n
+        media_s = sum(s for _, s in pares) / n
+        variancia = sum((p - media_p) ** 2 for p, _ in pares)
+        if variancia < 1e-9 * n or media_p == 0:
+            # Chunks todos do mesmo tamanho: não dá para separar o custo fixo
+            return 0.0, media_s / media_p if media_p else 0.0
+
+        por_palavra = sum((p - media_p) * (s - media_s) for p, s in pares) / variancia
+        por_palavra = max(por_palavra, 0.0)
+        fixo = max(media_s - por_palavra * media_p, 0.0)
+        return fixo, por_palavra
+
+    def quantil(self, endpoint: str, q: float) -> Optional[float]:
+        """
+        Quantil q (0..1) da latência do endpoint
+
+        Returns:
+            Segundos, ou None se ainda não há amostras suficientes
+        """
+        with self._lock:
+            amostras = self._por_endpoint.get(endpoint)
+            if not amostras or len(amostras) < self.min_amostras:
+                amostras = self._geral
+            if len(amostras) < self.min_amostras:
+                return None
+            ordenadas = sorted(amostras)
+
+        return ordenadas[min(int(q * len(ordenadas)), len(ordenadas) - 1)]
+
+    def resumo(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/máximo de cada endpoint (para logs e interface)"""
+        with self._lock:
+            copia = {nome: sorted(amostras) for nome, amostras in self._por_endpoint.items()}
+
+        resumo = {}
+        for nome, ordenadas in copia.items():
+            n = len(ordenadas)
+            resumo[nome] = {
+                "amostras": n,
+                "p50": ordenadas[n // 2],
+                "p95": ordenadas[min(int(0.95 * n), n - 1)],
+                "max": ordenadas[-1],
+            }
+        return resumo
+
+
+class CotaEndpoints:
+    """
+    Requisições enviadas a cada endpoint no último minuto e no dia (UTC)
+
+    O dia vira à meia-noite UTC, quando o Google zera o RPD (mesma regra do
+    reset de meia-noite do sistema web).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ultimo_minuto: Dict[str, Deque[float]] = {}
+        self._hoje: Dict[str, int] = {}
+        self._dia = self._dia_utc()
+
+    @staticmethod
+    def _dia_utc() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def registrar(self, endpoint: str):
+        """Conta uma requisição enviada agora"""
+        with self._lock:
+            self._virar_dia()
+            agora = time.monotonic()
+            minuto = self._ultimo_minuto.setdefault(endpoint, deque())
+            minuto.append(agora)
+            while minuto and minuto[0] < agora - 60:
+                minuto.popleft()
+            self._hoje[endpoint] = self._hoje.get(endpoint, 0) + 1
+
+    def no_minuto(self, endpoint: str) -> int:
+        with self._lock:
+            minuto = self._ultimo_minuto.get(endpoint, ())
+            limite = time.monotonic() - 60
+            return sum(1 for t in minuto if t >= limite)
+
+    def hoje(self, endpoint: str) -> int:
+        with self._lock:
+            self._virar_dia()
+            return self._hoje.get(endpoint, 0)
+
+    def _virar_dia(self):
+        dia = self._dia_utc()
+        if dia != self._dia:
+            self._dia = dia
+            self._hoje.clear()
+
+
+class SaudeEndpoints:
+    """
+    Modelo de saúde dos endpoints (EWMA de latência e de taxa de erro)
+
+    Cada endpoint tem uma pontuação (menor = melhor):
+
+        latência_ewma × (1 + 4 × taxa_de_erro_ewma) × (1 + requisições_em_voo)
+
+    Novos chunks vão para o endpoint de menor pontuação, então um worker
+    lento ou instável recebe menos trabalho sem ser abandonado de vez.
+
+    Falhas seguidas (rede, timeout, 5xx) ejetam o endpoint por um tempo que
+    dobra a cada reincidência. Vencido o prazo ele fica "em teste" (half-open):
+    recebe uma única requisição, reservada em `escolher`; se der certo volta
+    ao normal, se falhar é ejetado de novo. 429 não ejeta: é cota, e o cooldown do agendador cuida disso.
+    """
+
+    OK = "ok"
+    EJETADO = "ejetado"
+    EM_TESTE = "em teste"
+
+    def __init__(self, alfa: float = 0.2, falhas_para_ejetar: int = 3,
+                 ejecao_inicial: float = 30.0, ejecao_maxima: float = 300.0):
+        """
+        Args:
+            alfa: Peso da observação mais recente nas médias (0..1)
+            falhas_para_ejetar: Falhas seguidas até ejetar o endpoint
+            ejecao_inicial: Primeira ejeção, em segundos
+            ejecao_maxima: Teto da ejeção após reincidências
+        """
+        self.alfa = alfa
+        self.falhas_para_ejetar = falhas_para_ejetar
+        self.ejecao_inicial = ejecao_inicial
+        self.ejecao_maxima = ejecao_maxima
+
+        self._lock = threading.Lock()
+        self._estado: Dict[str, Dict] = {}
+        self._rodizio = 0
+
+    def _obter(self, nome: str) -> Dict:
+        """Estado do endpoint (chamar com o lock)"""
+        if nome not in self._estado:
+            self._estado[nome] = {
+                "latencia": None,
+                "taxa_erro": 0.0,
+                "em_voo": 0,
+                "testando": False,
+                "sucessos": 0,
+                "falhas": 0,
+                "falhas_seguidas": 0,
+                "erros_429": 0,
+                "erros_503": 0,
+                "estado": self.OK,
+                "ejetado_ate": 0.0,
+                "ejecao": self.ejecao_inicial,
+            }
+        return self._estado[nome]
+
+    # ----- Observações -----
+
+    def registrar_inicio(self, nome: str):
+        """Uma requisição foi enviada ao endpoint"""
+        with self._lock:
+            self._obter(nome)["em_voo"] += 1
+
+    def registrar_sucesso(self, nome: str, segundos: float):
+        """A requisição terminou bem, em `segundos`"""
+        with self._lock:
+            e = self._obter(nome)
+            e["em_voo"] -= 1
+            e["testando"] = False
+            e["sucessos"] += 1
+            e["falhas_seguidas"] = 0
+            e["latencia"] = segundos if e["latencia"] is None else (
+                self.alfa * segundos + (1 - self.alfa) * e["latencia"])
+            e["taxa_erro"] *= 1 - self.alfa
+            if e["estado"] == self.EM_TESTE:
+                e["estado"] = self.OK
+                e["ejecao"] = self.ejecao_inicial
+                print(f"[SAUDE] ✅ {nome} voltou ao normal")
+
+    def registrar_falha(self, nome: str, status: Optional[int] = None):
+        """A requisição falhou (status HTTP, ou None para rede/timeout/áudio ruim)"""
+        with self._lock:
+            e = self._obter(nome)
+            e["em_voo"] -= 1
+            e["testando"] = False
+            e["falhas"] += 1
+            e["taxa_erro"] = self.alfa + (1 - self.alfa) * e["taxa_erro"]
+            if status == 429:
+                e["erros_429"] += 1
+                return
+            if status == 503:
+                e["erros_503"] += 1
+
+            e["falhas_seguidas"] += 1
+            if e["estado"] == self.EM_TESTE or e["falhas_seguidas"] >= self.falhas_para_ejetar:
+                self._ejetar(nome, e)
+
+    def registrar_cancelamento(self, nome: str):
+        """A requisição foi abandonada (cópia perdedora de uma duplicata)"""
+        with self._lock:
+            e = self._obter(nome)
+            e["em_voo"] -= 1
+            e["testando"] = False
+
+    def _ejetar(self, nome: str, e: Dict):
+        if e["estado"] == self.EM_TESTE:
+            e["ejecao"] = min(e["ejecao"] * 2, self.ejecao_maxima)
+        e["estado"] = self.EJETADO
+        e["ejetado_ate"] = time.monotonic() + e["ejecao"]
+        e["falhas_seguidas"] = 0
+        print(f"[SAUDE] ⛔ {nome} ejetado por {e['ejecao']:.0f}s")
+
+    # ----- Roteamento -----
+
+    def escolher(self, candidatos: List[Endpoint]) -> Optional[Endpoint]:
+        """
+        Melhor endpoint entre os candidatos (ex: os que não estão em cooldown)
+
+        Se todos estiverem ejetados, devolve o que sai da ejeção primeiro, como
+        teste: a vazão cai, mas o job não para. A requisição de teste fica
+        reservada aqui mesmo, sob o lock: outra thread que escolha antes de ela
+        ser enviada (registrar_inicio) não recebe o mesmo endpoint.
+
+        Returns:
+            None se a lista estiver vazia ou se todos os candidatos estiverem
+            ejetados com uma requisição ainda em andamento (tentar de novo depois)
+        """
+        if not candidatos:
+            return None
+
+        with self._lock:
+            agora = time.monotonic()
+            latencias = [e["latencia"] for e in self._estado.values() if e["latencia"] is not None]
+            latencia_padrao = sum(latencias) / len(latencias) if latencias else 1.0
+
+            # Rodízio no ponto de partida: em empate, os endpoints se alternam
+            self._rodizio += 1
+            inicio = self._rodizio % len(candidatos)
+            ordem = candidatos[inicio:] + candidatos[:inicio]
+
+            melhor, melhor_pontuacao = None, None
+            for endpoint in ordem:
+                e = self._obter(endpoint.nome)
+                if e["estado"] == self.EJETADO and agora >= e["ejetado_ate"]:
+                    e["estado"] = self.EM_TESTE
+                if e["estado"] == self.EJETADO:
+                    continue
+                if e["estado"] == self.EM_TESTE and (e["testando"] or e["em_voo"] > 0):
+                    continue  # Só uma requisição de teste por vez
+
+                pontuacao = self._pontuacao(e, latencia_padrao)
+                if melhor_pontuacao is None or pontuacao < melhor_pontuacao:
+                    melhor, melhor_pontuacao = endpoint, pontuacao
+
+            if melhor is None:
+                livres = [ep for ep in candidatos
+                          if not (self._obter(ep.nome)["testando"] or self._obter(ep.nome)["em_voo"])]
+                if not livres:
+                    return None
+                melhor = min(livres, key=lambda ep: self._obter(ep.nome)["ejetado_ate"])
+                self._obter(melhor.nome)["estado"] = self.EM_TESTE
+
+            e = self._obter(melhor.nome)
+            if e["estado"] == self.EM_TESTE:
+                e["testando"] = True
+            return melhor
+
+    def _pontuacao(self, e: Dict, latencia_padrao: float) -> float:
+        latencia = e["latencia"] if e["latencia"] is not None else latencia_padrao
+        return latencia * (1 + 4 * e["taxa_erro"]) * (1 + e["em_voo"])
+
+    def saudavel(self, nome: str) -> bool:
+        """False se o endpoint está ejetado ou em teste"""
+        with self._lock:
+            return self._obter(nome)["estado"] == self.OK
+
+    # ----- Interface -----
+
+    def instantaneo(self) -> List[Dict]:
+        """
+        Estado atual de cada endpoint, do melhor para o pior (para a interface)
+
+        Returns:
+            Lista de dicts com nome, estado, pontuacao, latencia, taxa_erro,
+            em_voo, sucessos, falhas, erros_429, erros_503
+        """
+        with self._lock:
+            latencias = [e["latencia"] for e in self._estado.values() if e["latencia"] is not None]
+            latencia_padrao = sum(latencias) / len(latencias) if latencias else 1.0
+
+            linhas = []
+            for nome, e in self._estado.items():
+                linhas.append({
+                    "nome": nome,
+                    "estado": e["estado"],
+                    "pontuacao": self._pontuacao(e, latencia_padrao),
+                    "latencia": e["latencia"],
+                    "taxa_erro": e["taxa_erro"],
+                    "em_voo": e["em_voo"],
+                    "sucessos": e["sucessos"],
+                    "falhas": e["falhas"],
+                    "erros_429": e["erros_429"],
+                    "erros_503": e["erros_503"],
+                })
+        return sorted(linhas, key=lambda linha: linha["pontuacao"])
@@ -0,0 +1,508 @@
+"""
+Diário de Jobs de Síntese
+Registro append-only que permite retomar um job interrompido (crash, notebook
+fechado, sessão expirada) sem re-dividir o texto nem re-sintetizar chunks prontos
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from audio_output import EmendaCrossfade, EscritorWav
+from chunk_table import TabelaChunks, TextosChunks
+from compression_stage import EstagioCompressao
+from job_trace import ativar, trecho
+from memory_report import etapa
+from progress_bus import FALHOU, PENDENTE, PRONTO
+from srt_writer import EscritorSrt, LegendasEmOrdem
+from synthesis_scheduler import AgendadorSintese, EstatisticasJob, FalhaJob
+from tts_client import BYTES_POR_AMOSTRA
+
+
+PASTA_JOBS = "jobs_sintese"
+
+ARQUIVO_DIARIO = "diario.jsonl"
+ARQUIVO_AUDIO = "audio.pcm"
+ARQUIVO_TEXTOS = "textos.txt"
+
+# Jobs concluídos guardam só diario.jsonl e textos.txt (load_harness.py reproduz
+# jobs reais a partir deles); passado este prazo a pasta inteira é apagada
+IDADE_MAXIMA_CONCLUIDO = 7 * 24 * 3600
+
+
+class DiarioJob:
+    """
+    Diário de um job de síntese
+
+    Estrutura da pasta do job:
+        diario.jsonl  - uma linha JSON por evento (plano, chunk, falha, concluido)
+        textos.txt    - textos dos chunks, um atrás do outro (o plano guarda os tamanhos)
+        audio.pcm     - PCM dos chunks prontos, na ordem em que terminaram
+
+    Cada chunk concluído é gravado em audio.pcm e depois registrado no diário
+    com offset, tamanho e SHA-256; as duas escritas são sincronizadas em disco
+    antes de seguir. Se o processo morrer entre elas, o PCM sem registro é
+    descartado ao reabrir. Quando o job termina, audio.pcm é apagado (o áudio
+    já está no WAV final).
+
+    Em memória, o estado de cada chunk fica numa TabelaChunks (colunas NumPy,
+    ver chunk_table.py) e `chunks` lê os textos de textos.txt sob demanda.
+    """
+
+    def __init__(self, pasta: str):
+        """
+        Use DiarioJob.criar() ou DiarioJob.abrir() em vez do construtor.
+
+        Args:
+            pasta: Pasta do job
+        """
+        self.pasta = pasta
+        self.job_id = os.path.basename(pasta)
+        self.chunks: Sequence[str] = []
+        self.voz = ""
+        self.prompt = ""
+        self.saida = ""
+        self.criado_em = 0.0
+        self.concluido = False
+        # Chunks unidos ao anterior com crossfade (frases reaproveitadas)
+        self.emendas: List[int] = []
+        # (voz, prompt) próprios de alguns chunks (outro idioma, ver language_detect.py)
+        self.rotas: Dict[int, Tuple[str, str]] = {}
+
+        # Situação, tentativas e offsets do PCM de cada chunk
+        self.tabela = TabelaChunks(0)
+        self.falhas: Dict[int, str] = {}
+
+        self._lock = threading.Lock()
+        self._fim_dados = 0
+
+    # ----- Criação / abertura -----
+
+    @classmethod
+    def criar(cls, chunks: List[str], voz: str, prompt: str, saida: str,
+              pasta_base: str = PASTA_JOBS, emendas: Optional[List[int]] = None,
+              rotas: Optional[Dict[int, Tuple[str, str]]] = None) -> "DiarioJob":
+        """
+        Cria um novo job e grava o plano de chunks
+
+        Args:
+            chunks: Textos dos chunks (já divididos)
+            voz: Voz a ser usada
+            prompt: Instrução de estilo
+            saida: Caminho do WAV final
+            pasta_base: Pasta onde os jobs são guardados
+            emendas: Chunks unidos ao anterior com crossfade (ver phrase_reuse.py)
+            rotas: (voz, prompt) de chunks que fogem da voz do job (ver language_detect.py)
+        """
+        diario = cls(os.path.join(pasta_base, uuid.uuid4().hex))
+        os.makedirs(diario.pasta)
+
+        tamanhos = TabelaChunks(len(chunks))
+        TextosChunks.gravar(os.path.join(diario.pasta, ARQUIVO_TEXTOS), chunks, tamanhos)
+        diario.voz = voz
+        diario.prompt = prompt
+        diario.saida = saida
+        diario.criado_em = time.time()
+        diario.emendas = list(emendas or [])
+        diario.rotas = dict(rotas or {})
+
+        open(os.path.join(diario.pasta, ARQUIVO_AUDIO), "wb").close()
+        diario._anexar({
+            "tipo": "plano",
+            "textos": ARQUIVO_TEXTOS,
+            "tamanhos_textos": tamanhos.tamanho_texto.tolist(),
+            "voz": voz,
+            "prompt": prompt,
+            "saida": saida,
+            "criado_em": diario.criado_em,
+            "emendas": diario.emendas,
+            "rotas": {str(i): list(rota) for i, rota in diario.rotas.items()},
+        })
+        return diario
+
+    @classmethod
+    def abrir(cls, pasta: str) -> "DiarioJob":
+        """
+        Reabre um job existente reproduzindo o diário
+
+        Raises:
+            ValueError: Se o diário não tiver o registro de plano
+        """
+        diario = cls(pasta)
+        caminho = os.path.join(pasta, ARQUIVO_DIARIO)
+
+        fim_valido = 0
+        with open(caminho, "rb") as f:
+            for linha in f:
+                try:
+                    if not linha.endswith(b"\n"):
+                        raise ValueError("linha incompleta")
+                    registro = json.loads(linha.decode("utf-8"))
+                except ValueError:
+                    # Última linha pela metade (processo morto no meio da escrita)
+                    break
+                diario._aplicar(registro)
+                fim_valido += len(linha)
+
+        if not len(diario.chunks):
+            diario.fechar()
+            raise ValueError(f"Diário sem plano de chunks: {caminho}")
+
+        # Cortar o lixo do fim para que os próximos registros fiquem em linhas válidas
+        if os.path.getsize(caminho) > fim_valido:
+            with open(caminho, "r+b") as f:
+                f.truncate(fim_valido)
+
+        diario._descartar_dados_orfaos()
+        return diario
+
+    # ----- Registro de eventos -----
+
+    def registrar_chunk(self, indice: int, pcm: bytes):
+        """
+        Grava o PCM de um chunk concluído e registra no diário
+
+        Pode ser chamado de qualquer thread.
+        """
+        with trecho("gravar diário", "escrita", chunk=indice + 1, bytes=len(pcm)):
+            self._registrar_chunk(indice, pcm)
+
+    def _registrar_chunk(self, indice: int, pcm: bytes):
+        soma = hashlib.sha256(pcm).hexdigest()
+        with self._lock:
+            with open(os.path.join(self.pasta, ARQUIVO_AUDIO), "r+b") as f:
+                f.seek(self._fim_dados)
+                f.write(pcm)
+                f.flush()
+                os.fsync(f.fileno())
+            offset = self._fim_dados
+            self._fim_dados += len(pcm)
+
+            self._anexar_sem_lock({
+                "tipo": "chunk",
+                "indice": indice,
+                "offset": offset,
+                "tamanho": len(pcm),
+                "sha256": soma,
+            })
+
+    def registrar_falha(self, indice: int, erro: str):
+        """Registra que um chunk falhou (será refeito ao retomar)"""
+        self._anexar({"tipo": "falha", "indice": indice, "erro": erro})
+
+    def chunks_faltando(self) -> List[int]:
+        """Índices dos chunks que ainda precisam ser sintetizados"""
+        return self.tabela.indices_exceto(PRONTO).tolist()
+
+    def prontos(self) -> List[int]:
+        """Índices dos chunks já gravados, em ordem"""
+        return self.tabela.indices(PRONTO).tolist()
+
+    def ler_chunk(self, indice: int) -> bytes:
+        """
+        Lê o PCM de um chunk pronto, conferindo o checksum
+
+        Raises:
+            ValueError: Se o PCM no disco não bater com o checksum registrado
+        """
+        registro = self.tabela[indice]
+        with open(os.path.join(self.pasta, ARQUIVO_AUDIO), "rb") as f:
+            f.seek(registro.offset_pcm)
+            pcm = f.read(registro.tamanho_pcm)
+        if hashlib.sha256(pcm).digest() != registro.sha256:
+            raise ValueError(f"Checksum inválido no chunk {indice + 1}")
+        return pcm
+
+    def verificar(self) -> List[int]:
+        """
+        Confere o checksum de todos os chunks prontos
+
+        Chunks corrompidos voltam para a lista de faltando.
+
+        Returns:
+            Índices dos chunks que estavam corrompidos
+        """
+        corrompidos = []
+        for indice in self.prontos():
+            try:
+                self.ler_chunk(indice)
+            except (ValueError, OSError):
+                corrompidos.append(indice)
+        for indice in corrompidos:
+            self.tabela.marcar(indice, PENDENTE)
+        return corrompidos
+
+    def finalizar(self, caminho_srt: Optional[str] = None) -> float:
+        """
+        Monta o WAV final na ordem do plano, marca o job como concluído e apaga audio.pcm
+
+        Args:
+            caminho_srt: Se informado, gera as legendas na mesma passada do WAV
+
+        Returns:
+            Duração do áudio em segundos
+
+        Raises:
+            ValueError: Se ainda houver chunks faltando
+        """
+        faltando = self.chunks_faltando()
+        if faltando:
+            raise ValueError(f"Job incompleto: faltam {len(faltando)} chunk(s)")
+
+        srt = EscritorSrt(caminho_srt) if caminho_srt else None
+        emenda = EmendaCrossfade(self.emendas)
+        try:
+            with trecho("montar WAV", "escrita", chunks=len(self.chunks)), EscritorWav(self.saida) as wav:
+                for indice, texto in enumerate(self.chunks):
+                    pcm = emenda.processar(indice, self.ler_chunk(indice))
+                    wav.escrever(pcm)
+                    if srt:
+                        srt.adicionar_chunk(texto, len(pcm) // BYTES_POR_AMOSTRA)
+                duracao = wav.duracao
+        finally:
+            if srt:
+                srt.fechar()
+
+        self._anexar({"tipo": "concluido", "duracao": duracao})
+        self.concluido = True
+        # O PCM dos chunks já está no WAV: guardá-lo só ocuparia disco
+        try:
+            os.remove(os.path.join(self.pasta, ARQUIVO_AUDIO))
+        except OSError as e:
+            print(f"[DIARIO] Não foi possível apagar o PCM do job {self.job_id[:8]}: {e}")
+        return duracao
+
+    def fechar(self):
+        """Libera o arquivo de textos (o diário não deve mais ser usado)"""
+        if isinstance(self.chunks, TextosChunks):
+            self.chunks.fechar()
+
+    def apagar(self):
+        """Remove a pasta do job (após o usuário recusar a retomada, por exemplo)"""
+        self.fechar()
+        for nome in os.listdir(self.pasta):
+            os.remove(os.path.join(self.pasta, nome))
+        os.rmdir(self.pasta)
+
+    # ----- Internos -----
+
+    def _anexar(self, registro: Dict):
+        with self._lock:
+            self._anexar_sem_lock(registro)
+
+    def _anexar_sem_lock(self, registro: Dict):
+        """Acrescenta uma linha ao diário e sincroniza em disco"""
+        with open(os.path.join(self.pasta, ARQUIVO_DIARIO), "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._aplicar(registro)
+
+    def _aplicar(self, registro: Dict):
+        """Atualiza o estado em memória a partir de um registro"""
+        tipo = registro.get("tipo")
+        if tipo == "plano":
+            if "chunks" in registro:
+                # Diário anterior ao textos.txt: os textos vêm no próprio plano
+                self.chunks = registro["chunks"]
+                self.tabela = TabelaChunks(len(self.chunks))
+            else:
+                self.tabela = TabelaChunks(len(registro["tamanhos_textos"]))
+                TextosChunks.preencher_offsets(self.tabela, registro["tamanhos_textos"])
+                self.chunks = TextosChunks(os.path.join(self.pasta, registro["textos"]), self.tabela)
+            self.voz = registro["voz"]
+            self.prompt = registro["prompt"]
+            self.saida = registro["saida"]
+            self.criado_em = registro["criado_em"]
+            self.emendas = registro.get("emendas", [])
+            self.rotas = {int(i): tuple(rota) for i, rota in registro.get("rotas", {}).items()}
+        elif tipo == "chunk":
+            indice = registro["indice"]
+            self.tabela.registrar_pcm(indice, registro["offset"], registro["tamanho"],
+                                      bytes.fromhex(registro["sha256"]))
+            self.falhas.pop(indice, None)
+            self._fim_dados = max(self._fim_dados, registro["offset"] + registro["tamanho"])
+        elif tipo == "falha":
+            self.falhas[registro["indice"]] = registro["erro"]
+            if not self.tabela.esta_em(registro["indice"], PRONTO):
+                self.tabela.marcar(registro["indice"], FALHOU)
+        elif tipo == "concluido":
+            self.concluido = True
+
+    def _descartar_dados_orfaos(self):
+        """Trunca PCM gravado após o último registro (escrito antes de um crash)"""
+        caminho = os.path.join(self.pasta, ARQUIVO_AUDIO)
+        if self.concluido and not os.path.exists(caminho):
+            # PCM apagado ao concluir: se o job for refeito, verificar() marca tudo como faltando
+            open(caminho, "wb").close()
+            return
+        if os.path.getsize(caminho) > self._fim_dados:
+            with open(caminho, "r+b") as f:
+                f.truncate(self._fim_dados)
+
+
+def listar_jobs_inacabados(pasta_base: str = PASTA_JOBS) -> List[DiarioJob]:
+    """
+    Lista os jobs que não chegaram ao fim, do mais recente para o mais antigo
+
+    Jobs concluídos há mais de IDADE_MAXIMA_CONCLUIDO são apagados no caminho.
+
+    Args:
+        pasta_base: Pasta onde os jobs são guardados
+    """
+    if not os.path.isdir(pasta_base):
+        return []
+
+    jobs = []
+    agora = time.time()
+    for nome in os.listdir(pasta_base):
+        pasta = os.path.join(pasta_base, nome)
+        if not os.path.isfile(os.path.join(pasta, ARQUIVO_DIARIO)):
+            continue
+        try:
+            diario = DiarioJob.abrir(pasta)
+        except (OSError, ValueError) as e:
+            print(f"[DIARIO] Ignorando job ilegível {nome}: {e}")
+            continue
+        if diario.concluido:
+            if agora - os.path.getmtime(os.path.join(pasta, ARQUIVO_DIARIO)) > IDADE_MAXIMA_CONCLUIDO:
+                print(f"[DIARIO] Removendo job concluído antigo {nome[:8]}")
+                try:
+                    diario.apagar()
+                except OSError as e:
+                    print(f"[DIARIO] Não foi possível remover {nome}: {e}")
+            else:
+                diario.fechar()
+        else:
+            jobs.append(diario)
+
+    return sorted(jobs, key=lambda d: d.criado_em, reverse=True)
+
+
+def executar_job(agendador: AgendadorSintese, diario: DiarioJob,
+                 compressao: Optional[EstagioCompressao] = None,
+                 caminho_srt: Optional[str] = None,
+                 estatisticas: Optional[EstatisticasJob] = None,
+                 ao_concluir_chunk: Optional[Callable[[int, bytes], None]] = None) -> float:
+    """
+    Executa (ou retoma) um job usando o diário
+
+    Só os chunks faltando são enviados ao agendador; cada chunk pronto é
+    gravado no diário imediatamente.
+
+    Args:
+        agendador: AgendadorSintese configurado
+        diario: Diário do job
+        compressao: Estágio de compressão opcional, alimentado enquanto a síntese roda
+        caminho_srt: Se informado, gera as legendas durante a síntese: cada chunk que
+                     completa a sequência já entra no .srt
+        estatisticas: Contadores do job (peso na divisão justa, requisições feitas);
+                      com `estatisticas.rastreio`, a linha do tempo cobre também a
+                      escrita e a compressão; com `estatisticas.perfil_memoria`, cada
+                      estágio entra no relatório de memória; com `estatisticas.progresso`,
+                      os chunks já prontos do diário entram como prontos
+        ao_concluir_chunk: Callback extra por chunk pronto (ex: SaidaEmOrdem.receber);
+                           recebe também os chunks já prontos de uma execução anterior,
+                           e o início do roteiro passa a ter prioridade
+
+    Returns:
+        Duração do áudio final em segundos
+
+    Raises:
+        FalhaJob: Se algum chunk falhar (o progresso fica salvo para outra retomada)
+    """
+    perfil = estatisticas.perfil_memoria if estatisticas else None
+    try:
+        with ativar(estatisticas.rastreio if estatisticas else None):
+            return _executar_job(agendador, diario, compressao, caminho_srt, estatisticas,
+                                 ao_concluir_chunk)
+    finally:
+        if perfil is not None:
+            perfil.finalizar()
+
+
+def _executar_job(agendador: AgendadorSintese, diario: DiarioJob,
+                  compressao: Optional[EstagioCompressao], caminho_srt: Optional[str],
+                  estatisticas: Optional[EstatisticasJob],
+                  ao_concluir_chunk: Optional[Callable[[int, bytes], None]]) -> float:
+    """Corpo de executar_job (com a linha do tempo do job já ativa na thread)"""
+    perfil = estatisticas.perfil_memoria if estatisticas else None
+    with etapa(perfil, "verificar diário"):
+        corrompidos = diario.verificar()
+    if corrompidos:
+        print(f"[DIARIO] {len(corrompidos)} chunk(s) corrompido(s) serão refeitos")
+
+    faltando = diario.chunks_faltando()
+    if estatisticas is not None and estatisticas.progresso is not None:
+        for indice in diario.prontos():
+            estatisticas.progresso.publicar(indice, PRONTO, bytes_pcm=diario.tabela[indice].tamanho_pcm)
+    print(f"[DIARIO] Job {diario.job_id[:8]}: {len(diario.chunks) - len(faltando)}/"
+          f"{len(diario.chunks)} chunks já prontos")
+
+    legendas = LegendasEmOrdem(caminho_srt, diario.chunks, diario.emendas) if caminho_srt else None
+    try:
+        return _sintetizar_e_montar(agendador, diario, compressao, legendas, estatisticas,
+                                    ao_concluir_chunk, faltando)
+    finally:
+        if legendas is not None:
+            legendas.fechar()
+
+
+def _sintetizar_e_montar(agendador: AgendadorSintese, diario: DiarioJob,
+                         compressao: Optional[EstagioCompressao],
+                         legendas: Optional[LegendasEmOrdem],
+                         estatisticas: Optional[EstatisticasJob],
+                         ao_concluir_chunk: Optional[Callable[[int, bytes], None]],
+                         faltando: List[int]) -> float:
+    """Síntese dos chunks faltando e montagem do WAV (parte de _executar_job)"""
+    perfil = estatisticas.perfil_memoria if estatisticas else None
+    destinos: List[Callable[[int, bytes], None]] = []
+    if compressao is not None:
+        destinos.append(compressao.adicionar_chunk)
+    if legendas is not None:
+        destinos.append(legendas.receber)
+    if ao_concluir_chunk is not None:
+        destinos.append(ao_concluir_chunk)
+
+    # Chunks já prontos de uma execução anterior entram direto nos destinos
+    with etapa(perfil, "reenviar chunks prontos"):
+        for indice in (diario.prontos() if destinos else []):
+            pcm = diario.ler_chunk(indice)
+            for destino in destinos:
+                destino(indice, pcm)
+
+    def registrar(indice: int, pcm: bytes):
+        diario.registrar_chunk(indice, pcm)
+        for destino in destinos:
+            destino(indice, pcm)
+
+    if faltando:
+        try:
+            with etapa(perfil, "síntese"):
+                agendador.sintetizar_job(
+                    diario.chunks, diario.voz, diario.prompt,
+                    ao_concluir_chunk=registrar,
+                    indices=faltando,
+                    estatisticas=estatisticas,
+                    priorizar_inicio=ao_concluir_chunk is not None,
+                    guardar_resultados=False,
+                    rotas=diario.rotas,
+                    tabela=diario.tabela,
+                )
+        except FalhaJob as e:
+            for indice, erro in e.erros.items():
+                diario.registrar_falha(indice, erro)
+            if compressao is not None:
+                compressao.cancelar()
+            raise
+
+    with etapa(perfil, "montar WAV"):
+        duracao = diario.finalizar()
+    if compressao is not None:
+        with etapa(perfil, "finalizar compressão"):
+            compressao.finalizar(len(diario.chunks))
+    return duracao
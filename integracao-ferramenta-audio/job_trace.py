@@ -0,0 +1,169 @@
+"""
+Linha do Tempo dos Jobs (Chrome Trace / Perfetto)
+Registra espera na fila, cooldown, HTTP, decodificação, validação, escrita e
+compressão de cada chunk, por thread e por endpoint, num JSON que abre em
+chrome://tracing ou https://ui.perfetto.dev
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from synthesis_cache import escrever_atomico
+
+
+# Trilhas (pid) do arquivo: threads do processo, endpoints, chunks e o pool de compressão
+PID_THREADS = 1
+PID_ENDPOINTS = 2
+PID_CHUNKS = 3
+PID_COMPRESSAO = 4
+
+_NOMES_TRILHAS = {
+    PID_THREADS: "Threads",
+    PID_ENDPOINTS: "Endpoints",
+    PID_CHUNKS: "Chunks",
+    PID_COMPRESSAO: "Compressão (processos)",
+}
+
+_local = threading.local()
+
+
+class RastreadorJob:
+    """
+    Coleta os eventos de um job no formato Trace Event do Chrome
+
+    - Trechos ("X") nas threads: o que cada thread estava fazendo
+    - Trechos assíncronos ("b"/"e") por endpoint: requisições em voo, com sobreposição
+    - Trechos assíncronos por chunk: da entrada na fila até o PCM pronto
+
+    Os tempos são de relógio (time.time), para que os trechos medidos nos
+    processos de compressão caiam na mesma escala.
+    """
+
+    def __init__(self, nome: str = "job"):
+        """
+        Args:
+            nome: Nome do job (aparece nos metadados do arquivo)
+        """
+        self.nome = nome
+        self.inicio = time.time()
+        self._lock = threading.Lock()
+        self._eventos: List[Dict] = []
+        self._threads: Dict[int, str] = {}
+        self._ids = itertools.count(1)
+
+    # ----- Registro -----
+
+    def trecho_completo(self, nome: str, categoria: str, inicio: float, fim: float,
+                        pid: int = PID_THREADS, tid: Optional[int] = None, **args):
+        """Registra um trecho já medido (tempos em segundos de time.time)"""
+        if tid is None:
+            tid = self._tid_atual()
+        self._anexar({"name": nome, "cat": categoria, "ph": "X", "pid": pid, "tid": tid,
+                      "ts": self._us(inicio), "dur": max(self._us(fim) - self._us(inicio), 0),
+                      "args": args})
+
+    def assincrono(self, nome: str, categoria: str, inicio: float, fim: float,
+                   pid: int, id_evento: Optional[int] = None, **args):
+        """Registra um trecho que pode se sobrepor a outros da mesma trilha"""
+        if id_evento is None:
+            id_evento = next(self._ids)
+        base = {"name": nome, "cat": categoria, "pid": pid, "tid": 0, "id": id_evento}
+        self._anexar(dict(base, ph="b", ts=self._us(inicio), args=args))
+        self._anexar(dict(base, ph="e", ts=self._us(fim)))
+
+    def instante(self, nome: str, categoria: str = "evento", **args):
+        """Marca um instante na thread atual (ex: 429 recebido)"""
+        self._anexar({"name": nome, "cat": categoria, "ph": "i", "s": "t", "pid": PID_THREADS,
+                      "tid": self._tid_atual(), "ts": self._us(time.time()), "args": args})
+
+    # ----- Exportação -----
+
+    def eventos(self) -> List[Dict]:
+        """Eventos registrados, com os metadados de nomes de trilhas e threads"""
+        metadados = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": nome}}
+                     for pid, nome in _NOMES_TRILHAS.items()]
+        with self._lock:
+            metadados += [{"name": "thread_name", "ph": "M", "pid": PID_THREADS, "tid": tid,
+                           "args": {"name": nome}} for tid, nome in self._threads.items()]
+            return metadados + list(self._eventos)
+
+    def salvar(self, caminho: str) -> str:
+        """Grava o JSON (Trace Event Format) e devolve o caminho"""
+        dados = {
+            "traceEvents": self.eventos(),
+            "displayTimeUnit": "ms",
+            "otherData": {"job": self.nome, "inicio": self.inicio},
+        }
+        escrever_atomico(caminho, json.dumps(dados, ensure_ascii=False).encode("utf-8"))
+        print(f"[TRACE] Linha do tempo salva em {caminho} (abrir em https://ui.perfetto.dev)")
+        return caminho
+
+    # ----- Internos -----
+
+    def _us(self, instante: float) -> int:
+        return int((instante - self.inicio) * 1_000_000)
+
+    def _tid_atual(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            with self._lock:
+                self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def _anexar(self, evento: Dict):
+        with self._lock:
+            self._eventos.append(evento)
+
+
+# ===== Rastreador ativo na thread =====
+
+def ativo() -> Optional[RastreadorJob]:
+    """Rastreador do job que a thread atual está executando (ou None)"""
+    return getattr(_local, "rastreador", None)
+
+
+@contextmanager
+def ativar(rastreador: Optional[RastreadorJob]) -> Iterator[None]:
+    """Torna o rastreador ativo na thread atual durante o bloco"""
+    anterior = ativo()
+    _local.rastreador = rastreador
+    try:
+        yield
+    finally:
+        _local.rastreador = anterior
+
+
+@contextmanager
+def trecho(nome: str, categoria: str = "sintese", endpoint: Optional[str] = None,
+           **args) -> Iterator[None]:
+    """
+    Mede um trecho na thread atual, se houver rastreador ativo (senão, não faz nada)
+
+    Com `endpoint`, o trecho também aparece na trilha do endpoint.
+    """
+    rastreador = ativo()
+    if rastreador is None:
+        yield
+        return
+
+    inicio = time.time()
+    try:
+        yield
+    finally:
+        fim = time.time()
+        if endpoint is not None:
+            # O nome do evento assíncrono define a trilha: uma por endpoint
+            rastreador.assincrono(endpoint, categoria, inicio, fim, PID_ENDPOINTS,
+                                  etapa=nome, **args)
+            args["endpoint"] = endpoint
+        rastreador.trecho_completo(nome, categoria, inicio, fim, **args)
+
+
+def caminho_trace(saida: str) -> str:
+    """Arquivo da linha do tempo ao lado da saída do job (audio.wav → audio.trace.json)"""
+    return os.path.splitext(saida)[0] + ".trace.json"
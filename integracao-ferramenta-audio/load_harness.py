@@ -0,0 +1,340 @@
+"""
+Teste de Carga da Síntese
+Reproduz jobs reais (diários de jobs, roteiros .txt ou tamanhos sintéticos)
+contra o servidor TTS local e mede vazão, latência de cauda e quanto da cota
+virou áudio aproveitado
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from adaptive_concurrency import ControladorAimd
+from job_journal import DiarioJob
+from local_tts_server import ServidorTTSLocal, carregar_config
+from synthesis_cache import escrever_atomico
+from synthesis_scheduler import (AgendadorSintese, ConfigDuplicacao, EstatisticasJob, FalhaJob,
+                                 ReguladorJusto)
+from text_chunker import contar_palavras, dividir_texto_para_tts
+from tts_client import (BYTES_POR_AMOSTRA, GEMINI_TTS_MODEL, TAXA_AMOSTRAGEM, ClienteTTS, Endpoint,
+                        ErroSintese)
+
+
+class PerfilJob:
+    """
+    Um job a reproduzir
+
+    Attributes:
+        nome: Identificação no relatório
+        chunks: Textos dos chunks (só o tamanho importa para o servidor local)
+        voz / prompt: Repassados ao agendador
+        chegada: Segundos após o início do teste em que o job entra
+    """
+
+    def __init__(self, nome: str, chunks: List[str], voz: str = "Kore", prompt: str = "",
+                 chegada: float = 0.0):
+        self.nome = nome
+        self.chunks = chunks
+        self.voz = voz
+        self.prompt = prompt
+        self.chegada = chegada
+
+    @property
+    def palavras(self) -> int:
+        return sum(contar_palavras(c) for c in self.chunks)
+
+
+def perfil_sintetico(nome: str, palavras_por_chunk: List[int], chegada: float = 0.0) -> PerfilJob:
+    """Job com chunks do tamanho pedido (texto de enchimento)"""
+    chunks = [" ".join(f"palavra{i % 50}" for i in range(n)) + "." for n in palavras_por_chunk]
+    return PerfilJob(nome, chunks, chegada=chegada)
+
+
+def carregar_perfis(caminhos: List[str], intervalo_chegada: float = 0.0) -> List[PerfilJob]:
+    """
+    Lê os jobs a reproduzir
+
+    Cada caminho pode ser a pasta de um diário (jobs_sintese/<id>), uma pasta
+    com vários diários, um roteiro .txt ou um JSON com
+    [{"nome": ..., "palavras_por_chunk": [...], "chegada": ...}, ...].
+
+    Args:
+        caminhos: Arquivos e pastas
+        intervalo_chegada: Segundos entre a entrada de um job e a do seguinte
+                           (quando o perfil não define a chegada)
+    """
+    perfis: List[PerfilJob] = []
+
+    def adicionar(perfil: PerfilJob):
+        if not perfil.chegada:
+            perfil.chegada = len(perfis) * intervalo_chegada
+        perfis.append(perfil)
+
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            pastas = [caminho] if os.path.exists(os.path.join(caminho, "diario.jsonl")) else [
+                os.path.join(caminho, nome) for nome in sorted(os.listdir(caminho))
+                if os.path.exists(os.path.join(caminho, nome, "diario.jsonl"))]
+            for pasta in pastas:
+                diario = DiarioJob.abrir(pasta)
+                adicionar(PerfilJob(os.path.basename(pasta), diario.chunks, diario.voz, diario.prompt))
+        elif caminho.endswith(".json"):
+            with open(caminho, "r", encoding="utf-8") as f:
+                for item in json.load(f):
+                    adicionar(perfil_sintetico(item["nome"], item["palavras_por_chunk"],
+                                               item.get("chegada", 0.0)))
+        else:
+            with open(caminho, "r", encoding="utf-8") as f:
+                adicionar(PerfilJob(os.path.basename(caminho), dividir_texto_para_tts(f.read())))
+    return perfis
+
+
+class ClienteMedido:
+    """
+    ClienteTTS que registra cada requisição (latência e resultado)
+
+    Mede do lado do cliente: inclui a espera pela resposta, o download e a
+    decodificação, como o agendador enxerga.
+    """
+
+    def __init__(self, cliente: Optional[ClienteTTS] = None):
+        self.cliente = cliente or ClienteTTS()
+        self.registros: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def sintetizar(self, endpoint: Endpoint, texto: str, voz: str, prompt: str = "",
+                   cancelar: Optional[threading.Event] = None) -> bytes:
+        inicio = time.monotonic()
+        resultado = "ok"
+        try:
+            return self.cliente.sintetizar(endpoint, texto, voz, prompt, cancelar)
+        except ErroSintese as e:
+            if cancelar is not None and cancelar.is_set():
+                resultado = "cancelada"
+            else:
+                resultado = str(e.status or ("timeout" if e.timeout else "rede"))
+            raise
+        finally:
+            with self._lock:
+                self.registros.append({"endpoint": endpoint.nome, "palavras": contar_palavras(texto),
+                                       "segundos": time.monotonic() - inicio, "resultado": resultado})
+
+
+def _quantil(ordenados: List[float], q: float) -> float:
+    if not ordenados:
+        return 0.0
+    return ordenados[min(int(q * len(ordenados)), len(ordenados) - 1)]
+
+
+class TesteCarga:
+    """
+    Roda os jobs ao mesmo tempo sobre um agendador compartilhado
+
+    Igual à fila de lotes: um AgendadorSintese para todos os jobs e, com
+    `limite_global`, um ReguladorJusto dividindo as requisições entre eles.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], max_paralelo: int = 6,
+                 limite_global: Optional[int] = None, aimd: bool = False,
+                 duplicacao: bool = False, validar: bool = False):
+        """
+        Args:
+            endpoints: Endpoints do servidor local (ou de outro servidor de teste)
+            max_paralelo: Requisições simultâneas por job
+            limite_global: Requisições simultâneas somando todos os jobs
+            aimd: Usar o limite adaptativo por endpoint
+            duplicacao: Duplicar chunks atrasados (hedge)
+            validar: Passar cada resposta pelo ValidadorAudio
+        """
+        self.cliente = ClienteMedido()
+        validador = None
+        if validar:
+            from audio_validation import ValidadorAudio
+            validador = ValidadorAudio()
+        self.agendador = AgendadorSintese(
+            endpoints, cliente=self.cliente, max_paralelo=max_paralelo,
+            regulador=ReguladorJusto(limite_global) if limite_global else None,
+            validador=validador,
+            duplicacao=ConfigDuplicacao() if duplicacao else None,
+            # Sem arquivo de estado: cada teste começa com os limites iniciais
+            concorrencia=ControladorAimd(arquivo_estado=None) if aimd else None,
+        )
+        self.jobs: List[Dict] = []
+        self.inicio = 0.0
+        self.fim = 0.0
+
+    def executar(self, perfis: List[PerfilJob]) -> List[Dict]:
+        """Roda todos os jobs (cada um entra na sua chegada) e espera o fim"""
+        self.inicio = time.monotonic()
+        lock = threading.Lock()
+
+        def rodar(perfil: PerfilJob):
+            time.sleep(max(perfil.chegada - (time.monotonic() - self.inicio), 0))
+            estatisticas = EstatisticasJob(job_id=perfil.nome)
+            inicio = time.monotonic()
+            falhas = 0
+            try:
+                self.agendador.sintetizar_job(perfil.chunks, perfil.voz, perfil.prompt,
+                                              estatisticas=estatisticas, guardar_resultados=False)
+            except FalhaJob as e:
+                falhas = len(e.chunks_falhados)
+            with lock:
+                self.jobs.append({
+                    "nome": perfil.nome, "chunks": len(perfil.chunks), "palavras": perfil.palavras,
+                    "falhas": falhas, "requisicoes": estatisticas.requisicoes,
+                    "duplicadas": estatisticas.duplicadas, "rejeitados": estatisticas.rejeitados,
+                    "segundos_audio": estatisticas.bytes_audio / (TAXA_AMOSTRAGEM * BYTES_POR_AMOSTRA),
+                    "espera": inicio - self.inicio - perfil.chegada,
+                    "duracao": time.monotonic() - inicio,
+                })
+
+        threads = [threading.Thread(target=rodar, args=(perfil,), name=f"job_{perfil.nome}")
+                   for perfil in perfis]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.fim = time.monotonic()
+        return self.jobs
+
+    def relatorio(self, servidor: Optional[Dict] = None) -> Dict:
+        """
+        Vazão, latência e eficiência de cota do teste
+
+        Args:
+            servidor: estatisticas() do servidor local; sem elas, a cota
+                      consumida é estimada pelas requisições enviadas
+        """
+        duracao = self.fim - self.inicio
+        chunks = sum(j["chunks"] - j["falhas"] for j in self.jobs)
+        segundos_audio = sum(j["segundos_audio"] for j in self.jobs)
+        registros = self.cliente.registros
+        sucessos = sorted(r["segundos"] for r in registros if r["resultado"] == "ok")
+        por_resultado: Dict[str, int] = {}
+        for registro in registros:
+            por_resultado[registro["resultado"]] = por_resultado.get(registro["resultado"], 0) + 1
+
+        consumida = servidor["totais"]["aceitas"] if servidor else len(registros)
+        return {
+            "duracao": duracao,
+            "jobs": len(self.jobs),
+            "chunks": chunks,
+            "falhas": sum(j["falhas"] for j in self.jobs),
+            "vazao": {
+                "chunks_por_minuto": chunks / duracao * 60 if duracao else 0.0,
+                "palavras_por_segundo": sum(j["palavras"] for j in self.jobs) / duracao if duracao else 0.0,
+                # Segundos de áudio produzidos por segundo de relógio
+                "fator_tempo_real": segundos_audio / duracao if duracao else 0.0,
+            },
+            "latencia": {
+                "amostras": len(sucessos),
+                "p50": _quantil(sucessos, 0.5),
+                "p90": _quantil(sucessos, 0.9),
+                "p99": _quantil(sucessos, 0.99),
+                "max": sucessos[-1] if sucessos else 0.0,
+            },
+            "requisicoes": {"enviadas": len(registros), "por_resultado": por_resultado},
+            "cota": {
+                "consumida": consumida,
+                # Fração da cota gasta que virou chunk entregue (1.0 = nenhum desperdício)
+                "eficiencia": chunks / consumida if consumida else 0.0,
+                "desperdicio": max(consumida - chunks, 0),
+            },
+            "jobs_detalhe": sorted(self.jobs, key=lambda j: j["nome"]),
+            "servidor": servidor,
+        }
+
+
+def imprimir_relatorio(relatorio: Dict):
+    vazao, latencia, cota = relatorio["vazao"], relatorio["latencia"], relatorio["cota"]
+    print(f"\n{'=' * 60}\nTESTE DE CARGA: {relatorio['jobs']} job(s), {relatorio['chunks']} chunks "
+          f"em {relatorio['duracao']:.1f}s ({relatorio['falhas']} falha(s))")
+    print(f"Vazão:    {vazao['chunks_por_minuto']:.1f} chunks/min, "
+          f"{vazao['palavras_por_segundo']:.1f} palavras/s, "
+          f"{vazao['fator_tempo_real']:.1f}× tempo real")
+    print(f"Latência: p50 {latencia['p50']:.2f}s | p90 {latencia['p90']:.2f}s | "
+          f"p99 {latencia['p99']:.2f}s | máx {latencia['max']:.2f}s ({latencia['amostras']} respostas)")
+    print(f"Requisições: {relatorio['requisicoes']['enviadas']} {relatorio['requisicoes']['por_resultado']}")
+    print(f"Cota:     {cota['consumida']} consumida(s), eficiência {cota['eficiencia']:.0%} "
+          f"({cota['desperdicio']} sem chunk aproveitado)")
+    for job in relatorio["jobs_detalhe"]:
+        print(f"  {job['nome']}: {job['chunks']} chunks em {job['duracao']:.1f}s "
+              f"(esperou {job['espera']:.1f}s), {job['requisicoes']} req, {job['duplicadas']} dup")
+    print("=" * 60)
+
+
+# ===== LINHA DE COMANDO =====
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da síntese contra o servidor TTS local")
+    parser.add_argument("perfis", nargs="*",
+                        help="Diários de jobs, roteiros .txt ou JSON de tamanhos (padrão: 3 jobs sintéticos)")
+    parser.add_argument("--config", help="Perfil JSON do servidor local (local_tts_server.py)")
+    parser.add_argument("--url", help="Usar um servidor já rodando em vez de subir um local")
+    parser.add_argument("--escala-tempo", type=float, help="Multiplicador dos tempos do servidor")
+    parser.add_argument("--workers", type=int, default=9, help="Endpoints workerN-proxy")
+    parser.add_argument("--gemini", type=int, default=0, help="Usar N chaves Gemini em vez dos workers")
+    parser.add_argument("--paralelo", type=int, default=6, help="Requisições simultâneas por job")
+    parser.add_argument("--limite-global", type=int, help="Requisições simultâneas no total")
+    parser.add_argument("--intervalo", type=float, default=0.0, help="Segundos entre a entrada dos jobs")
+    parser.add_argument("--aimd", action="store_true", help="Limite adaptativo por endpoint")
+    parser.add_argument("--duplicacao", action="store_true", help="Duplicar chunks atrasados")
+    parser.add_argument("--validar", action="store_true", help="Validar o áudio de cada resposta")
+    parser.add_argument("--saida", help="Gravar o relatório em JSON")
+    args = parser.parse_args()
+
+    perfis = carregar_perfis(args.perfis, args.intervalo)
+    if not perfis:
+        aleatorio = random.Random(7)
+        perfis = [perfil_sintetico(f"sintetico{n + 1}",
+                                   [aleatorio.randint(250, 450) for _ in range(tamanho)],
+                                   n * args.intervalo)
+                  for n, tamanho in enumerate((40, 15, 5))]
+
+    servidor = None
+    if args.url:
+        base = args.url.rstrip("/")
+        if args.gemini:
+            endpoints = [Endpoint(f"Gemini {i + 1}",
+                                  f"{base}/v1beta/models/{GEMINI_TTS_MODEL}:generateContent",
+                                  Endpoint.TIPO_GEMINI, f"chave-local-{i + 1}")
+                         for i in range(args.gemini)]
+        else:
+            endpoints = [Endpoint(f"Worker {i + 1}", f"{base}/functions/v1/worker{i + 1}-proxy",
+                                  Endpoint.TIPO_WORKER, "chave-local")
+                         for i in range(args.workers)]
+    else:
+        config = carregar_config(args.config)
+        if args.escala_tempo is not None:
+            config["escala_tempo"] = args.escala_tempo
+        servidor = ServidorTTSLocal(config).iniciar()
+        endpoints = (servidor.chaves_gemini([f"chave-local-{i + 1}" for i in range(args.gemini)])
+                     if args.gemini else servidor.workers(args.workers))
+
+    teste = TesteCarga(endpoints, max_paralelo=args.paralelo, limite_global=args.limite_global,
+                       aimd=args.aimd, duplicacao=args.duplicacao, validar=args.validar)
+    print(f"[CARGA] {len(perfis)} job(s), {sum(len(p.chunks) for p in perfis)} chunks, "
+          f"{len(endpoints)} endpoint(s)")
+    teste.executar(perfis)
+
+    if servidor is not None:
+        estatisticas_servidor = servidor.estatisticas()
+        servidor.parar()
+    else:
+        estatisticas_servidor = requests.get(f"{args.url.rstrip('/')}/__estatisticas", timeout=10).json()
+
+    relatorio = teste.relatorio(estatisticas_servidor)
+    imprimir_relatorio(relatorio)
+    if args.saida:
+        escrever_atomico(args.saida, json.dumps(relatorio, indent=2, ensure_ascii=False).encode("utf-8"))
+        print(f"[CARGA] Relatório salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""
+Servidor TTS Local (substituto dos workers e do Gemini)
+Implementa o contrato das funções workerN-proxy ({input, prompt, voice, generation})
+e o endpoint generateContent do Gemini, devolvendo PCM sintético no mesmo JSON
+base64 da API. Latência, erros 429/503 e cotas por chave são configuráveis,
+para medir o cliente de síntese sem gastar cota real
+"""
+
+import argparse
+import base64
+import copy
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from memory_budget import estimar_bytes_pcm
+from tts_client import GEMINI_TTS_MODEL, TAXA_AMOSTRAGEM, Endpoint
+
+
+# Perfil padrão: parecido com o que os workers mostram em produção
+# (~2 s fixos + ~25 ms por palavra, cauda lognormal, poucos 503)
+CONFIG_PADRAO = {
+    "semente": None,
+    # Multiplica latências, Retry-After e as janelas de cota (0.1 = 10× mais rápido)
+    "escala_tempo": 1.0,
+    "formato": "json",  # "json" (base64 igual ao Gemini) ou "pcm" (audio/L16)
+    "latencia": {
+        "distribuicao": "lognormal",  # "fixa", "normal", "lognormal" ou "empirica"
+        "fixo": 2.0,
+        "por_palavra": 0.025,
+        "sigma": 0.25,
+        "amostras": [],  # segundos medidos, para "empirica"
+        "cauda": {"prob": 0.0, "fator": 4.0},
+    },
+    "erros": {"taxa_429": 0.0, "taxa_503": 0.02, "retry_after": 5.0, "latencia": 0.1},
+    "cota": {"rpm": None, "rpd": None},
+    # Sobrescritas por rota ("worker1" ... "worker9", "gemini") e por chave
+    "workers": {},
+    "chaves": {},
+    # Mudanças ao longo do teste: [{"a_partir_de": 60, "workers": {"worker3": {...}}}, ...]
+    "fases": [],
+}
+
+_ROTA_WORKER = re.compile(r"/functions/v1/(worker\d+)-proxy$")
+_ROTA_GEMINI = re.compile(r"/v1beta/models/[^/:]+:generateContent$")
+
+# PCM parecido com fala (tom de 180 Hz com sílabas a 4 Hz), passa no ValidadorAudio
+_SEGUNDO_PCM = b"".join(
+    struct.pack("<h", int(9000 * (0.55 + 0.45 * math.sin(2 * math.pi * 4 * i / TAXA_AMOSTRAGEM))
+                          * math.sin(2 * math.pi * 180 * i / TAXA_AMOSTRAGEM)))
+    for i in range(TAXA_AMOSTRAGEM)
+)
+# 1 s de PCM tem tamanho múltiplo de 3: o base64 de N segundos é o de 1 s repetido
+_SEGUNDO_BASE64 = base64.b64encode(_SEGUNDO_PCM)
+
+
+def mesclar(base: Dict, mudancas: Dict) -> Dict:
+    """Cópia de `base` com `mudancas` aplicadas recursivamente"""
+    resultado = copy.deepcopy(base)
+    for chave, valor in (mudancas or {}).items():
+        if isinstance(valor, dict) and isinstance(resultado.get(chave), dict):
+            resultado[chave] = mesclar(resultado[chave], valor)
+        else:
+            resultado[chave] = valor
+    return resultado
+
+
+def pcm_sintetico(tamanho: int) -> bytes:
+    """PCM com cara de fala, com exatamente `tamanho` bytes"""
+    inteiros, resto = divmod(tamanho, len(_SEGUNDO_PCM))
+    return _SEGUNDO_PCM * inteiros + _SEGUNDO_PCM[:resto]
+
+
+def base64_sintetico(tamanho: int) -> bytes:
+    """base64 de pcm_sintetico(tamanho), sem codificar o áudio inteiro de novo"""
+    inteiros, resto = divmod(tamanho, len(_SEGUNDO_PCM))
+    return _SEGUNDO_BASE64 * inteiros + base64.b64encode(_SEGUNDO_PCM[:resto])
+
+
+class ContadoresChave:
+    """
+    O que uma chave (numa rota) recebeu e respondeu
+
+    Attributes:
+        recebidas: Requisições que chegaram
+        aceitas: Requisições que consumiram cota
+        ok: Respostas 200 entregues por inteiro
+        canceladas: Cliente desconectou no meio da resposta (ex: duplicata perdedora)
+        erro_429_cota: 429 por RPM/RPD estourado
+        erro_429_injetado: 429 sorteado pelo perfil
+        erro_503: 503 sorteado pelo perfil
+        erro_400: Corpo fora do contrato
+        bytes_pcm: PCM entregue
+    """
+
+    CAMPOS = ("recebidas", "aceitas", "ok", "canceladas", "erro_429_cota", "erro_429_injetado",
+              "erro_503", "erro_400", "bytes_pcm")
+
+    def __init__(self):
+        for campo in self.CAMPOS:
+            setattr(self, campo, 0)
+
+    def como_dict(self) -> Dict[str, int]:
+        return {campo: getattr(self, campo) for campo in self.CAMPOS}
+
+
+class ServidorTTSLocal:
+    """
+    Servidor HTTP local que se passa pelos workers e pelo Gemini
+
+    Rotas (POST):
+        /functions/v1/workerN-proxy                       - contrato dos workers
+        /v1beta/models/<modelo>:generateContent?key=...   - API Gemini
+    Rota (GET):
+        /__estatisticas                                   - contadores em JSON
+
+    A cota (RPM/RPD) é contada por rota e chave: cada worker tem a própria,
+    e cada API key do Gemini também. Os erros sorteados (429/503) não
+    consomem cota; uma requisição aceita consome, mesmo se o cliente
+    desistir no meio.
+    """
+
+    def __init__(self, config: Optional[Dict] = None, host: str = "127.0.0.1", porta: int = 0):
+        """
+        Args:
+            config: Perfil (mesclado sobre CONFIG_PADRAO)
+            host: Endereço de escuta
+            porta: Porta (0 = escolher uma livre)
+        """
+        self.config = mesclar(CONFIG_PADRAO, config or {})
+        self._aleatorio = random.Random(self.config["semente"])
+        self._lock = threading.Lock()
+        self._janelas: Dict[Tuple[str, str], Deque[float]] = {}
+        self._no_dia: Dict[Tuple[str, str, int], int] = {}
+        self._contadores: Dict[Tuple[str, str], ContadoresChave] = {}
+        self._em_voo = 0
+        self.pico_em_voo = 0
+
+        servidor = self
+
+        class Tratador(_TratadorTTS):
+            dono = servidor
+
+        self._http = ThreadingHTTPServer((host, porta), Tratador)
+        self._http.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        self.inicio = time.monotonic()
+
+    # ----- Ciclo de vida -----
+
+    @property
+    def url(self) -> str:
+        host, porta = self._http.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def iniciar(self) -> "ServidorTTSLocal":
+        """Atende em segundo plano"""
+        self.inicio = time.monotonic()
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True,
+                                        name="servidor_tts_local")
+        self._thread.start()
+        print(f"[SERVIDOR LOCAL] Atendendo em {self.url}")
+        return self
+
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *_):
+        self.parar()
+
+    # ----- Endpoints para o cliente -----
+
+    def workers(self, quantidade: int = 9, chave: str = "chave-local") -> List[Endpoint]:
+        """Endpoints workerN-proxy apontando para este servidor (mesmos nomes de workers_supabase)"""
+        letras = "BCDEFGHIJ"
+        return [Endpoint(f"Servidor {letras[i]}", f"{self.url}/functions/v1/worker{i + 1}-proxy",
+                         Endpoint.TIPO_WORKER, chave)
+                for i in range(quantidade)]
+
+    def chaves_gemini(self, chaves: List[str]) -> List[Endpoint]:
+        """Endpoints Gemini (um por API key) apontando para este servidor"""
+        url = f"{self.url}/v1beta/models/{GEMINI_TTS_MODEL}:generateContent"
+        return [Endpoint(f"Gemini {chave[-4:]}", url, Endpoint.TIPO_GEMINI, chave) for chave in chaves]
+
+    # ----- Estatísticas -----
+
+    def estatisticas(self) -> Dict:
+        """Contadores por rota/chave e os totais"""
+        with self._lock:
+            por_chave = {f"{rota}:{chave}": c.como_dict()
+                         for (rota, chave), c in sorted(self._contadores.items())}
+        totais = {campo: sum(c[campo] for c in por_chave.values()) for campo in ContadoresChave.CAMPOS}
+        return {"totais": totais, "por_chave": por_chave, "pico_em_voo": self.pico_em_voo,
+                "segundos": time.monotonic() - self.inicio}
+
+    # ----- Decisão de cada requisição -----
+
+    def config_efetiva(self, rota: str, chave: str) -> Dict:
+        """Perfil que vale agora para a rota/chave (fases ativas incluídas)"""
+        config = self.config
+        efetiva = mesclar(config, config["workers"].get(rota, {}))
+        efetiva = mesclar(efetiva, config["chaves"].get(chave, {}))
+        decorrido = (time.monotonic() - self.inicio) / config["escala_tempo"]
+        for fase in config["fases"]:
+            if decorrido >= fase.get("a_partir_de", 0):
+                mudancas = {k: v for k, v in fase.items() if k not in ("a_partir_de", "workers")}
+                efetiva = mesclar(efetiva, mudancas)
+                efetiva = mesclar(efetiva, fase.get("workers", {}).get(rota, {}))
+        return efetiva
+
+    def decidir(self, rota: str, chave: str, palavras: int) -> Tuple[int, float, Optional[float]]:
+        """
+        Sorteia o destino de uma requisição
+
+        Returns:
+            (status, segundos_de_espera, retry_after)
+        """
+        config = self.config_efetiva(rota, chave)
+        escala = config["escala_tempo"]
+        erros = config["erros"]
+        retry_after = erros["retry_after"] * escala
+
+        with self._lock:
+            contadores = self._contadores.setdefault((rota, chave), ContadoresChave())
+            contadores.recebidas += 1
+
+            sorteio = self._aleatorio.random()
+            if sorteio < erros["taxa_503"]:
+                contadores.erro_503 += 1
+                return 503, erros["latencia"] * escala, retry_after
+            if sorteio < erros["taxa_503"] + erros["taxa_429"]:
+                contadores.erro_429_injetado += 1
+                return 429, erros["latencia"] * escala, retry_after
+
+            espera_cota = self._consumir_cota(rota, chave, config["cota"], escala)
+            if espera_cota is not None:
+                contadores.erro_429_cota += 1
+                return 429, erros["latencia"] * escala, espera_cota
+
+            contadores.aceitas += 1
+            return 200, self._sortear_latencia(config["latencia"], palavras) * escala, None
+
+    def _consumir_cota(self, rota: str, chave: str, cota: Dict, escala: float) -> Optional[float]:
+        """Conta a requisição na cota; devolve o Retry-After se estourou (chamar com o lock)"""
+        agora = time.monotonic()
+        minuto, dia = 60 * escala, 86400 * escala
+        janela = self._janelas.setdefault((rota, chave), deque())
+        while janela and janela[0] <= agora - minuto:
+            janela.popleft()
+
+        if cota.get("rpd") is not None:
+            dia_atual = int((agora - self.inicio) // dia)
+            contagem_dia = self._no_dia.get((rota, chave, dia_atual), 0)
+            if contagem_dia >= cota["rpd"]:
+                return self.inicio + (dia_atual + 1) * dia - agora
+            self._no_dia[(rota, chave, dia_atual)] = contagem_dia + 1
+        if cota.get("rpm") is not None and len(janela) >= cota["rpm"]:
+            return janela[0] + minuto - agora
+
+        janela.append(agora)
+        return None
+
+    def _sortear_latencia(self, perfil: Dict, palavras: int) -> float:
+        """Latência (segundos, antes da escala) de uma resposta bem-sucedida (chamar com o lock)"""
+        base = perfil["fixo"] + perfil["por_palavra"] * palavras
+        distribuicao = perfil["distribuicao"]
+        if distribuicao == "empirica" and perfil["amostras"]:
+            segundos = self._aleatorio.choice(perfil["amostras"]) + perfil["por_palavra"] * palavras
+        elif distribuicao == "normal":
+            segundos = self._aleatorio.gauss(base, perfil["sigma"] * base)
+        elif distribuicao == "lognormal":
+            # Mediana = base; sigma controla a cauda
+            segundos = base * self._aleatorio.lognormvariate(0, perfil["sigma"])
+        else:
+            segundos = base
+        if self._aleatorio.random() < perfil["cauda"]["prob"]:
+            segundos *= perfil["cauda"]["fator"]
+        return max(segundos, 0.0)
+
+    def _entrar(self):
+        with self._lock:
+            self._em_voo += 1
+            self.pico_em_voo = max(self.pico_em_voo, self._em_voo)
+
+    def _sair(self, rota: str, chave: str, status: int, bytes_pcm: int = 0, cancelada: bool = False):
+        with self._lock:
+            self._em_voo -= 1
+            contadores = self._contadores[(rota, chave)]
+            if cancelada:
+                contadores.canceladas += 1
+            elif status == 200:
+                contadores.ok += 1
+                contadores.bytes_pcm += bytes_pcm
+
+
+class _TratadorTTS(BaseHTTPRequestHandler):
+    """Uma conexão HTTP/1.1 (keep-alive, como a sessão do ClienteTTS)"""
+
+    protocol_version = "HTTP/1.1"
+    dono: ServidorTTSLocal
+
+    def log_message(self, *_):
+        pass
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/__estatisticas":
+            self._responder(200, json.dumps(self.dono.estatisticas()).encode("utf-8"))
+        else:
+            self._responder(404, b'{"error": "Rota inexistente"}')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            corpo = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+        except ValueError:
+            corpo = None
+
+        worker = _ROTA_WORKER.search(url.path)
+        if worker:
+            rota = worker.group(1)
+            chave = self.headers.get("apikey", "")
+            texto = self._texto_worker(corpo)
+            formato = None
+        elif _ROTA_GEMINI.search(url.path):
+            rota = "gemini"
+            chave = parse_qs(url.query).get("key", [""])[0]
+            texto = self._texto_gemini(corpo)
+            formato = "json"
+        else:
+            self._responder(404, b'{"error": "Rota inexistente"}')
+            return
+
+        if texto is None:
+            with self.dono._lock:
+                self.dono._contadores.setdefault((rota, chave), ContadoresChave()).erro_400 += 1
+            self._responder(400, json.dumps({"error": "Corpo fora do contrato"}).encode("utf-8"))
+            return
+
+        palavras = len(texto.split())
+        status, espera, retry_after = self.dono.decidir(rota, chave, palavras)
+        self.dono._entrar()
+        enviados, cancelada = 0, False
+        try:
+            time.sleep(espera)
+            if status != 200:
+                self._responder_erro(status, retry_after)
+                return
+            enviados = estimar_bytes_pcm(texto)
+            self._responder_audio(enviados, formato or self.dono.config_efetiva(rota, chave)["formato"])
+        except (BrokenPipeError, ConnectionResetError):
+            cancelada = True
+            self.close_connection = True
+        finally:
+            self.dono._sair(rota, chave, status, enviados, cancelada)
+
+    # ----- Contratos -----
+
+    @staticmethod
+    def _texto_worker(corpo) -> Optional[str]:
+        """Texto de um corpo {input, prompt, voice, generation} (None se inválido)"""
+        if not isinstance(corpo, dict):
+            return None
+        if not isinstance(corpo.get("input"), str) or not corpo["input"].strip():
+            return None
+        if not corpo.get("voice") or not corpo.get("generation"):
+            return None
+        return corpo["input"]
+
+    @staticmethod
+    def _texto_gemini(corpo) -> Optional[str]:
+        """Texto de um corpo generateContent com responseModalities AUDIO (None se inválido)"""
+        try:
+            texto = corpo["contents"][0]["parts"][0]["text"]
+            voz = corpo["generationConfig"]["speechConfig"]["voiceConfig"]["prebuiltVoiceConfig"]
+            if not voz.get("voiceName") or not texto.strip():
+                return None
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None
+        return texto
+
+    # ----- Respostas -----
+
+    def _responder(self, status: int, corpo: bytes, tipo: str = "application/json",
+                   extras: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in (extras or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _responder_erro(self, status: int, retry_after: Optional[float]):
+        """Erro no formato da API Gemini (o mesmo que os workers repassam)"""
+        situacao = "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"
+        mensagem = ("Quota exceeded for this key" if status == 429
+                    else "The model is overloaded. Please try again later.")
+        corpo = {"error": {"code": status, "message": mensagem, "status": situacao}}
+        extras = {"Retry-After": f"{retry_after:.2f}"} if retry_after else None
+        self._responder(status, json.dumps(corpo).encode("utf-8"), extras=extras)
+
+    def _responder_audio(self, tamanho: int, formato: str):
+        if formato == "pcm":
+            self._responder(200, pcm_sintetico(tamanho), tipo="audio/L16;codec=pcm;rate=24000")
+            return
+
+        inicio, fim = (json.dumps({"candidates": [{"content": {"parts": [{"inlineData": {
+            "mimeType": f"audio/L16;codec=pcm;rate={TAXA_AMOSTRAGEM}", "data": "@"}}]}}]})
+            .encode("utf-8").split(b"@"))
+        dados = base64_sintetico(tamanho)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(inicio) + len(dados) + len(fim)))
+        self.end_headers()
+        self.wfile.write(inicio)
+        # Em blocos: o cliente que desiste no meio derruba a conexão aqui
+        for posicao in range(0, len(dados), 256 * 1024):
+            self.wfile.write(dados[posicao:posicao + 256 * 1024])
+        self.wfile.write(fim)
+
+
+def carregar_config(caminho: Optional[str]) -> Dict:
+    """Lê um perfil JSON (None = perfil padrão)"""
+    if not caminho:
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ===== LINHA DE COMANDO =====
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor TTS local com latência, erros e cotas simulados")
+    parser.add_argument("--porta", type=int, default=8787)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--config", help="Perfil JSON (latência, erros, cotas, fases)")
+    parser.add_argument("--escala-tempo", type=float, help="Multiplicador de todos os tempos")
+    args = parser.parse_args()
+
+    config = carregar_config(args.config)
+    if args.escala_tempo is not None:
+        config["escala_tempo"] = args.escala_tempo
+
+    servidor = ServidorTTSLocal(config, args.host, args.porta).iniciar()
+    print(f"[SERVIDOR LOCAL] Workers: {servidor.url}/functions/v1/worker1-proxy ... worker9-proxy")
+    print(f"[SERVIDOR LOCAL] Gemini:  {servidor.url}/v1beta/models/{GEMINI_TTS_MODEL}:generateContent")
+    try:
+        while True:
+            time.sleep(30)
+            totais = servidor.estatisticas()["totais"]
+            print(f"[SERVIDOR LOCAL] {totais['recebidas']} recebidas, {totais['ok']} ok, "
+                  f"{totais['erro_429_cota'] + totais['erro_429_injetado']} 429, {totais['erro_503']} 503")
+    except KeyboardInterrupt:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Orçamento de Memória do Pipeline
+Limita quanto PCM fica em RAM entre os estágios (agendador → saída → compressão):
+chunks que chegam fora de ordem vão para um arquivo temporário quando o
+orçamento acaba, e o agendador segura novos envios até haver folga
+"""
+
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from text_chunker import contar_palavras
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Fala do Gemini: ~0,45 s por palavra (estimativa do PCM antes de sintetizar)
+SEGUNDOS_POR_PALAVRA_FALADA = 0.45
+
+# Fração do orçamento que os buffers de reordenação podem ocupar; o resto
+# fica para os chunks em voo, para o agendador nunca parar só por causa deles
+FRACAO_BUFFERS = 0.5
+
+
+def estimar_bytes_pcm(texto: str) -> int:
+    """PCM esperado para um chunk (reserva feita antes de enviar a requisição)"""
+    segundos = contar_palavras(texto) * SEGUNDOS_POR_PALAVRA_FALADA
+    return int(segundos * TAXA_AMOSTRAGEM) * BYTES_POR_AMOSTRA
+
+
+def pico_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo em MB (None onde não há `resource`)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return pico / 1024 ** 2 if os.uname().sysname == "Darwin" else pico / 1024
+
+
+class OrcamentoMemoria:
+    """
+    Contador de bytes de áudio em RAM, compartilhado pelos estágios
+
+    Não bloqueia ninguém: quem reserva decide o que fazer quando não há
+    folga (o agendador espera um chunk terminar, os buffers gravam em disco).
+    """
+
+    def __init__(self, limite_mb: float = 256.0):
+        """
+        Args:
+            limite_mb: PCM máximo em RAM entre os estágios
+        """
+        self.limite = int(limite_mb * 1024 ** 2)
+        self.ocupado = 0
+        self.pico = 0
+        self._lock = threading.Lock()
+
+    def tentar_reservar(self, tamanho: int, forcar: bool = False) -> bool:
+        """
+        Reserva `tamanho` bytes se couberem no orçamento
+
+        Args:
+            tamanho: Bytes a reservar
+            forcar: Reservar mesmo sem folga (para garantir progresso, ex: nada em voo)
+
+        Returns:
+            True se reservou
+        """
+        with self._lock:
+            if not forcar and self.ocupado + tamanho > self.limite:
+                return False
+            self.ocupado += tamanho
+            self.pico = max(self.pico, self.ocupado)
+            return True
+
+    def liberar(self, tamanho: int):
+        """Devolve bytes reservados"""
+        with self._lock:
+            self.ocupado -= tamanho
+
+    def __str__(self) -> str:
+        mb = 1024 ** 2
+        return f"{self.ocupado / mb:.0f}/{self.limite / mb:.0f} MB (pico {self.pico / mb:.0f} MB)"
+
+
+class BufferReordenacao:
+    """
+    Guarda chunks que chegaram antes da vez até poderem sair em ordem
+
+    Enquanto há orçamento, os dados ficam em RAM; depois, vão para um único
+    arquivo temporário (apagado ao fechar). Não é thread-safe: use com o lock
+    do estágio dono do buffer.
+    """
+
+    def __init__(self, orcamento: Optional[OrcamentoMemoria] = None,
+                 fracao: float = FRACAO_BUFFERS, nome: str = "buffer"):
+        """
+        Args:
+            orcamento: Orçamento compartilhado (None = tudo em RAM, sem limite)
+            fracao: Parte do orçamento que este buffer pode ocupar
+            nome: Nome usado no log
+        """
+        self.orcamento = orcamento
+        self.limite = int(orcamento.limite * fracao) if orcamento is not None else None
+        self.nome = nome
+        self.bytes_em_memoria = 0
+        self.derramados = 0
+
+        self._memoria: Dict[int, bytes] = {}
+        self._disco: Dict[int, Tuple[int, int]] = {}
+        self._arquivo = None
+
+    def guardar(self, indice: int, dados: bytes):
+        """Guarda um item (em RAM se couber, senão no arquivo temporário)"""
+        if self.orcamento is None or (
+                self.bytes_em_memoria + len(dados) <= self.limite
+                and self.orcamento.tentar_reservar(len(dados))):
+            self._memoria[indice] = dados
+            self.bytes_em_memoria += len(dados)
+            return
+
+        if self._arquivo is None:
+            self._arquivo = tempfile.TemporaryFile(prefix=f"{self.nome}_")
+            print(f"[MEMORIA] {self.nome}: orçamento cheio ({self.orcamento}), "
+                  f"o excedente vai para disco")
+        self._arquivo.seek(0, os.SEEK_END)
+        self._disco[indice] = (self._arquivo.tell(), len(dados))
+        self._arquivo.write(dados)
+        self.derramados += 1
+
+    def retirar(self, indice: int) -> bytes:
+        """Remove e devolve um item"""
+        if indice in self._memoria:
+            dados = self._memoria.pop(indice)
+            self.bytes_em_memoria -= len(dados)
+            if self.orcamento is not None:
+                self.orcamento.liberar(len(dados))
+            return dados
+
+        offset, tamanho = self._disco.pop(indice)
+        self._arquivo.seek(offset)
+        dados = self._arquivo.read(tamanho)
+        if not self._disco:
+            # Nada mais em disco: reaproveitar o espaço do arquivo
+            self._arquivo.truncate(0)
+        return dados
+
+    def __contains__(self, indice: int) -> bool:
+        return indice in self._memoria or indice in self._disco
+
+    def __len__(self) -> int:
+        return len(self._memoria) + len(self._disco)
+
+    def fechar(self):
+        """Descarta o que sobrou e apaga o arquivo temporário"""
+        if self.orcamento is not None:
+            self.orcamento.liberar(self.bytes_em_memoria)
+        self._memoria.clear()
+        self._disco.clear()
+        self.bytes_em_memoria = 0
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+# ===== DEMONSTRAÇÃO =====
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from streaming_output import SaidaEmOrdem
+    from synthesis_scheduler import AgendadorSintese
+    from tts_client import Endpoint
+
+    class ClienteSimulado:
+        """Devolve PCM do tamanho certo; o chunk 1 demora bem mais que os outros"""
+
+        def sintetizar(self, endpoint, texto, voz, prompt="", cancelar=None):
+            time.sleep(1.5 if texto.startswith("Início") else random.uniform(0.01, 0.05))
+            return bytes(estimar_bytes_pcm(texto))
+
+    chunks = ["Início. " + "palavra " * 440] + ["palavra " * 450] * 199  # ~11 h de áudio
+    endpoints = [Endpoint(f"simulado{i}", f"http://localhost/{i}", Endpoint.TIPO_WORKER)
+                 for i in range(4)]
+    orcamento = OrcamentoMemoria(limite_mb=128)
+    agendador = AgendadorSintese(endpoints, cliente=ClienteSimulado(), max_paralelo=8,
+                                 memoria=orcamento)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        with SaidaEmOrdem(arquivo=os.path.join(pasta, "saida.wav"), orcamento=orcamento) as saida:
+            agendador.sintetizar_job(chunks, "Kore", ao_concluir_chunk=saida.receber,
+                                     guardar_resultados=False)
+
+    print(f"Orçamento: {orcamento} | chunks em disco: {saida.metricas()['chunks_em_disco']} | "
+          f"pico RSS do processo: {pico_rss_mb():.0f} MB")
@@ -0,0 +1,289 @@
+"""
+Relatório de Memória por Estágio
+Modo opcional de diagnóstico: snapshots do tracemalloc e amostras de RSS em cada
+estágio do job e a cada chunk concluído, com os locais que mais alocaram, o pico,
+o que ficou retido após o job e o crescimento entre jobs da mesma sessão
+"""
+
+import gc
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from memory_budget import pico_rss_mb
+from synthesis_cache import escrever_atomico
+
+
+PASTA_RELATORIOS = "relatorios_memoria"
+
+# Variável de ambiente que liga o modo na interface (run_gui)
+VARIAVEL_AMBIENTE = "AUDIO_PERFIL_MEMORIA"
+
+_MB = 1024 ** 2
+
+# Alocações do próprio relatório, do tracemalloc e do import de módulos não interessam
+_FILTROS = [
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def rss_atual_mb() -> Optional[float]:
+    """Memória residente atual do processo em MB (None fora do Linux)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf("SC_PAGE_SIZE") / _MB
+
+
+def _tirar_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_FILTROS)
+
+
+def _principais(depois: tracemalloc.Snapshot, antes: tracemalloc.Snapshot,
+                quantidade: int) -> List[Dict]:
+    """Locais (arquivo:linha) que mais cresceram entre dois snapshots"""
+    # compare_to ordena pelo módulo da diferença: o que foi liberado também vem na frente
+    cresceram = [e for e in depois.compare_to(antes, "lineno") if e.size_diff > 0]
+    locais = []
+    for estatistica in cresceram[:quantidade]:
+        quadro = estatistica.traceback[0]
+        locais.append({
+            "local": f"{os.path.basename(quadro.filename)}:{quadro.lineno}",
+            "kb": round(estatistica.size_diff / 1024, 1),
+            "blocos": estatistica.count_diff,
+        })
+    return locais
+
+
+class SessaoMemoria:
+    """
+    Liga o tracemalloc por uma sessão inteira (interface ou fila de lotes)
+
+    Cada job recebe um MedidorMemoriaJob (`novo_job`). Ao fim de cada job, a
+    sessão compara a memória de base (antes do job) com a do início da
+    sessão: se ela sobe job após job, algo está sendo retido entre jobs, e
+    `sessao_memoria.json` mostra os locais que acumularam.
+    """
+
+    def __init__(self, pasta: str = PASTA_RELATORIOS, quadros: int = 1, top: int = 10,
+                 intervalo_chunks: int = 1):
+        """
+        Args:
+            pasta: Onde gravar os relatórios
+            quadros: Quadros de pilha guardados por alocação (mais = mais lento)
+            top: Quantos locais listar em cada estágio
+            intervalo_chunks: Snapshot a cada N chunks (a amostra de memória é sempre feita)
+        """
+        self.pasta = pasta
+        self.top = top
+        self.intervalo_chunks = max(intervalo_chunks, 1)
+        self.jobs: List[Dict] = []
+        # O pico do tracemalloc é global: quem o zera primeiro repassa aos jobs abertos
+        self._lock = threading.Lock()
+        self._ativos: List["MedidorMemoriaJob"] = []
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(quadros)
+        gc.collect()
+        self._snapshot_inicial = _tirar_snapshot()
+        self.base_inicial = tracemalloc.get_traced_memory()[0]
+        os.makedirs(pasta, exist_ok=True)
+        print(f"[MEMORIA] Relatório de memória ligado (tracemalloc), relatórios em {pasta}/")
+
+    @classmethod
+    def do_ambiente(cls) -> Optional["SessaoMemoria"]:
+        """Sessão ligada se AUDIO_PERFIL_MEMORIA=1 (ou None)"""
+        if os.environ.get(VARIAVEL_AMBIENTE, "") in ("", "0"):
+            return None
+        return cls()
+
+    def novo_job(self, nome: str) -> "MedidorMemoriaJob":
+        return MedidorMemoriaJob(self, nome)
+
+    def parar(self):
+        """Desliga o tracemalloc (o relatório da sessão já está gravado)"""
+        tracemalloc.stop()
+
+    def _propagar_pico(self, zerar: bool = False):
+        """Leva o pico desde o último reset a todos os jobs e etapas abertas (chamar com o lock)"""
+        pico = tracemalloc.get_traced_memory()[1]
+        for medidor in self._ativos:
+            medidor.pico = max(medidor.pico, pico)
+            for registro in medidor._abertas:
+                registro["pico"] = max(registro["pico"], pico)
+        if zerar:
+            tracemalloc.reset_peak()
+
+    def _registrar_job(self, resumo: Dict):
+        """Acrescenta o resumo de um job e regrava o relatório da sessão"""
+        snapshot = _tirar_snapshot()
+        with self._lock:
+            self.jobs.append(resumo)
+            bases = [j["base_mb"] for j in self.jobs]
+            crescendo = len(bases) >= 3 and all(b2 > b1 for b1, b2 in zip(bases, bases[1:]))
+            relatorio = {
+                "base_inicial_mb": round(self.base_inicial / _MB, 2),
+                "jobs": self.jobs,
+                # Memória que ficou entre o início da sessão e o fim do último job
+                "acumulado_na_sessao": _principais(snapshot, self._snapshot_inicial, self.top),
+                "suspeita_de_vazamento": crescendo,
+            }
+        if crescendo:
+            print(f"[MEMORIA] ⚠️ Memória de base subiu em todos os {len(bases)} jobs "
+                  f"({bases[0]:.1f} → {bases[-1]:.1f} MB): veja 'acumulado_na_sessao'")
+        escrever_atomico(os.path.join(self.pasta, "sessao_memoria.json"),
+                         json.dumps(relatorio, indent=1, ensure_ascii=False).encode("utf-8"))
+
+
+class MedidorMemoriaJob:
+    """
+    Medições de memória de um job
+
+    Use `etapa(...)` em volta de cada estágio (verificação, síntese, WAV,
+    compressão), `chunk_concluido` a cada chunk pronto e `finalizar` ao fim.
+    Só mede o processo atual: os processos do pool de compressão ficam de fora.
+    Com vários jobs ao mesmo tempo (fila de lotes), os locais de cada etapa
+    incluem o que os outros jobs alocaram no mesmo intervalo.
+    """
+
+    def __init__(self, sessao: SessaoMemoria, nome: str):
+        self.sessao = sessao
+        self.nome = nome
+        self.inicio = time.monotonic()
+        self.etapas: List[Dict] = []
+        self.chunks: List[Dict] = []
+        self.pico = 0
+
+        gc.collect()
+        self.base = tracemalloc.get_traced_memory()[0]
+        self._snapshot_inicial = _tirar_snapshot()
+        self._snapshot_chunk: Optional[tracemalloc.Snapshot] = None
+        self._crescimento_chunks: Dict[str, Dict] = {}
+        self._abertas: List[Dict] = []
+        with sessao._lock:
+            sessao._ativos.append(self)
+
+    # ----- Estágios e chunks -----
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        """Mede um estágio: memória antes/depois, pico e os locais que mais alocaram"""
+        with self.sessao._lock:
+            self.sessao._propagar_pico(zerar=True)
+            registro = {"nome": nome, "pico": 0}
+            self._abertas.append(registro)
+        memoria_antes = tracemalloc.get_traced_memory()[0]
+        antes = _tirar_snapshot()
+        rss_antes = rss_atual_mb()
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            depois = _tirar_snapshot()
+            with self.sessao._lock:
+                self.sessao._propagar_pico()
+                self._abertas.remove(registro)
+            atual = tracemalloc.get_traced_memory()[0]
+            self.etapas.append({
+                "nome": nome,
+                "segundos": round(time.monotonic() - inicio, 3),
+                "antes_mb": round(memoria_antes / _MB, 2),
+                "depois_mb": round(atual / _MB, 2),
+                "pico_mb": round(registro["pico"] / _MB, 2),
+                "rss_antes_mb": rss_antes,
+                "rss_depois_mb": rss_atual_mb(),
+                "principais": _principais(depois, antes, self.sessao.top),
+            })
+
+    def chunk_concluido(self, indice: int):
+        """Amostra a memória ao fim de um chunk e acumula quem cresceu desde o anterior"""
+        snapshot = None
+        if len(self.chunks) % self.sessao.intervalo_chunks == 0:
+            snapshot = _tirar_snapshot()
+        with self.sessao._lock:
+            self.sessao._propagar_pico()
+            atual = tracemalloc.get_traced_memory()[0]
+            self.chunks.append({"indice": indice, "t": round(time.monotonic() - self.inicio, 3),
+                                "mb": round(atual / _MB, 2), "rss_mb": rss_atual_mb()})
+            if snapshot is None:
+                return
+            if self._snapshot_chunk is not None:
+                for local in _principais(snapshot, self._snapshot_chunk, self.sessao.top):
+                    acumulado = self._crescimento_chunks.setdefault(
+                        local["local"], {"local": local["local"], "kb": 0.0, "blocos": 0, "vezes": 0})
+                    acumulado["kb"] += local["kb"]
+                    acumulado["blocos"] += local["blocos"]
+                    acumulado["vezes"] += 1
+            self._snapshot_chunk = snapshot
+
+    # ----- Relatório -----
+
+    def finalizar(self) -> Dict:
+        """Fecha as medições, grava o relatório do job e devolve o resumo"""
+        with self.sessao._lock:
+            self.sessao._propagar_pico()
+            self.sessao._ativos.remove(self)
+        gc.collect()
+        final = _tirar_snapshot()
+        retido = tracemalloc.get_traced_memory()[0] - self.base
+
+        relatorio = {
+            "job": self.nome,
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "segundos": round(time.monotonic() - self.inicio, 1),
+            "base_mb": round(self.base / _MB, 2),
+            "pico_mb": round(self.pico / _MB, 2),
+            "pico_rss_processo_mb": pico_rss_mb(),
+            "retido_mb": round(retido / _MB, 2),
+            "crescimento_por_chunk_kb": self._crescimento_por_chunk(),
+            "etapas": self.etapas,
+            "chunks": self.chunks,
+            "crescimento_entre_chunks": [dict(l, kb=round(l["kb"], 1)) for l in sorted(
+                self._crescimento_chunks.values(), key=lambda l: -l["kb"])[:self.sessao.top]],
+            "retidos_apos_job": _principais(final, self._snapshot_inicial, self.sessao.top),
+        }
+        nome_arquivo = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.nome)
+        escrever_atomico(os.path.join(self.sessao.pasta, f"{nome_arquivo}_memoria.json"),
+                         json.dumps(relatorio, indent=1, ensure_ascii=False).encode("utf-8"))
+
+        resumo = {campo: relatorio[campo] for campo in
+                  ("job", "data", "base_mb", "pico_mb", "retido_mb", "crescimento_por_chunk_kb")}
+        print(f"[MEMORIA] {self.nome}: pico {resumo['pico_mb']:.1f} MB, "
+              f"retido {resumo['retido_mb']:+.1f} MB, "
+              f"{resumo['crescimento_por_chunk_kb']:+.1f} KB por chunk")
+        self.sessao._registrar_job(resumo)
+        return relatorio
+
+    # ----- Internos -----
+
+    def _crescimento_por_chunk(self) -> float:
+        """Inclinação (KB por chunk) da memória rastreada ao longo dos chunks"""
+        n = len(self.chunks)
+        if n < 2:
+            return 0.0
+        media_x = (n - 1) / 2
+        media_y = sum(c["mb"] for c in self.chunks) / n
+        variancia = sum((i - media_x) ** 2 for i in range(n))
+        inclinacao = sum((i - media_x) * (c["mb"] - media_y) for i, c in enumerate(self.chunks)) / variancia
+        return round(inclinacao * 1024, 1)
+
+
+@contextmanager
+def etapa(medidor: Optional[MedidorMemoriaJob], nome: str) -> Iterator[None]:
+    """medidor.etapa(nome), ou nada se o relatório de memória estiver desligado"""
+    if medidor is None:
+        yield
+        return
+    with medidor.etapa(nome):
+        yield
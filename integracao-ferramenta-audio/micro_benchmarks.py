@@ -0,0 +1,327 @@
+"""
+Micro-benchmarks das Primitivas de Áudio
+Mede tempo e pico de memória da limpeza/divisão do texto, decodificação base64,
+escrita do WAV, concatenação, detecção de silêncio e SRT, sobre corpora
+sintéticos fixos (1 min a 5 h de áudio), e falha quando alguma primitiva piora
+além do limite em relação à referência gravada
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from audio_output import EmendaCrossfade, EscritorWav
+from audio_validation import validar_chunk
+from local_tts_server import pcm_sintetico
+from srt_writer import EscritorSrt
+from streaming_decode import TAMANHO_BLOCO, decodificar_audio_json
+from synthesis_cache import escrever_atomico
+from text_chunker import GEMINI_TTS_WORD_LIMIT, dividir_texto_para_tts, normalizar_texto
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+
+ARQUIVO_RESULTADOS = "benchmark_resultados.json"
+
+# Mudar o formato do arquivo ou os corpora invalida a referência gravada
+VERSAO_FORMATO = 1
+VERSAO_CORPUS = 1
+
+CORPORA = {"1min": 60, "10min": 600, "1h": 3600, "5h": 18000}
+
+# Piora tolerada antes de falhar; diferenças abaixo dos pisos são ruído
+LIMITE_TEMPO = 0.25
+LIMITE_MEMORIA = 0.25
+PISO_SEGUNDOS = 0.002
+PISO_MB = 0.5
+
+# Ritmo do ValidadorAudio (150 palavras/min): um chunk de 450 palavras = 3 min
+SEGUNDOS_POR_PALAVRA = 0.4
+
+_VOCABULARIO = ("a história começou numa cidade pequena do interior onde todos se conheciam "
+                "e ninguém imaginava que aquela noite mudaria tudo para sempre quando o velho "
+                "relógio da praça parou exatamente à meia-noite João olhou para Maria sem "
+                "entender nada").split()
+
+
+class Corpus:
+    """
+    Roteiro e áudio sintéticos de uma duração fixa
+
+    O texto é gerado com semente fixa. O áudio é um único chunk de 3 min
+    reaproveitado (a memória do corpus não cresce com a duração); o último
+    chunk é cortado para fechar a duração exata.
+    """
+
+    def __init__(self, nome: str, segundos: int):
+        self.nome = nome
+        self.segundos = segundos
+        aleatorio = random.Random(segundos)
+
+        palavras = int(segundos / SEGUNDOS_POR_PALAVRA)
+        sentencas, total = [], 0
+        while total < palavras:
+            tamanho = min(aleatorio.randint(6, 22), palavras - total)
+            sentenca = " ".join(aleatorio.choice(_VOCABULARIO) for _ in range(tamanho))
+            sentencas.append(sentenca.capitalize() + aleatorio.choice(".!?."))
+            total += tamanho
+        # Espaços e quebras irregulares, como nos roteiros colados da web
+        self.texto = "  ".join(s if i % 7 else s + "\n\n" for i, s in enumerate(sentencas))
+        self.chunks = dividir_texto_para_tts(self.texto)
+
+        bytes_chunk = int(GEMINI_TTS_WORD_LIMIT * SEGUNDOS_POR_PALAVRA * TAXA_AMOSTRAGEM) * BYTES_POR_AMOSTRA
+        self.pcm_chunk = pcm_sintetico(bytes_chunk)
+        total_bytes = segundos * TAXA_AMOSTRAGEM * BYTES_POR_AMOSTRA
+        inteiros, resto = divmod(total_bytes, bytes_chunk)
+        self.tamanhos = [bytes_chunk] * inteiros + ([resto] if resto else [])
+
+        prefixo, sufixo = json.dumps({"candidates": [{"content": {"parts": [{"inlineData": {
+            "mimeType": f"audio/L16;codec=pcm;rate={TAXA_AMOSTRAGEM}", "data": "@"}}]}}]}).split("@")
+        self.resposta_json = (prefixo.encode() + base64.b64encode(self.pcm_chunk) + sufixo.encode())
+
+    def pcms(self):
+        """PCM de cada chunk, em ordem (views do chunk modelo)"""
+        modelo = memoryview(self.pcm_chunk)
+        for tamanho in self.tamanhos:
+            yield modelo[:tamanho]
+
+    def pares(self):
+        """(texto, pcm) de cada chunk de áudio, repetindo os textos se faltarem"""
+        for i, pcm in enumerate(self.pcms()):
+            yield self.chunks[i % len(self.chunks)], pcm
+
+
+# ===== PRIMITIVAS =====
+
+def bench_limpeza_divisao(corpus: Corpus):
+    dividir_texto_para_tts(normalizar_texto(corpus.texto))
+
+
+def bench_decodificacao_base64(corpus: Corpus):
+    resposta = corpus.resposta_json
+    for _ in corpus.tamanhos:
+        # Uma resposta de 3 min por chunk, lida em blocos como no ClienteTTS
+        blocos = (resposta[i:i + TAMANHO_BLOCO] for i in range(0, len(resposta), TAMANHO_BLOCO))
+        pcm, _ = decodificar_audio_json(blocos, len(resposta))
+        del pcm
+
+
+def bench_escrita_wav(corpus: Corpus):
+    fd, caminho = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        with EscritorWav(caminho) as escritor:
+            for pcm in corpus.pcms():
+                escritor.escrever(pcm)
+    finally:
+        os.remove(caminho)
+
+
+def bench_concatenacao(corpus: Corpus):
+    # Pior caso: todas as emendas com crossfade
+    emenda = EmendaCrossfade(range(1, len(corpus.tamanhos)))
+    for indice, pcm in enumerate(corpus.pcms()):
+        emenda.processar(indice, bytes(pcm))
+
+
+def bench_deteccao_silencio(corpus: Corpus):
+    for texto, pcm in corpus.pares():
+        validar_chunk(pcm, texto)
+
+
+def bench_legendas_srt(corpus: Corpus):
+    with EscritorSrt(os.devnull) as srt:
+        for texto, pcm in corpus.pares():
+            srt.adicionar_chunk(texto, len(pcm) // BYTES_POR_AMOSTRA)
+
+
+PRIMITIVAS: Dict[str, Callable[[Corpus], None]] = {
+    "limpeza_divisao": bench_limpeza_divisao,
+    "decodificacao_base64": bench_decodificacao_base64,
+    "escrita_wav": bench_escrita_wav,
+    "concatenacao": bench_concatenacao,
+    "deteccao_silencio": bench_deteccao_silencio,
+    "legendas_srt": bench_legendas_srt,
+}
+
+
+# ===== MEDIÇÃO =====
+
+def medir(funcao: Callable[[Corpus], None], corpus: Corpus, tempo_minimo: float = 0.5,
+          min_repeticoes: int = 3, max_repeticoes: int = 10) -> Dict[str, float]:
+    """
+    Tempo (melhor de várias repetições) e pico de memória de uma primitiva
+
+    Repete ao menos `min_repeticoes` vezes e até somar `tempo_minimo`; o
+    mínimo é o valor menos afetado por outros processos da máquina.
+
+    A memória é medida numa execução à parte com tracemalloc (que deixa o
+    código mais lento), descontando o que já estava alocado antes.
+    """
+    tempos = []
+    while len(tempos) < max_repeticoes and (len(tempos) < min_repeticoes or sum(tempos) < tempo_minimo):
+        inicio = time.perf_counter()
+        funcao(corpus)
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    funcao(corpus)
+    pico = tracemalloc.get_traced_memory()[1] - antes
+    tracemalloc.stop()
+
+    return {"segundos": min(tempos), "pico_mb": pico / 1024 ** 2, "repeticoes": len(tempos)}
+
+
+def executar(corpora: List[str], primitivas: List[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Roda as primitivas pedidas em cada corpus: {primitiva: {corpus: medida}}"""
+    resultados: Dict[str, Dict[str, Dict[str, float]]] = {p: {} for p in primitivas}
+    for nome in corpora:
+        corpus = Corpus(nome, CORPORA[nome])
+        print(f"[BENCH] Corpus {nome}: {len(corpus.texto.split())} palavras, "
+              f"{len(corpus.tamanhos)} chunks de áudio")
+        for primitiva in primitivas:
+            medida = medir(PRIMITIVAS[primitiva], corpus)
+            resultados[primitiva][nome] = medida
+            print(f"  {primitiva:<22} {medida['segundos'] * 1000:>10.1f} ms  "
+                  f"{medida['pico_mb']:>8.1f} MB")
+    return resultados
+
+
+def comparar(atual: Dict, referencia: Dict, limite_tempo: float = LIMITE_TEMPO,
+             limite_memoria: float = LIMITE_MEMORIA) -> List[Tuple[str, str, str]]:
+    """
+    Regressões da execução atual em relação à referência
+
+    Returns:
+        (primitiva, corpus, descrição) de cada medida que piorou além do limite
+    """
+    regressoes = []
+    for primitiva, por_corpus in atual.items():
+        for corpus, medida in por_corpus.items():
+            base = referencia.get(primitiva, {}).get(corpus)
+            if base is None:
+                continue
+            segundos, segundos_ref = medida["segundos"], base["segundos"]
+            if (segundos > segundos_ref * (1 + limite_tempo)
+                    and segundos - segundos_ref > PISO_SEGUNDOS):
+                regressoes.append((primitiva, corpus,
+                                   f"tempo {segundos_ref * 1000:.1f} → {segundos * 1000:.1f} ms "
+                                   f"(+{segundos / segundos_ref - 1:.0%})"))
+            pico, pico_ref = medida["pico_mb"], base["pico_mb"]
+            if pico > pico_ref * (1 + limite_memoria) and pico - pico_ref > PISO_MB:
+                regressoes.append((primitiva, corpus, f"memória {pico_ref:.1f} → {pico:.1f} MB"))
+    return regressoes
+
+
+# ===== ARQUIVO DE RESULTADOS =====
+
+def _maquina() -> str:
+    return f"{platform.node()} {platform.machine()} {platform.processor() or ''}".strip()
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+                              ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def carregar_resultados(caminho: str) -> Dict:
+    """Histórico e referência gravados (vazio se o arquivo não existe ou é de outra versão)"""
+    vazio = {"versao": VERSAO_FORMATO, "versao_corpus": VERSAO_CORPUS, "referencia": None,
+             "execucoes": []}
+    if not os.path.exists(caminho):
+        return vazio
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    if dados.get("versao") != VERSAO_FORMATO or dados.get("versao_corpus") != VERSAO_CORPUS:
+        print(f"[BENCH] {caminho} é de outra versão do formato/corpus; começando uma referência nova")
+        return vazio
+    return dados
+
+
+# ===== LINHA DE COMANDO =====
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks das primitivas de áudio")
+    parser.add_argument("--corpora", default=",".join(CORPORA),
+                        help=f"Durações separadas por vírgula ({', '.join(CORPORA)})")
+    parser.add_argument("--primitivas", default=",".join(PRIMITIVAS),
+                        help="Primitivas separadas por vírgula")
+    parser.add_argument("--arquivo", default=ARQUIVO_RESULTADOS, help="Arquivo de resultados versionado")
+    parser.add_argument("--limite", type=float, default=LIMITE_TEMPO,
+                        help="Piora de tempo tolerada (0.25 = 25%%)")
+    parser.add_argument("--limite-memoria", type=float, default=LIMITE_MEMORIA)
+    parser.add_argument("--gravar-referencia", action="store_true",
+                        help="Usar esta execução como nova referência")
+    args = parser.parse_args()
+
+    corpora = [c for c in args.corpora.split(",") if c]
+    primitivas = [p for p in args.primitivas.split(",") if p]
+    desconhecidos = [c for c in corpora if c not in CORPORA] + [p for p in primitivas if p not in PRIMITIVAS]
+    if desconhecidos:
+        parser.error(f"desconhecido(s): {', '.join(desconhecidos)}")
+
+    dados = carregar_resultados(args.arquivo)
+    if dados["referencia"] is None and not args.gravar_referencia:
+        # Sem referência a trava não compara nada: a primeira execução não pode virar referência sozinha
+        print(f"[BENCH] ❌ Nenhuma referência em {args.arquivo}. Grave uma a partir de um commit "
+              f"conhecido com --gravar-referencia (na máquina onde a trava vai rodar) e versione o arquivo")
+        return 2
+
+    execucao = {
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "maquina": _maquina(),
+        "python": sys.version.split()[0],
+        "resultados": executar(corpora, primitivas),
+    }
+    dados["execucoes"] = (dados["execucoes"] + [execucao])[-50:]
+
+    regressoes = []
+    referencia = dados["referencia"]
+    if args.gravar_referencia:
+        dados["referencia"] = execucao
+        print(f"[BENCH] Referência gravada (commit {execucao['commit']})")
+    else:
+        if referencia["maquina"] != execucao["maquina"]:
+            print(f"[BENCH] ⚠️ Referência medida em outra máquina ({referencia['maquina']}); "
+                  f"compare com cuidado ou grave uma nova com --gravar-referencia")
+        regressoes = comparar(execucao["resultados"], referencia["resultados"],
+                              args.limite, args.limite_memoria)
+        if regressoes:
+            # Uma medida ruim pode ser só a máquina ocupada: medir de novo antes de falhar
+            print(f"[BENCH] {len(regressoes)} possível(is) regressão(ões), medindo de novo...")
+            for primitiva, nome in sorted({(p, c) for p, c, _ in regressoes}):
+                medida = execucao["resultados"][primitiva][nome]
+                nova = medir(PRIMITIVAS[primitiva], Corpus(nome, CORPORA[nome]))
+                medida["segundos"] = min(medida["segundos"], nova["segundos"])
+            regressoes = comparar(execucao["resultados"], referencia["resultados"],
+                                  args.limite, args.limite_memoria)
+
+    escrever_atomico(args.arquivo, json.dumps(dados, indent=1, ensure_ascii=False).encode("utf-8"))
+
+    if regressoes:
+        print(f"[BENCH] ❌ {len(regressoes)} regressão(ões) em relação ao commit "
+              f"{referencia['commit']} ({referencia['data']}):")
+        for primitiva, nome, descricao in regressoes:
+            print(f"  {primitiva} [{nome}]: {descricao}")
+        return 1
+    print("[BENCH] ✅ Nenhuma regressão")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Painel de Saúde dos Endpoints
+Tabela Tkinter com a pontuação ao vivo de cada endpoint (SaudeEndpoints)
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from endpoint_stats import SaudeEndpoints
+
+
+# Atalho que abre (ou traz para frente) a janela de saúde (ver instalar_atalho_saude)
+ATALHO_SAUDE = "<Control-Shift-F10>"
+
+
+class PainelEndpoints(ttk.Frame):
+    """
+    Tabela com estado, latência, taxa de erro e 429/503 de cada endpoint
+
+    Pode ser colocada em qualquer janela do programa; atualiza sozinha a cada
+    `intervalo_ms` lendo o instantâneo do modelo de saúde (não bloqueia a síntese).
+    """
+
+    COLUNAS = (
+        ("estado", "Estado", 80),
+        ("latencia", "Latência", 80),
+        ("taxa_erro", "Erros", 60),
+        ("em_voo", "Em voo", 60),
+        ("sucessos", "OK", 50),
+        ("erros_429", "429", 50),
+        ("erros_503", "503", 50),
+    )
+
+    def __init__(self, master, saude: SaudeEndpoints, intervalo_ms: int = 1000):
+        """
+        Args:
+            master: Widget pai
+            saude: Modelo de saúde (ex: agendador.saude)
+            intervalo_ms: Intervalo entre atualizações
+        """
+        super().__init__(master)
+        self.saude = saude
+        self.intervalo_ms = intervalo_ms
+
+        self.tabela = ttk.Treeview(self, columns=[c[0] for c in self.COLUNAS], height=9)
+        self.tabela.heading("#0", text="Endpoint")
+        self.tabela.column("#0", width=110)
+        for coluna, titulo, largura in self.COLUNAS:
+            self.tabela.heading(coluna, text=titulo)
+            self.tabela.column(coluna, width=largura, anchor=tk.CENTER)
+        self.tabela.pack(fill=tk.BOTH, expand=True)
+
+        self.tabela.tag_configure(SaudeEndpoints.EJETADO, foreground="#c0392b")
+        self.tabela.tag_configure(SaudeEndpoints.EM_TESTE, foreground="#d68910")
+
+        self._agendado = None
+        self.bind("<Destroy>", self._ao_destruir)
+        self._atualizar()
+
+    def _atualizar(self):
+        """Redesenha a tabela e agenda a próxima atualização"""
+        self.tabela.delete(*self.tabela.get_children())
+        for linha in self.saude.instantaneo():
+            latencia = f"{linha['latencia']:.1f}s" if linha["latencia"] is not None else "-"
+            self.tabela.insert(
+                "", tk.END,
+                text=linha["nome"],
+                values=(
+                    linha["estado"],
+                    latencia,
+                    f"{linha['taxa_erro']:.0%}",
+                    linha["em_voo"],
+                    linha["sucessos"],
+                    linha["erros_429"],
+                    linha["erros_503"],
+                ),
+                tags=(linha["estado"],),
+            )
+        self._agendado = self.after(self.intervalo_ms, self._atualizar)
+
+    def _ao_destruir(self, evento):
+        if evento.widget is self and self._agendado is not None:
+            self.after_cancel(self._agendado)
+            self._agendado = None
+
+
+def abrir_janela_saude(master, saude: SaudeEndpoints) -> tk.Toplevel:
+    """
+    Abre uma janela separada com o painel
+
+    Args:
+        master: Janela principal do programa
+        saude: Modelo de saúde (ex: agendador.saude)
+    """
+    janela = tk.Toplevel(master)
+    janela.title("Servidores de Áudio")
+    PainelEndpoints(janela, saude).pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    return janela
+
+
+def instalar_atalho_saude(janela, saude: SaudeEndpoints) -> None:
+    """
+    Ctrl+Shift+F10 abre a janela de saúde (ou traz para frente a já aberta)
+
+    Args:
+        janela: Janela principal do programa (Tk)
+        saude: Modelo de saúde (ex: agendador.saude)
+    """
+    aberta = []
+
+    def abrir(_evento=None):
+        if aberta and aberta[0].winfo_exists():
+            aberta[0].deiconify()
+            aberta[0].lift()
+            return
+        aberta[:] = [abrir_janela_saude(janela, saude)]
+
+    janela.bind_all(ATALHO_SAUDE, abrir)
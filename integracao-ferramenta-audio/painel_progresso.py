@@ -0,0 +1,231 @@
+"""
+Painel de Progresso do Job
+Barra geral com vazão e ETA e uma linha por chunk, alimentados pelo
+BarramentoProgresso num ritmo fixo (o Tk só é tocado na thread principal)
+"""
+
+import argparse
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from progress_bus import FALHOU, PENDENTE, PRONTO, REPETINDO, SINTETIZANDO, BarramentoProgresso
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+
+# Atalho que abre (ou traz para frente) as janelas de progresso (ver instalar_atalho_progresso)
+ATALHO_PROGRESSO = "<Control-Shift-F9>"
+
+
+def formatar_duracao(segundos: float) -> str:
+    """1:02:03 / 4:05 (ou '--' se desconhecido)"""
+    if segundos < 0:
+        return "--"
+    minutos, seg = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}:{minutos:02d}:{seg:02d}" if horas else f"{minutos}:{seg:02d}"
+
+
+class PainelProgresso(ttk.Frame):
+    """
+    Progresso de um job: resumo (prontos, falhas, chunks/min, ETA) e a tabela de chunks
+
+    A cada quadro (`quadros_por_segundo`), drena o barramento e atualiza só as
+    linhas que mudaram desde o quadro anterior, no máximo `max_linhas_por_quadro`
+    (o resto fica para o quadro seguinte). Com isso o custo por quadro não
+    depende do tamanho do job nem de quantos chunks terminaram juntos.
+    """
+
+    COLUNAS = (
+        ("estado", "Estado", 100),
+        ("tentativa", "Tentativa", 70),
+        ("audio", "Áudio", 70),
+    )
+
+    CORES = {
+        SINTETIZANDO: "#1f618d",
+        REPETINDO: "#d68910",
+        PRONTO: "#1e8449",
+        FALHOU: "#c0392b",
+    }
+
+    def __init__(self, master, barramento: BarramentoProgresso,
+                 textos: Optional[List[str]] = None, quadros_por_segundo: float = 10,
+                 max_linhas_por_quadro: int = 200):
+        """
+        Args:
+            master: Widget pai
+            barramento: Barramento do job (o mesmo passado em EstatisticasJob.progresso)
+            textos: Texto de cada chunk (o início aparece na linha)
+            quadros_por_segundo: Atualizações da tela por segundo
+            max_linhas_por_quadro: Linhas redesenhadas no máximo por quadro
+        """
+        super().__init__(master)
+        self.barramento = barramento
+        self.intervalo_ms = max(int(1000 / quadros_por_segundo), 1)
+        self.max_linhas_por_quadro = max_linhas_por_quadro
+        self._atrasadas: Set[int] = set()
+        self._agendado: Optional[str] = None
+
+        self.resumo = ttk.Label(self, text="")
+        self.resumo.pack(fill=tk.X)
+        self.barra = ttk.Progressbar(self, maximum=max(barramento.total, 1))
+        self.barra.pack(fill=tk.X, pady=(4, 6))
+
+        quadro_tabela = ttk.Frame(self)
+        quadro_tabela.pack(fill=tk.BOTH, expand=True)
+        self.tabela = ttk.Treeview(quadro_tabela, columns=[c[0] for c in self.COLUNAS], height=12)
+        self.tabela.heading("#0", text="Chunk")
+        self.tabela.column("#0", width=260)
+        for coluna, titulo, largura in self.COLUNAS:
+            self.tabela.heading(coluna, text=titulo)
+            self.tabela.column(coluna, width=largura, anchor=tk.CENTER)
+        rolagem = ttk.Scrollbar(quadro_tabela, orient=tk.VERTICAL, command=self.tabela.yview)
+        self.tabela.configure(yscrollcommand=rolagem.set)
+        self.tabela.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        rolagem.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for estado, cor in self.CORES.items():
+            self.tabela.tag_configure(estado, foreground=cor)
+
+        # Linhas criadas uma vez; depois só `item(...)` nas que mudaram
+        for indice in range(barramento.total):
+            texto = f"{indice + 1}"
+            if textos:
+                texto += f"  {textos[indice][:40]}"
+            self.tabela.insert("", tk.END, iid=str(indice), text=texto,
+                               values=(PENDENTE, "", ""))
+
+        self.bind("<Destroy>", self._ao_destruir)
+        self._quadro()
+
+    def _quadro(self):
+        """Drena o barramento, redesenha o que mudou e agenda o próximo quadro"""
+        mudaram, _ = self.barramento.drenar()
+        self._atrasadas |= mudaram
+        if len(self._atrasadas) <= self.max_linhas_por_quadro:
+            agora, self._atrasadas = self._atrasadas, set()
+        else:
+            agora = set(sorted(self._atrasadas)[:self.max_linhas_por_quadro])
+            self._atrasadas -= agora
+
+        for indice in agora:
+            self._desenhar_linha(indice)
+        self._desenhar_resumo()
+        self._agendado = self.after(self.intervalo_ms, self._quadro)
+
+    def _desenhar_linha(self, indice: int):
+        barramento = self.barramento
+        estado = barramento.estado[indice]
+        tentativa = barramento.tentativas[indice]
+        bytes_pcm = barramento.bytes_pcm[indice] if estado == PRONTO else 0
+        audio = f"{bytes_pcm / (TAXA_AMOSTRAGEM * BYTES_POR_AMOSTRA):.1f}s" if bytes_pcm else ""
+        self.tabela.item(str(indice), values=(estado, tentativa or "", audio), tags=(estado,))
+
+    def _desenhar_resumo(self):
+        r = self.barramento.resumo()
+        texto = f"{r['prontos']}/{r['total']} prontos · {r['em_andamento']} em andamento"
+        if r["falhados"]:
+            texto += f" · {r['falhados']} falha(s)"
+        if r["chunks_por_minuto"]:
+            texto += (f" · {r['chunks_por_minuto']:.1f} chunks/min"
+                      f" ({r['audio_por_segundo']:.1f}x tempo real)")
+        texto += f" · decorrido {formatar_duracao(r['decorrido'])} · restante {formatar_duracao(r['eta'])}"
+        if texto != self.resumo.cget("text"):
+            self.resumo.configure(text=texto)
+        self.barra.configure(value=r["prontos"])
+
+    def _ao_destruir(self, evento):
+        if evento.widget is self and self._agendado is not None:
+            self.after_cancel(self._agendado)
+            self._agendado = None
+
+
+def abrir_janela_progresso(master, barramento: BarramentoProgresso,
+                           textos: Optional[List[str]] = None,
+                           nome: Optional[str] = None) -> tk.Toplevel:
+    """
+    Abre uma janela separada com o painel
+
+    Args:
+        master: Janela principal do programa
+        barramento: Barramento do job
+        textos: Texto de cada chunk (opcional)
+        nome: Nome do job no título da janela (opcional)
+    """
+    janela = tk.Toplevel(master)
+    janela.title(f"Progresso do Áudio - {nome}" if nome else "Progresso do Áudio")
+    PainelProgresso(janela, barramento, textos).pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    return janela
+
+
+def instalar_atalho_progresso(janela,
+                              jobs: Sequence[Tuple[str, BarramentoProgresso, Optional[List[str]]]],
+                              abrir_agora: bool = True) -> None:
+    """
+    Ctrl+Shift+F9 abre uma janela de progresso por job (ou traz para frente as já abertas)
+
+    Chamar da thread principal (ex: no `ao_criar` de instalar_atalhos_na_proxima_janela);
+    os jobs rodam em outras threads e só publicam no barramento.
+
+    Args:
+        janela: Janela principal do programa (Tk)
+        jobs: (nome, barramento, textos) de cada job; a lista pode crescer depois
+        abrir_agora: Já abrir as janelas dos jobs que estiverem na lista
+    """
+    abertas: Dict[int, tk.Toplevel] = {}
+
+    def abrir(_evento=None):
+        for nome, barramento, textos in list(jobs):
+            aberta = abertas.get(id(barramento))
+            if aberta is not None and aberta.winfo_exists():
+                aberta.deiconify()
+                aberta.lift()
+                continue
+            abertas[id(barramento)] = abrir_janela_progresso(janela, barramento, textos, nome)
+
+    janela.bind_all(ATALHO_PROGRESSO, abrir)
+    if abrir_agora and jobs:
+        abrir()
+
+
+# ===== DEMONSTRAÇÃO =====
+
+def main():
+    import random
+    import threading
+    import time
+
+    parser = argparse.ArgumentParser(description="Painel com um job simulado (muitos chunks, muitas threads)")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=48)
+    parser.add_argument("--latencia", type=float, default=0.3, help="Segundos médios por chunk")
+    args = parser.parse_args()
+
+    barramento = BarramentoProgresso(args.chunks)
+    proximo = iter(range(args.chunks))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                indice = next(proximo, None)
+            if indice is None:
+                return
+            barramento.publicar(indice, SINTETIZANDO)
+            time.sleep(random.expovariate(1 / args.latencia))
+            if random.random() < 0.05:
+                barramento.publicar(indice, REPETINDO, tentativa=2)
+                time.sleep(random.expovariate(1 / args.latencia))
+            barramento.publicar(indice, PRONTO, bytes_pcm=TAXA_AMOSTRAGEM * BYTES_POR_AMOSTRA * 60)
+
+    root = tk.Tk()
+    root.title("Progresso do Áudio (simulação)")
+    PainelProgresso(root, barramento).pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    for _ in range(args.threads):
+        threading.Thread(target=worker, daemon=True).start()
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Reaproveitamento de Frases entre Roteiros
+Vinhetas, chamadas e despedidas que se repetem em todo episódio ("Presta
+atenção...") são sintetizadas uma vez por voz/prompt e reaproveitadas
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from synthesis_cache import CacheSintese, chave_cache, escrever_atomico
+from text_chunker import (GEMINI_TTS_WORD_LIMIT, contar_palavras, dividir_sentencas,
+                          dividir_texto_para_tts, normalizar_texto)
+
+
+PASTA_FRASES = "frases_sintese"
+
+# Frases curtas demais soam estranhas isoladas ("Sim."); longas demais raramente se repetem
+MIN_PALAVRAS_FRASE = 4
+MAX_PALAVRAS_FRASE = 60
+
+# Limite do áudio guardado: frases são curtas, 512 MB cobrem milhares delas
+LIMITE_AUDIO_FRASES = 512 * 1024 ** 2
+
+# Sentenças que não aparecem nos últimos N roteiros são esquecidas: sem isso as
+# contagens guardam toda sentença de todo roteiro já feito (quase todas únicas)
+JANELA_ROTEIROS = 200
+
+# A cada N roteiros o log de contagens é compactado em frases.json
+COMPACTAR_A_CADA = 50
+
+
+class ArmazemFrases:
+    """
+    Frases recorrentes e o áudio de cada uma, por voz e prompt
+
+    Estrutura da pasta:
+        frases.json   - contagem de roteiros em que cada sentença apareceu
+        frases.log    - roteiros registrados desde a última compactação (uma linha cada)
+        audio/        - CacheSintese só com o PCM das frases (separado do cache
+                        de chunks, para não ser expulso por roteiros inteiros)
+
+    Uma sentença vira frase quando aparece em `min_roteiros` roteiros
+    diferentes. A partir daí ela vai num chunk próprio (com as frases vizinhas),
+    e nas próximas vezes o áudio desse chunk vem daqui sem requisição.
+    Sentenças ausentes dos últimos `janela_roteiros` roteiros são esquecidas.
+    """
+
+    ARQUIVO_CONTAGENS = "frases.json"
+    ARQUIVO_LOG = "frases.log"
+
+    def __init__(self, pasta: str = PASTA_FRASES, min_roteiros: int = 2,
+                 limite_bytes: int = LIMITE_AUDIO_FRASES,
+                 janela_roteiros: int = JANELA_ROTEIROS):
+        """
+        Args:
+            pasta: Pasta do armazém
+            min_roteiros: Em quantos roteiros a sentença precisa aparecer
+            limite_bytes: Tamanho máximo do áudio guardado
+            janela_roteiros: Sentenças não vistas nos últimos N roteiros são esquecidas
+        """
+        self.pasta = pasta
+        self.min_roteiros = min_roteiros
+        self.janela_roteiros = janela_roteiros
+        self.audio = CacheSintese(os.path.join(pasta, "audio"), limite_bytes)
+
+        self._lock = threading.Lock()
+        # chave (sentença, voz, prompt) → roteiros (hash) em que apareceu, até min_roteiros
+        self._vistas: Dict[str, List[str]] = {}
+        # chave → número do último roteiro registrado em que apareceu
+        self._ultimo: Dict[str, int] = {}
+        self._numero = 0
+        self._linhas_log = 0
+        self._carregar()
+
+    # ----- Detecção -----
+
+    def registrar_roteiro(self, texto: str, voz: str, prompt: str) -> Set[str]:
+        """
+        Conta as sentenças de um roteiro e devolve as que já são frases
+
+        Rodar o mesmo roteiro de novo não conta duas vezes.
+
+        Returns:
+            Sentenças normalizadas que devem ser sintetizadas à parte
+        """
+        roteiro = hashlib.sha256(normalizar_texto(texto).encode("utf-8")).hexdigest()[:16]
+        sentencas = {self._chave(sentenca, voz, prompt): sentenca
+                     for sentenca in set(map(normalizar_texto, dividir_sentencas(texto)))
+                     if MIN_PALAVRAS_FRASE <= contar_palavras(sentenca) <= MAX_PALAVRAS_FRASE}
+        with self._lock:
+            self._numero += 1
+            self._contar(roteiro, self._numero, sentencas)
+            frases = {sentenca for chave, sentenca in sentencas.items()
+                      if len(self._vistas[chave]) >= self.min_roteiros}
+            if self._linhas_log + 1 >= COMPACTAR_A_CADA:
+                self._compactar()
+            else:
+                self._anexar_log([roteiro, self._numero, sorted(sentencas)])
+        return frases
+
+    def e_frase(self, texto: str, voz: str, prompt: str) -> bool:
+        """True se o texto (um chunk) só tem frases recorrentes"""
+        sentencas = [normalizar_texto(s) for s in dividir_sentencas(texto)]
+        with self._lock:
+            return bool(sentencas) and all(
+                len(self._vistas.get(self._chave(s, voz, prompt), [])) >= self.min_roteiros
+                for s in sentencas)
+
+    # ----- Áudio -----
+
+    def obter(self, texto: str, voz: str, prompt: str, versao_modelo: str) -> Optional[bytes]:
+        """PCM guardado da frase, ou None"""
+        return self.audio.obter(chave_cache(texto, voz, prompt, versao_modelo))
+
+    def inserir(self, texto: str, voz: str, prompt: str, versao_modelo: str, pcm: bytes):
+        """Guarda o PCM de uma frase"""
+        self.audio.inserir(chave_cache(texto, voz, prompt, versao_modelo), pcm)
+
+    # ----- Internos -----
+
+    @staticmethod
+    def _chave(sentenca: str, voz: str, prompt: str) -> str:
+        material = json.dumps([sentenca, voz, normalizar_texto(prompt or "")], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _contar(self, roteiro: str, numero: int, chaves: Iterable[str]):
+        """Conta um roteiro nas sentenças dadas (chamar com o lock)"""
+        for chave in chaves:
+            vistas = self._vistas.setdefault(chave, [])
+            if roteiro not in vistas and len(vistas) < self.min_roteiros:
+                vistas.append(roteiro)
+            self._ultimo[chave] = numero
+
+    def _esquecer_antigas(self):
+        """Remove sentenças fora da janela de roteiros (chamar com o lock)"""
+        corte = self._numero - self.janela_roteiros
+        for chave in [c for c, numero in self._ultimo.items() if numero <= corte]:
+            del self._ultimo[chave]
+            self._vistas.pop(chave, None)
+
+    def _anexar_log(self, registro: list):
+        """Acrescenta um roteiro ao log (chamar com o lock)"""
+        os.makedirs(self.pasta, exist_ok=True)
+        with open(os.path.join(self.pasta, self.ARQUIVO_LOG), "ab") as f:
+            f.write(json.dumps(registro).encode("utf-8") + b"\n")
+        self._linhas_log += 1
+
+    def _compactar(self):
+        """Grava as contagens inteiras e zera o log (chamar com o lock)"""
+        self._esquecer_antigas()
+        dados = {"numero": self._numero, "vistas": self._vistas, "ultimo": self._ultimo}
+        escrever_atomico(os.path.join(self.pasta, self.ARQUIVO_CONTAGENS),
+                         json.dumps(dados).encode("utf-8"))
+        try:
+            os.remove(os.path.join(self.pasta, self.ARQUIVO_LOG))
+        except FileNotFoundError:
+            pass
+        self._linhas_log = 0
+
+    def _carregar(self):
+        caminho = os.path.join(self.pasta, self.ARQUIVO_CONTAGENS)
+        if os.path.exists(caminho):
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                self._vistas = dados.get("vistas", {})
+                self._numero = dados.get("numero", 0)
+                # Arquivo antigo sem "ultimo": tudo conta como visto agora
+                self._ultimo = dados.get("ultimo") or dict.fromkeys(self._vistas, self._numero)
+            except (OSError, ValueError) as e:
+                print(f"[FRASES] Contagens ilegíveis, começando do zero: {e}")
+
+        caminho = os.path.join(self.pasta, self.ARQUIVO_LOG)
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, "rb") as f:
+            for linha in f:
+                try:
+                    if not linha.endswith(b"\n"):
+                        raise ValueError("linha incompleta")
+                    roteiro, numero, chaves = json.loads(linha.decode("utf-8"))
+                except ValueError:
+                    # Última linha pela metade (processo morto no meio da escrita)
+                    break
+                if numero > self._numero:
+                    self._numero = numero
+                    self._contar(roteiro, numero, chaves)
+                self._linhas_log += 1
+        self._esquecer_antigas()
+        # Regravar agora também descarta uma linha final cortada
+        self._compactar()
+
+
+def dividir_com_frases(texto: str, armazem: ArmazemFrases, voz: str, prompt: str = "",
+                       max_palavras: int = GEMINI_TTS_WORD_LIMIT) -> Tuple[List[str], List[int]]:
+    """
+    Divide o roteiro deixando as frases recorrentes em chunks só delas
+
+    Frases seguidas (ex: a vinheta inteira) ficam no mesmo chunk, até
+    max_palavras; o texto entre elas é dividido normalmente.
+
+    Returns:
+        (chunks, emendas) - emendas são os índices de chunk cujo início deve
+        ser unido ao chunk anterior com crossfade (antes e depois de cada frase)
+    """
+    frases = armazem.registrar_roteiro(texto, voz, prompt)
+    chunks: List[str] = []
+    emendas: Set[int] = set()
+    corrido: List[str] = []
+    bloco: List[str] = []
+    blocos = 0
+
+    def fechar_corrido():
+        if corrido:
+            chunks.extend(dividir_texto_para_tts(" ".join(corrido), max_palavras))
+            corrido.clear()
+
+    def fechar_bloco():
+        nonlocal blocos
+        if bloco:
+            emendas.add(len(chunks))
+            chunks.append(" ".join(bloco))
+            emendas.add(len(chunks))
+            blocos += 1
+            bloco.clear()
+
+    for sentenca in dividir_sentencas(texto):
+        if normalizar_texto(sentenca) not in frases:
+            fechar_bloco()
+            corrido.append(sentenca)
+            continue
+        fechar_corrido()
+        if contar_palavras(" ".join(bloco + [sentenca])) > max_palavras:
+            fechar_bloco()
+        bloco.append(sentenca)
+    fechar_bloco()
+    fechar_corrido()
+
+    if blocos:
+        print(f"[FRASES] {blocos} bloco(s) de frases recorrentes em {len(chunks)} chunks")
+    return chunks, sorted(i for i in emendas if 0 < i < len(chunks))
+
+
+# ===== DEMONSTRAÇÃO =====
+
+if __name__ == "__main__":
+    import tempfile
+
+    from synthesis_scheduler import AgendadorSintese, EstatisticasJob
+    from tts_client import Endpoint
+
+    class ClienteSimulado:
+        palavras = 0
+
+        def sintetizar(self, endpoint, texto, voz, prompt="", cancelar=None):
+            ClienteSimulado.palavras += contar_palavras(texto)
+            return bytes(contar_palavras(texto) * 20000)
+
+    vinheta = ("Presta atenção nessa história que eu vou te contar agora. "
+               "Se inscreve no canal e ativa o sininho para não perder nada.")
+    despedida = "Se você gostou deste vídeo deixa o seu like. Até o próximo episódio, um grande abraço."
+
+    def episodio(n: int) -> str:
+        corpo = " ".join(f"No episódio {n}, o trecho {i} conta uma parte nova da história." for i in range(8))
+        return f"{vinheta} {corpo} {despedida}"
+
+    endpoints = [Endpoint("simulado", "http://localhost", Endpoint.TIPO_WORKER)]
+    with tempfile.TemporaryDirectory() as pasta:
+        armazem = ArmazemFrases(pasta)
+        for usar_frases in (False, True):
+            agendador = AgendadorSintese(endpoints, cliente=ClienteSimulado(),
+                                         frases=armazem if usar_frases else None)
+            requisicoes = ClienteSimulado.palavras = 0
+            for n in range(10):
+                if usar_frases:
+                    chunks, _ = dividir_com_frases(episodio(n), armazem, "Kore", max_palavras=120)
+                else:
+                    chunks = dividir_texto_para_tts(episodio(n), 120)
+                estatisticas = EstatisticasJob()
+                agendador.sintetizar_job(chunks, "Kore", estatisticas=estatisticas)
+                requisicoes += estatisticas.requisicoes
+            print(f"{'Com' if usar_frases else 'Sem'} reaproveitamento: {requisicoes} requisições, "
+                  f"{ClienteSimulado.palavras} palavras sintetizadas em 10 episódios")
@@ -0,0 +1,154 @@
+"""
+Barramento de Progresso
+Leva o progresso dos chunks das threads de síntese até a interface sem lock e
+sem chamar o Tk fora da thread principal: os workers publicam, a interface
+drena num ritmo fixo e só redesenha o que mudou
+"""
+
+import itertools
+import time
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+
+PENDENTE = "pendente"
+SINTETIZANDO = "sintetizando"
+REPETINDO = "repetindo"
+PRONTO = "pronto"
+FALHOU = "falhou"
+
+# Janela da vazão usada no ETA (segundos)
+JANELA_VAZAO = 60.0
+
+
+class BarramentoProgresso:
+    """
+    Estado de cada chunk de um job + anel de avisos de mudança
+
+    Lado dos workers (`publicar`, qualquer thread): grava o estado do chunk
+    em listas de tamanho fixo e avisa o índice num anel. Cada operação é uma
+    atribuição simples ou `next()` num contador, atômicas no CPython: não há
+    lock, e um worker nunca espera pela interface.
+
+    Lado da interface (`drenar`, uma thread só): lê os avisos desde a última
+    vez, junta os repetidos (10 mudanças do mesmo chunk viram uma linha) e
+    mantém os totais, a vazão e o ETA. Se os workers derem a volta no anel
+    antes de uma drenagem, nada se perde: o estado está nas listas e a
+    drenagem pede o redesenho de tudo.
+    """
+
+    def __init__(self, total: int, capacidade: int = 4096):
+        """
+        Args:
+            total: Número de chunks do job
+            capacidade: Avisos guardados entre duas drenagens
+        """
+        self.total = total
+        self.estado: List[str] = [PENDENTE] * total
+        self.tentativas: List[int] = [0] * total
+        self.bytes_pcm: List[int] = [0] * total
+
+        self._capacidade = capacidade
+        self._anel: List[Optional[Tuple[int, int]]] = [None] * capacidade
+        self._escritas = itertools.count()
+
+        # Só a interface mexe daqui para baixo
+        self._lido = 0
+        self._visto: List[str] = [PENDENTE] * total
+        self.contagem: Dict[str, int] = {PENDENTE: total}
+        self.bytes_prontos = 0
+        self.inicio = time.monotonic()
+        self._amostras: deque = deque()
+
+    # ----- Workers -----
+
+    def publicar(self, indice: int, estado: str, tentativa: int = 0, bytes_pcm: int = 0):
+        """Novo estado de um chunk (qualquer thread)"""
+        if tentativa:
+            self.tentativas[indice] = tentativa
+        if bytes_pcm:
+            self.bytes_pcm[indice] = bytes_pcm
+        self.estado[indice] = estado
+        posicao = next(self._escritas)
+        self._anel[posicao % self._capacidade] = (posicao, indice)
+
+    # ----- Interface -----
+
+    def drenar(self) -> Tuple[Set[int], bool]:
+        """
+        Avisos desde a última drenagem (chamar sempre da mesma thread)
+
+        Returns:
+            (índices que mudaram, redesenhar_tudo)
+        """
+        mudaram: Set[int] = set()
+        tudo = False
+        for _ in range(self._capacidade):
+            aviso = self._anel[self._lido % self._capacidade]
+            if aviso is None or aviso[0] < self._lido:
+                # Ainda não escrito (um worker pegou a posição e não gravou): fica para o próximo quadro
+                break
+            if aviso[0] > self._lido:
+                # Os workers deram a volta no anel: parte dos avisos se perdeu
+                tudo = True
+                self._lido = aviso[0]
+            mudaram.add(aviso[1])
+            self._lido += 1
+
+        if tudo:
+            mudaram = set(range(self.total))
+        for indice in mudaram:
+            self._contabilizar(indice)
+        if mudaram:
+            self._amostras.append((time.monotonic(), self.contagem.get(PRONTO, 0), self.bytes_prontos))
+        return mudaram, tudo
+
+    def _contabilizar(self, indice: int):
+        anterior, atual = self._visto[indice], self.estado[indice]
+        if anterior == atual:
+            return
+        self.contagem[anterior] -= 1
+        self.contagem[atual] = self.contagem.get(atual, 0) + 1
+        if atual == PRONTO:
+            self.bytes_prontos += self.bytes_pcm[indice]
+        elif anterior == PRONTO:
+            self.bytes_prontos -= self.bytes_pcm[indice]
+        self._visto[indice] = atual
+
+    def resumo(self) -> Dict[str, float]:
+        """
+        Totais vistos na última drenagem
+
+        Returns:
+            Dict com prontos, falhados, em_andamento, total, chunks_por_minuto,
+            audio_por_segundo (segundos de áudio por segundo de relógio),
+            eta (segundos, -1 se ainda sem vazão) e decorrido
+        """
+        agora = time.monotonic()
+        while len(self._amostras) > 2 and agora - self._amostras[0][0] > JANELA_VAZAO:
+            self._amostras.popleft()
+
+        prontos = self.contagem.get(PRONTO, 0)
+        falhados = self.contagem.get(FALHOU, 0)
+        por_minuto = audio_por_segundo = 0.0
+        eta = -1.0
+        if len(self._amostras) >= 2:
+            t0, prontos0, bytes0 = self._amostras[0]
+            intervalo = agora - t0
+            if intervalo > 0 and prontos > prontos0:
+                por_minuto = (prontos - prontos0) / intervalo * 60
+                audio_por_segundo = (self.bytes_prontos - bytes0) / (TAXA_AMOSTRAGEM * BYTES_POR_AMOSTRA) / intervalo
+                eta = (self.total - prontos - falhados) / por_minuto * 60
+
+        return {
+            "prontos": prontos,
+            "falhados": falhados,
+            "em_andamento": self.contagem.get(SINTETIZANDO, 0) + self.contagem.get(REPETINDO, 0),
+            "total": self.total,
+            "chunks_por_minuto": por_minuto,
+            "audio_por_segundo": audio_por_segundo,
+            "eta": eta,
+            "decorrido": agora - self.inicio,
+        }
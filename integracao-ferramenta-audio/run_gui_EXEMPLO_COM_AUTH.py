@@ -5,7 +5,108 @@ Este arquivo mostra como integrar o sistema de login no programa existente.
 """
 
 from tela_login import TelaLogin
+import multiprocessing
+import os
 import sys
+import threading
+import tkinter as tk
+from tkinter import messagebox
+
+from adaptive_concurrency import ControladorAimd
+from job_journal import executar_job, listar_jobs_inacabados
+from memory_report import SessaoMemoria
+from painel_endpoints import instalar_atalho_saude
+from painel_progresso import instalar_atalho_progresso
+from progress_bus import BarramentoProgresso
+from sampling_profiler import instalar_atalhos_na_proxima_janela, instalar_sinais
+from synthesis_cache import CacheSintese
+from synthesis_scheduler import AgendadorSintese, EstatisticasJob, FalhaJob
+from tts_client import Endpoint
+
+
+def criar_agendador(auth_manager):
+    """
+    Agendador compartilhado pelos jobs do programa (e pelo painel de saúde)
+
+    Args:
+        auth_manager: Instância do AuthManager com usuário logado
+    """
+    return AgendadorSintese(
+        Endpoint.workers_supabase(auth_manager.ANON_KEY),
+        cache=CacheSintese(),
+        concorrencia=ControladorAimd(),
+    )
+
+
+def oferecer_retomada_jobs(agendador):
+    """
+    Pergunta ao usuário se deseja retomar jobs de síntese interrompidos
+
+    Jobs retomados continuam em segundo plano a partir dos chunks que faltam,
+    sem re-dividir o texto nem re-sintetizar o áudio já pronto.
+
+    Args:
+        agendador: AgendadorSintese que executa as retomadas
+
+    Returns:
+        (nome, barramento, textos) de cada job retomado, para o painel de progresso
+    """
+    progressos = []
+    jobs = listar_jobs_inacabados()
+    if not jobs:
+        return progressos
+
+    root = tk.Tk()
+    root.withdraw()
+
+    sessao_memoria = None
+    for diario in jobs:
+        prontos = len(diario.prontos())
+        total = len(diario.chunks)
+        resposta = messagebox.askyesnocancel(
+            "Job de Áudio Interrompido",
+            f"O áudio \"{os.path.basename(diario.saida)}\" não terminou "
+            f"({prontos}/{total} partes prontas).\n\n"
+            "Sim: continuar de onde parou\n"
+            "Não: descartar o progresso\n"
+            "Cancelar: decidir depois",
+        )
+
+        if resposta:
+            if sessao_memoria is None:
+                # AUDIO_PERFIL_MEMORIA=1: relatório de memória por estágio (memory_report.py)
+                sessao_memoria = SessaoMemoria.do_ambiente()
+            barramento = BarramentoProgresso(len(diario.chunks))
+            # Só o início de cada texto: o painel abre depois e o diário já pode estar fechado
+            progressos.append((os.path.basename(diario.saida), barramento,
+                               [texto[:40] for texto in diario.chunks]))
+            threading.Thread(target=_retomar_job,
+                             args=(agendador, diario, sessao_memoria, barramento)).start()
+        elif resposta is False:
+            diario.apagar()
+        else:
+            # Decidir depois: o diário é reaberto na próxima vez
+            diario.fechar()
+
+    root.destroy()
+    return progressos
+
+
+def _retomar_job(agendador, diario, sessao_memoria=None, progresso=None):
+    """Executa a retomada de um job (roda em thread separada)"""
+    perfil = sessao_memoria.novo_job(os.path.basename(diario.saida)) if sessao_memoria else None
+    estatisticas = EstatisticasJob(perfil_memoria=perfil, progresso=progresso)
+    try:
+        duracao = executar_job(agendador, diario, estatisticas=estatisticas)
+        print(f"[RETOMADA] ✅ {diario.saida} concluído ({duracao / 60:.1f} min)")
+    except FalhaJob as e:
+        print(f"[RETOMADA] ❌ {diario.saida}: {e} - o progresso continua salvo")
+    except Exception as e:
+        # Thread solta: sem isto o erro sumiria e o usuário acharia que o job travou
+        print(f"[RETOMADA] ❌ {diario.saida}: {type(e).__name__}: {e} - o progresso continua salvo")
+    finally:
+        diario.fechar()
+
 
 def iniciar_programa_com_autenticacao(auth_manager):
     """
@@ -35,6 +136,22 @@ def iniciar_programa_com_autenticacao(auth_manager):
 
     print(f"Programa iniciado para: {auth_manager.obter_nome_usuario()}")
 
+    # Oferecer retomada de jobs interrompidos (crash, notebook fechado, sessão expirada)
+    agendador = criar_agendador(auth_manager)
+    progressos = oferecer_retomada_jobs(agendador)
+
+    # Na janela principal: Ctrl+Shift+F10 saúde dos servidores, Ctrl+Shift+F9 progresso dos
+    # jobs retomados (abre sozinho quando há algum); diagnóstico escondido Ctrl+Shift+F12
+    # perfil, Ctrl+Shift+F11 threads. Com o root à mão (ex: Application().root), prefira
+    # instalar_atalhos(root), instalar_atalho_saude(root, agendador.saude) e
+    # instalar_atalho_progresso(root, progressos), e use este mesmo agendador nos jobs da
+    # interface para o painel mostrar o tráfego deles
+    def ao_criar_janela(root):
+        instalar_atalho_saude(root, agendador.saude)
+        instalar_atalho_progresso(root, progressos)
+
+    instalar_atalhos_na_proxima_janela(ao_criar_janela)
+
     # SUBSTITUA ESTE CÓDIGO PELO CÓDIGO REAL DO run_gui.py:
     try:
         # Importar a interface principal
@@ -57,6 +174,9 @@ def main():
     Esta função agora mostra login ANTES de abrir o programa
     """
 
+    # Diagnóstico de lentidão: kill -USR1/-USR2 <pid> ou AUDIO_PERFIL_CPU=1 (sampling_profiler.py)
+    instalar_sinais()
+
     # Criar e mostrar tela de login
     # Quando login for bem-sucedido, chama iniciar_programa_com_autenticacao
     tela = TelaLogin(on_login_success=iniciar_programa_com_autenticacao)
@@ -67,6 +187,8 @@ if __name__ == "__main__":
     """
     Este é o código que executa quando você roda: python run_gui.py
     """
+    # Necessário no executável do PyInstaller: o estágio de compressão usa um pool de processos
+    multiprocessing.freeze_support()
     main()
 
 
@@ -0,0 +1,345 @@
+"""
+Perfil por Amostragem e Despejo de Threads
+Diagnóstico de lentidão no executável (PyInstaller --windowed), sem profiler
+externo: amostra as pilhas de todas as threads e grava um arquivo de pilhas
+colapsadas (flame graph) ou um retrato instantâneo de todas as threads, para o
+usuário enviar por e-mail
+"""
+
+import argparse
+import atexit
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from synthesis_cache import escrever_atomico
+
+
+PASTA_DIAGNOSTICO = "diagnostico"
+
+# Atalhos escondidos na interface (ver instalar_atalhos)
+ATALHO_PERFIL = "<Control-Shift-F12>"
+ATALHO_THREADS = "<Control-Shift-F11>"
+
+# Variável de ambiente que liga o perfil desde a abertura do programa (ex: AUDIO_PERFIL_CPU=200 → 200 Hz)
+VARIAVEL_AMBIENTE = "AUDIO_PERFIL_CPU"
+
+FREQUENCIA_PADRAO = 100
+MAXIMO_SEGUNDOS_PADRAO = 600
+
+
+def _carimbo() -> str:
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def _nomes_threads() -> Dict[int, str]:
+    return {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+
+
+class AmostradorPilhas:
+    """
+    Profiler por amostragem de todas as threads
+
+    Uma thread própria lê `sys._current_frames()` N vezes por segundo e
+    conta cada pilha (raiz → folha). O resultado é tempo de relógio, não de
+    CPU: threads esperando rede ou lock aparecem paradas no ponto da espera,
+    que costuma ser justamente o que se quer ver numa lentidão.
+
+    Saída no formato de pilhas colapsadas (`thread;arquivo:funcao;... N`),
+    lido por flamegraph.pl, speedscope.app e `python sampling_profiler.py`.
+    """
+
+    def __init__(self, frequencia: float = FREQUENCIA_PADRAO, pasta: str = PASTA_DIAGNOSTICO,
+                 maximo_segundos: float = MAXIMO_SEGUNDOS_PADRAO):
+        """
+        Args:
+            frequencia: Amostras por segundo
+            pasta: Onde gravar o arquivo .folded
+            maximo_segundos: Para sozinho depois disso (o usuário pode esquecer ligado)
+        """
+        self.intervalo = 1.0 / frequencia
+        self.pasta = pasta
+        self.maximo_segundos = maximo_segundos
+        self.amostras = 0
+        self.inicio = 0.0
+        self.ultimo_arquivo: Optional[str] = None
+
+        self._pilhas: Counter = Counter()
+        self._rotulos: Dict[object, str] = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ativo(self) -> bool:
+        return self._thread is not None
+
+    def iniciar(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._pilhas.clear()
+            self.amostras = 0
+            self.inicio = time.monotonic()
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._laco, name="amostrador-pilhas", daemon=True)
+            self._thread.start()
+        print(f"[PERFIL] Amostrando pilhas a {1 / self.intervalo:.0f} Hz...")
+
+    def parar(self) -> Optional[str]:
+        """
+        Para a amostragem e grava o arquivo
+
+        Returns:
+            Caminho do .folded gravado (None se não estava ativo)
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return None
+        self._parar.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        return self._gravar()
+
+    def alternar(self) -> Optional[str]:
+        """Liga se estiver parado; para e grava se estiver ligado"""
+        if self.ativo:
+            return self.parar()
+        self.iniciar()
+        return None
+
+    # ----- Amostragem -----
+
+    def _laco(self):
+        proprio = threading.get_ident()
+        proximo = time.monotonic()
+        while not self._parar.is_set():
+            nomes = _nomes_threads()
+            for ident, quadro in sys._current_frames().items():
+                if ident != proprio:
+                    self._pilhas[self._colapsar(nomes.get(ident, f"thread-{ident}"), quadro)] += 1
+            self.amostras += 1
+
+            if time.monotonic() - self.inicio > self.maximo_segundos:
+                print(f"[PERFIL] Limite de {self.maximo_segundos:.0f}s atingido")
+                self.parar()
+                return
+            # Passo fixo: a frequência não cai com o custo da própria amostragem
+            proximo += self.intervalo
+            self._parar.wait(max(proximo - time.monotonic(), 0))
+
+    def _colapsar(self, thread: str, quadro) -> Tuple[str, ...]:
+        pilha: List[str] = []
+        while quadro is not None:
+            codigo = quadro.f_code
+            rotulo = self._rotulos.get(codigo)
+            if rotulo is None:
+                rotulo = f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}"
+                # ';' separa quadros e o espaço separa a contagem no formato colapsado
+                rotulo = self._rotulos[codigo] = rotulo.replace(";", ":").replace(" ", "_")
+            pilha.append(rotulo)
+            quadro = quadro.f_back
+        pilha.append(thread.replace(";", ":").replace(" ", "_"))
+        return tuple(reversed(pilha))
+
+    # ----- Saída -----
+
+    def _gravar(self) -> str:
+        segundos = time.monotonic() - self.inicio
+        linhas = [f"{';'.join(pilha)} {n}" for pilha, n in self._pilhas.most_common()]
+        os.makedirs(self.pasta, exist_ok=True)
+        caminho = os.path.join(self.pasta, f"perfil_{_carimbo()}.folded")
+        escrever_atomico(caminho, ("\n".join(linhas) + "\n").encode("utf-8"))
+        self.ultimo_arquivo = caminho
+        print(f"[PERFIL] {self.amostras} amostras em {segundos:.0f}s gravadas em {caminho}")
+        for funcao, n in resumir(self._pilhas, 5)["proprio"]:
+            print(f"[PERFIL]   {n / max(self.amostras, 1):6.1%}  {funcao}")
+        return caminho
+
+
+def despejar_threads(pasta: str = PASTA_DIAGNOSTICO) -> str:
+    """
+    Grava a pilha atual de todas as threads num .txt
+
+    Returns:
+        Caminho do arquivo gravado
+    """
+    threads = {t.ident: t for t in threading.enumerate()}
+    partes = [f"Despejo de threads - {datetime.now().isoformat(timespec='seconds')} - "
+              f"pid {os.getpid()}\n"]
+    quadros = sorted(sys._current_frames().items())
+    for ident, quadro in quadros:
+        thread = threads.get(ident)
+        nome = thread.name if thread else f"thread-{ident}"
+        daemon = " (daemon)" if thread is not None and thread.daemon else ""
+        partes.append(f"\n--- {nome}{daemon} [{ident}] ---\n")
+        partes.extend(traceback.format_stack(quadro))
+
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"threads_{_carimbo()}.txt")
+    escrever_atomico(caminho, "".join(partes).encode("utf-8"))
+    print(f"[PERFIL] Despejo de {len(quadros)} thread(s) gravado em {caminho}")
+    return caminho
+
+
+def resumir(pilhas: Counter, quantidade: int = 20) -> Dict[str, List[Tuple[str, int]]]:
+    """
+    Funções com mais amostras
+
+    Returns:
+        {"proprio": [(funcao, n)] na folha da pilha,
+         "total": [(funcao, n)] em qualquer ponto da pilha (contada uma vez por amostra)}
+    """
+    proprio: Counter = Counter()
+    total: Counter = Counter()
+    for pilha, n in pilhas.items():
+        if len(pilha) > 1:
+            proprio[pilha[-1]] += n
+        for funcao in set(pilha[1:]):
+            total[funcao] += n
+    return {"proprio": proprio.most_common(quantidade), "total": total.most_common(quantidade)}
+
+
+def ler_colapsado(caminho: str) -> Counter:
+    """Lê um arquivo de pilhas colapsadas"""
+    pilhas: Counter = Counter()
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            pilha, _, n = linha.rstrip("\n").rpartition(" ")
+            if pilha:
+                pilhas[tuple(pilha.split(";"))] += int(n)
+    return pilhas
+
+
+# ===== GATILHOS =====
+
+_amostrador: Optional[AmostradorPilhas] = None
+
+
+def amostrador() -> AmostradorPilhas:
+    """Amostrador do processo (um só, compartilhado por atalhos e sinais)"""
+    global _amostrador
+    if _amostrador is None:
+        _amostrador = AmostradorPilhas()
+    return _amostrador
+
+
+def instalar_atalhos(janela) -> None:
+    """
+    Atalhos escondidos numa janela Tkinter (valem para todas as janelas dela)
+
+    - Ctrl+Shift+F12: liga o perfil; de novo, para e grava o .folded
+    - Ctrl+Shift+F11: despejo instantâneo de todas as threads
+
+    Args:
+        janela: Tk ou Toplevel
+    """
+    from tkinter import messagebox
+
+    def alternar_perfil(_evento=None):
+        caminho = amostrador().alternar()
+        if caminho:
+            messagebox.showinfo("Diagnóstico", f"Perfil gravado em:\n{os.path.abspath(caminho)}\n\n"
+                                               "Envie este arquivo para o suporte.")
+
+    def despejar(_evento=None):
+        caminho = despejar_threads()
+        messagebox.showinfo("Diagnóstico", f"Despejo gravado em:\n{os.path.abspath(caminho)}\n\n"
+                                           "Envie este arquivo para o suporte.")
+
+    janela.bind_all(ATALHO_PERFIL, alternar_perfil)
+    janela.bind_all(ATALHO_THREADS, despejar)
+
+
+def instalar_atalhos_na_proxima_janela(ao_criar: Optional[Callable[[object], None]] = None) -> None:
+    """
+    Instala os atalhos no próximo tk.Tk() criado
+
+    Para a janela principal criada dentro de gui_text_to_speech.main(), sem
+    acesso ao root dela. Quando o root estiver à mão, use instalar_atalhos(root).
+
+    Args:
+        ao_criar: Chamado também com o novo root (ex: outros atalhos da interface)
+    """
+    import tkinter as tk
+
+    original = tk.Tk.__init__
+
+    def __init__(self, *args, **kwargs):
+        tk.Tk.__init__ = original
+        original(self, *args, **kwargs)
+        instalar_atalhos(self)
+        if ao_criar is not None:
+            ao_criar(self)
+
+    tk.Tk.__init__ = __init__
+
+
+def instalar_sinais() -> None:
+    """
+    Gatilhos por sinal (POSIX; chamar da thread principal)
+
+    - SIGUSR1: despejo de todas as threads
+    - SIGUSR2: liga/para o perfil
+
+    Ex: `kill -USR2 <pid>`, reproduzir a lentidão, `kill -USR2 <pid>` de novo.
+    Liga também o perfil desde a abertura se AUDIO_PERFIL_CPU estiver definida
+    (gravado ao sair do programa).
+    """
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: despejar_threads())
+        signal.signal(signal.SIGUSR2, lambda *_: amostrador().alternar())
+
+    frequencia = os.environ.get(VARIAVEL_AMBIENTE, "")
+    if frequencia not in ("", "0"):
+        try:
+            hz = float(frequencia) if frequencia != "1" else FREQUENCIA_PADRAO
+        except ValueError:
+            print(f"[PERFIL] {VARIAVEL_AMBIENTE}={frequencia!r} não é um número; "
+                  f"usando {FREQUENCIA_PADRAO:g} Hz")
+            hz = FREQUENCIA_PADRAO
+        if hz <= 0:
+            hz = FREQUENCIA_PADRAO
+        global _amostrador
+        _amostrador = AmostradorPilhas(frequencia=hz)
+        _amostrador.iniciar()
+        atexit.register(_amostrador.parar)
+
+
+# ===== LINHA DE COMANDO =====
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume um perfil colapsado (.folded) enviado pelo usuário")
+    parser.add_argument("arquivo", help="Arquivo perfil_*.folded")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--thread", help="Só as pilhas desta thread (ex: MainThread)")
+    args = parser.parse_args()
+
+    pilhas = ler_colapsado(args.arquivo)
+    if args.thread:
+        pilhas = Counter({p: n for p, n in pilhas.items() if p[0] == args.thread})
+    por_thread: Counter = Counter()
+    for pilha, n in pilhas.items():
+        por_thread[pilha[0]] += n
+    amostras = max(por_thread.most_common(1)[0][1], 1) if por_thread else 1
+
+    print(f"Amostras por thread (a mais amostrada = {amostras}):")
+    for thread, n in por_thread.most_common():
+        print(f"  {n:8d}  {thread}")
+    resumo = resumir(pilhas, args.top)
+    for titulo, chave in (("Tempo próprio (folha da pilha)", "proprio"),
+                          ("Tempo total (em qualquer ponto da pilha)", "total")):
+        print(f"\n{titulo}:")
+        for funcao, n in resumo[chave]:
+            print(f"  {n:8d}  {funcao}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+"""
+Geração de Roteiros em Lote
+Versão sem navegador do gerador de roteiros em partes (useParallelScriptGenerator.ts):
+gera centenas de roteiros pela linha de comando, com as partes de cada roteiro
+escritas ao mesmo tempo e as requisições distribuídas entre várias chaves DeepSeek
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import re
+import shutil
+import sys
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from auth_manager import AuthManager
+from script_stream import DEEPSEEK_MODELO_PADRAO, ClienteDeepseek, ErroRoteiro
+from synthesis_cache import escrever_atomico
+from text_chunker import contar_palavras
+
+
+# Mesmos valores do sistema web (languageDetection.ts / useParallelScriptGenerator.ts)
+PALAVRAS_POR_MINUTO = {
+    "pt-BR": 150, "pt-PT": 150, "en-US": 150, "en-GB": 145, "en-AU": 150,
+    "es-ES": 180, "es-MX": 175, "es-AR": 175, "fr-FR": 160, "de-DE": 130,
+    "it-IT": 170, "ru-RU": 140, "zh-CN": 160, "zh-TW": 160, "ja-JP": 350,
+    "ko-KR": 280, "ar-SA": 140, "hi-IN": 145, "tr-TR": 165, "nl-NL": 150,
+    "pl-PL": 145, "sv-SE": 150, "da-DK": 150, "no-NO": 150, "fi-FI": 140,
+    "el-GR": 150, "th-TH": 350, "vi-VN": 160, "id-ID": 155, "he-IL": 145,
+}
+# Idiomas contados por caracteres (caracteres por "palavra")
+CARACTERES_POR_PALAVRA = {"zh-CN": 2.5, "zh-TW": 2.5, "ja-JP": 3.5, "th-TH": 5}
+MINUTOS_POR_PARTE = 10
+MINIMO_PALAVRAS_PARTE = 300
+
+TEMPERATURA_PREMISSA = 0.75
+TEMPERATURA_PARTE = 0.9
+MAX_TOKENS_PARTE = 8192
+
+MARCADOR_INICIO = "[INICIO_ROTEIRO]"
+
+# Tentativas de cada parte (cada uma em outra chave, se houver)
+MAX_TENTATIVAS_PARTE = 4
+# Partes com menos que esta fração da meta de palavras são refeitas
+FRACAO_MINIMA_PALAVRAS = 0.5
+
+# Mesmos valores do enhancedDeepseekApi.ts
+COOLDOWN_429 = 60.0
+MAX_FALHAS_SEGUIDAS = 5
+PAUSA_APOS_FALHAS = 300.0
+
+PASTA_SAIDA = "roteiros_gerados"
+PASTA_EM_ANDAMENTO = ".em_andamento"
+
+PROMPT_PREMISSA = """Atue como um Roteirista Expert localizado em: {local}.
+Idioma de saída: {idioma}.
+OBJETIVO: Criar a premissa da história (a 'Bíblia') e dividi-la em {partes} parte(s) antes do roteiro.
+REGRAS DE FORMATAÇÃO:
+- NÃO use Markdown nem metadados como "Data", "Autor" ou "Versão".
+- Seja CRIATIVO e ORIGINAL. Cada história deve ser ÚNICA.
+
+Título do Vídeo: {titulo}
+
+Instruções para a Premissa: {instrucoes}
+
+Entregue primeiro a premissa e, no final, uma linha por parte exatamente neste formato:
+PARTE 1: o que acontece nesta parte
+PARTE {partes}: o que acontece nesta parte"""
+
+PROMPT_PARTE = """Idioma de saída: {idioma}. Escreva somente neste idioma.
+
+PREMISSA APROVADA:
+{premissa}
+
+ESTRUTURA DO ROTEIRO ({partes} partes):
+{esboco}
+
+TÍTULO: {titulo}
+
+Escreva a PARTE {numero} de {partes}: {resumo}
+{posicao}
+TAMANHO: cerca de {palavras} palavras. Tente chegar perto da meta.
+INSTRUÇÕES DO USUÁRIO: {instrucoes}
+
+Escreva só a narração, em parágrafos separados por uma linha em branco, sem títulos e sem
+os nomes das partes. Comece com a marca {marcador} e em seguida o texto."""
+
+POSICAO_UNICA = "Esta é a história inteira: apresente, desenvolva e conclua com um final completo."
+# As partes são escritas ao mesmo tempo: nenhuma vê o texto da outra, só o esboço.
+# A junção vem das linhas vizinhas do esboço (o que a anterior cobre, o que a seguinte vai cobrir)
+POSICAO_ABERTURA = ("Esta é a abertura: apresente a história e prenda o espectador; não conclua. "
+                    "Pare antes do que cabe à {seguinte}.")
+POSICAO_MEIO = ("Esta parte vem depois da {anterior} e antes da {seguinte}. Comece logo após "
+                "os acontecimentos da anterior, sem recontá-los, e pare antes do que cabe à "
+                "seguinte, deixando o gancho para ela; não conclua.")
+POSICAO_FINAL = ("Esta é a PARTE FINAL e vem depois da {anterior}. Comece logo após os "
+                 "acontecimentos dela, sem recontá-los, e conclua a história, resolvendo todos "
+                 "os conflitos, com um final completo.")
+
+_REGEX_PARTE = re.compile(r"^\W*PARTE\s+(\d+)\W*?[:\-–—]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_REGEX_TITULO_PARTE = re.compile(r"^\W*(?:PARTE|PART)\s+\d+\W*$", re.IGNORECASE | re.MULTILINE)
+_REGEX_TAGS = re.compile(r"\[(?:IMAGEM|MÚSICA|SFX)[^\]]*\]", re.IGNORECASE)
+
+
+def contar_palavras_idioma(texto: str, idioma: str) -> int:
+    """Palavras do texto, ou o equivalente em caracteres nos idiomas sem espaços"""
+    if idioma in CARACTERES_POR_PALAVRA:
+        return round(len(re.sub(r"\s+", "", texto)) / CARACTERES_POR_PALAVRA[idioma])
+    return contar_palavras(texto)
+
+
+def planejar_partes(duracao_min: float, idioma: str) -> Tuple[int, int]:
+    """
+    Quantas partes e quantas palavras por parte (mesma conta do sistema web)
+
+    Returns:
+        (partes, palavras_por_parte)
+    """
+    ppm = PALAVRAS_POR_MINUTO.get(idioma, 150)
+    partes = max(1, math.ceil(duracao_min / MINUTOS_POR_PARTE))
+    return partes, max(MINIMO_PALAVRAS_PARTE, round(duracao_min * ppm / partes))
+
+
+def separar_premissa(texto: str, partes: int) -> Tuple[str, List[str]]:
+    """
+    Separa a premissa do esboço "PARTE N: ..." pedido no fim dela
+
+    Returns:
+        (premissa, resumo de cada parte; "" nas que o modelo não listou)
+    """
+    resumos = [""] * partes
+    primeira = None
+    for encontrado in _REGEX_PARTE.finditer(texto):
+        numero = int(encontrado.group(1))
+        if 1 <= numero <= partes:
+            resumos[numero - 1] = encontrado.group(2).strip()
+            primeira = encontrado.start() if primeira is None else primeira
+    premissa = texto[:primeira] if primeira is not None else texto
+    return premissa.strip(), resumos
+
+
+def limpar_parte(texto: str) -> str:
+    """Texto depois de [INICIO_ROTEIRO], sem Markdown, tags de cena e títulos de parte"""
+    indice = texto.find(MARCADOR_INICIO)
+    if indice != -1:
+        texto = texto[indice + len(MARCADOR_INICIO):]
+    texto = texto.replace("```", "").replace("**", "")
+    texto = _REGEX_TAGS.sub("", texto)
+    texto = _REGEX_TITULO_PARTE.sub("", texto)
+    linhas = [linha for linha in texto.splitlines() if not linha.lstrip().startswith("#")]
+    paragrafos = re.split(r"\n[ \t]*\n", "\n".join(linhas))
+    return "\n\n".join(p.strip() for p in paragrafos if p.strip())
+
+
+def nome_arquivo(indice: int, titulo: str) -> str:
+    """0001_titulo_do_video.txt (a numeração mantém a ordem da lista de títulos)"""
+    base = unicodedata.normalize("NFKD", titulo).encode("ascii", "ignore").decode("ascii")
+    base = re.sub(r"[^\w]+", "_", base).strip("_").lower()[:60] or "roteiro"
+    return f"{indice + 1:04d}_{base}.txt"
+
+
+# ===== CHAVES =====
+
+class ChaveDeepseek:
+    """Uma chave DeepSeek no rodízio, com o próprio cliente HTTP e contadores"""
+
+    def __init__(self, nome: str, cliente: ClienteDeepseek):
+        self.nome = nome
+        self.cliente = cliente
+        self.em_uso = 0
+        self.cooldown_ate = 0.0
+        self.falhas_seguidas = 0
+        self.desativada = False
+        self.requisicoes = 0
+        self.erros = 0
+        self.ultimo_uso = 0.0
+
+
+class RodizioChaves:
+    """
+    Distribui as requisições entre as chaves (asyncio, uma thread só)
+
+    Cada chave atende até `por_chave` requisições ao mesmo tempo. A escolhida
+    é a menos ocupada e, no empate, a usada há mais tempo. 429 põe a chave em
+    cooldown (Retry-After ou 60s), 5 falhas seguidas a pausam por 5 minutos e
+    401/403 da DeepSeek a tiram do rodízio. 401/403 do gateway do Supabase não
+    dizem nada sobre a chave e não contam contra ela. Sem chave livre, espera a
+    primeira que liberar.
+    """
+
+    def __init__(self, chaves: List[ChaveDeepseek], por_chave: int = 1):
+        """
+        Args:
+            chaves: Chaves do rodízio
+            por_chave: Requisições simultâneas por chave
+        """
+        if not chaves:
+            raise ValueError("É necessário pelo menos uma chave DeepSeek")
+        self.chaves = chaves
+        self.por_chave = por_chave
+        self._condicao = asyncio.Condition()
+
+    @property
+    def capacidade(self) -> int:
+        return len(self.chaves) * self.por_chave
+
+    async def adquirir(self, evitar: Optional[ChaveDeepseek] = None) -> ChaveDeepseek:
+        """
+        Próxima chave livre (espera se todas estiverem ocupadas ou em cooldown)
+
+        Args:
+            evitar: Chave que acabou de falhar; só é usada se não houver outra
+
+        Raises:
+            ErroRoteiro: Se todas as chaves foram desativadas (401/403)
+        """
+        async with self._condicao:
+            while True:
+                chave = self._escolher(evitar)
+                if chave is not None:
+                    chave.em_uso += 1
+                    chave.requisicoes += 1
+                    chave.ultimo_uso = time.monotonic()
+                    return chave
+                espera = self._menor_espera()
+                try:
+                    await asyncio.wait_for(self._condicao.wait(), espera)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def liberar(self, chave: ChaveDeepseek, erro: Optional[ErroRoteiro] = None):
+        """Devolve a chave ao rodízio, registrando o resultado da requisição"""
+        async with self._condicao:
+            chave.em_uso -= 1
+            if erro is None:
+                chave.falhas_seguidas = 0
+            elif erro.status in (401, 403) and not erro.chave_recusada:
+                # Recusa do gateway/proxy, não da DeepSeek: a chave não tem culpa
+                pass
+            else:
+                chave.erros += 1
+                chave.falhas_seguidas += 1
+                if erro.chave_recusada:
+                    chave.desativada = True
+                    print(f"[LOTE] 🔑 {chave.nome} desativada: {erro}")
+                elif erro.status == 429:
+                    chave.cooldown_ate = time.monotonic() + (erro.retry_after or COOLDOWN_429)
+                elif chave.falhas_seguidas >= MAX_FALHAS_SEGUIDAS:
+                    chave.cooldown_ate = time.monotonic() + PAUSA_APOS_FALHAS
+                    chave.falhas_seguidas = 0
+                    print(f"[LOTE] 🔑 {chave.nome}: {MAX_FALHAS_SEGUIDAS} falhas seguidas, "
+                          f"pausada por {PAUSA_APOS_FALHAS / 60:.0f} min")
+            self._condicao.notify_all()
+
+    def _escolher(self, evitar: Optional[ChaveDeepseek]) -> Optional[ChaveDeepseek]:
+        ativas = [c for c in self.chaves if not c.desativada]
+        if not ativas:
+            raise ErroRoteiro("Nenhuma chave DeepSeek válida (todas recusadas com 401/403)", 401)
+        agora = time.monotonic()
+        livres = [c for c in ativas if c.em_uso < self.por_chave and c.cooldown_ate <= agora]
+        if evitar is not None and len(livres) > 1:
+            livres = [c for c in livres if c is not evitar]
+        return min(livres, key=lambda c: (c.em_uso, c.ultimo_uso)) if livres else None
+
+    def _menor_espera(self) -> Optional[float]:
+        """Segundos até o fim do cooldown mais próximo (None: esperar uma liberação)"""
+        agora = time.monotonic()
+        cooldowns = [c.cooldown_ate - agora for c in self.chaves
+                     if not c.desativada and c.cooldown_ate > agora]
+        return max(min(cooldowns), 0.05) if cooldowns else None
+
+
+# ===== GERAÇÃO =====
+
+class GeradorRoteirosLote:
+    """
+    Gera roteiros em partes, todas as partes de um roteiro ao mesmo tempo
+
+    Para cada título: uma requisição com a premissa e o esboço de cada parte;
+    depois uma requisição por parte, todas em paralelo, cada uma com a premissa,
+    o esboço completo e a posição dela na história (abertura, meio, final).
+    Cada parte tem as próprias tentativas, em outra chave a cada falha, e o
+    roteiro é montado na ordem das partes.
+
+    Premissa e partes prontas ficam em <pasta_saida>/.em_andamento/ até o
+    roteiro ser montado: se o lote parar no meio, a próxima execução só gera
+    o que falta. Roteiros já gravados são pulados.
+    """
+
+    def __init__(self, rodizio: RodizioChaves, pasta_saida: str = PASTA_SAIDA,
+                 duracao_min: float = 10, idioma: str = "pt-BR", local: str = "Brasil",
+                 instrucoes_premissa: str = "", instrucoes_roteiro: str = "",
+                 roteiros_simultaneos: int = 4):
+        """
+        Args:
+            rodizio: Chaves DeepSeek
+            pasta_saida: Onde gravar os roteiros (.txt, prontos para batch_queue.py)
+            duracao_min: Duração alvo de cada roteiro em minutos
+            idioma: Idioma de saída (código do sistema web, ex: "pt-BR")
+            local: Localização do público
+            instrucoes_premissa: Instruções do agente para a premissa
+            instrucoes_roteiro: Instruções do agente para o roteiro
+            roteiros_simultaneos: Roteiros em andamento ao mesmo tempo
+        """
+        self.rodizio = rodizio
+        self.pasta_saida = pasta_saida
+        self.duracao_min = duracao_min
+        self.idioma = idioma
+        self.local = local
+        self.instrucoes_premissa = instrucoes_premissa
+        self.instrucoes_roteiro = instrucoes_roteiro
+        self.roteiros_simultaneos = roteiros_simultaneos
+        self.partes, self.palavras_por_parte = planejar_partes(duracao_min, idioma)
+        self.tentativas_extras = 0
+
+    def executar(self, titulos: List[str]) -> Dict[str, str]:
+        """
+        Gera o lote inteiro (bloqueia até terminar)
+
+        Returns:
+            {título: caminho do .txt ou "erro: ..."}
+        """
+        async def principal():
+            # O HTTP (requests) roda em threads; o asyncio só coordena
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(self.rodizio.capacidade + 1, thread_name_prefix="deepseek"))
+            return await self.gerar_lote(titulos)
+
+        return asyncio.run(principal())
+
+    async def gerar_lote(self, titulos: List[str]) -> Dict[str, str]:
+        """Versão assíncrona de `executar`"""
+        os.makedirs(self.pasta_saida, exist_ok=True)
+        inicio = time.monotonic()
+        vagas = asyncio.Semaphore(self.roteiros_simultaneos)
+        resultados: Dict[str, str] = {}
+
+        print(f"[LOTE] {len(titulos)} roteiro(s) de {self.duracao_min:g} min em {self.partes} "
+              f"parte(s) de ~{self.palavras_por_parte} palavras | {len(self.rodizio.chaves)} chave(s), "
+              f"{self.roteiros_simultaneos} roteiro(s) ao mesmo tempo")
+
+        async def um(indice: int, titulo: str):
+            async with vagas:
+                try:
+                    resultados[titulo] = await self.gerar_roteiro(indice, titulo)
+                except ErroRoteiro as e:
+                    resultados[titulo] = f"erro: {e}"
+                    print(f"[LOTE] ❌ {titulo}: {e}")
+                except Exception as e:
+                    # Disco cheio, arquivo travado...: só este título falha, o lote segue
+                    resultados[titulo] = f"erro: {type(e).__name__}: {e}"
+                    print(f"[LOTE] ❌ {titulo}: erro inesperado: {type(e).__name__}: {e}")
+
+        await asyncio.gather(*(um(i, t) for i, t in enumerate(titulos)))
+
+        falhas = sum(1 for r in resultados.values() if r.startswith("erro:"))
+        minutos = (time.monotonic() - inicio) / 60
+        print(f"[LOTE] Concluído em {minutos:.1f} min: {len(titulos) - falhas} roteiro(s) pronto(s), "
+              f"{falhas} com erro, {self.tentativas_extras} tentativa(s) repetida(s)")
+        for chave in self.rodizio.chaves:
+            estado = " (desativada)" if chave.desativada else ""
+            print(f"[LOTE]   {chave.nome}: {chave.requisicoes} requisição(ões), {chave.erros} erro(s){estado}")
+        return resultados
+
+    async def gerar_roteiro(self, indice: int, titulo: str) -> str:
+        """
+        Premissa → partes em paralelo → roteiro montado em ordem
+
+        Returns:
+            Caminho do .txt gravado
+
+        Raises:
+            ErroRoteiro: Se a premissa ou alguma parte falhar em todas as tentativas
+        """
+        arquivo = nome_arquivo(indice, titulo)
+        caminho = os.path.join(self.pasta_saida, arquivo)
+        if os.path.exists(caminho):
+            print(f"[LOTE] ⏭️  {titulo}: já gerado")
+            return caminho
+        pasta_partes = os.path.join(self.pasta_saida, PASTA_EM_ANDAMENTO, os.path.splitext(arquivo)[0])
+        os.makedirs(pasta_partes, exist_ok=True)
+        inicio = time.monotonic()
+
+        def validar_premissa(texto: str) -> str:
+            if len(texto.strip()) < 100:
+                raise ErroRoteiro("Premissa muito curta")
+            return texto.strip()
+
+        prompt = PROMPT_PREMISSA.format(local=self.local, idioma=self.idioma, partes=self.partes,
+                                        titulo=titulo, instrucoes=self.instrucoes_premissa)
+        bruto = await self._etapa(os.path.join(pasta_partes, "premissa.txt"), f"{titulo} / premissa",
+                                  prompt, TEMPERATURA_PREMISSA, validar_premissa)
+        premissa, resumos = separar_premissa(bruto, self.partes)
+        esboco = "\n".join(f"PARTE {i + 1}: {r or '(livre)'}" for i, r in enumerate(resumos))
+
+        def validar_parte(texto: str) -> str:
+            limpo = limpar_parte(texto)
+            palavras = contar_palavras_idioma(limpo, self.idioma)
+            if palavras < self.palavras_por_parte * FRACAO_MINIMA_PALAVRAS:
+                raise ErroRoteiro(f"Parte curta demais ({palavras} de ~{self.palavras_por_parte} palavras)")
+            return limpo
+
+        tarefas = []
+        for i in range(self.partes):
+            prompt = PROMPT_PARTE.format(
+                idioma=self.idioma, premissa=premissa, partes=self.partes, esboco=esboco,
+                titulo=titulo, numero=i + 1, resumo=resumos[i], posicao=self._posicao(i, resumos),
+                palavras=self.palavras_por_parte, instrucoes=self.instrucoes_roteiro,
+                marcador=MARCADOR_INICIO)
+            tarefas.append(self._etapa(os.path.join(pasta_partes, f"parte_{i + 1:02d}.txt"),
+                                       f"{titulo} / parte {i + 1}/{self.partes}",
+                                       prompt, TEMPERATURA_PARTE, validar_parte))
+        # Uma parte que falha não cancela as outras: as prontas ficam salvas para a próxima execução
+        partes = await asyncio.gather(*tarefas, return_exceptions=True)
+        for parte in partes:
+            if isinstance(parte, BaseException):
+                raise parte
+
+        roteiro = "\n\n".join(partes)
+        escrever_atomico(caminho, (roteiro + "\n").encode("utf-8"))
+        shutil.rmtree(pasta_partes, ignore_errors=True)
+        print(f"[LOTE] ✅ {titulo}: {contar_palavras_idioma(roteiro, self.idioma)} palavras em "
+              f"{time.monotonic() - inicio:.0f}s → {caminho}")
+        return caminho
+
+    def _posicao(self, i: int, resumos: List[str]) -> str:
+        """Onde a parte i fica na história, com as partes vizinhas descritas pelo esboço"""
+        def vizinha(j: int) -> str:
+            return f'parte {j + 1} ("{resumos[j]}")' if resumos[j] else f"parte {j + 1}"
+
+        if self.partes == 1:
+            return POSICAO_UNICA
+        if i == 0:
+            return POSICAO_ABERTURA.format(seguinte=vizinha(1))
+        if i == self.partes - 1:
+            return POSICAO_FINAL.format(anterior=vizinha(i - 1))
+        return POSICAO_MEIO.format(anterior=vizinha(i - 1), seguinte=vizinha(i + 1))
+
+    async def _etapa(self, arquivo: str, rotulo: str, prompt: str, temperatura: float,
+                     validar) -> str:
+        """Uma requisição com tentativas em chaves diferentes; o resultado fica salvo em `arquivo`"""
+        if os.path.exists(arquivo):
+            with open(arquivo, "r", encoding="utf-8") as f:
+                return f.read()
+
+        chave: Optional[ChaveDeepseek] = None
+        ultimo_erro: Optional[ErroRoteiro] = None
+        for tentativa in range(1, MAX_TENTATIVAS_PARTE + 1):
+            chave = await self.rodizio.adquirir(evitar=chave)
+            erro = None
+            try:
+                texto = validar(await asyncio.to_thread(chave.cliente.gerar, prompt, temperatura,
+                                                        MAX_TOKENS_PARTE))
+            except ErroRoteiro as e:
+                erro = e
+            except Exception as e:
+                # Resposta em formato inesperado etc.: conta como falha da tentativa, não como sucesso
+                erro = ErroRoteiro(f"{type(e).__name__}: {e}")
+            finally:
+                await self.rodizio.liberar(chave, erro)
+
+            if erro is None:
+                escrever_atomico(arquivo, texto.encode("utf-8"))
+                return texto
+            ultimo_erro = erro
+            print(f"[LOTE] {rotulo}: tentativa {tentativa}/{MAX_TENTATIVAS_PARTE} em {chave.nome}: {erro}")
+            # 401/403 da DeepSeek são da chave (a próxima tentativa usa outra); outros 4xx,
+            # inclusive 401/403 do gateway, são do pedido ou da configuração
+            if not erro.recuperavel and not erro.chave_recusada:
+                break
+            if tentativa < MAX_TENTATIVAS_PARTE:
+                self.tentativas_extras += 1
+                # Backoff exponencial: 1s, 2s, 4s
+                await asyncio.sleep(min(2 ** (tentativa - 1), 5))
+        raise ErroRoteiro(f"{rotulo}: {ultimo_erro}", ultimo_erro.status)
+
+
+# ===== LINHA DE COMANDO =====
+
+def ler_linhas(caminho: str) -> List[str]:
+    """Linhas não vazias de um arquivo, ignorando comentários (#)"""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [linha.strip() for linha in f if linha.strip() and not linha.lstrip().startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera roteiros em lote pelo deepseek-proxy, sem navegador")
+    parser.add_argument("titulos", help="Arquivo .txt com um título por linha")
+    parser.add_argument("--chaves", help="Arquivo com uma chave DeepSeek por linha "
+                                         "(padrão: DEEPSEEK_API_KEYS, separadas por vírgula)")
+    parser.add_argument("--modelo", default=DEEPSEEK_MODELO_PADRAO)
+    parser.add_argument("--por-chave", type=int, default=1, help="Requisições simultâneas por chave")
+    parser.add_argument("--roteiros-simultaneos", type=int, default=4)
+    parser.add_argument("--duracao", type=float, default=10, help="Minutos de cada roteiro")
+    parser.add_argument("--idioma", default="pt-BR")
+    parser.add_argument("--local", default="Brasil")
+    parser.add_argument("--premissa", default="", help="Instruções para a premissa (ou @arquivo)")
+    parser.add_argument("--roteiro", default="", help="Instruções para o roteiro (ou @arquivo)")
+    parser.add_argument("--saida", default=PASTA_SAIDA)
+    args = parser.parse_args()
+
+    auth = AuthManager()
+    if not auth.verificar_acesso_ativo():
+        print("[LOTE] Faça login no programa antes de gerar roteiros")
+        sys.exit(1)
+
+    if args.chaves:
+        chaves = ler_linhas(args.chaves)
+    else:
+        chaves = [c.strip() for c in os.environ.get("DEEPSEEK_API_KEYS", "").split(",") if c.strip()]
+    if not chaves:
+        print("[LOTE] Informe as chaves DeepSeek (--chaves ou DEEPSEEK_API_KEYS)")
+        sys.exit(1)
+
+    def texto_ou_arquivo(valor: str) -> str:
+        if valor.startswith("@"):
+            with open(valor[1:], "r", encoding="utf-8") as f:
+                return f.read()
+        return valor
+
+    rodizio = RodizioChaves(
+        [ChaveDeepseek(f"DeepSeek {chave[-4:]}", ClienteDeepseek(auth, chave, args.modelo))
+         for chave in chaves],
+        por_chave=args.por_chave,
+    )
+    gerador = GeradorRoteirosLote(
+        rodizio, pasta_saida=args.saida, duracao_min=args.duracao, idioma=args.idioma,
+        local=args.local, instrucoes_premissa=texto_ou_arquivo(args.premissa),
+        instrucoes_roteiro=texto_ou_arquivo(args.roteiro),
+        roteiros_simultaneos=args.roteiros_simultaneos,
+    )
+    resultados = gerador.executar(ler_linhas(args.titulos))
+    if any(r.startswith("erro:") for r in resultados.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
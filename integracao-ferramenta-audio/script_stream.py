@@ -0,0 +1,545 @@
+"""
+Roteiro em Streaming
+Gera o roteiro pelo deepseek-proxy com `stream: true` e sintetiza cada
+parágrafo assim que ele termina de ser escrito, enquanto o resto do roteiro
+ainda está sendo gerado: o tempo do tema ao áudio pronto fica perto de
+max(geração, síntese), em vez da soma das duas
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from auth_manager import AuthManager
+from job_trace import ativar
+from streaming_output import SaidaEmOrdem
+from synthesis_cache import escrever_atomico
+from synthesis_scheduler import AgendadorSintese, EstatisticasJob, FalhaJob
+from text_chunker import (GEMINI_TTS_WORD_LIMIT, contar_palavras, dividir_texto_para_tts,
+                          dividir_texto_progressivo)
+from tts_client import STATUS_RECUPERAVEIS
+
+
+# Mesmos valores do sistema web (deepseekApi.ts / useParallelScriptGenerator.ts)
+DEEPSEEK_MODELO_PADRAO = "deepseek-chat"
+TEMPERATURA_PADRAO = 0.9
+MAX_TOKENS_PADRAO = 8192
+TIMEOUT_CONEXAO = 10
+# Maior silêncio aceito entre dois eventos do stream (o web espera 120s pela resposta inteira)
+TIMEOUT_LEITURA = 120
+# Espera pela resposta inteira sem streaming (mesmo valor do enhancedDeepseekApi.ts)
+TIMEOUT_RESPOSTA = 180
+
+# Parágrafos menores que isso esperam o seguinte antes de virar chunk (menos requisições)
+MINIMO_PALAVRAS_CHUNK = 60
+
+PROMPT_ROTEIRO = (
+    "Escreva um roteiro para ser narrado em voz alta sobre o tema: {tema}\n\n"
+    "Escreva somente o texto que será narrado, em parágrafos separados por uma linha "
+    "em branco, sem títulos, marcadores, numeração ou indicações de cena."
+)
+
+_REGEX_FIM_PARAGRAFO = re.compile(r"\n[ \t]*\n")
+
+
+class ErroRoteiro(Exception):
+    """
+    Erro ao gerar o roteiro
+
+    Attributes:
+        status: Status HTTP (None para erros de rede/formato)
+        retry_after: Segundos sugeridos pelo servidor antes de tentar de novo
+        da_deepseek: True se o status veio da DeepSeek (repassado pelo proxy);
+                     False se veio do próprio proxy ou do gateway do Supabase
+    """
+
+    def __init__(self, mensagem: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None, da_deepseek: bool = False):
+        super().__init__(mensagem)
+        self.status = status
+        self.retry_after = retry_after
+        self.da_deepseek = da_deepseek
+
+    @property
+    def recuperavel(self) -> bool:
+        """True se vale tentar de novo (rede, resposta vazia, 429, 5xx); 401/403 não"""
+        return self.status is None or self.status in STATUS_RECUPERAVEIS
+
+    @property
+    def chave_recusada(self) -> bool:
+        """True se a DeepSeek recusou a chave (401/403 dela, não do gateway)"""
+        return self.da_deepseek and self.status in (401, 403)
+
+
+class GeracaoCancelada(ErroRoteiro):
+    """A geração foi interrompida por `cancelar`; o áudio de saída ficou incompleto"""
+
+    @property
+    def recuperavel(self) -> bool:
+        return False
+
+
+# ===== GERAÇÃO =====
+
+def ler_eventos_sse(linhas: Iterable[bytes]) -> Iterator[str]:
+    """
+    Texto de cada evento `data:` de um stream de chat completions
+
+    Args:
+        linhas: Linhas do corpo da resposta (sem o '\\n')
+
+    Yields:
+        Pedaços de texto (delta.content), na ordem
+    """
+    for linha in linhas:
+        # Linhas vazias separam eventos; ':' inicia comentário (keep-alive)
+        if not linha or linha.startswith(b":") or not linha.startswith(b"data:"):
+            continue
+        dados = linha[5:].strip()
+        if dados == b"[DONE]":
+            return
+        try:
+            evento = json.loads(dados)
+        except ValueError:
+            raise ErroRoteiro(f"Evento inválido no stream: {dados[:80]!r}")
+        if "error" in evento:
+            raise ErroRoteiro(f"DeepSeek: {evento['error']}")
+        for escolha in evento.get("choices") or ():
+            pedaco = (escolha.get("delta") or {}).get("content")
+            if pedaco:
+                yield pedaco
+            if escolha.get("finish_reason") == "length":
+                print("[ROTEIRO] ⚠️ Limite de tokens atingido: o roteiro pode ter ficado incompleto")
+
+
+class ClienteDeepseek:
+    """
+    Cliente do deepseek-proxy (Supabase)
+
+    Como no sistema web, o proxy é chamado com a ANON_KEY (que não expira) e a
+    chave DeepSeek do usuário vai no cabeçalho x-deepseek-api-key. O token da
+    sessão não é usado: ele expira em uma hora e derrubaria lotes longos.
+    """
+
+    def __init__(self, auth: AuthManager, chave_api: str, modelo: str = DEEPSEEK_MODELO_PADRAO,
+                 sessao: Optional[requests.Session] = None):
+        """
+        Args:
+            auth: AuthManager (a URL do proxy e a ANON_KEY vêm dele)
+            chave_api: Chave da API DeepSeek
+            modelo: Modelo DeepSeek
+            sessao: Sessão HTTP (padrão: uma nova)
+        """
+        self.auth = auth
+        self.chave_api = chave_api
+        self.modelo = modelo
+        self.url = auth.url_funcao("deepseek-proxy")
+        self.sessao = sessao or requests.Session()
+
+    def gerar_em_fluxo(self, prompt: str, temperatura: float = TEMPERATURA_PADRAO,
+                       max_tokens: int = MAX_TOKENS_PADRAO,
+                       cancelar: Optional[threading.Event] = None) -> Iterator[str]:
+        """
+        Gera texto com streaming
+
+        Args:
+            prompt: Mensagem do usuário
+            temperatura: Temperatura da amostragem
+            max_tokens: Limite de tokens da resposta
+            cancelar: Interrompe a leitura do stream se for sinalizado
+
+        Yields:
+            Pedaços do texto assim que chegam
+
+        Raises:
+            ErroRoteiro: Erro HTTP, de rede ou stream inválido
+        """
+        response = self._enviar(prompt, temperatura, max_tokens, True, TIMEOUT_LEITURA)
+        with response:
+            # chunk_size=None: cada bloco do corpo é entregue assim que chega
+            linhas = response.iter_lines(chunk_size=None)
+            try:
+                for pedaco in ler_eventos_sse(linhas):
+                    if cancelar is not None and cancelar.is_set():
+                        print("[ROTEIRO] Geração cancelada")
+                        return
+                    yield pedaco
+            except requests.RequestException as e:
+                raise ErroRoteiro(f"Stream interrompido: {e}")
+
+    def gerar(self, prompt: str, temperatura: float = TEMPERATURA_PADRAO,
+              max_tokens: int = MAX_TOKENS_PADRAO, timeout: float = TIMEOUT_RESPOSTA) -> str:
+        """
+        Gera texto sem streaming (resposta inteira de uma vez)
+
+        Args:
+            prompt: Mensagem do usuário
+            temperatura: Temperatura da amostragem
+            max_tokens: Limite de tokens da resposta
+            timeout: Segundos de espera pela resposta
+
+        Returns:
+            Texto gerado
+
+        Raises:
+            ErroRoteiro: Erro HTTP, de rede ou resposta vazia
+        """
+        response = self._enviar(prompt, temperatura, max_tokens, False, timeout)
+        with response:
+            try:
+                dados = response.json()
+            except ValueError:
+                raise ErroRoteiro("Resposta do deepseek-proxy não é JSON")
+        if not isinstance(dados, dict):
+            raise ErroRoteiro("Resposta do deepseek-proxy em formato inesperado")
+        escolhas = dados.get("choices") or [{}]
+        texto = (escolhas[0].get("message") or {}).get("content") or ""
+        if len(texto.strip()) < 20:
+            raise ErroRoteiro("Resposta muito curta ou vazia")
+        if escolhas[0].get("finish_reason") == "length":
+            print("[ROTEIRO] ⚠️ Limite de tokens atingido: o texto pode ter ficado incompleto")
+        return texto
+
+    def _enviar(self, prompt: str, temperatura: float, max_tokens: int, stream: bool,
+                timeout: float) -> requests.Response:
+        """POST ao proxy; levanta ErroRoteiro se o status não for 200"""
+        cabecalhos = self.auth.cabecalhos(usar_sessao=False)
+        cabecalhos["x-deepseek-api-key"] = self.chave_api
+        if stream:
+            cabecalhos["Accept"] = "text/event-stream"
+        corpo = {
+            "model": self.modelo,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperatura,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+
+        try:
+            response = self.sessao.post(self.url, json=corpo, headers=cabecalhos, stream=stream,
+                                        timeout=(TIMEOUT_CONEXAO, timeout))
+        except requests.Timeout as e:
+            raise ErroRoteiro(f"Timeout no deepseek-proxy: {e}")
+        except requests.RequestException as e:
+            raise ErroRoteiro(f"Erro de conexão com o deepseek-proxy: {e}")
+
+        if response.status_code != 200:
+            with response:
+                try:
+                    mensagem = response.json().get("error", "")
+                except ValueError:
+                    mensagem = response.text[:200]
+            if isinstance(mensagem, dict):
+                mensagem = mensagem.get("message", "")
+            retry_after = response.headers.get("Retry-After")
+            # Sem x-deepseek-status, a resposta não veio da DeepSeek (gateway ou o próprio proxy)
+            da_deepseek = "x-deepseek-status" in response.headers
+            origem = "DeepSeek" if da_deepseek else "deepseek-proxy"
+            raise ErroRoteiro(f"{origem} HTTP {response.status_code}: {mensagem}",
+                              response.status_code,
+                              float(retry_after) if retry_after and retry_after.isdigit() else None,
+                              da_deepseek)
+        return response
+
+
+# ===== PARÁGRAFOS E CHUNKS =====
+
+class CortadorParagrafos:
+    """Recebe o texto aos pedaços e devolve cada parágrafo assim que ele fecha"""
+
+    def __init__(self):
+        self._aberto = ""
+
+    def adicionar(self, pedaco: str) -> List[str]:
+        """
+        Args:
+            pedaco: Próximo pedaço do texto
+
+        Returns:
+            Parágrafos fechados por este pedaço (linha em branco), na ordem
+        """
+        # Só o parágrafo em aberto fica guardado: o custo não cresce com o roteiro
+        self._aberto += pedaco
+        partes = _REGEX_FIM_PARAGRAFO.split(self._aberto)
+        self._aberto = partes.pop()
+        return [p.strip() for p in partes if p.strip()]
+
+    def finalizar(self) -> List[str]:
+        """Último parágrafo (o texto acabou sem linha em branco)"""
+        resto, self._aberto = self._aberto.strip(), ""
+        return [resto] if resto else []
+
+
+class FatiadorIncremental:
+    """
+    Divide os parágrafos em chunks à medida que chegam
+
+    Mesmas regras de text_chunker.py: o primeiro trecho usa a divisão
+    progressiva (chunk 1 pequeno, para o áudio começar logo) e os demais a
+    divisão normal. Parágrafos curtos esperam o seguinte até somar
+    `minimo_palavras`, para não virar uma requisição cada.
+    """
+
+    def __init__(self, max_palavras: int = GEMINI_TTS_WORD_LIMIT,
+                 primeiros: Tuple[int, ...] = (40, 120),
+                 minimo_palavras: int = MINIMO_PALAVRAS_CHUNK):
+        """
+        Args:
+            max_palavras: Limite dos chunks normais
+            primeiros: Limite de cada chunk inicial (dividir_texto_progressivo)
+            minimo_palavras: Palavras acumuladas antes de liberar chunks
+        """
+        self.max_palavras = max_palavras
+        self.primeiros = primeiros
+        self.minimo_palavras = minimo_palavras
+        self._pendentes: List[str] = []
+        self._palavras = 0
+        self._primeiro = True
+
+    def adicionar(self, paragrafo: str) -> List[str]:
+        """
+        Returns:
+            Chunks liberados (talvez nenhum, se o texto acumulado ainda for curto)
+        """
+        self._pendentes.append(paragrafo)
+        self._palavras += contar_palavras(paragrafo)
+        # O primeiro trecho sai já no limite do chunk 1, sem esperar o mínimo
+        minimo = self.primeiros[0] if self._primeiro and self.primeiros else self.minimo_palavras
+        if self._palavras < minimo:
+            return []
+        return self._liberar()
+
+    def finalizar(self) -> List[str]:
+        """Chunks com o que sobrou"""
+        return self._liberar() if self._pendentes else []
+
+    def _liberar(self) -> List[str]:
+        texto = " ".join(self._pendentes)
+        self._pendentes, self._palavras = [], 0
+        if self._primeiro:
+            self._primeiro = False
+            return dividir_texto_progressivo(texto, self.max_palavras, self.primeiros)
+        return dividir_texto_para_tts(texto, self.max_palavras)
+
+
+# ===== PIPELINE =====
+
+class PipelineRoteiroAudio:
+    """
+    Tema → roteiro em streaming → chunks → síntese em paralelo → WAV em ordem
+
+    A geração roda na thread de quem chama `executar`; cada chunk liberado
+    pelo fatiador vai na hora para um pool de síntese (`agendador.max_paralelo`
+    threads, com cache, frases, validação e retry de sintetizar_chunk). O
+    áudio sai em ordem num WAV que cresce (SaidaEmOrdem). Quando a geração
+    termina, só falta sintetizar os últimos chunks.
+    """
+
+    def __init__(self, gerador: ClienteDeepseek, agendador: AgendadorSintese,
+                 fatiador: Optional[FatiadorIncremental] = None):
+        """
+        Args:
+            gerador: Cliente do deepseek-proxy
+            agendador: AgendadorSintese configurado
+            fatiador: Regras de divisão (padrão: FatiadorIncremental())
+        """
+        self.gerador = gerador
+        self.agendador = agendador
+        self.fatiador = fatiador or FatiadorIncremental()
+
+    def executar(self, prompt: str, voz: str, prompt_voz: str = "",
+                 saida: str = "roteiro_stream.wav", arquivo_roteiro: Optional[str] = None,
+                 estatisticas: Optional[EstatisticasJob] = None,
+                 cancelar: Optional[threading.Event] = None) -> Dict[str, float]:
+        """
+        Gera o roteiro e o áudio ao mesmo tempo
+
+        Args:
+            prompt: Prompt completo enviado ao DeepSeek (ver PROMPT_ROTEIRO)
+            voz: Voz da narração
+            prompt_voz: Instrução de estilo da voz
+            saida: WAV final (cresce durante a síntese)
+            arquivo_roteiro: Onde gravar o roteiro gerado (padrão: `saida` com .txt)
+            estatisticas: Contadores da síntese
+            cancelar: Interrompe a geração e descarta os chunks ainda não enviados
+
+        Returns:
+            Dict com tempo_geracao, tempo_sintese (do primeiro chunk enviado ao
+            último pronto), tempo_total, sobreposicao (segundos economizados em
+            relação a gerar e depois sintetizar), chunks, palavras e segundos_audio
+
+        Raises:
+            ErroRoteiro: Se a geração falhar (os chunks já enviados são descartados)
+            GeracaoCancelada: Se `cancelar` foi sinalizado antes do fim (o WAV fica incompleto)
+            FalhaJob: Se algum chunk falhar após todas as tentativas
+        """
+        estatisticas = estatisticas or EstatisticasJob()
+        fatiador = self.fatiador
+        cortador = CortadorParagrafos()
+        paragrafos: List[str] = []
+        chunks: List[str] = []
+        erros: Dict[int, str] = {}
+        futuros: List[Future] = []
+
+        # Chunks ainda em síntese: o mais antigo tem prioridade na duplicação por atraso
+        pendentes = set()
+        lock = threading.Lock()
+        lock_saida = threading.Lock()
+
+        def e_o_primeiro(indice: int) -> bool:
+            with lock:
+                return bool(pendentes) and min(pendentes) == indice
+
+        tempos = {"primeiro_envio": 0.0, "ultimo_pronto": 0.0}
+
+        def tarefa(indice: int) -> bytes:
+            with ativar(estatisticas.rastreio):
+                return self.agendador.sintetizar_chunk(indice, chunks[indice], voz, prompt_voz,
+                                                       estatisticas, e_o_primeiro)
+
+        def ao_terminar(indice: int, futuro: Future):
+            if futuro.cancelled():
+                return
+            with lock:
+                pendentes.discard(indice)
+                tempos["ultimo_pronto"] = time.monotonic()
+            try:
+                pcm = futuro.result()
+                with lock_saida:
+                    saida_ordem.receber(indice, pcm)
+            except Exception as e:
+                # Qualquer erro (não só ErroSintese) tem que virar FalhaJob no fim
+                erros[indice] = str(e)
+                print(f"[ROTEIRO] ❌ Chunk {indice + 1} falhou: {e}")
+                # Os chunks seguintes ficam retidos na SaidaEmOrdem: sem buraco no WAV
+
+        def enviar(novos: List[str]):
+            for texto in novos:
+                with lock:
+                    indice = len(chunks)
+                    chunks.append(texto)
+                    pendentes.add(indice)
+                if not tempos["primeiro_envio"]:
+                    tempos["primeiro_envio"] = time.monotonic()
+                    print(f"[ROTEIRO] Primeiro chunk enviado à síntese em "
+                          f"{tempos['primeiro_envio'] - inicio:.1f}s")
+                futuro = executor.submit(tarefa, indice)
+                futuro.add_done_callback(lambda f, i=indice: ao_terminar(i, f))
+                futuros.append(futuro)
+
+        print(f"[ROTEIRO] Gerando roteiro ({self.gerador.modelo}) com síntese simultânea, "
+              f"até {self.agendador.max_paralelo} chunks em paralelo")
+        inicio = time.monotonic()
+        saida_ordem = SaidaEmOrdem(arquivo=saida, orcamento=self.agendador.memoria)
+        executor = ThreadPoolExecutor(max_workers=self.agendador.max_paralelo,
+                                      thread_name_prefix="sintese")
+        try:
+            for pedaco in self.gerador.gerar_em_fluxo(prompt, cancelar=cancelar):
+                for paragrafo in cortador.adicionar(pedaco):
+                    paragrafos.append(paragrafo)
+                    enviar(fatiador.adicionar(paragrafo))
+            for paragrafo in cortador.finalizar():
+                paragrafos.append(paragrafo)
+                enviar(fatiador.adicionar(paragrafo))
+            enviar(fatiador.finalizar())
+            tempo_geracao = time.monotonic() - inicio
+            print(f"[ROTEIRO] Roteiro completo em {tempo_geracao:.1f}s: {len(paragrafos)} parágrafo(s), "
+                  f"{len(chunks)} chunk(s); {len(pendentes)} ainda em síntese")
+
+            cancelado = cancelar is not None and cancelar.is_set()
+            if not cancelado:
+                wait(futuros)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            saida_ordem.fechar()
+            if self.agendador.cache is not None:
+                self.agendador.cache.salvar()
+
+        if paragrafos:
+            arquivo_roteiro = arquivo_roteiro or os.path.splitext(saida)[0] + ".txt"
+            escrever_atomico(arquivo_roteiro, ("\n\n".join(paragrafos) + "\n").encode("utf-8"))
+            print(f"[ROTEIRO] Roteiro salvo em {arquivo_roteiro}")
+
+        if cancelado:
+            raise GeracaoCancelada(f"Geração cancelada com {len(chunks)} chunk(s) enviado(s): "
+                                   f"{saida} ficou incompleto")
+        if erros:
+            raise FalhaJob(erros)
+
+        tempo_total = time.monotonic() - inicio
+        tempo_sintese = tempos["ultimo_pronto"] - tempos["primeiro_envio"] if chunks else 0.0
+        metricas = {
+            "tempo_geracao": tempo_geracao,
+            "tempo_sintese": tempo_sintese,
+            "tempo_total": tempo_total,
+            "sobreposicao": max(tempo_geracao + tempo_sintese - tempo_total, 0.0),
+            "chunks": len(chunks),
+            "palavras": sum(contar_palavras(p) for p in paragrafos),
+            "segundos_audio": saida_ordem.metricas()["segundos_audio"],
+        }
+        print(f"[ROTEIRO] ✅ Tema → áudio em {tempo_total:.1f}s (geração {tempo_geracao:.1f}s, "
+              f"síntese {tempo_sintese:.1f}s, {metricas['sobreposicao']:.1f}s em paralelo)")
+        return metricas
+
+
+# ===== LINHA DE COMANDO =====
+
+def main():
+    from audio_validation import ValidadorAudio
+    from memory_budget import OrcamentoMemoria
+    from synthesis_cache import CacheSintese
+    from synthesis_scheduler import ConfigDuplicacao
+    from tts_client import Endpoint
+
+    parser = argparse.ArgumentParser(description="Gera um roteiro e o áudio dele ao mesmo tempo")
+    parser.add_argument("tema", help="Tema do roteiro (ou @arquivo.txt com o prompt completo)")
+    parser.add_argument("--chave", default=os.environ.get("DEEPSEEK_API_KEY", ""),
+                        help="Chave DeepSeek (padrão: variável DEEPSEEK_API_KEY)")
+    parser.add_argument("--modelo", default=DEEPSEEK_MODELO_PADRAO)
+    parser.add_argument("--saida", default="roteiro_stream.wav")
+    parser.add_argument("--voz", default="Kore")
+    parser.add_argument("--prompt-voz", default="")
+    parser.add_argument("--paralelo", type=int, default=6, help="Chunks sintetizados ao mesmo tempo")
+    parser.add_argument("--memoria-mb", type=float, default=256)
+    args = parser.parse_args()
+
+    auth = AuthManager()
+    if not auth.verificar_acesso_ativo():
+        print("[ROTEIRO] Faça login no programa antes de usar o roteiro em streaming")
+        sys.exit(1)
+    if not args.chave:
+        print("[ROTEIRO] Informe a chave DeepSeek (--chave ou DEEPSEEK_API_KEY)")
+        sys.exit(1)
+
+    if args.tema.startswith("@"):
+        with open(args.tema[1:], "r", encoding="utf-8") as f:
+            prompt = f.read()
+    else:
+        prompt = PROMPT_ROTEIRO.format(tema=args.tema)
+
+    agendador = AgendadorSintese(
+        Endpoint.workers_supabase(AuthManager.ANON_KEY),
+        cache=CacheSintese(),
+        max_paralelo=args.paralelo,
+        validador=ValidadorAudio(),
+        duplicacao=ConfigDuplicacao(),
+        memoria=OrcamentoMemoria(args.memoria_mb),
+    )
+    pipeline = PipelineRoteiroAudio(ClienteDeepseek(auth, args.chave, args.modelo), agendador)
+    try:
+        pipeline.executar(prompt, args.voz, args.prompt_voz, saida=args.saida)
+    except (ErroRoteiro, FalhaJob) as e:
+        print(f"[ROTEIRO] ❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Geração de Legendas SRT Durante a Escrita do Áudio
+Calcula os tempos a partir da contagem de amostras PCM de cada chunk, sem
+decodificar o áudio final (equivalente Python de src/utils/srtGenerator.ts)
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from audio_output import EmendaCrossfade
+from text_chunker import contar_palavras, dividir_sentencas
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+
+class ConfigSrt:
+    """
+    Limites dos blocos de legenda (mesmos padrões de DEFAULT_SRT_CONFIG no sistema web)
+    """
+
+    def __init__(self, max_caracteres_bloco: int = 500, min_palavras_bloco: int = 30,
+                 max_palavras_bloco: int = 100):
+        self.max_caracteres_bloco = max_caracteres_bloco
+        self.min_palavras_bloco = min_palavras_bloco
+        self.max_palavras_bloco = max_palavras_bloco
+
+
+def formatar_tempo_srt(ms: int) -> str:
+    """Converte milissegundos para o formato SRT (HH:MM:SS,mmm)"""
+    horas, ms = divmod(ms, 3600000)
+    minutos, ms = divmod(ms, 60000)
+    segundos, ms = divmod(ms, 1000)
+    return f"{horas:02d}:{minutos:02d}:{segundos:02d},{ms:03d}"
+
+
+def _peso(sentenca: str) -> int:
+    """Peso de uma sentença na divisão do tempo do chunk (caracteres sem espaços)"""
+    return max(len(sentenca) - sentenca.count(" "), 1)
+
+
+def agrupar_sentencas(sentencas: List[str], config: ConfigSrt) -> List[List[str]]:
+    """
+    Agrupa sentenças em blocos respeitando os limites (mesma regra de createTextBlocks)
+
+    Returns:
+        Lista de blocos, cada um com suas sentenças
+    """
+    blocos: List[List[str]] = []
+    atual: List[str] = []
+
+    for sentenca in sentencas:
+        teste = " ".join(atual + [sentenca])
+        excede = (len(teste) > config.max_caracteres_bloco
+                  or contar_palavras(teste) > config.max_palavras_bloco)
+
+        if excede and atual and contar_palavras(" ".join(atual)) >= config.min_palavras_bloco:
+            blocos.append(atual)
+            atual = [sentenca]
+        else:
+            # Blocos curtos demais absorvem a sentença mesmo ultrapassando o limite
+            atual.append(sentenca)
+
+    if atual:
+        blocos.append(atual)
+    return blocos
+
+
+class EscritorSrt:
+    """
+    Escritor incremental de SRT
+
+    Recebe cada chunk na ordem em que é escrito no WAV, junto com a quantidade
+    de amostras PCM desse chunk. A duração do chunk é dividida entre as
+    sentenças proporcionalmente ao tamanho de cada uma, e os blocos são gravados
+    (e o arquivo é descarregado) imediatamente, permitindo acompanhar legendas
+    de um áudio ainda parcial.
+    """
+
+    def __init__(self, caminho: str, config: Optional[ConfigSrt] = None,
+                 taxa_amostragem: int = TAXA_AMOSTRAGEM):
+        """
+        Args:
+            caminho: Arquivo .srt de saída
+            config: Limites dos blocos (padrão: ConfigSrt())
+            taxa_amostragem: Taxa do PCM em Hz
+        """
+        self.caminho = caminho
+        self.config = config or ConfigSrt()
+        self.taxa_amostragem = taxa_amostragem
+
+        self.total_blocos = 0
+        self._amostras_ate_agora = 0
+        self._arquivo = open(caminho, "w", encoding="utf-8")
+
+    def adicionar_chunk(self, texto: str, amostras: int) -> List[Tuple[int, int, str]]:
+        """
+        Registra o próximo chunk do áudio
+
+        Args:
+            texto: Texto do chunk
+            amostras: Número de amostras PCM do chunk (bytes // 2)
+
+        Returns:
+            Blocos gravados: (inicio_ms, fim_ms, texto)
+        """
+        inicio_chunk = self._amostras_ate_agora
+        self._amostras_ate_agora += amostras
+
+        blocos = [" ".join(b) for b in agrupar_sentencas(dividir_sentencas(texto), self.config)]
+        if not blocos:
+            return []
+
+        pesos = [_peso(b) for b in blocos]
+        peso_total = sum(pesos)
+
+        gravados = []
+        acumulado = 0
+        for bloco, peso in zip(blocos, pesos):
+            inicio = inicio_chunk + amostras * acumulado // peso_total
+            acumulado += peso
+            fim = inicio_chunk + amostras * acumulado // peso_total
+
+            inicio_ms = inicio * 1000 // self.taxa_amostragem
+            fim_ms = fim * 1000 // self.taxa_amostragem
+            self._gravar_bloco(inicio_ms, fim_ms, bloco)
+            gravados.append((inicio_ms, fim_ms, bloco))
+
+        self._arquivo.flush()
+        return gravados
+
+    def fechar(self):
+        """Fecha o arquivo"""
+        if not self._arquivo.closed:
+            self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def _gravar_bloco(self, inicio_ms: int, fim_ms: int, texto: str):
+        self.total_blocos += 1
+        if self.total_blocos > 1:
+            self._arquivo.write("\n")
+        self._arquivo.write(
+            f"{self.total_blocos}\n"
+            f"{formatar_tempo_srt(inicio_ms)} --> {formatar_tempo_srt(fim_ms)}\n"
+            f"{texto}\n"
+        )
+
+
+class LegendasEmOrdem:
+    """
+    Legendas escritas durante a síntese, com chunks chegando fora de ordem
+
+    Use `receber` como destino por chunk (ex: em executar_job): cada chunk
+    que completa a sequência vai para o EscritorSrt na hora, então o .srt
+    acompanha o áudio parcial. Dos chunks adiantados só o tamanho fica
+    guardado. Com emendas, os tempos descontam o crossfade como no WAV final.
+    """
+
+    def __init__(self, caminho: str, textos: Sequence[str], emendas: Iterable[int] = (),
+                 config: Optional[ConfigSrt] = None, taxa_amostragem: int = TAXA_AMOSTRAGEM):
+        """
+        Args:
+            caminho: Arquivo .srt de saída
+            textos: Texto de cada chunk, na ordem do roteiro
+            emendas: Chunks unidos ao anterior com crossfade (phrase_reuse.py)
+            config: Limites dos blocos (padrão: ConfigSrt())
+            taxa_amostragem: Taxa do PCM em Hz
+        """
+        self.textos = textos
+        self.proximo = 0
+        self._escritor = EscritorSrt(caminho, config, taxa_amostragem)
+        self._emenda = EmendaCrossfade(emendas)
+        self._tamanhos: Dict[int, int] = {}
+
+    @property
+    def total_blocos(self) -> int:
+        return self._escritor.total_blocos
+
+    def receber(self, indice: int, pcm: bytes):
+        """Entrega um chunk pronto (qualquer ordem); grava as legendas que já podem sair"""
+        self._tamanhos[indice] = len(pcm)
+        while self.proximo in self._tamanhos:
+            tamanho = self._emenda.tamanho_liberado(self.proximo, self._tamanhos.pop(self.proximo))
+            self._escritor.adicionar_chunk(self.textos[self.proximo], tamanho // BYTES_POR_AMOSTRA)
+            self.proximo += 1
+
+    def fechar(self):
+        """Fecha o arquivo"""
+        self._escritor.fechar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
@@ -0,0 +1,203 @@
+"""
+Decodificação em Streaming das Respostas de Áudio
+Lê o corpo HTTP em blocos, localiza o base64 do áudio sem montar o JSON e
+decodifica direto em um bytearray pré-alocado (ver ANALISE_PERFORMANCE_AUDIO.md)
+"""
+
+import binascii
+import re
+from typing import Iterable, Optional
+
+TAMANHO_BLOCO = 64 * 1024
+
+# Início do payload de áudio: "data": "   (Gemini e workers: candidates[].content.parts[].inlineData)
+_INICIO_DADOS = re.compile(rb'"data"\s*:\s*"')
+_MIME_TYPE = re.compile(rb'"mimeType"\s*:\s*"([^"]*)"')
+
+# A parte do JSON que não é áudio tem poucas centenas de bytes; acima disto a
+# resposta não é do formato esperado
+_MAX_METADADOS = 1024 * 1024
+
+
+class DecodificadorAudioJson:
+    """
+    Decodificador incremental de uma resposta JSON com áudio em base64
+
+    Em vez de response.json() → base64.b64decode() → bytes (três cópias
+    inteiras do chunk), cada bloco recebido é decodificado e copiado para um
+    único bytearray, alocado uma vez a partir do Content-Length. Fora do
+    payload, só os metadados (mimeType etc.) ficam guardados.
+
+    O payload precisa ser base64 puro, sem escapes JSON (exceto \\/), que é o
+    que o Gemini e os workers enviam.
+    """
+
+    def __init__(self, tamanho_estimado: Optional[int] = None):
+        """
+        Args:
+            tamanho_estimado: Tamanho do corpo em bytes (Content-Length), se conhecido
+        """
+        # base64 → 3/4 do tamanho; o corpo inclui o JSON em volta, então sobra um pouco
+        self._buffer = bytearray((tamanho_estimado or 0) * 3 // 4)
+        self._escrito = 0
+        self._metadados = bytearray()
+        self._pendente = b""
+        self._estado = "procurando"
+
+    @property
+    def mime_type(self) -> str:
+        """mimeType declarado na resposta ("" se ausente)"""
+        encontrado = _MIME_TYPE.search(self._metadados)
+        return encontrado.group(1).decode("ascii", "replace") if encontrado else ""
+
+    def alimentar(self, bloco: bytes):
+        """Processa o próximo bloco do corpo HTTP"""
+        if self._estado == "procurando":
+            self._metadados += bloco
+            encontrado = _INICIO_DADOS.search(self._metadados)
+            if not encontrado:
+                if len(self._metadados) > _MAX_METADADOS:
+                    raise ValueError("Resposta sem áudio: payload não encontrado")
+                return
+            bloco = bytes(self._metadados[encontrado.end():])
+            del self._metadados[encontrado.start():]
+            self._estado = "dados"
+
+        if self._estado == "dados":
+            fim = bloco.find(b'"')
+            if fim < 0:
+                self._decodificar(bloco)
+                return
+            self._decodificar(bloco[:fim])
+            self._decodificar_final()
+            bloco = bloco[fim + 1:]
+            self._estado = "depois"
+
+        # Depois do payload: guarda o resto (o mimeType pode vir depois de "data")
+        if len(self._metadados) < _MAX_METADADOS:
+            self._metadados += bloco
+
+    def finalizar(self) -> bytearray:
+        """
+        Encerra a leitura
+
+        Returns:
+            O PCM decodificado (o próprio buffer, encolhido sem cópia)
+
+        Raises:
+            ValueError: Se a resposta não tinha áudio ou terminou no meio do payload
+        """
+        if self._estado == "procurando":
+            raise ValueError("Resposta sem áudio: payload não encontrado")
+        if self._estado == "dados":
+            raise ValueError("Resposta terminou no meio do áudio")
+
+        del self._buffer[self._escrito:]
+        return self._buffer
+
+    def _decodificar(self, texto: bytes):
+        """Decodifica o maior prefixo múltiplo de 4 caracteres; guarda o resto"""
+        if self._pendente:
+            texto = self._pendente + texto
+        if b"\\" in texto:
+            if texto.endswith(b"\\"):
+                texto, self._pendente = texto[:-1], b"\\"
+            else:
+                self._pendente = b""
+            texto = texto.replace(b"\\/", b"/")
+        else:
+            self._pendente = b""
+
+        util = len(texto) - len(texto) % 4
+        if util < len(texto):
+            self._pendente = texto[util:] + self._pendente
+        if util:
+            self._escrever(binascii.a2b_base64(texto[:util]))
+
+    def _decodificar_final(self):
+        if self._pendente:
+            # Sobra sem padding (alguns encoders omitem o "=")
+            resto = self._pendente.replace(b"\\/", b"/")
+            self._pendente = b""
+            self._escrever(binascii.a2b_base64(resto + b"=" * (-len(resto) % 4)))
+
+    def _escrever(self, pcm: bytes):
+        fim = self._escrito + len(pcm)
+        if fim > len(self._buffer):
+            # Content-Length ausente ou comprimido: cresce em passos de 50%
+            self._buffer.extend(bytes(max(fim - len(self._buffer), len(self._buffer) // 2)))
+        self._buffer[self._escrito:fim] = pcm
+        self._escrito = fim
+
+
+def decodificar_audio_json(blocos: Iterable[bytes], tamanho_estimado: Optional[int] = None):
+    """
+    Decodifica uma resposta JSON com áudio base64 a partir de um iterável de blocos
+
+    Returns:
+        (pcm, mime_type)
+    """
+    decodificador = DecodificadorAudioJson(tamanho_estimado)
+    for bloco in blocos:
+        decodificador.alimentar(bloco)
+    return decodificador.finalizar(), decodificador.mime_type
+
+
+def ler_corpo(blocos: Iterable[bytes], tamanho_estimado: Optional[int] = None) -> bytearray:
+    """Lê um corpo binário (PCM cru) para um único bytearray pré-alocado"""
+    buffer = bytearray(tamanho_estimado or 0)
+    escrito = 0
+    for bloco in blocos:
+        fim = escrito + len(bloco)
+        if fim > len(buffer):
+            buffer.extend(bytes(max(fim - len(buffer), len(buffer) // 2)))
+        buffer[escrito:fim] = bloco
+        escrito = fim
+    del buffer[escrito:]
+    return buffer
+
+
+# ===== BENCHMARK =====
+
+if __name__ == "__main__":
+    import base64
+    import json
+    import os
+    import time
+    import tracemalloc
+
+    # Chunk típico: ~3 min de PCM 24 kHz (≈ 8,6 MB, ≈ 11,5 MB em base64)
+    pcm = os.urandom(24000 * 2 * 180)
+    corpo = json.dumps({
+        "candidates": [{"content": {"parts": [{"inlineData": {
+            "mimeType": "audio/L16;codec=pcm;rate=24000",
+            "data": base64.b64encode(pcm).decode("ascii"),
+        }}]}}],
+    }).encode("ascii")
+    blocos = [corpo[i:i + TAMANHO_BLOCO] for i in range(0, len(corpo), TAMANHO_BLOCO)]
+
+    def ingenuo():
+        # Equivalente a response.content + response.json() + b64decode
+        conteudo = b"".join(blocos)
+        dados = json.loads(conteudo)
+        return base64.b64decode(dados["candidates"][0]["content"]["parts"][0]["inlineData"]["data"])
+
+    def streaming():
+        return decodificar_audio_json(iter(blocos), len(corpo))[0]
+
+    print(f"Chunk: {len(pcm) / 1e6:.1f} MB de PCM, corpo de {len(corpo) / 1e6:.1f} MB")
+    for nome, funcao in (("ingênuo", ingenuo), ("streaming", streaming)):
+        assert funcao() == pcm
+
+        inicio = time.perf_counter()
+        for _ in range(5):
+            funcao()
+        tempo = (time.perf_counter() - inicio) / 5
+
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"  {nome:10s} {tempo * 1000:7.1f} ms/chunk   pico {pico / 1e6:6.1f} MB "
+              f"({pico / len(pcm):.2f}× o PCM)")
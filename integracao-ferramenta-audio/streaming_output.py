@@ -0,0 +1,207 @@
+"""
+Saída de Áudio em Streaming
+Libera o chunk 1 assim que fica pronto e cada chunk seguinte em ordem, para um
+arquivo que cresce, um named pipe ou um callback (ex: player da interface)
+"""
+
+import argparse
+import os
+import struct
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from audio_output import EmendaCrossfade
+from job_trace import trecho
+from memory_budget import BufferReordenacao, OrcamentoMemoria
+from tts_client import BYTES_POR_AMOSTRA, TAXA_AMOSTRAGEM
+
+# Tamanho "desconhecido" no cabeçalho WAV: players leem até o fim do que existe
+_TAMANHO_ABERTO = 0xFFFFFFFF
+
+
+def cabecalho_wav(tamanho_dados: int = _TAMANHO_ABERTO,
+                  taxa_amostragem: int = TAXA_AMOSTRAGEM) -> bytes:
+    """Cabeçalho WAV PCM 16-bit mono (tamanho aberto por padrão, para streaming)"""
+    riff = _TAMANHO_ABERTO if tamanho_dados == _TAMANHO_ABERTO else 36 + tamanho_dados
+    return b"".join([
+        b"RIFF", struct.pack("<I", riff), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, 1, 1, taxa_amostragem,
+                             taxa_amostragem * BYTES_POR_AMOSTRA, BYTES_POR_AMOSTRA, 16),
+        b"data", struct.pack("<I", tamanho_dados),
+    ])
+
+
+class SaidaEmOrdem:
+    """
+    Recebe chunks na ordem em que terminam e os libera na ordem do roteiro
+
+    Use `receber` como callback `ao_concluir_chunk` do agendador (ou de
+    executar_job). Cada chunk liberado vai para todos os destinos:
+
+    - callback(indice, pcm): ex. a interface tocando enquanto o resto sintetiza
+    - arquivo: WAV que cresce a cada chunk (cabeçalho corrigido ao fechar)
+    - pipe: named pipe (POSIX) recebendo o mesmo WAV; ex:
+      `ffplay /tmp/audio_pipe` ou `ffmpeg -i /tmp/audio_pipe ...`
+
+    Métricas: tempo até o primeiro áudio (TTFA) e a maior espera entre dois
+    chunks liberados, contados desde a criação.
+    """
+
+    def __init__(self, ao_liberar: Optional[Callable[[int, bytes], None]] = None,
+                 arquivo: Optional[str] = None, pipe: Optional[str] = None,
+                 primeiro_indice: int = 0, taxa_amostragem: int = TAXA_AMOSTRAGEM,
+                 orcamento: Optional[OrcamentoMemoria] = None,
+                 emendas: Iterable[int] = ()):
+        """
+        Args:
+            ao_liberar: Callback (indice, pcm) chamado em ordem
+            arquivo: WAV que cresce durante a síntese
+            pipe: Caminho do named pipe (criado se não existir; a abertura
+                  espera até algum leitor conectar)
+            primeiro_indice: Índice do primeiro chunk esperado
+            taxa_amostragem: Taxa do PCM em Hz
+            orcamento: Orçamento de memória; chunks fora de ordem além dele
+                       esperam a vez num arquivo temporário
+            emendas: Chunks unidos ao anterior com crossfade (phrase_reuse.py)
+        """
+        self.ao_liberar = ao_liberar
+        self.taxa_amostragem = taxa_amostragem
+        self.proximo = primeiro_indice
+
+        self.inicio = time.monotonic()
+        self.ttfa: Optional[float] = None
+        self.maior_espera = 0.0
+        self.liberados = 0
+        self.bytes_liberados = 0
+        self._ultimo = self.inicio
+        self._pendentes = BufferReordenacao(orcamento, nome="saida_stream")
+        self._emenda = EmendaCrossfade(emendas)
+
+        self._arquivo = None
+        if arquivo:
+            self._arquivo = open(arquivo, "wb")
+            self._arquivo.write(cabecalho_wav(taxa_amostragem=taxa_amostragem))
+            self._arquivo.flush()
+
+        self._pipe = None
+        if pipe:
+            if not hasattr(os, "mkfifo"):
+                raise OSError("Named pipes não são suportados neste sistema; use arquivo ou callback")
+            if not os.path.exists(pipe):
+                os.mkfifo(pipe)
+            print(f"[STREAM] Aguardando leitor em {pipe}...")
+            self._pipe = open(pipe, "wb")
+            self._pipe.write(cabecalho_wav(taxa_amostragem=taxa_amostragem))
+
+    def receber(self, indice: int, pcm: bytes):
+        """Entrega um chunk pronto (qualquer ordem); libera tudo que já pode sair em ordem"""
+        if indice != self.proximo:
+            self._pendentes.guardar(indice, pcm)
+            return
+        self._liberar(indice, pcm)
+        self.proximo += 1
+        while self.proximo in self._pendentes:
+            self._liberar(self.proximo, self._pendentes.retirar(self.proximo))
+            self.proximo += 1
+
+    def _liberar(self, indice: int, pcm: bytes):
+        with trecho("saída em streaming", "escrita", chunk=indice + 1):
+            self._escrever(indice, self._emenda.processar(indice, pcm))
+
+    def _escrever(self, indice: int, pcm: bytes):
+        agora = time.monotonic()
+        if self.ttfa is None:
+            self.ttfa = agora - self.inicio
+            print(f"[STREAM] 🔊 Primeiro áudio em {self.ttfa:.1f}s")
+        self.maior_espera = max(self.maior_espera, agora - self._ultimo)
+        self._ultimo = agora
+
+        if self._arquivo is not None:
+            self._arquivo.write(pcm)
+            self._arquivo.flush()
+        if self._pipe is not None:
+            try:
+                self._pipe.write(pcm)
+                self._pipe.flush()
+            except BrokenPipeError:
+                print("[STREAM] Leitor do pipe desconectou")
+                self._pipe = None
+        if self.ao_liberar is not None:
+            self.ao_liberar(indice, pcm)
+
+        self.liberados += 1
+        self.bytes_liberados += len(pcm)
+
+    def metricas(self) -> Dict[str, float]:
+        """TTFA, maior espera entre chunks, áudio liberado e chunks que passaram pelo disco"""
+        return {
+            "ttfa": self.ttfa if self.ttfa is not None else -1.0,
+            "maior_espera": self.maior_espera,
+            "chunks": self.liberados,
+            "segundos_audio": self.bytes_liberados / (self.taxa_amostragem * BYTES_POR_AMOSTRA),
+            "tempo_total": time.monotonic() - self.inicio,
+            "chunks_em_disco": self._pendentes.derramados,
+        }
+
+    def fechar(self):
+        """Fecha os destinos (o WAV recebe o tamanho final no cabeçalho)"""
+        self._pendentes.fechar()
+        if self._arquivo is not None:
+            self._arquivo.seek(0)
+            self._arquivo.write(cabecalho_wav(self.bytes_liberados, self.taxa_amostragem))
+            self._arquivo.close()
+            self._arquivo = None
+        if self._pipe is not None:
+            try:
+                self._pipe.close()
+            except BrokenPipeError:
+                pass
+            self._pipe = None
+
+        m = self.metricas()
+        print(f"[STREAM] {m['chunks']} chunks, {m['segundos_audio']:.0f}s de áudio | "
+              f"TTFA {m['ttfa']:.1f}s, maior espera {m['maior_espera']:.1f}s")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+# ===== LINHA DE COMANDO =====
+
+def main():
+    from auth_manager import AuthManager
+    from audio_validation import ValidadorAudio
+    from synthesis_cache import CacheSintese
+    from synthesis_scheduler import AgendadorSintese, ConfigDuplicacao
+    from text_chunker import dividir_texto_progressivo
+    from tts_client import Endpoint
+
+    parser = argparse.ArgumentParser(description="Sintetiza um roteiro liberando o áudio em ordem")
+    parser.add_argument("roteiro", help="Arquivo .txt")
+    parser.add_argument("--saida", default="saida_stream.wav", help="WAV que cresce durante a síntese")
+    parser.add_argument("--pipe", help="Named pipe para um player (POSIX)")
+    parser.add_argument("--voz", default="Kore")
+    parser.add_argument("--prompt", default="")
+    parser.add_argument("--memoria-mb", type=float, default=256)
+    args = parser.parse_args()
+
+    with open(args.roteiro, "r", encoding="utf-8") as f:
+        chunks: List[str] = dividir_texto_progressivo(f.read())
+
+    agendador = AgendadorSintese(
+        Endpoint.workers_supabase(AuthManager.ANON_KEY),
+        cache=CacheSintese(),
+        validador=ValidadorAudio(),
+        duplicacao=ConfigDuplicacao(),
+        memoria=OrcamentoMemoria(args.memoria_mb),
+    )
+    with SaidaEmOrdem(arquivo=args.saida, pipe=args.pipe, orcamento=agendador.memoria) as saida:
+        agendador.sintetizar_job(chunks, args.voz, args.prompt, ao_concluir_chunk=saida.receber,
+                                 priorizar_inicio=True, guardar_resultados=False)
+
+
+if __name__ == "__main__":
+    main()
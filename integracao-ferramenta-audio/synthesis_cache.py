@@ -0,0 +1,393 @@
+"""
+Cache de Síntese em Disco
+Guarda o PCM de cada chunk já sintetizado, endereçado pelo conteúdo
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from text_chunker import normalizar_texto
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+# Permissão de arquivos novos segundo a umask do processo (lida uma vez: os.umask
+# troca a máscara do processo inteiro e não pode ser consultada com threads rodando)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+MODO_ARQUIVO = 0o666 & ~_UMASK
+
+# Mudar este número invalida todas as entradas antigas (ex: mudança no formato do PCM)
+VERSAO_CACHE = 1
+
+# Limite padrão: 2 GB (~12 horas de áudio PCM 24 kHz)
+LIMITE_PADRAO_BYTES = 2 * 1024 ** 3
+
+# Arquivos fora do índice só são apagados depois desta idade (segundos): podem ser
+# de outro processo que ainda vai registrá-los, ou um .tmp sendo escrito agora
+IDADE_MINIMA_ORFAO = 3600
+
+
+def chave_cache(texto: str, voz: str, prompt: str, versao_modelo: str) -> str:
+    """
+    Calcula a chave de cache de um chunk
+
+    Args:
+        texto: Texto do chunk (é normalizado antes do hash)
+        voz: Nome da voz
+        prompt: Instrução de estilo
+        versao_modelo: Modelo/endpoint usado na síntese
+
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+    material = json.dumps(
+        [VERSAO_CACHE, normalizar_texto(texto), voz, normalizar_texto(prompt or ""), versao_modelo],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def escrever_atomico(caminho: str, dados: bytes):
+    """
+    Escreve um arquivo de forma atômica (temporário + rename)
+
+    Um processo interrompido no meio nunca deixa um arquivo pela metade.
+    """
+    escrever_atomico_partes(caminho, [dados])
+
+
+def escrever_atomico_partes(caminho: str, partes: Iterable[bytes]):
+    """Como escrever_atomico, mas consumindo as partes uma a uma (arquivos grandes)"""
+    pasta = os.path.dirname(caminho) or "."
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for parte in partes:
+                f.write(parte)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp cria com 0600: o arquivo final fica com a permissão de um open() comum
+        os.chmod(temporario, MODO_ARQUIVO)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class TravaArquivo:
+    """
+    Trava exclusiva entre processos, num arquivo (flock; msvcrt.locking no Windows)
+
+    Uso: `with TravaArquivo(caminho): ...` - espera até conseguir. Não é
+    reentrante: não abra a mesma trava de novo dentro do bloco.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = None
+
+    def __enter__(self) -> "TravaArquivo":
+        self._arquivo = open(self.caminho, "a+b")
+        if os.name == "nt":
+            self._arquivo.seek(0)
+            while True:
+                try:
+                    # LK_LOCK desiste depois de ~10s; continuar esperando
+                    msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *_):
+        try:
+            if os.name == "nt":
+                self._arquivo.seek(0)
+                msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+class CacheSintese:
+    """
+    Cache LRU em disco para áudio sintetizado
+
+    Estrutura da pasta:
+        indice.json          - entradas (chave → tamanho, último acesso), em ordem LRU
+        indice.lock          - trava entre processos para ler/gravar o índice
+        objetos/ab/abcd...   - PCM de cada chunk
+
+    Seguro para uso por várias threads do agendador e por vários processos na
+    mesma pasta (interface, fila de lotes, roteiro + áudio): cada gravação do
+    índice, com a trava, mescla o que está em disco com o que este processo
+    sabe, em vez de sobrescrever. Objetos gravados por outro processo depois
+    que este abriu o cache são adotados na primeira consulta.
+    """
+
+    ARQUIVO_INDICE = "indice.json"
+    ARQUIVO_TRAVA = "indice.lock"
+
+    def __init__(self, pasta: str = "cache_sintese", limite_bytes: int = LIMITE_PADRAO_BYTES):
+        """
+        Args:
+            pasta: Pasta onde o cache é guardado
+            limite_bytes: Tamanho máximo total; entradas menos usadas são removidas
+        """
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, dict]" = OrderedDict()
+        self._total_bytes = 0
+        self._indice_sujo = False
+        # Desde a última gravação: removidas por este processo (não voltam na mescla)
+        # e novas neste processo (as demais, se sumiram do disco, outro processo removeu)
+        self._removidas = set()
+        self._novas = set()
+
+        self.acertos = 0
+        self.faltas = 0
+
+        os.makedirs(os.path.join(pasta, "objetos"), exist_ok=True)
+        self._carregar_indice()
+
+    # ----- API pública -----
+
+    def obter(self, chave: str) -> Optional[bytes]:
+        """
+        Busca o PCM de uma chave
+
+        Returns:
+            Bytes PCM ou None se não estiver no cache
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                entrada = self._adotar(chave)
+            if entrada is None:
+                self.faltas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            entrada["acesso"] = time.time()
+            self._indice_sujo = True
+
+        try:
+            with open(self._caminho_objeto(chave), "rb") as f:
+                dados = f.read()
+        except OSError:
+            # Arquivo sumiu (apagado manualmente?): tratar como falta
+            with self._lock:
+                self._remover_entrada(chave)
+                self.faltas += 1
+            return None
+
+        if len(dados) != entrada["tamanho"]:
+            with self._lock:
+                self._remover_entrada(chave)
+                self.faltas += 1
+            return None
+
+        with self._lock:
+            self.acertos += 1
+        return dados
+
+    def inserir(self, chave: str, dados: bytes):
+        """
+        Insere (ou substitui) o PCM de uma chave
+
+        A escrita é atômica e o índice é salvo logo em seguida.
+        """
+        if len(dados) > self.limite_bytes:
+            return
+
+        caminho = self._caminho_objeto(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        escrever_atomico(caminho, dados)
+
+        with self._lock:
+            if chave in self._entradas:
+                self._total_bytes -= self._entradas.pop(chave)["tamanho"]
+            self._removidas.discard(chave)
+            self._novas.add(chave)
+            self._entradas[chave] = {"tamanho": len(dados), "acesso": time.time()}
+            self._total_bytes += len(dados)
+            self._evictar()
+            self._salvar_indice()
+
+    def __contains__(self, chave: str) -> bool:
+        with self._lock:
+            return chave in self._entradas
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+    @property
+    def total_bytes(self) -> int:
+        """Tamanho total ocupado pelos objetos"""
+        return self._total_bytes
+
+    def salvar(self):
+        """Persiste a ordem LRU (chamar ao fim de cada job)"""
+        with self._lock:
+            if self._indice_sujo:
+                self._salvar_indice()
+
+    def limpar(self):
+        """Remove todas as entradas do cache (inclusive as de outros processos)"""
+        with self._lock:
+            with TravaArquivo(os.path.join(self.pasta, self.ARQUIVO_TRAVA)):
+                for chave, _, acesso in self._ler_indice():
+                    self._entradas.setdefault(chave, {"tamanho": 0, "acesso": acesso})
+                for chave in list(self._entradas):
+                    self._remover_entrada(chave)
+                self._total_bytes = 0
+                self._gravar_indice()
+
+    # ----- Internos -----
+
+    def _caminho_objeto(self, chave: str) -> str:
+        return os.path.join(self.pasta, "objetos", chave[:2], chave)
+
+    def _remover_entrada(self, chave: str):
+        """Remove entrada e arquivo (chamar com o lock adquirido)"""
+        entrada = self._entradas.pop(chave, None)
+        if entrada is None:
+            return
+        self._total_bytes -= entrada["tamanho"]
+        self._removidas.add(chave)
+        self._indice_sujo = True
+        try:
+            os.remove(self._caminho_objeto(chave))
+        except OSError:
+            pass
+
+    def _evictar(self):
+        """Remove as entradas menos usadas até caber no limite (chamar com o lock)"""
+        while self._total_bytes > self.limite_bytes and self._entradas:
+            chave_antiga = next(iter(self._entradas))
+            self._remover_entrada(chave_antiga)
+
+    def _adotar(self, chave: str) -> Optional[dict]:
+        """Entrada para um objeto gravado por outro processo (chamar com o lock)"""
+        try:
+            tamanho = os.path.getsize(self._caminho_objeto(chave))
+        except OSError:
+            return None
+        # Não entra em _novas: se sumir do índice em disco, o outro processo removeu
+        self._removidas.discard(chave)
+        entrada = {"tamanho": tamanho, "acesso": time.time()}
+        self._entradas[chave] = entrada
+        self._total_bytes += tamanho
+        self._indice_sujo = True
+        return entrada
+
+    def _salvar_indice(self):
+        """
+        Mescla com o índice em disco e grava (chamar com o lock)
+
+        Entradas de outros processos entram; as que este processo removeu não
+        voltam, nem as que outro processo removeu; para chaves em comum vale o
+        acesso mais recente.
+        """
+        with TravaArquivo(os.path.join(self.pasta, self.ARQUIVO_TRAVA)):
+            em_disco = self._ler_indice()
+            chaves_disco = {entrada[0] for entrada in em_disco}
+            for chave in list(self._entradas):
+                if chave not in chaves_disco and chave not in self._novas:
+                    del self._entradas[chave]
+            for chave, tamanho, acesso in em_disco:
+                if chave in self._removidas:
+                    continue
+                entrada = self._entradas.get(chave)
+                if entrada is None:
+                    self._entradas[chave] = {"tamanho": tamanho, "acesso": acesso}
+                else:
+                    entrada["acesso"] = max(entrada["acesso"], acesso)
+            self._entradas = OrderedDict(sorted(self._entradas.items(), key=lambda item: item[1]["acesso"]))
+            self._total_bytes = sum(e["tamanho"] for e in self._entradas.values())
+            self._evictar()
+            self._gravar_indice()
+
+    def _ler_indice(self) -> list:
+        """Entradas [chave, tamanho, acesso] do índice em disco ([] se não houver)"""
+        try:
+            with open(os.path.join(self.pasta, self.ARQUIVO_INDICE), "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"[CACHE] Índice corrompido, recomeçando: {e}")
+            return []
+        return dados.get("entradas", []) if dados.get("versao") == VERSAO_CACHE else []
+
+    def _gravar_indice(self):
+        """Grava o índice em disco (chamar com o lock e a trava entre processos)"""
+        dados = {
+            "versao": VERSAO_CACHE,
+            "entradas": [[chave, e["tamanho"], e["acesso"]] for chave, e in self._entradas.items()],
+        }
+        escrever_atomico(
+            os.path.join(self.pasta, self.ARQUIVO_INDICE),
+            json.dumps(dados).encode("utf-8"),
+        )
+        self._indice_sujo = False
+        self._removidas.clear()
+        self._novas.clear()
+
+    def _carregar_indice(self):
+        """
+        Carrega o índice salvo e reconcilia com os arquivos em disco
+
+        Entradas sem arquivo são descartadas; arquivos sem entrada há mais de
+        IDADE_MINIMA_ORFAO (ex: processo morto entre gravar objeto e índice)
+        são apagados. Os mais novos podem ser de outro processo em andamento.
+        """
+        with self._lock, TravaArquivo(os.path.join(self.pasta, self.ARQUIVO_TRAVA)):
+            self._reconciliar(self._ler_indice())
+
+        if self._entradas:
+            print(f"[CACHE] {len(self._entradas)} chunks em cache "
+                  f"({self._total_bytes / 1024 ** 2:.1f} MB)")
+
+    def _reconciliar(self, entradas: list):
+        """Corpo de _carregar_indice (com o lock e a trava)"""
+        # Ordenar por último acesso mantém a ordem LRU mesmo se o índice foi salvo fora de ordem
+        for chave, tamanho, acesso in sorted(entradas, key=lambda e: e[2]):
+            try:
+                if os.path.getsize(self._caminho_objeto(chave)) == tamanho:
+                    self._entradas[chave] = {"tamanho": tamanho, "acesso": acesso}
+                    self._total_bytes += tamanho
+            except OSError:
+                continue
+
+        limite_orfao = time.time() - IDADE_MINIMA_ORFAO
+        pasta_objetos = os.path.join(self.pasta, "objetos")
+        for raiz, _, arquivos in os.walk(pasta_objetos):
+            for nome in arquivos:
+                if nome not in self._entradas:
+                    caminho = os.path.join(raiz, nome)
+                    try:
+                        if os.path.getmtime(caminho) < limite_orfao:
+                            os.remove(caminho)
+                    except OSError:
+                        pass
+
+        self._evictar()
+        if len(self._entradas) != len(entradas):
+            self._gravar_indice()
@@ -0,0 +1,711 @@
+"""
+Agendador de Síntese
+Distribui os chunks de um job entre os endpoints disponíveis, com retry e cache
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from adaptive_concurrency import ControladorAimd
+from chunk_table import TabelaChunks
+from endpoint_stats import CotaEndpoints, HistoricoLatencias, SaudeEndpoints
+from job_trace import PID_CHUNKS, RastreadorJob, ativar, ativo, trecho
+from memory_budget import OrcamentoMemoria, estimar_bytes_pcm
+from memory_report import MedidorMemoriaJob
+from phrase_reuse import ArmazemFrases
+from progress_bus import FALHOU, PRONTO, REPETINDO, SINTETIZANDO, BarramentoProgresso
+from synthesis_cache import CacheSintese, chave_cache
+from text_chunker import contar_palavras
+from tts_client import ClienteTTS, Endpoint, ErroSintese
+
+
+# Mesmos valores do sistema web (useGeminiTtsQueue.ts / useAudioQueue.ts)
+MAX_TENTATIVAS_CHUNK = 5
+COOLDOWN_429_PADRAO = 60.0
+COOLDOWN_5XX = 30.0
+# Espera máxima pela resposta de uma cópia depois do limite de duplicação
+# (uma thread perdida não pode segurar o job para sempre)
+ESPERA_MAXIMA_COPIA = 600.0
+
+
+class FalhaJob(Exception):
+    """
+    Um ou mais chunks falharam após todas as tentativas
+
+    Attributes:
+        chunks_falhados: Índices (0-based) dos chunks que falharam
+        erros: Mensagem de erro de cada chunk falhado
+    """
+
+    def __init__(self, erros: Dict[int, str]):
+        self.chunks_falhados = sorted(erros)
+        self.erros = erros
+        resumo = ", ".join(str(i + 1) for i in self.chunks_falhados)
+        super().__init__(f"{len(erros)} chunk(s) falharam: [{resumo}]")
+
+
+class EstatisticasJob:
+    """
+    Contadores de um job (um objeto por chamada de sintetizar_job)
+
+    Attributes:
+        job_id: Identificador do job
+        peso: Peso do job na divisão justa de requisições entre jobs simultâneos
+        requisicoes: Requisições enviadas à rede
+        acertos_cache: Chunks atendidos pelo cache
+        acertos_frases: Chunks atendidos pelo armazém de frases recorrentes
+        rejeitados: Respostas reprovadas pelo validador de áudio
+        duplicadas: Requisições duplicadas por atraso (hedge)
+        bytes_audio: Total de PCM produzido
+        rastreio: Linha do tempo do job (job_trace.py), se ativada
+        perfil_memoria: Relatório de memória do job (memory_report.py), se ativado
+        progresso: Barramento de progresso lido pela interface (progress_bus.py)
+        tabela: Situação, tentativas e duração de cada chunk (chunk_table.py),
+                preenchida por sintetizar_job
+    """
+
+    def __init__(self, job_id: Optional[str] = None, peso: float = 1.0,
+                 rastreio: Optional[RastreadorJob] = None,
+                 perfil_memoria: Optional[MedidorMemoriaJob] = None,
+                 progresso: Optional[BarramentoProgresso] = None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.peso = peso
+        self.rastreio = rastreio
+        self.perfil_memoria = perfil_memoria
+        self.progresso = progresso
+        self.requisicoes = 0
+        self.acertos_cache = 0
+        self.acertos_frases = 0
+        self.rejeitados = 0
+        self.duplicadas = 0
+        self.bytes_audio = 0
+        self.tabela: Optional[TabelaChunks] = None
+
+
+class ReguladorJusto:
+    """
+    Divide um limite global de requisições simultâneas entre vários jobs
+
+    Quando uma vaga abre, ela vai para o job com menos requisições em voo
+    em relação ao seu peso (fair share ponderado). Assim um roteiro enorme
+    não ocupa todas as vagas enquanto roteiros menores esperam.
+    """
+
+    def __init__(self, max_simultaneas: int):
+        """
+        Args:
+            max_simultaneas: Limite global de requisições em voo
+        """
+        self.max_simultaneas = max_simultaneas
+        self._cond = threading.Condition()
+        self._em_uso = 0
+        self._em_voo: Dict[str, int] = {}
+        self._esperando: Dict[str, int] = {}
+        self._pesos: Dict[str, float] = {}
+
+    def adquirir(self, job_id: str, peso: float = 1.0):
+        """Bloqueia até que o job possa enviar mais uma requisição"""
+        with self._cond:
+            self._pesos[job_id] = peso
+            self._esperando[job_id] = self._esperando.get(job_id, 0) + 1
+            while self._em_uso >= self.max_simultaneas or self._escolher() != job_id:
+                self._cond.wait()
+            self._esperando[job_id] -= 1
+            if not self._esperando[job_id]:
+                del self._esperando[job_id]
+            self._em_voo[job_id] = self._em_voo.get(job_id, 0) + 1
+            self._em_uso += 1
+            # Pode haver vaga para outro job
+            self._cond.notify_all()
+
+    def liberar(self, job_id: str):
+        """Devolve a vaga de uma requisição concluída"""
+        with self._cond:
+            self._em_uso -= 1
+            self._em_voo[job_id] -= 1
+            if not self._em_voo[job_id]:
+                del self._em_voo[job_id]
+            self._cond.notify_all()
+
+    def _escolher(self) -> Optional[str]:
+        """Job em espera com a menor fatia atual (em voo / peso)"""
+        if not self._esperando:
+            return None
+        return min(self._esperando,
+                   key=lambda j: self._em_voo.get(j, 0) / self._pesos.get(j, 1.0))
+
+
+class ConfigDuplicacao:
+    """
+    Quando duplicar um chunk atrasado em outro endpoint (hedged requests)
+
+    Se a resposta passa do quantil `quantil` da latência do endpoint, a mesma
+    requisição é enviada a outro endpoint saudável; vale a primeira resposta
+    boa e a outra é cancelada. As duplicatas nunca passam de `max_fracao` das
+    requisições, para não gastar cota à toa.
+    """
+
+    def __init__(self, quantil: float = 0.95, max_fracao: float = 0.1):
+        """
+        Args:
+            quantil: Quantil de latência a partir do qual o chunk é duplicado
+            max_fracao: Fração máxima de requisições que podem ser duplicatas
+        """
+        self.quantil = quantil
+        self.max_fracao = max_fracao
+
+
+class AgendadorSintese:
+    """
+    Agendador de chunks de um job de síntese
+
+    Cada chunk passa por:
+        1. Consulta ao cache (se configurado) - acerto não gasta requisição
+        2. Escolha de endpoint (melhor pontuação de saúde, pulando endpoints em cooldown)
+        3. Requisição com retry e backoff
+        4. Inserção no cache
+    """
+
+    def __init__(self, endpoints: List[Endpoint], cliente: Optional[ClienteTTS] = None,
+                 cache: Optional[CacheSintese] = None, max_paralelo: int = 4,
+                 max_tentativas: int = MAX_TENTATIVAS_CHUNK, versao_modelo: Optional[str] = None,
+                 regulador: Optional[ReguladorJusto] = None, validador=None,
+                 duplicacao: Optional[ConfigDuplicacao] = None,
+                 concorrencia: Optional[ControladorAimd] = None,
+                 memoria: Optional[OrcamentoMemoria] = None,
+                 frases: Optional[ArmazemFrases] = None):
+        """
+        Args:
+            endpoints: Endpoints disponíveis (chaves Gemini ou workers)
+            cliente: Cliente HTTP (padrão: ClienteTTS())
+            cache: Cache de síntese opcional
+            max_paralelo: Máximo de requisições simultâneas por job
+            max_tentativas: Tentativas por chunk antes de desistir
+            versao_modelo: Modelo usado na chave do cache (padrão: o do primeiro endpoint)
+            regulador: Limite global compartilhado quando vários jobs rodam ao mesmo tempo
+            validador: ValidadorAudio opcional (audio_validation.py); respostas
+                       reprovadas contam como falha e o chunk é tentado de novo
+            duplicacao: Ativa a duplicação de chunks atrasados (padrão: desativada)
+            concorrencia: Limite adaptativo (AIMD) de requisições em voo por endpoint;
+                          sem ele, só max_paralelo limita
+            memoria: Orçamento de PCM em RAM compartilhado com os estágios de saída;
+                     novos chunks só são enviados quando o áudio esperado cabe nele
+            frases: Armazém de frases recorrentes (phrase_reuse.py); chunks que são
+                    uma frase conhecida não vão para a rede
+        """
+        if not endpoints:
+            raise ValueError("É necessário pelo menos um endpoint")
+
+        self.endpoints = list(endpoints)
+        self.cliente = cliente or ClienteTTS()
+        self.cache = cache
+        self.max_paralelo = max_paralelo
+        self.max_tentativas = max_tentativas
+        self.versao_modelo = versao_modelo or self.endpoints[0].versao_modelo
+        self.regulador = regulador
+        self.validador = validador
+        self.duplicacao = duplicacao
+        self.concorrencia = concorrencia
+        self.memoria = memoria
+        self.frases = frases
+        self.latencias = HistoricoLatencias()
+        self.saude = SaudeEndpoints()
+        self.cota = CotaEndpoints()
+
+        self._lock = threading.Lock()
+        self._cooldowns: Dict[str, float] = {}
+        self._por_nome = {endpoint.nome: endpoint for endpoint in self.endpoints}
+
+        # Requisições e duplicatas desde a criação (teto de duplicação)
+        self._total_requisicoes = 0
+        self._total_duplicadas = 0
+
+    # ----- API pública -----
+
+    def sintetizar_job(self, chunks: Sequence[str], voz: str, prompt: str = "",
+                       ao_concluir_chunk: Optional[Callable[[int, bytes], None]] = None,
+                       indices: Optional[List[int]] = None,
+                       estatisticas: Optional[EstatisticasJob] = None,
+                       priorizar_inicio: bool = False,
+                       guardar_resultados: bool = True,
+                       rotas: Optional[Dict[int, Tuple[str, str]]] = None,
+                       tabela: Optional[TabelaChunks] = None) -> List[Optional[bytes]]:
+        """
+        Sintetiza todos os chunks de um job
+
+        Args:
+            chunks: Textos dos chunks, na ordem
+            voz: Voz a ser usada
+            prompt: Instrução de estilo
+            ao_concluir_chunk: Callback (indice, pcm) chamado assim que cada chunk
+                               fica pronto (ordem de conclusão, não a ordem original)
+            indices: Sintetizar apenas estes chunks (ex: os que faltam ao retomar um job)
+            estatisticas: Contadores do job (o chamador pode ler ao final)
+            priorizar_inicio: Para saída em streaming: o chunk mais antigo ainda
+                              pendente é duplicado já na mediana de latência
+                              (se a duplicação estiver ativa), em vez do p95
+            guardar_resultados: False quando o callback já consome o PCM (diário,
+                                saída em streaming): nada fica retido até o fim
+            rotas: (voz, prompt) próprios de alguns chunks, ex. os de outro idioma
+                   (language_detect.py); os demais usam `voz` e `prompt`
+            tabela: Tabela de estado a atualizar (ex: a do diário do job);
+                    padrão: uma nova, disponível em `estatisticas.tabela`
+
+        Returns:
+            PCM de cada chunk, na ordem original (None nos chunks fora de `indices`
+            e em todos se guardar_resultados=False)
+
+        Raises:
+            FalhaJob: Se algum chunk falhar após todas as tentativas
+        """
+        estatisticas = estatisticas or EstatisticasJob()
+
+        resultados: List[Optional[bytes]] = [None] * len(chunks)
+        erros: Dict[int, str] = {}
+        if indices is None:
+            indices = list(range(len(chunks)))
+
+        print(f"[AGENDADOR] Iniciando job: {len(indices)} chunks, "
+              f"{len(self.endpoints)} endpoint(s), até {self.max_paralelo} em paralelo")
+
+        tabela = tabela if tabela is not None else TabelaChunks(len(chunks))
+        tabela.reiniciar(indices)
+        estatisticas.tabela = tabela
+
+        # Primeiro chunk ainda não concluído: o cursor só avança, sem varrer a fila
+        ordem = sorted(indices)
+        cursor = 0
+        lock_cursor = threading.Lock()
+
+        def e_o_primeiro(indice: int) -> bool:
+            nonlocal cursor
+            with lock_cursor:
+                while cursor < len(ordem) and tabela.esta_em(ordem[cursor], PRONTO, FALHOU):
+                    cursor += 1
+                return cursor < len(ordem) and ordem[cursor] == indice
+
+        urgente = e_o_primeiro if priorizar_inicio else None
+        rastreio = estatisticas.rastreio
+        # Linha do tempo: cada chunk tem uma trilha com "fila" e depois "chunk N"
+        iniciado_em: Dict[int, float] = {}
+
+        progresso = estatisticas.progresso
+
+        def tarefa(indice: int, enviado_em: float) -> bytes:
+            tabela.marcar(indice, SINTETIZANDO)
+            if progresso is not None:
+                progresso.publicar(indice, SINTETIZANDO)
+            inicio = time.monotonic()
+            try:
+                with ativar(rastreio):
+                    if rastreio is not None:
+                        iniciado_em[indice] = time.time()
+                        rastreio.assincrono("fila", "fila", enviado_em, iniciado_em[indice], PID_CHUNKS,
+                                            id_evento=indice + 1)
+                    voz_chunk, prompt_chunk = rotas.get(indice, (voz, prompt)) if rotas else (voz, prompt)
+                    return self.sintetizar_chunk(indice, chunks[indice], voz_chunk, prompt_chunk,
+                                                 estatisticas, urgente)
+            finally:
+                tabela.duracao[indice] = time.monotonic() - inicio
+
+        # Envio em ordem, numa janela: só alguns chunks à frente dos que estão
+        # em voo, para que o PCM pronto não se acumule dentro dos futuros
+        fila = deque(indices)
+        em_voo: Dict[Future, Tuple[int, int, float]] = {}
+        janela = self.max_paralelo * 2
+        contido = False
+
+        with ativar(rastreio), \
+                ThreadPoolExecutor(max_workers=self.max_paralelo, thread_name_prefix="sintese") as executor:
+            while fila or em_voo:
+                while fila and len(em_voo) < janela:
+                    reserva = 0
+                    if self.memoria is not None:
+                        reserva = estimar_bytes_pcm(chunks[fila[0]])
+                        # Sem nada em voo, reserva de qualquer jeito para não travar
+                        if not self.memoria.tentar_reservar(reserva, forcar=not em_voo):
+                            if not contido:
+                                print(f"[AGENDADOR] Memória no limite ({self.memoria}), "
+                                      f"segurando novos envios")
+                                contido = True
+                            break
+                    indice = fila.popleft()
+                    enviado_em = time.time()
+                    em_voo[executor.submit(tarefa, indice, enviado_em)] = (indice, reserva, enviado_em)
+
+                concluidos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    indice, reserva, enviado_em = em_voo.pop(futuro)
+                    if rastreio is not None:
+                        rastreio.assincrono(f"chunk {indice + 1}", "fila",
+                                            iniciado_em.pop(indice, enviado_em), time.time(),
+                                            PID_CHUNKS, id_evento=indice + 1,
+                                            erro=futuro.exception() is not None)
+                    try:
+                        pcm = futuro.result()
+                    except ErroSintese as e:
+                        erros[indice] = str(e)
+                        tabela.marcar(indice, FALHOU)
+                        print(f"[AGENDADOR] ❌ Chunk {indice + 1} falhou: {e}")
+                        if progresso is not None:
+                            progresso.publicar(indice, FALHOU)
+                        continue
+                    finally:
+                        if reserva:
+                            self.memoria.liberar(reserva)
+
+                    if guardar_resultados:
+                        resultados[indice] = pcm
+                    if progresso is not None:
+                        progresso.publicar(indice, PRONTO, bytes_pcm=len(pcm))
+                    if ao_concluir_chunk:
+                        ao_concluir_chunk(indice, pcm)
+                    tabela.marcar(indice, PRONTO)
+                    if estatisticas.perfil_memoria is not None:
+                        estatisticas.perfil_memoria.chunk_concluido(indice)
+
+        if self.cache is not None:
+            self.cache.salvar()
+        if self.concorrencia is not None:
+            self.concorrencia.salvar()
+
+        print(f"[AGENDADOR] Job concluído: {estatisticas.requisicoes} requisição(ões), "
+              f"{estatisticas.acertos_cache} chunk(s) vindos do cache, "
+              f"{estatisticas.acertos_frases} frase(s) reaproveitada(s), "
+              f"{estatisticas.rejeitados} resposta(s) reprovada(s), "
+              f"{estatisticas.duplicadas} duplicada(s) por atraso")
+
+        if erros:
+            raise FalhaJob(erros)
+
+        return resultados
+
+    def sintetizar_chunk(self, indice: int, texto: str, voz: str, prompt: str = "",
+                         estatisticas: Optional[EstatisticasJob] = None,
+                         urgente: Optional[Callable[[int], bool]] = None) -> bytes:
+        """
+        Sintetiza um único chunk (frases → cache → rede com retry)
+
+        Raises:
+            ErroSintese: Após esgotar as tentativas ou em erro não recuperável
+        """
+        estatisticas = estatisticas or EstatisticasJob()
+
+        frase = self.frases is not None and self.frases.e_frase(texto, voz, prompt)
+        if frase:
+            with trecho("armazém de frases", "cache", chunk=indice + 1):
+                pcm = self._conferir_guardado(
+                    indice, texto, self.frases.obter(texto, voz, prompt, self.versao_modelo), "da frase")
+            if pcm is not None:
+                with self._lock:
+                    estatisticas.acertos_frases += 1
+                    estatisticas.bytes_audio += len(pcm)
+                return pcm
+
+        chave = None
+        if self.cache is not None:
+            chave = chave_cache(texto, voz, prompt, self.versao_modelo)
+            with trecho("cache", "cache", chunk=indice + 1):
+                pcm = self._conferir_guardado(indice, texto, self.cache.obter(chave), "do cache")
+            if pcm is not None:
+                with self._lock:
+                    estatisticas.acertos_cache += 1
+                    estatisticas.bytes_audio += len(pcm)
+                return pcm
+
+        ultimo_erro: Optional[ErroSintese] = None
+        for tentativa in range(1, self.max_tentativas + 1):
+            if estatisticas.tabela is not None:
+                estatisticas.tabela.registrar_tentativa(indice, tentativa)
+            with trecho("aguardando endpoint", "espera", chunk=indice + 1):
+                endpoint = self._aguardar_endpoint()
+            try:
+                pcm = self._requisitar_com_duplicacao(indice, endpoint, texto, voz, prompt,
+                                                      estatisticas, urgente)
+                break
+            except ErroSintese as e:
+                ultimo_erro = e
+                falhou = self._por_nome.get(e.endpoint, endpoint)
+                print(f"[AGENDADOR] Chunk {indice + 1} tentativa {tentativa}/{self.max_tentativas} "
+                      f"em {falhou.nome}: {e}")
+                self._registrar_falha(falhou, e)
+                if not e.recuperavel:
+                    raise
+                if tentativa < self.max_tentativas:
+                    if estatisticas.progresso is not None:
+                        estatisticas.progresso.publicar(indice, REPETINDO, tentativa=tentativa + 1)
+                    # Backoff exponencial: 1s, 2s, 4s, 5s, 5s
+                    with trecho("backoff", "espera", chunk=indice + 1, tentativa=tentativa):
+                        time.sleep(min(2 ** (tentativa - 1), 5))
+        else:
+            raise ultimo_erro
+
+        with self._lock:
+            estatisticas.bytes_audio += len(pcm)
+
+        if chave or frase:
+            with trecho("gravar cache", "cache", chunk=indice + 1):
+                if chave:
+                    self.cache.inserir(chave, pcm)
+                if frase:
+                    self.frases.inserir(texto, voz, prompt, self.versao_modelo, pcm)
+        return pcm
+
+    def _conferir_guardado(self, indice: int, texto: str, pcm: Optional[bytes],
+                           origem: str) -> Optional[bytes]:
+        """Passa áudio guardado pelo validador (None se reprovado ou ausente)"""
+        if pcm is not None and self.validador is not None:
+            resultado = self.validador.validar(pcm, texto)
+            if not resultado.valido:
+                print(f"[AGENDADOR] Chunk {indice + 1}: áudio {origem} reprovado ({resultado})")
+                return None
+        return pcm
+
+    def _requisitar_com_duplicacao(self, indice: int, endpoint: Endpoint, texto: str, voz: str,
+                                   prompt: str, estatisticas: EstatisticasJob,
+                                   urgente: Optional[Callable[[int], bool]] = None) -> bytes:
+        """
+        Uma tentativa do chunk; se passar do limite de latência, duplica em outro endpoint
+
+        O chunk que está segurando a saída em streaming (`urgente`) é duplicado
+        já na mediana, não no quantil configurado. O limite conta a partir de
+        quando a requisição sai para a rede, como as latências do histórico:
+        a espera por vaga (AIMD, regulador global) não dispara duplicatas.
+
+        Returns:
+            O primeiro PCM válido entre original e duplicata
+
+        Raises:
+            ErroSintese: Se todas as cópias enviadas falharem ou nenhuma responder
+                a tempo; outros erros de uma cópia são repassados como vieram
+        """
+        limite = None
+        if self.duplicacao is not None and len(self.endpoints) > 1:
+            quantil = self.duplicacao.quantil
+            if urgente is not None and urgente(indice):
+                quantil = min(quantil, 0.5)
+            limite = self.latencias.quantil(endpoint.nome, quantil)
+        if limite is None:
+            return self._requisitar_validado(endpoint, texto, voz, prompt, estatisticas)
+
+        respostas: "queue.Queue" = queue.Queue()
+        cancelar = threading.Event()
+        enviada = threading.Event()
+        rastreio = ativo()
+
+        def disparar(destino: Endpoint, enviada: Optional[threading.Event] = None):
+            try:
+                with ativar(rastreio):
+                    pcm = self._requisitar_validado(destino, texto, voz, prompt, estatisticas, cancelar,
+                                                    enviada)
+                respostas.put((destino, pcm, None))
+            except BaseException as e:
+                # Qualquer falha tem que chegar ao chamador, senão ele espera para sempre
+                respostas.put((destino, None, e))
+
+        def aguardar():
+            try:
+                return respostas.get(timeout=ESPERA_MAXIMA_COPIA)
+            except queue.Empty:
+                cancelar.set()
+                raise ErroSintese(f"Nenhuma cópia respondeu em {ESPERA_MAXIMA_COPIA:.0f}s",
+                                  endpoint=endpoint.nome, timeout=True)
+
+        threading.Thread(target=disparar, args=(endpoint, enviada), daemon=True).start()
+        enviadas = 1
+        # O relógio só começa quando a requisição sai (a espera por vaga não conta)
+        while not enviada.wait(0.05) and respostas.empty():
+            pass
+        try:
+            resposta = respostas.get(timeout=limite)
+        except queue.Empty:
+            reserva = self._endpoint_para_duplicata(endpoint)
+            if reserva is not None:
+                with self._lock:
+                    estatisticas.duplicadas += 1
+                print(f"[AGENDADOR] Chunk {indice + 1} passou de {limite:.1f}s em {endpoint.nome}, "
+                      f"duplicando em {reserva.nome}")
+                if rastreio is not None:
+                    rastreio.instante("duplicação", chunk=indice + 1, destino=reserva.nome)
+                threading.Thread(target=disparar, args=(reserva,), daemon=True).start()
+                enviadas = 2
+            resposta = aguardar()
+
+        # Vale a primeira resposta boa; se a primeira falhou, espera a outra
+        destino, pcm, erro = resposta
+        if erro is not None and enviadas == 2:
+            print(f"[AGENDADOR] Chunk {indice + 1}: cópia em {destino.nome} falhou ({erro}), "
+                  f"aguardando a outra")
+            if isinstance(erro, ErroSintese):
+                self._registrar_falha(destino, erro)
+            destino, pcm, erro = aguardar()
+
+        # A perdedora (se ainda estiver baixando) aborta no próximo bloco
+        cancelar.set()
+        if erro is not None:
+            raise erro
+        return pcm
+
+    def _requisitar_validado(self, endpoint: Endpoint, texto: str, voz: str, prompt: str,
+                             estatisticas: EstatisticasJob,
+                             cancelar: Optional[threading.Event] = None,
+                             enviada: Optional[threading.Event] = None) -> bytes:
+        """Requisição + validação do áudio (se houver validador), alimentando o modelo de saúde"""
+        reserva = self._reservar_vaga(endpoint)
+        self.saude.registrar_inicio(endpoint.nome)
+        inicio = time.monotonic()
+        try:
+            pcm = self._requisitar(endpoint, texto, voz, prompt, estatisticas, cancelar, enviada)
+            if self.validador is not None:
+                pcm = self._validar(endpoint, texto, pcm, estatisticas)
+        except ErroSintese as e:
+            if cancelar is not None and cancelar.is_set():
+                self.saude.registrar_cancelamento(endpoint.nome)
+                self._liberar_vaga(endpoint, reserva)
+            else:
+                self.saude.registrar_falha(endpoint.nome, e.status)
+                self._liberar_vaga(endpoint, reserva, sobrecarga=e.sobrecarga)
+            raise
+        except BaseException:
+            self.saude.registrar_cancelamento(endpoint.nome)
+            self._liberar_vaga(endpoint, reserva)
+            raise
+
+        self.saude.registrar_sucesso(endpoint.nome, time.monotonic() - inicio)
+        self._liberar_vaga(endpoint, reserva, sucesso=True)
+        return pcm
+
+    def _reservar_vaga(self, endpoint: Endpoint) -> Optional[float]:
+        """Ocupa uma vaga do limite adaptativo do endpoint (espera se estiver cheio)"""
+        if self.concorrencia is None:
+            return None
+        with trecho("vaga AIMD", "espera", endpoint=endpoint.nome):
+            while True:
+                reserva = self.concorrencia.tentar_adquirir(endpoint.nome)
+                if reserva is not None:
+                    return reserva
+                self.concorrencia.aguardar_vaga(0.5)
+
+    def _liberar_vaga(self, endpoint: Endpoint, reserva: Optional[float],
+                      sobrecarga: bool = False, sucesso: bool = False):
+        if self.concorrencia is not None and reserva is not None:
+            self.concorrencia.liberar(endpoint.nome, reserva, sobrecarga, sucesso)
+
+    def _requisitar(self, endpoint: Endpoint, texto: str, voz: str, prompt: str,
+                    estatisticas: EstatisticasJob,
+                    cancelar: Optional[threading.Event] = None,
+                    enviada: Optional[threading.Event] = None) -> bytes:
+        """
+        Uma requisição à rede, ocupando uma vaga do regulador global (se houver)
+
+        `enviada` é sinalizado quando a requisição sai, depois da espera pelo regulador.
+        """
+        if self.regulador:
+            with trecho("regulador", "espera"):
+                self.regulador.adquirir(estatisticas.job_id, estatisticas.peso)
+        try:
+            with self._lock:
+                estatisticas.requisicoes += 1
+                self._total_requisicoes += 1
+            self.cota.registrar(endpoint.nome)
+            if enviada is not None:
+                enviada.set()
+            inicio = time.monotonic()
+            with trecho("requisição", "rede", endpoint=endpoint.nome, palavras=contar_palavras(texto)):
+                pcm = self.cliente.sintetizar(endpoint, texto, voz, prompt, cancelar)
+        finally:
+            if self.regulador:
+                self.regulador.liberar(estatisticas.job_id)
+
+        if not pcm:
+            raise ErroSintese("Áudio vazio recebido", endpoint=endpoint.nome)
+        self.latencias.registrar(endpoint.nome, time.monotonic() - inicio, contar_palavras(texto))
+        return pcm
+
+    def _validar(self, endpoint: Endpoint, texto: str, pcm: bytes,
+                 estatisticas: EstatisticasJob) -> bytes:
+        """Aplica o validador: devolve o PCM aparado ou lança ErroSintese (recuperável)"""
+        with trecho("validação", "audio", endpoint=endpoint.nome):
+            resultado = self.validador.validar(pcm, texto)
+        if not resultado.valido:
+            with self._lock:
+                estatisticas.rejeitados += 1
+            raise ErroSintese(f"Áudio reprovado: {resultado}", endpoint=endpoint.nome)
+        return resultado.aparar(pcm)
+
+    # ----- Endpoints -----
+
+    def _aguardar_endpoint(self) -> Endpoint:
+        """
+        Retorna o melhor endpoint fora de cooldown (espera se todos estiverem)
+
+        Entre os livres, a escolha é do modelo de saúde (SaudeEndpoints). Com o
+        limite adaptativo ativo, endpoints no limite de requisições em voo também
+        ficam de fora até liberarem uma vaga.
+        """
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                livres = [ep for ep in self.endpoints if self._cooldowns.get(ep.nome, 0) <= agora]
+                if not livres:
+                    espera = min(self._cooldowns.values()) - agora
+
+            if livres and self.concorrencia is not None:
+                com_vaga = [ep for ep in livres if self.concorrencia.tem_vaga(ep.nome)]
+                if not com_vaga:
+                    self.concorrencia.aguardar_vaga(0.5)
+                    continue
+                livres = com_vaga
+
+            if livres:
+                endpoint = self.saude.escolher(livres)
+                if endpoint is not None:
+                    return endpoint
+                # Todos ejetados e com a requisição de teste em andamento: espera o resultado
+                time.sleep(0.2)
+                continue
+
+            print(f"[AGENDADOR] ⏸️ Todos os endpoints em cooldown, aguardando {espera:.0f}s...")
+            time.sleep(max(espera, 0.1))
+
+    def _endpoint_para_duplicata(self, original: Endpoint) -> Optional[Endpoint]:
+        """
+        Outro endpoint saudável e fora de cooldown para receber a duplicata
+
+        Returns:
+            None se não houver endpoint livre ou se o teto de duplicatas foi atingido
+        """
+        with self._lock:
+            teto = self.duplicacao.max_fracao * self._total_requisicoes
+            if self._total_duplicadas + 1 > teto:
+                return None
+
+            agora = time.monotonic()
+            livres = [ep for ep in self.endpoints
+                      if ep is not original and self._cooldowns.get(ep.nome, 0) <= agora
+                      and self.saude.saudavel(ep.nome)
+                      and (self.concorrencia is None or self.concorrencia.tem_vaga(ep.nome))]
+            reserva = self.saude.escolher(livres)
+            if reserva is not None:
+                self._total_duplicadas += 1
+            return reserva
+
+    def _registrar_falha(self, endpoint: Endpoint, erro: ErroSintese):
+        """Coloca o endpoint em cooldown conforme o tipo de erro"""
+        if erro.status == 429:
+            segundos = erro.retry_after or COOLDOWN_429_PADRAO
+        elif erro.status is not None and erro.status >= 500:
+            segundos = erro.retry_after or COOLDOWN_5XX
+        else:
+            return
+        with self._lock:
+            self._cooldowns[endpoint.nome] = time.monotonic() + segundos
+        rastreio = ativo()
+        if rastreio is not None:
+            rastreio.instante(f"cooldown {segundos:.0f}s", "espera", endpoint=endpoint.nome,
+                              status=erro.status)
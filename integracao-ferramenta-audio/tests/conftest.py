@@ -0,0 +1,9 @@
+"""
+Configuração dos testes do pipeline de síntese
+Os módulos ficam soltos na pasta integracao-ferramenta-audio (sem pacote)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
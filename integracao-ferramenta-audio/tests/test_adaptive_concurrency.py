@@ -0,0 +1,52 @@
+import json
+
+from adaptive_concurrency import ControladorAimd
+
+
+def test_sobe_uma_vaga_por_janela_de_sucessos():
+    controlador = ControladorAimd(arquivo_estado=None, limite_inicial=2.0)
+    for _ in range(2):
+        controlador.liberar("A", controlador.tentar_adquirir("A"), sucesso=True)
+    assert controlador.limites()["A"] < 3.0  # 2 + 1/2 + 1/2.5
+    controlador.liberar("A", controlador.tentar_adquirir("A"), sucesso=True)
+    assert 3.0 < controlador.limites()["A"] < 3.5
+
+
+def test_limite_cheio_recusa_reserva():
+    controlador = ControladorAimd(arquivo_estado=None, limite_inicial=2.0)
+    reservas = [controlador.tentar_adquirir("A") for _ in range(2)]
+    assert all(r is not None for r in reservas)
+    assert controlador.tentar_adquirir("A") is None and not controlador.tem_vaga("A")
+    controlador.liberar("A", reservas[0])
+    assert controlador.tem_vaga("A")
+
+
+def test_rajada_de_429_corta_uma_vez_so():
+    controlador = ControladorAimd(arquivo_estado=None, limite_inicial=8.0)
+    reservas = [controlador.tentar_adquirir("A") for _ in range(8)]
+    for reserva in reservas:
+        controlador.liberar("A", reserva, sobrecarga=True)
+    assert controlador.limites()["A"] == 4.0
+
+    # Requisição enviada depois do corte: corta de novo, até o piso
+    for _ in range(5):
+        controlador.liberar("A", controlador.tentar_adquirir("A"), sobrecarga=True)
+    assert controlador.limites()["A"] == controlador.limite_minimo
+
+
+def test_limites_aprendidos_persistem_dentro_da_faixa(tmp_path):
+    arquivo = str(tmp_path / "concorrencia.json")
+    controlador = ControladorAimd(arquivo_estado=arquivo, limite_inicial=4.0)
+    controlador.liberar("A", controlador.tentar_adquirir("A"), sobrecarga=True)
+    controlador.salvar()
+    assert ControladorAimd(arquivo_estado=arquivo).limites() == {"A": 2.0}
+
+    with open(arquivo, "w", encoding="utf-8") as f:
+        json.dump({"limites": {"A": 500, "B": 0}}, f)
+    assert ControladorAimd(arquivo_estado=arquivo, limite_maximo=16.0).limites() == {"A": 16.0, "B": 1.0}
+
+
+def test_estado_ilegivel_usa_limites_iniciais(tmp_path):
+    arquivo = tmp_path / "concorrencia.json"
+    arquivo.write_text("{quebrado", encoding="utf-8")
+    assert ControladorAimd(arquivo_estado=str(arquivo)).limites() == {}
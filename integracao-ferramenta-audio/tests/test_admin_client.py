@@ -0,0 +1,133 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from admin_client import FOLGA_CURSOR, ClienteAdmin, ErroAdmin, _data, faixas_uuid
+
+
+AGORA = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class RespostaFalsa:
+    def __init__(self, status_code, dados):
+        self.status_code = status_code
+        self._dados = dados
+        self.text = str(dados)
+
+    def json(self):
+        return self._dados
+
+
+class ServidorFalso:
+    """get-users com keyset em (updated_at, id) e faixa de ids, como a edge function"""
+
+    def __init__(self):
+        self.perfis = {}
+        self.falhar_na_chamada = None
+        self.chamadas = 0
+
+    def gravar(self, momento, id_perfil=None):
+        id_perfil = id_perfil or str(uuid.uuid4())
+        self.perfis[id_perfil] = {"id": id_perfil, "updated_at": momento.isoformat(), "is_approved": True}
+        return id_perfil
+
+    def post(self, url, json, headers, timeout):
+        self.chamadas += 1
+        if self.falhar_na_chamada == self.chamadas:
+            return RespostaFalsa(403, {"error": "sessão expirada"})
+        apos = json["after"]
+        chave_apos = (_data(apos["updated_at"]), apos["id"]) if apos else None
+        perfis = sorted(
+            (p for p in self.perfis.values()
+             if (json["id_min"] is None or p["id"] >= json["id_min"])
+             and (json["id_max"] is None or p["id"] < json["id_max"])
+             and (chave_apos is None or (_data(p["updated_at"]), p["id"]) > chave_apos)),
+            key=lambda p: (_data(p["updated_at"]), p["id"]))
+        pagina = perfis[:json["limit"]]
+        return RespostaFalsa(200, {"users": [dict(p) for p in pagina],
+                                   "next_cursor": len(perfis) > json["limit"] or None})
+
+
+class AuthFalso:
+    def url_funcao(self, funcao):
+        return f"http://admin/{funcao}"
+
+    def cabecalhos(self):
+        return {}
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorFalso()
+    for i in range(60):
+        servidor.gravar(AGORA - timedelta(hours=60 - i))
+    return servidor
+
+
+def _cliente(servidor, tmp_path):
+    return ClienteAdmin(AuthFalso(), pasta_cache=str(tmp_path), tamanho_pagina=7, faixas=3,
+                        sessao=servidor)
+
+
+def test_faixas_cobrem_todo_o_espaco_de_ids():
+    faixas = faixas_uuid(4)
+    assert faixas[0][0] is None and faixas[-1][1] is None
+    assert all(fim == inicio for (_, fim), (inicio, _) in zip(faixas, faixas[1:]))
+
+
+def test_recuar_volta_a_folga_e_comeca_do_menor_id():
+    assert ClienteAdmin._recuar(None) is None
+    cursor = {"updated_at": AGORA.isoformat(), "id": "ffffffff-0000-0000-0000-000000000000"}
+    recuado = ClienteAdmin._recuar(cursor)
+    assert _data(recuado["updated_at"]) == AGORA - FOLGA_CURSOR
+    assert recuado["id"] == "00000000-0000-0000-0000-000000000000"
+
+
+def test_cursor_so_avanca():
+    antes = {"updated_at": AGORA.isoformat(), "id": "b"}
+    depois = {"updated_at": (AGORA + timedelta(seconds=1)).isoformat(), "id": "a"}
+    assert ClienteAdmin._depois(depois, antes)
+    assert not ClienteAdmin._depois(antes, depois)
+    assert ClienteAdmin._depois(antes, None)
+
+
+def test_sincronizacao_incremental_so_baixa_o_que_mudou(servidor, tmp_path):
+    cliente = _cliente(servidor, tmp_path)
+    primeira = cliente.sincronizar()
+    assert primeira["novos"] == primeira["total"] == 60
+
+    alterado = next(iter(servidor.perfis))
+    servidor.gravar(AGORA, alterado)
+    novo = servidor.gravar(AGORA + timedelta(seconds=1))
+
+    cliente = _cliente(servidor, tmp_path)
+    segunda = cliente.sincronizar()
+    assert (segunda["novos"], segunda["alterados"], segunda["total"]) == (1, 1, 61)
+    # Só a folga é repetida, não o cadastro inteiro
+    assert segunda["recebidos"] < 10
+    assert novo in {u["id"] for u in cliente.usuarios()}
+
+
+def test_folga_pega_transacao_confirmada_depois_do_cursor(servidor, tmp_path):
+    cliente = _cliente(servidor, tmp_path)
+    cliente.sincronizar()
+    ultimo = max(_data(p["updated_at"]) for p in servidor.perfis.values())
+
+    # updated_at gravado antes do cursor, mas visível só depois da sincronização
+    atrasado = servidor.gravar(ultimo - FOLGA_CURSOR / 2)
+    contagem = cliente.sincronizar()
+    assert contagem["novos"] == 1
+    assert atrasado in {u["id"] for u in cliente.usuarios()}
+
+
+def test_sincronizacao_interrompida_continua_de_onde_parou(servidor, tmp_path):
+    servidor.falhar_na_chamada = 5
+    with pytest.raises(ErroAdmin, match="403"):
+        _cliente(servidor, tmp_path).sincronizar()
+
+    servidor.falhar_na_chamada = None
+    servidor.chamadas = 0
+    contagem = _cliente(servidor, tmp_path).sincronizar()
+    assert contagem["total"] == 60
+    assert contagem["novos"] < 60
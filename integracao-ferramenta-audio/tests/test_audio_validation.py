@@ -0,0 +1,50 @@
+import numpy as np
+
+from audio_validation import ConfigValidacao, validar_chunk
+from tts_client import TAXA_AMOSTRAGEM
+
+
+TEXTO = " ".join(["palavra"] * 25)  # ~10s a 150 palavras por minuto
+
+
+def _pcm(*trechos):
+    """Concatena trechos (segundos, amplitude) de senoide 220 Hz; amplitude 0 = silêncio"""
+    partes = []
+    for segundos, amplitude in trechos:
+        t = np.arange(int(segundos * TAXA_AMOSTRAGEM)) / TAXA_AMOSTRAGEM
+        partes.append(amplitude * np.sin(2 * np.pi * 220 * t))
+    return np.concatenate(partes).astype("<i2").tobytes()
+
+
+def test_fala_normal_e_aprovada_e_aparada():
+    pcm = _pcm((1.0, 0), (9.0, 8000), (2.0, 0))
+    resultado = validar_chunk(pcm, TEXTO)
+    assert resultado.valido, str(resultado)
+    assert abs(resultado.silencio_inicio - 1.0) < 0.05
+    aparado = resultado.aparar(pcm)
+    margem = ConfigValidacao().margem_bordas
+    assert abs(len(aparado) / 2 / TAXA_AMOSTRAGEM - (9.0 + 2 * margem)) < 0.05
+
+
+def test_silencio_longo_no_meio_reprova():
+    resultado = validar_chunk(_pcm((4.0, 8000), (5.0, 0), (4.0, 8000)), TEXTO)
+    assert not resultado.valido
+    assert "silêncio de 5.0s" in str(resultado)
+
+
+def test_chunk_curto_demais_e_truncado():
+    resultado = validar_chunk(_pcm((2.0, 8000)), TEXTO)
+    assert any("truncado" in p for p in resultado.problemas)
+
+
+def test_silencio_total_e_vazio():
+    assert "silêncio" in str(validar_chunk(_pcm((3.0, 0)), TEXTO))
+    assert str(validar_chunk(b"", TEXTO)) == "áudio vazio"
+
+
+def test_clipping_e_offset_dc():
+    amostras = np.full(10 * TAXA_AMOSTRAGEM, 2000, dtype="<i2")
+    amostras[::100] = 32767
+    problemas = validar_chunk(amostras.tobytes(), TEXTO).problemas
+    assert any("offset DC" in p for p in problemas)
+    assert any("clipping" in p for p in problemas)
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+import batch_queue
+from batch_queue import STATUS_ERRO, STATUS_PENDENTE, FilaLotes
+from synthesis_scheduler import AgendadorSintese
+from tts_client import Endpoint
+
+
+@pytest.fixture
+def fila(tmp_path, monkeypatch):
+    # O diário de cada job vai para jobs_sintese/ na pasta atual
+    monkeypatch.chdir(tmp_path)
+    execucoes = []
+
+    def job_que_falha(agendador, diario, *args, **kwargs):
+        execucoes.append(diario.pasta)
+        raise RuntimeError("roteiro com problema")
+
+    monkeypatch.setattr(batch_queue, "executar_job", job_que_falha)
+    fila = FilaLotes(AgendadorSintese([Endpoint("w", "http://x")]),
+                     pasta_estado=str(tmp_path / "estado"), pasta_saida=str(tmp_path / "saida"),
+                     legendas=False)
+    fila.execucoes = execucoes
+    return fila
+
+
+def _escrever_roteiro(pasta, nome="roteiro.txt", texto="Um roteiro curto de teste. " * 20):
+    pasta.mkdir(exist_ok=True)
+    (pasta / nome).write_text(texto, encoding="utf-8")
+
+
+def test_vigiar_pasta_nao_readiciona_job_que_falhou(fila, tmp_path):
+    entrada = tmp_path / "entrada"
+    _escrever_roteiro(entrada)
+    fila.vigiar_pasta(str(entrada), intervalo=0.05)
+    thread = threading.Thread(target=fila.executar, daemon=True)
+    thread.start()
+    time.sleep(0.6)
+    fila.parar()
+    thread.join(5)
+
+    assert [j["status"] for j in fila.jobs] == [STATUS_ERRO]
+    assert len(fila.execucoes) == 1
+
+
+def test_roteiro_editado_entra_como_job_novo(fila, tmp_path):
+    entrada = tmp_path / "entrada"
+    _escrever_roteiro(entrada)
+    assert fila.ingerir_pasta(str(entrada)) == 1
+    assert fila.ingerir_pasta(str(entrada)) == 0
+    _escrever_roteiro(entrada, texto="Versão corrigida do roteiro. " * 20)
+    assert fila.ingerir_pasta(str(entrada)) == 1
+
+
+def test_repetir_erros_retoma_pelo_mesmo_diario(fila, tmp_path):
+    entrada = tmp_path / "entrada"
+    _escrever_roteiro(entrada)
+    fila.ingerir_pasta(str(entrada))
+    fila.executar()
+    assert fila.jobs[0]["status"] == STATUS_ERRO
+
+    assert fila.repetir_erros() == 1
+    assert fila.jobs[0]["status"] == STATUS_PENDENTE and fila.jobs[0]["erro"] is None
+    assert fila.repetir_erros() == 0
+
+    fila.executar()
+    assert fila.jobs[0]["status"] == STATUS_ERRO
+    assert len(fila.execucoes) == 2 and fila.execucoes[0] == fila.execucoes[1]
+
+
+def test_diario_e_fechado_mesmo_quando_o_job_falha(fila, tmp_path, monkeypatch):
+    diarios = []
+    original = fila._obter_diario
+
+    def obter_e_guardar(entrada):
+        diario = original(entrada)
+        diarios.append(diario)
+        return diario
+
+    monkeypatch.setattr(fila, "_obter_diario", obter_e_guardar)
+    entrada = tmp_path / "entrada"
+    _escrever_roteiro(entrada)
+    fila.ingerir_pasta(str(entrada))
+    fila.executar()
+
+    assert fila.jobs[0]["status"] == STATUS_ERRO
+    assert diarios and diarios[0].chunks._arquivo.closed
@@ -0,0 +1,64 @@
+from chunk_sizing import LIMITES_PADRAO, planejar_chunks, dividir_planejado
+from synthesis_scheduler import AgendadorSintese
+from text_chunker import GEMINI_TTS_WORD_LIMIT, contar_palavras
+from tts_client import Endpoint
+
+
+def _workers(n=2, max_paralelo=4):
+    return AgendadorSintese([Endpoint(f"w{i}", f"http://w{i}") for i in range(n)],
+                            max_paralelo=max_paralelo)
+
+
+def _gemini(n=2):
+    return AgendadorSintese([Endpoint(f"g{i}", "http://g", tipo=Endpoint.TIPO_GEMINI, chave="k")
+                             for i in range(n)])
+
+
+def _medir(agendador, fixo, por_palavra):
+    for ep in agendador.endpoints:
+        for palavras in (100, 200, 300, 400):
+            agendador.latencias.registrar(ep.nome, fixo + por_palavra * palavras, palavras)
+
+
+def test_sem_medicoes_usa_o_modelo_padrao():
+    plano = planejar_chunks(3000, _workers())
+    assert LIMITES_PADRAO[Endpoint.TIPO_WORKER].min_palavras <= plano.palavras_por_chunk <= GEMINI_TTS_WORD_LIMIT
+    assert "estimado" in plano.motivo and plano.paralelismo == 4
+
+
+def test_custo_fixo_alto_prefere_chunks_grandes():
+    agendador = _workers()
+    _medir(agendador, fixo=10.0, por_palavra=0.001)
+    plano = planejar_chunks(3000, agendador)
+    assert plano.palavras_por_chunk == GEMINI_TTS_WORD_LIMIT and "medido" in plano.motivo
+
+
+def test_custo_por_palavra_dominante_aproveita_o_paralelismo():
+    agendador = _workers()
+    _medir(agendador, fixo=0.0, por_palavra=0.05)
+    plano = planejar_chunks(3000, agendador)
+    # 450 palavras = 7 chunks em 2 rodadas; menores fecham as mesmas 2 rodadas mais rápido
+    assert plano.palavras_por_chunk < GEMINI_TTS_WORD_LIMIT
+    assert plano.tempo_previsto < plano.prever(7, GEMINI_TTS_WORD_LIMIT)
+
+
+def test_cota_diaria_limita_o_numero_de_chunks():
+    agendador = _gemini()
+    for ep in agendador.endpoints:
+        for _ in range(12):
+            agendador.cota.registrar(ep.nome)
+    plano = planejar_chunks(2000, agendador)
+    assert plano.total_chunks <= 6 and "6 requisições restantes" in plano.motivo
+
+    for ep in agendador.endpoints:
+        for _ in range(2):
+            agendador.cota.registrar(ep.nome)
+    plano = planejar_chunks(2000, agendador)
+    assert plano.palavras_por_chunk == GEMINI_TTS_WORD_LIMIT and "insuficiente" in plano.motivo
+
+
+def test_dividir_planejado_corrige_a_contagem_real():
+    texto = " ".join(f"Frase número {i} do roteiro de teste." for i in range(400))
+    chunks, plano = dividir_planejado(texto, _workers())
+    assert plano.total_chunks == len(chunks)
+    assert all(contar_palavras(c) <= plano.palavras_por_chunk for c in chunks)
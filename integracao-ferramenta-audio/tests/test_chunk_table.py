@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from chunk_table import TabelaChunks, TextosChunks
+from progress_bus import FALHOU, PENDENTE, PRONTO, REPETINDO, SINTETIZANDO
+
+
+def test_estados_e_varreduras():
+    tabela = TabelaChunks(6)
+    assert tabela.contar()[PENDENTE] == 6
+
+    tabela.marcar(1, SINTETIZANDO)
+    tabela.marcar(4, FALHOU)
+    tabela.registrar_pcm(2, 100, 50, bytes(range(32)))
+    tabela.registrar_pcm(5, 0, 100, bytes(32))
+
+    assert tabela.indices(PRONTO).tolist() == [2, 5]
+    assert tabela.indices(PENDENTE, FALHOU).tolist() == [0, 3, 4]
+    assert tabela.indices_exceto(PRONTO).tolist() == [0, 1, 3, 4]
+    assert tabela.contar() == {PENDENTE: 2, SINTETIZANDO: 1, REPETINDO: 0, PRONTO: 2, FALHOU: 1}
+    assert tabela.esta_em(4, FALHOU, PENDENTE)
+
+    registro = tabela[2]
+    assert (registro.estado, registro.offset_pcm, registro.tamanho_pcm) == (PRONTO, 100, 50)
+    assert registro.sha256 == bytes(range(32))
+    assert tabela[-1].tamanho_pcm == 100
+
+
+def test_tentativas_e_reinicio():
+    tabela = TabelaChunks(3)
+    tabela.registrar_tentativa(0, 1)
+    assert tabela[0].estado == PENDENTE and tabela[0].tentativas == 1
+    tabela.registrar_tentativa(0, 2)
+    assert tabela[0].estado == REPETINDO
+    tabela.registrar_tentativa(1, 1000)
+    assert tabela[1].tentativas == 255
+
+    tabela.duracao[0] = 3.5
+    tabela.reiniciar([0, 1])
+    assert tabela[0].estado == PENDENTE and tabela[0].tentativas == 0 and tabela[0].duracao == 0
+
+
+def test_indice_fora_da_tabela():
+    with pytest.raises(IndexError):
+        TabelaChunks(2)[2]
+    with pytest.raises(IndexError):
+        TabelaChunks(2)[-3]
+
+
+def test_textos_por_offset(tmp_path):
+    textos = ["Primeiro.", "", "Acentuação: ção, é, ü — e emoji 🎙️", "Último chunk."]
+    tabela = TabelaChunks(len(textos))
+    caminho = str(tmp_path / "textos.txt")
+    TextosChunks.gravar(caminho, textos, tabela)
+
+    lidos = TextosChunks(caminho, tabela)
+    try:
+        assert len(lidos) == 4
+        assert list(lidos) == textos
+        assert lidos[2] == textos[2]
+        assert lidos[1:3] == textos[1:3]
+    finally:
+        lidos.fechar()
+
+    # Reabrindo só com os tamanhos (como o diário faz)
+    reconstruida = TabelaChunks(len(textos))
+    TextosChunks.preencher_offsets(reconstruida, tabela.tamanho_texto.tolist())
+    assert np.array_equal(reconstruida.offset_texto, tabela.offset_texto)
+
+
+def test_arquivo_de_textos_vazio(tmp_path):
+    tabela = TabelaChunks(2)
+    caminho = str(tmp_path / "textos.txt")
+    TextosChunks.gravar(caminho, ["", ""], tabela)
+    lidos = TextosChunks(caminho, tabela)
+    try:
+        assert list(lidos) == ["", ""]
+    finally:
+        lidos.fechar()
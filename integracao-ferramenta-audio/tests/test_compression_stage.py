@@ -0,0 +1,86 @@
+import os
+import stat
+import struct
+
+import pytest
+
+from compression_stage import Codificador, CodificadorMulawWav, EstagioCompressao, dividir_quadros_mp3
+from synthesis_cache import MODO_ARQUIVO
+
+
+def _quadro(versao=3, bitrate=9, taxa=0, preenchimento=0, tamanho=None):
+    """Quadro Layer III com cabeçalho montado à mão e corpo zerado"""
+    cabecalho = ((0x7FF << 21) | (versao << 19) | (0x1 << 17) | (1 << 16)
+                 | (bitrate << 12) | (taxa << 10) | (preenchimento << 9))
+    if tamanho is None:
+        tamanho = 4
+    return struct.pack(">I", cabecalho) + bytes(tamanho - 4)
+
+
+def test_quadros_mpeg1():
+    # 128 kbps, 44,1 kHz: 144 * 128000 // 44100 = 417 bytes (+1 com preenchimento)
+    dados = _quadro(tamanho=417) + _quadro(preenchimento=1, tamanho=418) + _quadro(tamanho=417)
+    quadros, amostras = dividir_quadros_mp3(dados)
+    assert [len(q) for q in quadros] == [417, 418, 417]
+    assert amostras == 1152
+    assert b"".join(quadros) == dados
+
+
+def test_quadros_mpeg2():
+    # 64 kbps, 22,05 kHz: 72 * 64000 // 22050 = 208 bytes
+    quadros, amostras = dividir_quadros_mp3(_quadro(versao=2, bitrate=8, tamanho=208) * 2)
+    assert [len(q) for q in quadros] == [208, 208]
+    assert amostras == 576
+
+
+def test_vazio():
+    assert dividir_quadros_mp3(b"") == ([], 0)
+
+
+@pytest.mark.parametrize("dados,mensagem", [
+    (_quadro(bitrate=0), "livre"),
+    (_quadro(bitrate=15), "reservado"),
+    (_quadro(taxa=3), "Taxa de amostragem reservada"),
+    (_quadro(versao=1), "Versão MPEG reservada"),
+    (_quadro(tamanho=417)[:300], "cortado"),
+    (b"ID3\x04" + bytes(100), "inválido"),
+])
+def test_cabecalhos_invalidos_levantam_value_error(dados, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        dividir_quadros_mp3(dados)
+
+
+def test_codificador_e_abstrato():
+    with pytest.raises(TypeError):
+        Codificador()
+
+    class SoCodificar(Codificador):
+        def codificar(self, pcm, amostras_antes, amostras_segmento, ultimo):
+            return pcm
+
+    with pytest.raises(TypeError):
+        SoCodificar()
+
+
+def _pcm(amostras):
+    return b"\x10\x00" * amostras
+
+
+def test_arquivo_final_segue_a_umask(tmp_path):
+    estagio = EstagioCompressao(str(tmp_path / "saida.wav"), codificador=CodificadorMulawWav(),
+                                max_processos=1, amostras_por_segmento=4800)
+    estagio.adicionar_chunk(1, _pcm(3000))
+    estagio.adicionar_chunk(0, _pcm(7000))
+    destino = estagio.finalizar(2)
+    assert stat.S_IMODE(os.stat(destino).st_mode) == MODO_ARQUIVO
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith(".tmp")]
+
+
+def test_chunks_depois_de_cancelar_sao_ignorados(tmp_path):
+    estagio = EstagioCompressao(str(tmp_path / "saida.wav"), codificador=CodificadorMulawWav(),
+                                max_processos=1, amostras_por_segmento=4800)
+    estagio.adicionar_chunk(0, _pcm(6000))
+    estagio.cancelar()
+    # Threads de síntese ainda entregando chunks depois da falha do job
+    estagio.adicionar_chunk(1, _pcm(6000))
+    estagio.adicionar_chunk(2, _pcm(6000))
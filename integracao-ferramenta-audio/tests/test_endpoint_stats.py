@@ -0,0 +1,105 @@
+import time
+
+from endpoint_stats import HistoricoLatencias, SaudeEndpoints
+from tts_client import Endpoint
+
+
+A = Endpoint("A", "http://a")
+B = Endpoint("B", "http://b")
+
+
+def _ejetar(saude, nome):
+    for _ in range(saude.falhas_para_ejetar):
+        saude.registrar_inicio(nome)
+        saude.registrar_falha(nome, 500)
+
+
+def _vencer_ejecao(saude, nome):
+    saude._estado[nome]["ejetado_ate"] = time.monotonic() - 1
+
+
+def _estado(saude, nome):
+    return next(linha["estado"] for linha in saude.instantaneo() if linha["nome"] == nome)
+
+
+# ----- HistoricoLatencias -----
+
+def test_quantil_usa_o_geral_ate_ter_amostras_proprias():
+    historico = HistoricoLatencias(min_amostras=4)
+    assert historico.quantil("A", 0.5) is None
+    for segundos in (1.0, 2.0, 3.0, 4.0):
+        historico.registrar("A", segundos)
+    assert historico.quantil("B", 0.5) == 3.0
+    assert historico.quantil("A", 0.95) == 4.0
+
+
+# ----- SaudeEndpoints -----
+
+def test_prefere_o_endpoint_mais_rapido():
+    saude = SaudeEndpoints()
+    for nome, segundos in (("A", 5.0), ("B", 1.0)):
+        saude.registrar_inicio(nome)
+        saude.registrar_sucesso(nome, segundos)
+    assert [saude.escolher([A, B]).nome for _ in range(4)] == ["B"] * 4
+
+
+def test_ejetado_nao_recebe_requisicoes():
+    saude = SaudeEndpoints()
+    _ejetar(saude, "A")
+    assert _estado(saude, "A") == SaudeEndpoints.EJETADO
+    assert {saude.escolher([A, B]).nome for _ in range(5)} == {"B"}
+
+
+def test_half_open_reserva_um_unico_teste_antes_do_envio():
+    saude = SaudeEndpoints()
+    for nome, segundos in (("A", 1.0), ("B", 50.0)):  # B bem pior: A em teste venceria sempre
+        saude.registrar_inicio(nome)
+        saude.registrar_sucesso(nome, segundos)
+    _ejetar(saude, "A")
+    _vencer_ejecao(saude, "A")
+
+    assert saude.escolher([A, B]) is A
+    # A requisição de teste ainda não saiu (sem registrar_inicio): A não pode ser escolhido de novo
+    assert [saude.escolher([A, B]).nome for _ in range(3)] == ["B"] * 3
+
+    saude.registrar_inicio("A")
+    saude.registrar_sucesso("A", 1.0)
+    assert _estado(saude, "A") == SaudeEndpoints.OK
+    assert saude.escolher([A, B]) is A
+
+
+def test_teste_que_falha_ejeta_de_novo_por_mais_tempo():
+    saude = SaudeEndpoints(ejecao_inicial=10.0)
+    _ejetar(saude, "A")
+    _vencer_ejecao(saude, "A")
+    assert saude.escolher([A]) is A
+    saude.registrar_inicio("A")
+    saude.registrar_falha("A", None)
+    assert _estado(saude, "A") == SaudeEndpoints.EJETADO
+    assert saude._estado["A"]["ejecao"] == 20.0
+
+
+def test_teste_cancelado_libera_a_reserva():
+    saude = SaudeEndpoints()
+    _ejetar(saude, "A")
+    _vencer_ejecao(saude, "A")
+    assert saude.escolher([A]) is A
+    saude.registrar_inicio("A")
+    saude.registrar_cancelamento("A")
+    assert saude.escolher([A]) is A
+
+
+def test_todos_ejetados_um_teste_por_vez():
+    saude = SaudeEndpoints()
+    _ejetar(saude, "A")
+    _ejetar(saude, "B")
+    primeiro = saude.escolher([A, B])
+    assert primeiro is not None and _estado(saude, primeiro.nome) == SaudeEndpoints.EM_TESTE
+    segundo = saude.escolher([A, B])
+    assert segundo is not None and segundo is not primeiro
+    # Os dois com teste reservado: nada a devolver até um deles terminar
+    assert saude.escolher([A, B]) is None
+
+    saude.registrar_inicio(primeiro.nome)
+    saude.registrar_sucesso(primeiro.nome, 1.0)
+    assert saude.escolher([A, B]) is primeiro
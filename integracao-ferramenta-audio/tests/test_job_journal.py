@@ -0,0 +1,131 @@
+import os
+import time
+
+import pytest
+
+from job_journal import (ARQUIVO_AUDIO, ARQUIVO_DIARIO, IDADE_MAXIMA_CONCLUIDO, DiarioJob,
+                         listar_jobs_inacabados)
+
+
+CHUNKS = ["Primeiro chunk.", "Segundo chunk com acentuação.", "Terceiro chunk."]
+
+
+@pytest.fixture
+def diario(tmp_path):
+    diario = DiarioJob.criar(CHUNKS, "Kore", "", str(tmp_path / "saida.wav"), pasta_base=str(tmp_path))
+    yield diario
+    diario.fechar()
+
+
+def _reabrir(diario):
+    diario.fechar()
+    return DiarioJob.abrir(diario.pasta)
+
+
+def test_reabrir_reproduz_o_diario(diario):
+    diario.registrar_chunk(2, b"\x01\x00" * 100)
+    diario.registrar_chunk(0, b"\x02\x00" * 50)
+    reaberto = _reabrir(diario)
+    try:
+        assert list(reaberto.chunks) == CHUNKS
+        assert reaberto.prontos() == [0, 2]
+        assert reaberto.chunks_faltando() == [1]
+        assert reaberto.ler_chunk(2) == b"\x01\x00" * 100
+        assert reaberto.ler_chunk(0) == b"\x02\x00" * 50
+    finally:
+        reaberto.fechar()
+
+
+def test_linha_cortada_no_fim_e_descartada(diario):
+    diario.registrar_chunk(0, b"\x01\x00" * 10)
+    caminho = os.path.join(diario.pasta, ARQUIVO_DIARIO)
+    tamanho_valido = os.path.getsize(caminho)
+    with open(caminho, "ab") as f:
+        f.write(b'{"tipo": "chunk", "indice": 1, "off')
+
+    reaberto = _reabrir(diario)
+    try:
+        assert reaberto.prontos() == [0]
+        assert os.path.getsize(caminho) == tamanho_valido
+        # Registros novos continuam em linhas válidas
+        reaberto.registrar_chunk(1, b"\x03\x00" * 10)
+    finally:
+        reaberto.fechar()
+
+    de_novo = DiarioJob.abrir(diario.pasta)
+    try:
+        assert de_novo.prontos() == [0, 1]
+        assert de_novo.ler_chunk(1) == b"\x03\x00" * 10
+    finally:
+        de_novo.fechar()
+
+
+def test_pcm_orfao_e_truncado(diario):
+    diario.registrar_chunk(1, b"\x05\x00" * 20)
+    caminho = os.path.join(diario.pasta, ARQUIVO_AUDIO)
+    # Processo morreu depois de gravar o PCM e antes de registrar no diário
+    with open(caminho, "ab") as f:
+        f.write(b"\xff" * 999)
+
+    reaberto = _reabrir(diario)
+    try:
+        assert os.path.getsize(caminho) == 40
+        reaberto.registrar_chunk(0, b"\x06\x00" * 8)
+        assert reaberto.ler_chunk(0) == b"\x06\x00" * 8
+        assert reaberto.ler_chunk(1) == b"\x05\x00" * 20
+    finally:
+        reaberto.fechar()
+
+
+def test_chunk_corrompido_volta_para_faltando(diario):
+    diario.registrar_chunk(0, b"\x01\x00" * 10)
+    diario.registrar_chunk(1, b"\x02\x00" * 10)
+    with open(os.path.join(diario.pasta, ARQUIVO_AUDIO), "r+b") as f:
+        f.write(b"\x00\x00")
+    assert diario.verificar() == [0]
+    assert diario.chunks_faltando() == [0, 2]
+
+
+def test_diario_sem_plano(tmp_path):
+    pasta = tmp_path / "job"
+    pasta.mkdir()
+    (pasta / ARQUIVO_DIARIO).write_bytes(b'{"tipo": "concl')
+    with pytest.raises(ValueError, match="sem plano"):
+        DiarioJob.abrir(str(pasta))
+
+
+def test_finalizar_exige_todos_os_chunks(diario):
+    diario.registrar_chunk(0, b"\x01\x00" * 10)
+    with pytest.raises(ValueError, match="incompleto"):
+        diario.finalizar()
+
+
+def test_finalizar_apaga_o_pcm_e_o_job_sai_da_lista(diario, tmp_path):
+    for indice in range(len(CHUNKS)):
+        diario.registrar_chunk(indice, b"\x01\x00" * 100)
+    assert diario.finalizar() > 0
+    assert not os.path.exists(os.path.join(diario.pasta, ARQUIVO_AUDIO))
+    assert os.path.exists(os.path.join(diario.pasta, ARQUIVO_DIARIO))
+
+    assert listar_jobs_inacabados(str(tmp_path)) == []
+    reaberto = DiarioJob.abrir(diario.pasta)
+    try:
+        assert reaberto.concluido and list(reaberto.chunks) == CHUNKS
+        # Refazer um job concluído (ex: a compressão falhou depois) sintetiza tudo de novo
+        assert reaberto.verificar() == [0, 1, 2]
+        reaberto.registrar_chunk(1, b"\x07\x00" * 5)
+        assert reaberto.ler_chunk(1) == b"\x07\x00" * 5
+    finally:
+        reaberto.fechar()
+
+
+def test_jobs_concluidos_antigos_sao_apagados(diario, tmp_path):
+    for indice in range(len(CHUNKS)):
+        diario.registrar_chunk(indice, b"\x01\x00" * 10)
+    diario.finalizar()
+    diario.fechar()
+    antigo = time.time() - IDADE_MAXIMA_CONCLUIDO - 60
+    os.utime(os.path.join(diario.pasta, ARQUIVO_DIARIO), (antigo, antigo))
+
+    assert listar_jobs_inacabados(str(tmp_path)) == []
+    assert not os.path.exists(diario.pasta)
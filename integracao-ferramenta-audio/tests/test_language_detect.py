@@ -0,0 +1,48 @@
+import shutil
+
+import pytest
+
+from language_detect import (ARQUIVO_AMOSTRAS, CIRILICA, HAN, KANA, NENHUMA, DetectorIdioma,
+                             RoteadorIdiomas, escrita_dominante)
+
+
+PT = "O narrador caminhou pela estrada de terra até a casa da avó, onde o café já estava pronto."
+EN = "The old lighthouse keeper climbed the stairs every night, even when the storm was howling outside."
+ES = "Cuando llegamos al pueblo, las campanas de la iglesia ya estaban sonando y todos corrían."
+
+
+@pytest.fixture(scope="module")
+def detector(tmp_path_factory):
+    pasta = tmp_path_factory.mktemp("idiomas")
+    amostras = str(pasta / "amostras.txt")
+    shutil.copy(ARQUIVO_AMOSTRAS, amostras)
+    return DetectorIdioma(arquivo_indice=str(pasta / "indice.npy"), arquivo_amostras=amostras)
+
+
+def test_escrita_dominante():
+    assert escrita_dominante("Привет, как дела?") == CIRILICA
+    assert escrita_dominante("今日はいい天気ですね") == KANA
+    assert escrita_dominante("今天天气很好") == HAN
+    assert escrita_dominante("123 — !!!") == NENHUMA
+
+
+def test_detecta_idiomas_latinos(detector):
+    assert [detector.detectar(t).idioma for t in (PT, EN, ES)] == ["pt", "en", "es"]
+    assert detector.detectar("12345").idioma is None
+
+
+def test_indice_gravado_e_reaberto_com_mmap(detector):
+    detector.detectar(PT)
+    reaberto = DetectorIdioma(arquivo_indice=detector.arquivo_indice,
+                              arquivo_amostras=detector.arquivo_amostras)
+    assert reaberto.detectar(EN).idioma == "en"
+    assert reaberto.idiomas == detector.idiomas
+    assert hasattr(reaberto._tabela, "filename")  # np.memmap
+
+
+def test_roteador_troca_so_a_voz_dos_chunks_em_outro_idioma(detector):
+    chunks = [PT, PT + " " + PT, EN, "Ok.", PT]
+    rotas = RoteadorIdiomas(vozes={"en": "Puck"}, detector_idioma=detector).rotear(chunks, "Kore", "Calmo")
+    assert list(rotas) == [2]
+    voz, prompt = rotas[2]
+    assert voz == "Puck" and prompt.startswith("Calmo") and "English" in prompt
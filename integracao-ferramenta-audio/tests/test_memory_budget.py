@@ -0,0 +1,41 @@
+from memory_budget import BufferReordenacao, OrcamentoMemoria, estimar_bytes_pcm
+
+
+def test_orcamento_recusa_sem_folga_salvo_forcado():
+    orcamento = OrcamentoMemoria(limite_mb=1)
+    assert orcamento.tentar_reservar(800 * 1024)
+    assert not orcamento.tentar_reservar(400 * 1024)
+    assert orcamento.tentar_reservar(400 * 1024, forcar=True)
+    assert orcamento.pico == 1200 * 1024
+    orcamento.liberar(1200 * 1024)
+    assert orcamento.ocupado == 0
+
+
+def test_buffer_derrama_no_disco_e_devolve_os_mesmos_bytes():
+    orcamento = OrcamentoMemoria(limite_mb=1)
+    buffer = BufferReordenacao(orcamento, fracao=0.5)
+    itens = {i: bytes([i]) * 200 * 1024 for i in range(5)}
+    for indice, dados in itens.items():
+        buffer.guardar(indice, dados)
+
+    assert buffer.bytes_em_memoria <= buffer.limite
+    assert buffer.derramados == 3 and len(buffer) == 5
+    assert orcamento.ocupado == buffer.bytes_em_memoria
+
+    for indice in (4, 0, 2, 1, 3):
+        assert buffer.retirar(indice) == itens[indice]
+    assert len(buffer) == 0 and orcamento.ocupado == 0
+    buffer.fechar()
+
+
+def test_fechar_devolve_o_que_sobrou_ao_orcamento():
+    orcamento = OrcamentoMemoria(limite_mb=1)
+    buffer = BufferReordenacao(orcamento)
+    buffer.guardar(0, b"x" * 1000)
+    buffer.fechar()
+    assert orcamento.ocupado == 0 and 0 not in buffer
+
+
+def test_estimativa_cresce_com_as_palavras():
+    assert estimar_bytes_pcm("") == 0
+    assert estimar_bytes_pcm("uma duas três quatro") == 2 * estimar_bytes_pcm("uma duas")
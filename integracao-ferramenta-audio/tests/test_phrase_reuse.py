@@ -0,0 +1,72 @@
+import json
+import os
+
+import phrase_reuse
+from phrase_reuse import ArmazemFrases, dividir_com_frases
+
+
+VINHETA = "Presta atenção nessa história que eu vou contar."
+
+
+def _roteiro(n):
+    return f"{VINHETA} O episódio número {n} começa aqui hoje mesmo."
+
+
+def test_frase_depois_de_dois_roteiros(tmp_path):
+    armazem = ArmazemFrases(str(tmp_path))
+    assert armazem.registrar_roteiro(_roteiro(1), "Kore", "") == set()
+    # O mesmo roteiro de novo não conta duas vezes
+    assert armazem.registrar_roteiro(_roteiro(1), "Kore", "") == set()
+    assert armazem.registrar_roteiro(_roteiro(2), "Kore", "") == {VINHETA}
+    assert armazem.e_frase(VINHETA, "Kore", "")
+    assert not armazem.e_frase(VINHETA, "Puck", "")
+
+
+def test_frase_vira_chunk_proprio(tmp_path):
+    armazem = ArmazemFrases(str(tmp_path))
+    dividir_com_frases(_roteiro(1), armazem, "Kore")
+    chunks, emendas = dividir_com_frases(_roteiro(2), armazem, "Kore")
+    assert chunks[0] == VINHETA
+    assert emendas == [1]
+
+
+def test_contagens_sobrevivem_ao_reinicio(tmp_path):
+    armazem = ArmazemFrases(str(tmp_path))
+    armazem.registrar_roteiro(_roteiro(1), "Kore", "")
+    assert os.path.exists(tmp_path / ArmazemFrases.ARQUIVO_LOG)
+
+    reaberto = ArmazemFrases(str(tmp_path))
+    assert reaberto.registrar_roteiro(_roteiro(2), "Kore", "") == {VINHETA}
+
+
+def test_sentencas_antigas_sao_esquecidas(tmp_path):
+    armazem = ArmazemFrases(str(tmp_path), janela_roteiros=5)
+    for n in range(12):
+        armazem.registrar_roteiro(_roteiro(n), "Kore", "")
+
+    reaberto = ArmazemFrases(str(tmp_path), janela_roteiros=5)
+    # A vinheta (em todos) e as sentenças dos últimos 5 roteiros
+    assert len(reaberto._vistas) == 6
+    assert reaberto.e_frase(VINHETA, "Kore", "")
+
+
+def test_log_compactado_e_linha_cortada(tmp_path, monkeypatch):
+    monkeypatch.setattr(phrase_reuse, "COMPACTAR_A_CADA", 3)
+    armazem = ArmazemFrases(str(tmp_path))
+    for n in range(3):
+        armazem.registrar_roteiro(_roteiro(n), "Kore", "")
+    assert not os.path.exists(tmp_path / ArmazemFrases.ARQUIVO_LOG)
+    with open(tmp_path / ArmazemFrases.ARQUIVO_CONTAGENS, encoding="utf-8") as f:
+        assert json.load(f)["numero"] == 3
+
+    armazem.registrar_roteiro(_roteiro(3), "Kore", "")
+    with open(tmp_path / ArmazemFrases.ARQUIVO_LOG, "ab") as f:
+        f.write(b'["abc", 99, ["')
+    reaberto = ArmazemFrases(str(tmp_path))
+    assert reaberto._numero == 4
+
+
+def test_formato_antigo_de_contagens(tmp_path):
+    with open(tmp_path / ArmazemFrases.ARQUIVO_CONTAGENS, "w", encoding="utf-8") as f:
+        json.dump({"vistas": {"chave": ["a", "b"]}}, f)
+    assert ArmazemFrases(str(tmp_path))._vistas == {"chave": ["a", "b"]}
@@ -0,0 +1,56 @@
+import threading
+
+from progress_bus import FALHOU, PENDENTE, PRONTO, SINTETIZANDO, BarramentoProgresso
+
+
+def test_drenar_junta_avisos_repetidos_do_mesmo_chunk():
+    barramento = BarramentoProgresso(total=5)
+    for tentativa in range(1, 4):
+        barramento.publicar(1, SINTETIZANDO, tentativa=tentativa)
+    barramento.publicar(1, PRONTO, bytes_pcm=4800)
+    barramento.publicar(3, FALHOU)
+
+    assert barramento.drenar() == ({1, 3}, False)
+    assert barramento.contagem[PRONTO] == 1 and barramento.contagem[FALHOU] == 1
+    assert barramento.contagem[PENDENTE] == 3 and barramento.tentativas[1] == 3
+    assert barramento.bytes_prontos == 4800
+    assert barramento.drenar() == (set(), False)
+
+
+def test_volta_no_anel_pede_redesenho_sem_perder_estado():
+    barramento = BarramentoProgresso(total=20, capacidade=8)
+    for indice in range(20):
+        barramento.publicar(indice, PRONTO, bytes_pcm=100)
+    mudaram, tudo = barramento.drenar()
+    assert tudo and mudaram == set(range(20))
+    assert barramento.contagem[PRONTO] == 20 and barramento.bytes_prontos == 2000
+
+
+def test_publicar_de_varias_threads():
+    barramento = BarramentoProgresso(total=400, capacidade=64)
+
+    def worker(inicio):
+        for indice in range(inicio, 400, 4):
+            barramento.publicar(indice, SINTETIZANDO)
+            barramento.publicar(indice, PRONTO, bytes_pcm=10)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(t.is_alive() for t in threads):
+        barramento.drenar()
+    for thread in threads:
+        thread.join()
+    barramento.drenar()
+
+    resumo = barramento.resumo()
+    assert resumo["prontos"] == 400 and resumo["em_andamento"] == 0
+    assert barramento.bytes_prontos == 4000
+
+
+def test_resumo_sem_vazao_ainda_nao_tem_eta():
+    barramento = BarramentoProgresso(total=3)
+    barramento.publicar(0, SINTETIZANDO)
+    barramento.drenar()
+    resumo = barramento.resumo()
+    assert resumo["eta"] == -1.0 and resumo["em_andamento"] == 1
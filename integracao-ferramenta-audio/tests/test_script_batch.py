@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+import script_batch
+from script_batch import (MAX_FALHAS_SEGUIDAS, PAUSA_APOS_FALHAS, ChaveDeepseek, GeradorRoteirosLote,
+                          RodizioChaves, separar_premissa)
+from script_stream import ErroRoteiro
+
+
+class ClienteFalso:
+    """Devolve (ou lança) cada item de `respostas`, na ordem"""
+
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.chamadas = 0
+
+    def gerar(self, prompt, temperatura, max_tokens):
+        self.chamadas += 1
+        resposta = self.respostas.pop(0)
+        if isinstance(resposta, BaseException):
+            raise resposta
+        return resposta
+
+
+def _chaves(*clientes):
+    return [ChaveDeepseek(f"k{i + 1}", cliente or ClienteFalso()) for i, cliente in enumerate(clientes)]
+
+
+@pytest.fixture(autouse=True)
+def sem_backoff(monkeypatch):
+    async def nada(segundos):
+        pass
+    monkeypatch.setattr(script_batch.asyncio, "sleep", nada)
+
+
+# ----- RodizioChaves -----
+
+def test_escolhe_a_menos_ocupada_e_depois_a_usada_ha_mais_tempo():
+    async def cenario():
+        rodizio = RodizioChaves(_chaves(None, None), por_chave=2)
+        a = await rodizio.adquirir()
+        b = await rodizio.adquirir()
+        assert a is not b
+        c = await rodizio.adquirir()
+        assert c is a  # empate em uso: a usada há mais tempo
+        await rodizio.liberar(c)
+        # evitar só é respeitado se houver outra livre
+        assert await rodizio.adquirir(evitar=b) is a
+    asyncio.run(cenario())
+
+
+def test_429_poe_a_chave_em_cooldown():
+    async def cenario():
+        rodizio = RodizioChaves(_chaves(None, None))
+        chave = await rodizio.adquirir()
+        await rodizio.liberar(chave, ErroRoteiro("rate", 429, retry_after=30, da_deepseek=True))
+        assert chave.cooldown_ate > time.monotonic() + 25
+        outra = await rodizio.adquirir()
+        assert outra is not chave
+        await rodizio.liberar(outra)
+        assert await rodizio.adquirir() is outra
+    asyncio.run(cenario())
+
+
+def test_401_da_deepseek_desativa_e_do_gateway_nao_conta():
+    async def cenario():
+        rodizio = RodizioChaves(_chaves(None))
+        chave = rodizio.chaves[0]
+        await rodizio.adquirir()
+        await rodizio.liberar(chave, ErroRoteiro("gateway", 401, da_deepseek=False))
+        assert not chave.desativada and chave.erros == 0
+
+        await rodizio.adquirir()
+        await rodizio.liberar(chave, ErroRoteiro("bad key", 401, da_deepseek=True))
+        assert chave.desativada
+        with pytest.raises(ErroRoteiro, match="Nenhuma chave"):
+            await rodizio.adquirir()
+    asyncio.run(cenario())
+
+
+def test_falhas_seguidas_pausam_a_chave():
+    async def cenario():
+        rodizio = RodizioChaves(_chaves(None))
+        chave = rodizio.chaves[0]
+        for _ in range(MAX_FALHAS_SEGUIDAS - 1):
+            await rodizio.adquirir()
+            await rodizio.liberar(chave, ErroRoteiro("HTTP 500", 500))
+        assert chave.cooldown_ate == 0.0
+        await rodizio.adquirir()
+        await rodizio.liberar(chave, ErroRoteiro("HTTP 500", 500))
+        assert chave.cooldown_ate > time.monotonic() + PAUSA_APOS_FALHAS - 5
+        assert chave.falhas_seguidas == 0
+    asyncio.run(cenario())
+
+
+def test_sucesso_zera_as_falhas_seguidas():
+    async def cenario():
+        rodizio = RodizioChaves(_chaves(None))
+        chave = rodizio.chaves[0]
+        await rodizio.adquirir()
+        await rodizio.liberar(chave, ErroRoteiro("HTTP 502", 502))
+        await rodizio.adquirir()
+        await rodizio.liberar(chave)
+        assert chave.falhas_seguidas == 0 and chave.erros == 1
+    asyncio.run(cenario())
+
+
+# ----- GeradorRoteirosLote -----
+
+def _gerador(tmp_path, *clientes, duracao_min=30):
+    return GeradorRoteirosLote(RodizioChaves(_chaves(*clientes)), pasta_saida=str(tmp_path),
+                               duracao_min=duracao_min)
+
+
+def test_erro_inesperado_conta_como_falha_da_chave(tmp_path):
+    quebrado = ClienteFalso(AttributeError("'list' object has no attribute 'get'"))
+    bom = ClienteFalso("texto gerado")
+    gerador = _gerador(tmp_path, quebrado, bom)
+    arquivo = str(tmp_path / "parte.txt")
+
+    texto = asyncio.run(gerador._etapa(arquivo, "teste", "prompt", 0.9, lambda t: t))
+
+    assert texto == "texto gerado"
+    k1, k2 = gerador.rodizio.chaves
+    assert (k1.erros, k1.falhas_seguidas) == (1, 1)
+    assert k2.erros == 0 and gerador.tentativas_extras == 1
+    assert (tmp_path / "parte.txt").read_text(encoding="utf-8") == "texto gerado"
+
+
+def test_partes_usam_as_linhas_vizinhas_do_esboco(tmp_path):
+    gerador = _gerador(tmp_path, None)
+    _, resumos = separar_premissa("Premissa.\nPARTE 1: o encontro\nPARTE 2: a fuga\nPARTE 3: o retorno", 3)
+    assert resumos == ["o encontro", "a fuga", "o retorno"]
+
+    abertura, meio, final = (gerador._posicao(i, resumos) for i in range(3))
+    assert '"a fuga"' in abertura
+    assert '"o encontro"' in meio and '"o retorno"' in meio
+    assert '"a fuga"' in final and "FINAL" in final
+    assert not any("exatamente de onde" in p for p in (abertura, meio, final))
+
+    # Parte que o modelo não listou no esboço: só o número
+    assert gerador._posicao(1, ["o encontro", "", ""]).count('"') == 2
@@ -0,0 +1,138 @@
+import json
+import threading
+
+import pytest
+
+from memory_budget import estimar_bytes_pcm
+from local_tts_server import pcm_sintetico
+from script_stream import (CortadorParagrafos, ErroRoteiro, FatiadorIncremental, GeracaoCancelada,
+                           PipelineRoteiroAudio, ler_eventos_sse)
+from synthesis_scheduler import AgendadorSintese, FalhaJob
+from text_chunker import contar_palavras
+from tts_client import ClienteTTS, Endpoint
+
+
+def _evento(*pedacos, finish_reason=None):
+    escolhas = [{"delta": {"content": p}, "finish_reason": finish_reason} for p in pedacos]
+    return b"data: " + json.dumps({"choices": escolhas}).encode("utf-8")
+
+
+# ----- ler_eventos_sse -----
+
+def test_sse_ignora_keep_alive_e_para_no_done():
+    linhas = [b": keep-alive", b"", _evento("Olá, "), b"", b"event: ping", _evento("mundo", "!"),
+              b"data: [DONE]", _evento("depois do fim")]
+    assert list(ler_eventos_sse(linhas)) == ["Olá, ", "mundo", "!"]
+
+
+def test_sse_evento_de_erro_vira_erro_roteiro():
+    linhas = [_evento("começo"), b'data: {"error": {"message": "quota"}}']
+    pedacos = ler_eventos_sse(linhas)
+    assert next(pedacos) == "começo"
+    with pytest.raises(ErroRoteiro, match="quota"):
+        next(pedacos)
+
+
+def test_sse_json_invalido_vira_erro_roteiro():
+    with pytest.raises(ErroRoteiro, match="Evento inválido"):
+        list(ler_eventos_sse([b"data: {nao e json"]))
+
+
+# ----- CortadorParagrafos -----
+
+def test_cortador_fecha_paragrafos_entregues_caractere_a_caractere():
+    texto = "Primeiro parágrafo.\n \nSegundo\ncom quebra simples.\n\n\n\nTerceiro sem fim"
+    cortador = CortadorParagrafos()
+    paragrafos = []
+    for caractere in texto:
+        paragrafos += cortador.adicionar(caractere)
+    assert paragrafos == ["Primeiro parágrafo.", "Segundo\ncom quebra simples."]
+    assert cortador.finalizar() == ["Terceiro sem fim"]
+    assert cortador.finalizar() == []
+
+
+# ----- FatiadorIncremental -----
+
+def test_fatiador_segura_paragrafos_curtos_ate_o_minimo():
+    fatiador = FatiadorIncremental(max_palavras=50, primeiros=(10, 30), minimo_palavras=20)
+    assert fatiador.adicionar("Só três palavras.") == []
+    primeiros = fatiador.adicionar("Agora chegam mais algumas palavras para passar do limite.")
+    assert primeiros and contar_palavras(primeiros[0]) <= 10
+    # Depois do primeiro trecho vale o mínimo normal
+    assert fatiador.adicionar("Curto de novo.") == []
+    assert fatiador.finalizar() == ["Curto de novo."]
+    assert fatiador.finalizar() == []
+
+
+def test_fatiador_preserva_todas_as_palavras():
+    paragrafos = [f"Parágrafo {i}. " + "palavra " * (7 * i + 3) for i in range(12)]
+    fatiador = FatiadorIncremental(max_palavras=40, primeiros=(10, 25), minimo_palavras=30)
+    chunks = []
+    for paragrafo in paragrafos:
+        chunks += fatiador.adicionar(paragrafo)
+    chunks += fatiador.finalizar()
+    assert all(contar_palavras(c) <= 40 for c in chunks)
+    assert " ".join(chunks).split() == " ".join(paragrafos).split()
+
+
+# ----- PipelineRoteiroAudio -----
+
+ROTEIRO = "\n\n".join(f"Parágrafo {i}." + " Uma frase do roteiro de teste." * 10 for i in range(6))
+
+
+class GeradorFalso:
+    modelo = "falso"
+
+    def __init__(self, ao_gerar=None):
+        self.ao_gerar = ao_gerar
+
+    def gerar_em_fluxo(self, prompt, cancelar=None):
+        for i in range(0, len(ROTEIRO), 25):
+            if self.ao_gerar is not None:
+                self.ao_gerar(i)
+            if cancelar is not None and cancelar.is_set():
+                return
+            yield ROTEIRO[i:i + 25]
+
+
+class ClienteFalso(ClienteTTS):
+    def __init__(self, falhar_em=None):
+        super().__init__()
+        self.falhar_em = falhar_em
+
+    def sintetizar(self, endpoint, texto, voz, prompt="", cancelar=None):
+        if self.falhar_em is not None and self.falhar_em in texto:
+            raise RuntimeError("bug inesperado no cliente")
+        return pcm_sintetico(estimar_bytes_pcm(texto))
+
+
+def _pipeline(gerador, cliente):
+    agendador = AgendadorSintese([Endpoint("w", "http://x")], cliente=cliente, max_paralelo=2)
+    return PipelineRoteiroAudio(gerador, agendador,
+                                FatiadorIncremental(max_palavras=40, primeiros=(15, 30)))
+
+
+def test_pipeline_completo_grava_roteiro_e_audio(tmp_path):
+    saida = str(tmp_path / "roteiro.wav")
+    metricas = _pipeline(GeradorFalso(), ClienteFalso()).executar("tema", "Kore", saida=saida)
+    assert metricas["chunks"] > 1
+    assert metricas["segundos_audio"] > 0
+    assert (tmp_path / "roteiro.txt").read_text(encoding="utf-8") == ROTEIRO + "\n"
+
+
+def test_erro_inesperado_num_chunk_vira_falha_job(tmp_path):
+    pipeline = _pipeline(GeradorFalso(), ClienteFalso(falhar_em="Parágrafo 3."))
+    with pytest.raises(FalhaJob):
+        pipeline.executar("tema", "Kore", saida=str(tmp_path / "roteiro.wav"))
+
+
+def test_cancelar_nao_devolve_metricas_de_sucesso(tmp_path):
+    cancelar = threading.Event()
+
+    def cancelar_no_meio(posicao):
+        if posicao > len(ROTEIRO) // 2:
+            cancelar.set()
+
+    pipeline = _pipeline(GeradorFalso(cancelar_no_meio), ClienteFalso())
+    with pytest.raises(GeracaoCancelada):
+        pipeline.executar("tema", "Kore", saida=str(tmp_path / "roteiro.wav"), cancelar=cancelar)
@@ -0,0 +1,73 @@
+import random
+
+from audio_output import EmendaCrossfade
+from srt_writer import ConfigSrt, EscritorSrt, LegendasEmOrdem, formatar_tempo_srt
+
+
+# Um bloco por sentença
+POR_SENTENCA = ConfigSrt(max_caracteres_bloco=10, min_palavras_bloco=1, max_palavras_bloco=3)
+
+
+def _ler(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_formatar_tempo():
+    assert formatar_tempo_srt(0) == "00:00:00,000"
+    assert formatar_tempo_srt(3723004) == "01:02:03,004"
+
+
+def test_tempo_dividido_pelo_tamanho_das_sentencas(tmp_path):
+    caminho = str(tmp_path / "saida.srt")
+    # Pesos: "Um dois." = 7 caracteres sem espaço, "Três quatro cinco." = 16
+    with EscritorSrt(caminho, POR_SENTENCA) as srt:
+        blocos = srt.adicionar_chunk("Um dois. Três quatro cinco.", 2400 * 23)
+        assert blocos == [(0, 700, "Um dois."), (700, 2300, "Três quatro cinco.")]
+        # O próximo chunk começa onde o anterior terminou
+        assert srt.adicionar_chunk("Fim.", 24000) == [(2300, 3300, "Fim.")]
+
+    assert _ler(caminho) == (
+        "1\n00:00:00,000 --> 00:00:00,700\nUm dois.\n\n"
+        "2\n00:00:00,700 --> 00:00:02,300\nTrês quatro cinco.\n\n"
+        "3\n00:00:02,300 --> 00:00:03,300\nFim.\n"
+    )
+
+
+def test_chunk_sem_texto_avanca_o_tempo(tmp_path):
+    with EscritorSrt(str(tmp_path / "saida.srt")) as srt:
+        assert srt.adicionar_chunk("", 24000) == []
+        assert srt.adicionar_chunk("Depois.", 24000) == [(1000, 2000, "Depois.")]
+
+
+def test_legendas_em_ordem_igual_ao_escritor(tmp_path):
+    textos = [f"Chunk {i} primeira frase. Segunda frase do chunk {i}." for i in range(20)]
+    tamanhos = [random.Random(i).randrange(1000, 50000) * 2 for i in range(20)]
+    emendas = [3, 4, 10, 15]
+
+    referencia = str(tmp_path / "referencia.srt")
+    emenda = EmendaCrossfade(emendas)
+    with EscritorSrt(referencia, POR_SENTENCA) as srt:
+        for indice, (texto, tamanho) in enumerate(zip(textos, tamanhos)):
+            pcm = emenda.processar(indice, bytes(tamanho))
+            srt.adicionar_chunk(texto, len(pcm) // 2)
+
+    ordem = list(range(20))
+    random.Random(7).shuffle(ordem)
+    streaming = str(tmp_path / "streaming.srt")
+    with LegendasEmOrdem(streaming, textos, emendas, POR_SENTENCA) as legendas:
+        for indice in ordem:
+            legendas.receber(indice, bytes(tamanhos[indice]))
+
+    assert _ler(streaming) == _ler(referencia)
+
+
+def test_legendas_esperam_o_chunk_que_falta(tmp_path):
+    caminho = str(tmp_path / "saida.srt")
+    with LegendasEmOrdem(caminho, ["Um.", "Dois.", "Três."]) as legendas:
+        legendas.receber(1, bytes(48000))
+        legendas.receber(2, bytes(48000))
+        assert legendas.total_blocos == 0
+        legendas.receber(0, bytes(48000))
+        assert legendas.total_blocos == 3
+    assert "00:00:02,000 --> 00:00:03,000\nTrês." in _ler(caminho)
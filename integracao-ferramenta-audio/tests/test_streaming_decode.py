@@ -0,0 +1,72 @@
+import base64
+import json
+
+import pytest
+
+from streaming_decode import decodificar_audio_json
+
+
+def _resposta(pcm: bytes, escapar_barras: bool = False, mime_depois: bool = False) -> bytes:
+    dados = base64.b64encode(pcm).decode("ascii")
+    if escapar_barras:
+        dados = dados.replace("/", "\\/")
+    parte = {"inlineData": {"data": "@"}}
+    if mime_depois:
+        parte["inlineData"]["mimeType"] = "audio/L16;codec=pcm;rate=24000"
+    else:
+        parte["inlineData"] = {"mimeType": "audio/L16;codec=pcm;rate=24000", "data": "@"}
+    prefixo, sufixo = json.dumps({"candidates": [{"content": {"parts": [parte]}}]}).split("@")
+    return prefixo.encode() + dados.encode() + sufixo.encode()
+
+
+def _blocos(corpo: bytes, tamanho: int):
+    return [corpo[i:i + tamanho] for i in range(0, len(corpo), tamanho)]
+
+
+# Todos os bytes possíveis: o base64 tem "+" e "/" em várias posições
+PCM = bytes(range(256)) * 37 + b"\x01\x02\x03"
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 2, 3, 4, 5, 7, 64, 1000, 64 * 1024])
+@pytest.mark.parametrize("escapar_barras", [False, True])
+def test_qualquer_fronteira_de_bloco(tamanho_bloco, escapar_barras):
+    corpo = _resposta(PCM, escapar_barras)
+    pcm, mime = decodificar_audio_json(_blocos(corpo, tamanho_bloco), len(corpo))
+    assert bytes(pcm) == PCM
+    assert mime == "audio/L16;codec=pcm;rate=24000"
+
+
+def test_barra_escapada_cortada_entre_blocos():
+    corpo = _resposta(PCM, escapar_barras=True)
+    corte = corpo.index(b"\\/") + 1  # bloco termina logo depois da barra invertida
+    pcm, _ = decodificar_audio_json([corpo[:corte], corpo[corte:]])
+    assert bytes(pcm) == PCM
+
+
+def test_mime_type_depois_do_audio():
+    corpo = _resposta(PCM, mime_depois=True)
+    _, mime = decodificar_audio_json(_blocos(corpo, 100))
+    assert mime == "audio/L16;codec=pcm;rate=24000"
+
+
+def test_sem_padding():
+    corpo = b'{"data": "' + base64.b64encode(b"abcd").rstrip(b"=") + b'"}'
+    pcm, _ = decodificar_audio_json([corpo])
+    assert bytes(pcm) == b"abcd"
+
+
+def test_content_length_menor_que_o_real():
+    corpo = _resposta(PCM)
+    pcm, _ = decodificar_audio_json(_blocos(corpo, 4096), tamanho_estimado=10)
+    assert bytes(pcm) == PCM
+
+
+def test_resposta_sem_audio():
+    with pytest.raises(ValueError, match="sem áudio"):
+        decodificar_audio_json([b'{"error": {"code": 429}}'])
+
+
+def test_resposta_cortada_no_meio_do_audio():
+    corpo = _resposta(PCM)
+    with pytest.raises(ValueError, match="meio do áudio"):
+        decodificar_audio_json([corpo[:len(corpo) // 2]])
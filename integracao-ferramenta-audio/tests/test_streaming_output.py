@@ -0,0 +1,37 @@
+import wave
+
+from streaming_output import SaidaEmOrdem
+from tts_client import TAXA_AMOSTRAGEM
+
+
+def _pcm(indice, amostras=2400):
+    return bytes([indice, 0]) * amostras
+
+
+def test_libera_em_ordem_e_fecha_o_cabecalho(tmp_path):
+    liberados = []
+    arquivo = str(tmp_path / "stream.wav")
+    with SaidaEmOrdem(ao_liberar=lambda i, pcm: liberados.append(i), arquivo=arquivo) as saida:
+        saida.receber(2, _pcm(2))
+        saida.receber(1, _pcm(1))
+        assert liberados == [] and saida.ttfa is None
+        saida.receber(0, _pcm(0))
+        assert liberados == [0, 1, 2]
+        saida.receber(3, _pcm(3))
+        assert liberados == [0, 1, 2, 3]
+
+    with wave.open(arquivo, "rb") as wav:
+        assert wav.getframerate() == TAXA_AMOSTRAGEM
+        assert wav.getnframes() == 4 * 2400
+        assert wav.readframes(wav.getnframes()) == b"".join(_pcm(i) for i in range(4))
+
+
+def test_metricas_contam_o_audio_liberado():
+    saida = SaidaEmOrdem(primeiro_indice=5)
+    saida.receber(6, _pcm(6))
+    assert saida.metricas()["ttfa"] == -1.0
+    saida.receber(5, _pcm(5))
+    metricas = saida.metricas()
+    assert metricas["chunks"] == 2 and metricas["ttfa"] >= 0
+    assert metricas["segundos_audio"] == 2 * 2400 / TAXA_AMOSTRAGEM
+    saida.fechar()
@@ -0,0 +1,98 @@
+import json
+import os
+import time
+
+from synthesis_cache import IDADE_MINIMA_ORFAO, CacheSintese, chave_cache
+
+
+def _chaves_no_indice(pasta):
+    with open(os.path.join(pasta, CacheSintese.ARQUIVO_INDICE), encoding="utf-8") as f:
+        return [entrada[0] for entrada in json.load(f)["entradas"]]
+
+
+def test_chave_ignora_diferencas_invisiveis():
+    assert chave_cache("Olá  mundo.\n", "Kore", "", "v1") == chave_cache("Olá mundo.", "Kore", "", "v1")
+    assert chave_cache("Olá mundo.", "Kore", "", "v1") != chave_cache("Olá mundo.", "Puck", "", "v1")
+
+
+def test_lru_expulsa_o_menos_usado(tmp_path):
+    cache = CacheSintese(str(tmp_path), limite_bytes=3000)
+    cache.inserir("a", b"1" * 1000)
+    cache.inserir("b", b"2" * 1000)
+    cache.inserir("c", b"3" * 1000)
+    assert cache.obter("a") == b"1" * 1000  # "a" passa a ser o mais recente
+    cache.inserir("d", b"4" * 1000)
+
+    assert "b" not in cache
+    assert cache.obter("b") is None
+    assert [cache.obter(c) is not None for c in "acd"] == [True, True, True]
+    assert cache.total_bytes == 3000
+    assert not os.path.exists(cache._caminho_objeto("b"))
+
+
+def test_maior_que_o_limite_nao_entra(tmp_path):
+    cache = CacheSintese(str(tmp_path), limite_bytes=100)
+    cache.inserir("grande", b"x" * 101)
+    assert len(cache) == 0
+
+
+def test_reinicio_mantem_entradas_e_ordem(tmp_path):
+    cache = CacheSintese(str(tmp_path), limite_bytes=3000)
+    for chave in "abc":
+        cache.inserir(chave, chave.encode() * 1000)
+    cache.obter("a")
+    cache.salvar()
+
+    reaberto = CacheSintese(str(tmp_path), limite_bytes=3000)
+    assert len(reaberto) == 3
+    reaberto.inserir("d", b"d" * 1000)
+    assert "b" not in reaberto and "a" in reaberto
+
+
+def test_reinicio_descarta_objeto_com_tamanho_errado(tmp_path):
+    cache = CacheSintese(str(tmp_path))
+    cache.inserir("a", b"1" * 100)
+    with open(cache._caminho_objeto("a"), "ab") as f:
+        f.write(b"lixo")
+    assert "a" not in CacheSintese(str(tmp_path))
+
+
+def test_orfaos_antigos_sao_apagados_e_recentes_nao(tmp_path):
+    CacheSintese(str(tmp_path))
+    pasta = tmp_path / "objetos" / "ab"
+    pasta.mkdir(parents=True)
+    antigo, recente, temporario = pasta / "abantigo", pasta / "abrecente", pasta / "tmp123.tmp"
+    for arquivo in (antigo, recente, temporario):
+        arquivo.write_bytes(b"x")
+    velho = time.time() - IDADE_MINIMA_ORFAO - 60
+    os.utime(antigo, (velho, velho))
+
+    CacheSintese(str(tmp_path))
+    assert not antigo.exists()
+    assert recente.exists() and temporario.exists()
+
+
+def test_dois_processos_na_mesma_pasta(tmp_path):
+    a = CacheSintese(str(tmp_path), limite_bytes=10_000)
+    b = CacheSintese(str(tmp_path), limite_bytes=10_000)
+    a.inserir("a1", b"1" * 100)
+    b.inserir("b1", b"2" * 100)
+    a.inserir("a2", b"3" * 100)
+    assert set(_chaves_no_indice(str(tmp_path))) == {"a1", "b1", "a2"}
+
+    # Objeto gravado pelo outro processo depois da abertura é adotado
+    assert b.obter("a2") == b"3" * 100
+
+    # O que um removeu não volta pela mescla do outro
+    a.limpar()
+    b.inserir("b2", b"4" * 100)
+    assert _chaves_no_indice(str(tmp_path)) == ["b2"]
+
+
+def test_limite_vale_para_o_conjunto_mesclado(tmp_path):
+    a = CacheSintese(str(tmp_path), limite_bytes=2500)
+    b = CacheSintese(str(tmp_path), limite_bytes=2500)
+    a.inserir("k1", b"1" * 1000)
+    b.inserir("k2", b"2" * 1000)
+    a.inserir("k3", b"3" * 1000)
+    assert _chaves_no_indice(str(tmp_path)) == ["k2", "k3"]
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+import synthesis_scheduler
+from synthesis_scheduler import AgendadorSintese, ConfigDuplicacao, EstatisticasJob
+from tts_client import ClienteTTS, Endpoint
+
+
+PCM = b"\x01\x00" * 240
+
+
+class ClienteRoteirizado(ClienteTTS):
+    """Cada chamada consome o próximo passo: (segundos de espera, PCM ou exceção)"""
+
+    def __init__(self, passos):
+        super().__init__()
+        self.passos = list(passos)
+        self._lock = threading.Lock()
+
+    def sintetizar(self, endpoint, texto, voz, prompt="", cancelar=None):
+        with self._lock:
+            espera, resultado = self.passos.pop(0)
+        time.sleep(espera)
+        if isinstance(resultado, BaseException):
+            raise resultado
+        return resultado
+
+
+@pytest.fixture(autouse=True)
+def espera_curta(monkeypatch):
+    monkeypatch.setattr(synthesis_scheduler, "ESPERA_MAXIMA_COPIA", 5.0)
+
+
+def _agendador(passos):
+    agendador = AgendadorSintese([Endpoint("A", "http://a"), Endpoint("B", "http://b")],
+                                 cliente=ClienteRoteirizado(passos),
+                                 duplicacao=ConfigDuplicacao(quantil=0.5, max_fracao=1.0))
+    # Histórico suficiente para o limite de duplicação ficar em ~50 ms
+    for _ in range(agendador.latencias.min_amostras):
+        agendador.latencias.registrar("A", 0.05)
+        agendador.latencias.registrar("B", 0.05)
+    return agendador
+
+
+def _sintetizar_com_prazo(agendador, estatisticas, prazo=3.0):
+    """Roda sintetizar_chunk numa thread para que um travamento vire falha do teste"""
+    resultado = {}
+
+    def rodar():
+        try:
+            resultado["pcm"] = agendador.sintetizar_chunk(0, "Um chunk qualquer.", "Kore",
+                                                          estatisticas=estatisticas)
+        except BaseException as e:
+            resultado["erro"] = e
+
+    thread = threading.Thread(target=rodar, daemon=True)
+    thread.start()
+    thread.join(prazo)
+    assert not thread.is_alive(), "a síntese travou esperando uma cópia"
+    return resultado
+
+
+def test_duplicata_vence_quando_original_falha_com_erro_inesperado():
+    agendador = _agendador([(0.1, RuntimeError("bug no cliente")), (0.3, PCM)])
+    estatisticas = EstatisticasJob()
+    resultado = _sintetizar_com_prazo(agendador, estatisticas)
+    assert resultado.get("pcm") == PCM
+    assert estatisticas.duplicadas == 1
+
+
+def test_erro_inesperado_sem_duplicata_chega_ao_chamador():
+    agendador = _agendador([(0.0, RuntimeError("bug no cliente"))])
+    resultado = _sintetizar_com_prazo(agendador, EstatisticasJob())
+    assert isinstance(resultado.get("erro"), RuntimeError)
+
+
+def test_erro_inesperado_nas_duas_copias_chega_ao_chamador():
+    agendador = _agendador([(0.3, RuntimeError("primeira")), (0.0, KeyError("segunda"))])
+    resultado = _sintetizar_com_prazo(agendador, EstatisticasJob())
+    assert isinstance(resultado.get("erro"), (RuntimeError, KeyError))
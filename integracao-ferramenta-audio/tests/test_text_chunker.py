@@ -0,0 +1,88 @@
+"""
+Paridade de text_chunker.py com src/utils/geminiTtsChunks.ts
+
+Os resultados esperados foram gerados rodando splitTextForGeminiTts (com os
+tipos removidos) no Node sobre os mesmos textos. Ao mudar a regra em um dos
+lados, gere de novo e atualize os dois.
+"""
+
+import pytest
+
+from text_chunker import (GEMINI_TTS_WORD_LIMIT, contar_palavras, dividir_sentencas,
+                          dividir_texto_para_tts, normalizar_texto)
+
+
+CASOS_TS = [
+    (
+        "Primeira frase curta. Segunda frase um pouco maior que a primeira! Terceira? Quarta frase aqui.",
+        8,
+        ["Primeira frase curta.", "Segunda frase um pouco maior que a primeira!",
+         "Terceira? Quarta frase aqui."],
+    ),
+    (
+        "Olá  mundo.\n\nEssa é   uma história\tcom espaços irregulares... E reticências!? Fim.",
+        5,
+        ["Olá  mundo.", "Essa é uma história com", "espaços irregulares...", "E reticências!? Fim."],
+    ),
+    (
+        "Uma sentença gigante, que tem muitas vírgulas, e continua sem parar, até estourar o limite "
+        "de palavras, várias vezes seguidas, sem ponto nenhum no meio dela.",
+        6,
+        ["Uma sentença gigante", "que tem muitas vírgulas", "e continua sem parar",
+         "até estourar o limite de palavras", "várias vezes seguidas", "sem ponto nenhum no meio dela."],
+    ),
+    (
+        "Curta. " + " ".join(f"palavra{i}" for i in range(25)) + ", resto da frase. Outra.",
+        10,
+        ["Curta.",
+         " ".join(f"palavra{i}" for i in range(10)),
+         " ".join(f"palavra{i}" for i in range(10, 20)),
+         " ".join(f"palavra{i}" for i in range(20, 25)),
+         "resto da frase. Outra."],
+    ),
+    (
+        "João olhou para Maria. Ninguém imaginava aquilo. A noite mudou tudo para sempre, e o "
+        "relógio parou à meia-noite.",
+        GEMINI_TTS_WORD_LIMIT,
+        ["João olhou para Maria. Ninguém imaginava aquilo. A noite mudou tudo para sempre, e o "
+         "relógio parou à meia-noite."],
+    ),
+    (
+        "texto sem pontuação nenhuma com várias palavras seguidas",
+        4,
+        ["texto sem pontuação nenhuma", "com várias palavras seguidas"],
+    ),
+    (
+        # Partes juntadas com "," sem espaço contam como uma palavra (igual no TS)
+        "A, b, c, d, e, f, g, h, i, j, k, l.",
+        3,
+        ["A,b,c,d,e,f,g,h,i,j,k,l."],
+    ),
+]
+
+
+@pytest.mark.parametrize("texto,max_palavras,esperado", CASOS_TS)
+def test_paridade_com_gemini_tts_chunks(texto, max_palavras, esperado):
+    assert dividir_texto_para_tts(texto, max_palavras) == esperado
+
+
+def test_texto_vazio():
+    assert dividir_texto_para_tts("   \n ") == []
+
+
+def test_final_sem_pontuacao_nao_se_perde():
+    # Diferença intencional: o TS descarta o trecho final sem pontuação
+    assert dividir_texto_para_tts("Frase com ponto. resto sem ponto", 450) == [
+        "Frase com ponto. resto sem ponto"]
+    assert dividir_sentencas("Um. Dois! fim") == ["Um.", "Dois!", "fim"]
+
+
+def test_nenhum_chunk_passa_do_limite():
+    texto = " ".join(f"Sentença número {i} com algumas palavras a mais." for i in range(200))
+    chunks = dividir_texto_para_tts(texto, 37)
+    assert all(contar_palavras(c) <= 37 for c in chunks)
+    assert normalizar_texto(" ".join(chunks)) == normalizar_texto(texto)
+
+
+def test_normalizar_texto():
+    assert normalizar_texto("  Café\n\n com\tleite  ") == "Café com leite"
@@ -0,0 +1,177 @@
+"""
+Divisão de Texto em Chunks para Síntese
+Porta em Python de src/utils/geminiTtsChunks.ts
+"""
+
+import re
+import unicodedata
+from typing import List, Tuple
+
+
+# Mesmo limite usado no sistema web (450 palavras ≈ 585 tokens)
+# Histórico: 800 → 500 → 450 (ajuste fino baseado em testes reais)
+GEMINI_TTS_WORD_LIMIT = 450
+
+_REGEX_SENTENCAS = re.compile(r"[^.!?]+[.!?]+")
+_REGEX_ESPACOS = re.compile(r"\s+")
+
+
+def contar_palavras(texto: str) -> int:
+    """
+    Conta palavras em um texto
+
+    Args:
+        texto: Texto a ser contado
+
+    Returns:
+        Número de palavras
+    """
+    return len(texto.split())
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza texto para comparação (cache, deduplicação)
+
+    Aplica Unicode NFC e colapsa espaços, de forma que diferenças
+    invisíveis (quebras de linha, espaços duplos) não mudem o resultado.
+
+    Args:
+        texto: Texto original
+
+    Returns:
+        Texto normalizado
+    """
+    texto = unicodedata.normalize("NFC", texto)
+    return _REGEX_ESPACOS.sub(" ", texto).strip()
+
+
+def dividir_sentencas(texto: str) -> List[str]:
+    """
+    Divide texto em sentenças preservando a pontuação
+
+    Args:
+        texto: Texto a ser dividido
+
+    Returns:
+        Lista de sentenças (sem espaços nas pontas)
+    """
+    sentencas = _REGEX_SENTENCAS.findall(texto)
+    resto = _REGEX_SENTENCAS.sub("", texto).strip()
+    if resto:
+        # Texto final sem pontuação não pode ser perdido
+        sentencas.append(resto)
+    return [s.strip() for s in sentencas if s.strip()]
+
+
+def _quebrar_por_palavras(texto: str, max_palavras: int) -> List[str]:
+    """Quebra um texto à força por contagem de palavras (plano de emergência)"""
+    palavras = texto.split()
+    return [
+        " ".join(palavras[i:i + max_palavras])
+        for i in range(0, len(palavras), max_palavras)
+    ]
+
+
+def dividir_texto_para_tts(texto: str, max_palavras: int = GEMINI_TTS_WORD_LIMIT) -> List[str]:
+    """
+    Divide texto em chunks de até max_palavras, respeitando pontos e vírgulas
+
+    Mesma estratégia do sistema web: agrupa sentenças inteiras; sentenças
+    gigantes são divididas por vírgulas e, em último caso, por palavras.
+
+    Args:
+        texto: Roteiro completo
+        max_palavras: Limite de palavras por chunk (padrão: 450)
+
+    Returns:
+        Lista de chunks na ordem original
+    """
+    if not texto.strip():
+        return []
+
+    chunks: List[str] = []
+    atual = ""
+
+    def salvar_atual():
+        if atual.strip():
+            chunks.append(atual.strip())
+
+    for sentenca in dividir_sentencas(texto):
+        palavras_sentenca = contar_palavras(sentenca)
+
+        if palavras_sentenca > max_palavras:
+            # Sentença gigante: salvar o que já temos e dividir por vírgulas
+            salvar_atual()
+            atual = ""
+
+            for parte in sentenca.split(","):
+                parte = parte.strip()
+                if not parte:
+                    continue
+
+                palavras_parte = contar_palavras(parte)
+                if palavras_parte > max_palavras:
+                    chunks.extend(_quebrar_por_palavras(parte, max_palavras))
+                elif contar_palavras(atual) + palavras_parte <= max_palavras:
+                    atual += ("," if atual else "") + parte
+                else:
+                    salvar_atual()
+                    atual = parte
+
+        elif contar_palavras(atual) + palavras_sentenca <= max_palavras:
+            atual += (" " if atual else "") + sentenca
+
+        else:
+            salvar_atual()
+            atual = sentenca
+
+    # Não esquecer o último chunk
+    salvar_atual()
+
+    return chunks
+
+
+def dividir_texto_progressivo(texto: str, max_palavras: int = GEMINI_TTS_WORD_LIMIT,
+                              primeiros: Tuple[int, ...] = (40, 120)) -> List[str]:
+    """
+    Divide texto com os primeiros chunks menores, para o áudio começar logo
+
+    O tempo até o primeiro áudio depende do tamanho do chunk 1; com ~40
+    palavras ele fica pronto em poucos segundos, qualquer que seja o tamanho
+    do roteiro. Os chunks seguintes crescem até max_palavras.
+
+    Args:
+        texto: Roteiro completo
+        max_palavras: Limite dos chunks normais
+        primeiros: Limite de palavras de cada chunk inicial, em ordem
+
+    Returns:
+        Lista de chunks na ordem original
+    """
+    sentencas = dividir_sentencas(texto)
+    chunks: List[str] = []
+    i = 0
+
+    for limite in primeiros:
+        if i >= len(sentencas):
+            break
+        atual: List[str] = []
+        palavras = 0
+        # Pelo menos uma sentença por chunk; sentenças gigantes são quebradas abaixo
+        while i < len(sentencas) and (not atual or palavras + contar_palavras(sentencas[i]) <= limite):
+            atual.append(sentencas[i])
+            palavras += contar_palavras(sentencas[i])
+            i += 1
+        chunks.extend(dividir_texto_para_tts(" ".join(atual), min(limite, max_palavras)))
+
+    chunks.extend(dividir_texto_para_tts(" ".join(sentencas[i:]), max_palavras))
+    return chunks
+
+
+# ===== EXEMPLO DE USO =====
+
+if __name__ == "__main__":
+    exemplo = "Presta atenção nessa história. " * 40
+    partes = dividir_texto_para_tts(exemplo, max_palavras=50)
+    print(f"{len(partes)} chunks: {[contar_palavras(p) for p in partes]}")
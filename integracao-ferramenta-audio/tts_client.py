@@ -0,0 +1,321 @@
+"""
+Cliente de Síntese de Voz (TTS)
+Fala com a API Gemini TTS (chave direta) e com as funções workerN-proxy do Supabase
+"""
+
+import re
+import shutil
+import subprocess
+import threading
+import uuid
+from typing import List, Optional
+
+import requests
+
+from job_trace import trecho
+from streaming_decode import TAMANHO_BLOCO, decodificar_audio_json, ler_corpo
+
+
+GEMINI_TTS_MODEL = "gemini-2.5-flash-preview-tts"
+GEMINI_TTS_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+
+SUPABASE_FUNCTIONS_URL = "https://egywqkqrgifautasinhi.supabase.co/functions/v1"
+
+# A API do Gemini retorna PCM 16-bit mono a 24 kHz; todo o pipeline trabalha nesse formato
+TAXA_AMOSTRAGEM = 24000
+BYTES_POR_AMOSTRA = 2
+
+# Status que indicam problema temporário (vale tentar de novo, talvez em outro endpoint)
+STATUS_RECUPERAVEIS = {408, 429, 500, 502, 503, 504}
+
+
+class ErroSintese(Exception):
+    """
+    Erro ao sintetizar um chunk
+
+    Attributes:
+        status: Status HTTP (None para erros de rede/formato)
+        retry_after: Segundos sugeridos pelo servidor antes de tentar de novo
+        endpoint: Nome do endpoint que falhou
+        timeout: O servidor não respondeu a tempo
+    """
+
+    def __init__(self, mensagem: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None, endpoint: Optional[str] = None,
+                 timeout: bool = False):
+        super().__init__(mensagem)
+        self.status = status
+        self.retry_after = retry_after
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    @property
+    def recuperavel(self) -> bool:
+        """True se o erro é temporário (rede, 429, 5xx)"""
+        return self.status is None or self.status in STATUS_RECUPERAVEIS
+
+    @property
+    def sobrecarga(self) -> bool:
+        """True se o endpoint sinalizou sobrecarga (429, 503 ou timeout)"""
+        return self.timeout or self.status in (429, 503)
+
+
+class Endpoint:
+    """
+    Destino de síntese: uma chave Gemini ou uma função workerN-proxy
+    """
+
+    TIPO_GEMINI = "gemini"
+    TIPO_WORKER = "worker"
+
+    def __init__(self, nome: str, url: str, tipo: str = TIPO_WORKER,
+                 chave: Optional[str] = None, versao_modelo: Optional[str] = None):
+        """
+        Args:
+            nome: Nome amigável (ex: "Servidor B" ou "Gemini #1")
+            url: URL da função/endpoint
+            tipo: Endpoint.TIPO_GEMINI ou Endpoint.TIPO_WORKER
+            chave: API key do Gemini ou ANON_KEY do Supabase
+            versao_modelo: Identifica o modelo por trás do endpoint (entra na chave do cache)
+        """
+        self.nome = nome
+        self.url = url
+        self.tipo = tipo
+        self.chave = chave
+        self.versao_modelo = versao_modelo or (
+            GEMINI_TTS_MODEL if tipo == self.TIPO_GEMINI else "openai-fm"
+        )
+
+    def __repr__(self):
+        return f"Endpoint({self.nome!r})"
+
+    @classmethod
+    def gemini(cls, chave: str, nome: Optional[str] = None) -> "Endpoint":
+        """Cria endpoint Gemini TTS para uma API key"""
+        url = f"{GEMINI_TTS_API_BASE}/{GEMINI_TTS_MODEL}:generateContent"
+        return cls(nome or f"Gemini {chave[-4:]}", url, cls.TIPO_GEMINI, chave)
+
+    @classmethod
+    def workers_supabase(cls, anon_key: str, quantidade: int = 9) -> List["Endpoint"]:
+        """
+        Cria a lista de endpoints workerN-proxy (mesma ordem de src/utils/config.ts)
+
+        Args:
+            anon_key: ANON_KEY do Supabase
+            quantidade: Quantos workers usar (1 a 9)
+        """
+        letras = "BCDEFGHIJ"
+        return [
+            cls(f"Servidor {letras[i]}", f"{SUPABASE_FUNCTIONS_URL}/worker{i + 1}-proxy",
+                cls.TIPO_WORKER, anon_key)
+            for i in range(quantidade)
+        ]
+
+
+def _extrair_taxa(mime_type: str) -> int:
+    """Extrai a taxa de amostragem de um mimeType como 'audio/L16;codec=pcm;rate=24000'"""
+    match = re.search(r"rate=(\d+)", mime_type or "")
+    return int(match.group(1)) if match else TAXA_AMOSTRAGEM
+
+
+def _blocos(response, endpoint: Endpoint, cancelar: Optional[threading.Event]):
+    """Blocos do corpo da resposta, interrompidos se `cancelar` for sinalizado"""
+    for bloco in response.iter_content(TAMANHO_BLOCO):
+        if cancelar is not None and cancelar.is_set():
+            raise ErroSintese("Requisição cancelada", endpoint=endpoint.nome)
+        yield bloco
+
+
+def _tamanho_corpo(response) -> Optional[int]:
+    """Content-Length do corpo já descomprimido (None se desconhecido)"""
+    if response.headers.get("content-encoding"):
+        return None
+    try:
+        return int(response.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _retry_after(response) -> Optional[float]:
+    """Lê o header Retry-After (em segundos), se existir"""
+    valor = response.headers.get("retry-after")
+    try:
+        return float(valor) if valor else None
+    except ValueError:
+        return None
+
+
+class ClienteTTS:
+    """
+    Cliente HTTP de síntese
+
+    Sempre devolve PCM 16-bit mono a TAXA_AMOSTRAGEM, independente do endpoint.
+    """
+
+    def __init__(self, timeout: float = 120, sessao: Optional[requests.Session] = None):
+        """
+        Args:
+            timeout: Timeout de cada requisição em segundos
+            sessao: Sessão requests (reaproveita conexões entre chunks)
+        """
+        self.timeout = timeout
+        self.sessao = sessao or requests.Session()
+
+    def sintetizar(self, endpoint: Endpoint, texto: str, voz: str, prompt: str = "",
+                   cancelar: Optional[threading.Event] = None) -> bytes:
+        """
+        Sintetiza um chunk de texto
+
+        Args:
+            endpoint: Endpoint a ser usado
+            texto: Texto do chunk
+            voz: Nome da voz (ex: "Kore")
+            prompt: Instrução de estilo/sotaque
+            cancelar: Se sinalizado, a leitura da resposta é abortada e a conexão
+                      fechada (usado para descartar a cópia perdedora de um chunk duplicado)
+
+        Returns:
+            PCM 16-bit mono (um bytearray nas respostas lidas em streaming)
+
+        Raises:
+            ErroSintese: Em qualquer falha (HTTP, rede, resposta sem áudio)
+        """
+        try:
+            if endpoint.tipo == Endpoint.TIPO_GEMINI:
+                return self._sintetizar_gemini(endpoint, texto, voz, prompt, cancelar)
+            return self._sintetizar_worker(endpoint, texto, voz, prompt, cancelar)
+        except requests.Timeout:
+            raise ErroSintese("Timeout: o servidor não respondeu", endpoint=endpoint.nome, timeout=True)
+        except requests.ConnectionError as e:
+            raise ErroSintese(f"Erro de conexão: {e}", endpoint=endpoint.nome)
+        except requests.RequestException as e:
+            raise ErroSintese(f"Erro ao ler a resposta: {e}", endpoint=endpoint.nome)
+
+    def _verificar_status(self, endpoint: Endpoint, response):
+        """Converte respostas HTTP de erro em ErroSintese"""
+        if response.ok:
+            return
+        try:
+            detalhe = response.json().get("error", "")
+            if isinstance(detalhe, dict):
+                detalhe = detalhe.get("message", "")
+        except ValueError:
+            detalhe = response.reason
+        raise ErroSintese(
+            f"Erro {response.status_code}: {detalhe}",
+            status=response.status_code,
+            retry_after=_retry_after(response),
+            endpoint=endpoint.nome,
+        )
+
+    def _sintetizar_gemini(self, endpoint: Endpoint, texto: str, voz: str, prompt: str,
+                           cancelar: Optional[threading.Event] = None) -> bytes:
+        """Chamada direta à API Gemini TTS (mesmo corpo de useGeminiTtsQueue.ts)"""
+        partes = [{"text": f"{prompt}\n\n{texto}" if prompt else texto}]
+        corpo = {
+            "model": GEMINI_TTS_MODEL,
+            "contents": [{"parts": partes}],
+            "generationConfig": {
+                "responseModalities": ["AUDIO"],
+                "speechConfig": {
+                    "voiceConfig": {"prebuiltVoiceConfig": {"voiceName": voz}},
+                },
+            },
+        }
+
+        with trecho("http: aguardando resposta", "rede"):
+            response = self.sessao.post(
+                endpoint.url,
+                params={"key": endpoint.chave},
+                json=corpo,
+                timeout=self.timeout,
+                stream=True,
+            )
+        with response:
+            self._verificar_status(endpoint, response)
+            with trecho("download + decodificação", "decodificacao"):
+                return self._pcm_de_json_streaming(endpoint, response, cancelar)
+
+    def _pcm_de_json_streaming(self, endpoint: Endpoint, response,
+                               cancelar: Optional[threading.Event] = None) -> bytearray:
+        """
+        Extrai o PCM de uma resposta JSON do Gemini enquanto ela chega
+
+        O base64 é decodificado bloco a bloco para um buffer único, sem montar
+        o JSON nem a string base64 inteira na memória.
+        """
+        try:
+            pcm, mime_type = decodificar_audio_json(
+                _blocos(response, endpoint, cancelar), _tamanho_corpo(response)
+            )
+        except ValueError:
+            raise ErroSintese("Nenhum áudio recebido da API.", endpoint=endpoint.nome)
+
+        taxa = _extrair_taxa(mime_type)
+        if taxa != TAXA_AMOSTRAGEM:
+            raise ErroSintese(f"Taxa de amostragem inesperada: {taxa} Hz", endpoint=endpoint.nome)
+        return pcm
+
+    def _sintetizar_worker(self, endpoint: Endpoint, texto: str, voz: str, prompt: str,
+                           cancelar: Optional[threading.Event] = None) -> bytes:
+        """Chamada a uma função workerN-proxy (contrato {input, prompt, voice, generation})"""
+        headers = {
+            "Content-Type": "application/json",
+            "apikey": endpoint.chave or "",
+            "Authorization": f"Bearer {endpoint.chave or ''}",
+        }
+        corpo = {
+            "input": texto,
+            "prompt": prompt or "Leia com naturalidade.",
+            "voice": voz,
+            "generation": str(uuid.uuid4()),
+        }
+
+        with trecho("http: aguardando resposta", "rede"):
+            response = self.sessao.post(endpoint.url, json=corpo, headers=headers,
+                                        timeout=self.timeout, stream=True)
+        with response:
+            self._verificar_status(endpoint, response)
+            with trecho("download + decodificação", "decodificacao"):
+                return self._pcm_de_audio(endpoint, response, cancelar)
+
+    def _pcm_de_audio(self, endpoint: Endpoint, response,
+                      cancelar: Optional[threading.Event] = None) -> bytes:
+        """Converte o corpo de áudio retornado por um worker para PCM 16-bit mono"""
+        tipo = response.headers.get("content-type", "audio/mpeg")
+
+        if "json" in tipo:
+            # Worker que devolve o mesmo formato do Gemini (base64 em JSON)
+            return self._pcm_de_json_streaming(endpoint, response, cancelar)
+
+        if "L16" in tipo or "pcm" in tipo:
+            return ler_corpo(_blocos(response, endpoint, cancelar), _tamanho_corpo(response))
+
+        dados = response.content
+
+        # Qualquer outro formato (mpeg, wav) é decodificado pelo ffmpeg
+        ffmpeg = shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise ErroSintese(f"Formato {tipo} requer ffmpeg instalado", endpoint=endpoint.nome)
+
+        with trecho("ffmpeg", "decodificacao", formato=tipo):
+            processo = subprocess.run(
+                [ffmpeg, "-v", "error", "-i", "pipe:0",
+                 "-f", "s16le", "-ac", "1", "-ar", str(TAXA_AMOSTRAGEM), "pipe:1"],
+                input=dados,
+                capture_output=True,
+            )
+        if processo.returncode != 0:
+            raise ErroSintese(f"ffmpeg falhou: {processo.stderr.decode(errors='replace')[:200]}",
+                              endpoint=endpoint.nome)
+        return processo.stdout
+
+
+def duracao_pcm(pcm_bytes: int) -> float:
+    """
+    Duração em segundos de um trecho PCM
+
+    Args:
+        pcm_bytes: Tamanho do PCM em bytes
+    """
+    return pcm_bytes / (TAXA_AMOSTRAGEM * BYTES_POR_AMOSTRA)
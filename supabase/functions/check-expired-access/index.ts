@@ -55,6 +55,29 @@ serve(async (req: Request) => {
     // Use service role to bypass RLS
     const admin = createClient(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY);
 
+    // Paginated mode: revoke at most `limit` users per call (safe to call concurrently)
+    const body = await req.json().catch(() => ({}));
+    if (body && typeof body.limit === "number") {
+      const limit = Math.min(Math.max(Math.floor(body.limit), 1), 1000);
+      const { data: revoked, error: revokeErr } = await admin.rpc("admin_revoke_expired_page", {
+        p_limit: limit,
+      });
+
+      if (revokeErr) {
+        console.error("Error revoking expired access page:", revokeErr);
+        return new Response(
+          JSON.stringify({ error: "Failed to revoke expired access" }),
+          { status: 500, headers: { "Content-Type": "application/json", ...corsHeaders } }
+        );
+      }
+
+      const users = revoked ?? [];
+      return new Response(
+        JSON.stringify({ count: users.length, users, has_more: users.length === limit }),
+        { status: 200, headers: { "Content-Type": "application/json", ...corsHeaders } }
+      );
+    }
+
     // Buscar todos os usuários com acesso expirado
     const { data: expiredUsers, error: selectErr } = await admin
       .from("profiles")
@@ -9,6 +9,7 @@ function corsHeaders(origin?: string) {
     "Access-Control-Allow-Origin": origin || "*",
     "Access-Control-Allow-Methods": "POST, OPTIONS",
     "Access-Control-Allow-Headers": "authorization, x-client-info, apikey, content-type, x-deepseek-api-key",
+    "Access-Control-Expose-Headers": "x-deepseek-status",
   };
 }
 
@@ -48,12 +49,30 @@ serve(async (req: Request) => {
       body: JSON.stringify(body),
     });
 
+    // Marks responses that came from DeepSeek, so clients can tell an invalid
+    // DeepSeek key (401/403 here) from a rejected Supabase session (gateway 401)
+    const upstreamHeaders = { "x-deepseek-status": String(response.status) };
+
+    // Streaming requests: pass the SSE events through as they arrive
+    if (body?.stream === true && response.ok && response.body) {
+      return new Response(response.body, {
+        status: response.status,
+        headers: {
+          "Content-Type": "text/event-stream",
+          "Cache-Control": "no-cache",
+          ...upstreamHeaders,
+          ...corsHeaders(origin),
+        },
+      });
+    }
+
     const data = await response.json();
 
     return new Response(JSON.stringify(data), {
       status: response.status,
       headers: {
         "Content-Type": "application/json",
+        ...upstreamHeaders,
         ...corsHeaders(origin),
       },
     });
@@ -41,6 +41,37 @@ serve(async (req: Request) => {
     // Use service role to get user data
     const admin = createClient(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY);
 
+    // Paginated mode (keyset on updated_at, id): only when the body has a `limit`
+    const body = await req.json().catch(() => ({}));
+    if (body && typeof body.limit === "number") {
+      const limit = Math.min(Math.max(Math.floor(body.limit), 1), 1000);
+      const { data: page, error: pageError } = await admin.rpc("admin_profiles_page", {
+        p_after_updated_at: body.after?.updated_at ?? null,
+        p_after_id: body.after?.id ?? null,
+        p_limit: limit,
+        p_id_min: body.id_min ?? null,
+        p_id_max: body.id_max ?? null,
+      });
+
+      if (pageError) {
+        console.error("get-users page error:", pageError);
+        return new Response(
+          JSON.stringify({ error: "Failed to fetch profiles page" }),
+          { status: 500, headers: { "Content-Type": "application/json", ...corsHeaders } }
+        );
+      }
+
+      const rows = page ?? [];
+      const last = rows[rows.length - 1];
+      return new Response(
+        JSON.stringify({
+          users: rows,
+          next_cursor: rows.length === limit ? { updated_at: last.updated_at, id: last.id } : null,
+        }),
+        { status: 200, headers: { "Content-Type": "application/json", ...corsHeaders } }
+      );
+    }
+
     // Get profiles
     const { data: profiles, error: profilesError } = await admin
       .from("profiles")
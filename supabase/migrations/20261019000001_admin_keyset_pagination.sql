@@ -0,0 +1,81 @@
+-- Migration: Paginação por chave (keyset) para o cliente de administração em lote
+-- Data: 2026-10-19
+-- Descrição: get-users e check-expired-access passam a aceitar páginas (`limit` no corpo).
+-- Cada página é uma busca no índice a partir do último (updated_at, id) visto, sem OFFSET,
+-- então o custo de uma página não cresce com o número de clientes.
+
+-- Ordem da paginação de perfis
+CREATE INDEX IF NOT EXISTS idx_profiles_updated_at_id
+  ON public.profiles(updated_at, id);
+
+-- Ordem da varredura de acessos expirados (só os que ainda estão aprovados)
+CREATE INDEX IF NOT EXISTS idx_profiles_expired_sweep
+  ON public.profiles(access_expires_at, id)
+  WHERE is_approved = true AND access_expires_at IS NOT NULL;
+
+-- Página de perfis (com e-mail) depois de (p_after_updated_at, p_after_id), em ordem de (updated_at, id).
+-- p_id_min/p_id_max limitam a uma faixa de ids, para o cliente varrer faixas em paralelo.
+CREATE OR REPLACE FUNCTION public.admin_profiles_page(
+  p_after_updated_at timestamptz DEFAULT NULL,
+  p_after_id uuid DEFAULT NULL,
+  p_limit integer DEFAULT 500,
+  p_id_min uuid DEFAULT NULL,
+  p_id_max uuid DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  name text,
+  email text,
+  is_approved boolean,
+  created_at timestamptz,
+  updated_at timestamptz,
+  access_expires_at timestamptz
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, auth
+AS $$
+  SELECT p.id, p.name, u.email::text, p.is_approved, p.created_at, p.updated_at, p.access_expires_at
+  FROM profiles p
+  LEFT JOIN auth.users u ON u.id = p.id
+  WHERE (p_after_updated_at IS NULL
+         OR (p.updated_at, p.id) > (p_after_updated_at,
+                                    COALESCE(p_after_id, '00000000-0000-0000-0000-000000000000'::uuid)))
+    AND (p_id_min IS NULL OR p.id >= p_id_min)
+    AND (p_id_max IS NULL OR p.id < p_id_max)
+  ORDER BY p.updated_at, p.id
+  LIMIT LEAST(GREATEST(p_limit, 1), 1000);
+$$;
+
+-- Revoga até p_limit acessos expirados e devolve os revogados.
+-- SKIP LOCKED: várias chamadas simultâneas pegam linhas diferentes, sem esperar umas pelas outras.
+CREATE OR REPLACE FUNCTION public.admin_revoke_expired_page(p_limit integer DEFAULT 500)
+RETURNS TABLE (id uuid, name text, access_expires_at timestamptz)
+LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH alvo AS (
+    SELECT p.id
+    FROM profiles p
+    WHERE p.is_approved = true
+      AND p.access_expires_at IS NOT NULL
+      AND p.access_expires_at < NOW()
+    ORDER BY p.access_expires_at, p.id
+    LIMIT LEAST(GREATEST(p_limit, 1), 1000)
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE profiles p
+  SET is_approved = false
+  FROM alvo
+  WHERE p.id = alvo.id
+  RETURNING p.id, p.name, p.access_expires_at;
+$$;
+
+-- Só as edge functions (service role) chamam estas funções; elas validam o administrador antes
+REVOKE ALL ON FUNCTION public.admin_profiles_page(timestamptz, uuid, integer, uuid, uuid) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.admin_revoke_expired_page(integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.admin_profiles_page(timestamptz, uuid, integer, uuid, uuid) TO service_role;
+GRANT EXECUTE ON FUNCTION public.admin_revoke_expired_page(integer) TO service_role;